@@ -12,12 +12,14 @@ from dash import Dash, html
 
 # Import shared components
 from assets.footer import _footer
+from src.api import api
 # from assets.nav import _nav
 
 
 app = Dash(__name__, use_pages=True, external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.FONT_AWESOME],
 	   suppress_callback_exceptions=True, prevent_initial_callbacks=True)
 server = app.server
+server.register_blueprint(api)
 
 # App Layout
 app.layout = dbc.Container([
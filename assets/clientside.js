@@ -0,0 +1,92 @@
+/*
+ * Clientside callbacks of the home page.
+ *
+ * The room parameters and the edited cells of the area table are normalized in the
+ * browser, so an edit needs no round-trip to the server. The calculation on the server
+ * parses all values again as a final guard.
+ */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    home: {
+        // Parses a number with a decimal point or comma, returns null for empty or invalid values
+        parse_number: function(value) {
+            if (typeof value === 'number') {
+                return Number.isFinite(value) ? value : null;
+            }
+            if (typeof value !== 'string') {
+                return null;
+            }
+            const cleaned = value.replace(/,/g, '.').trim();
+            if (!/^-?(\d+\.?\d*|\.\d+)$/.test(cleaned)) {
+                return null;
+            }
+            return Number(cleaned);
+        },
+
+        // Rounds to two decimals like round(value, 2) in Python
+        round_2: function(value) {
+            return Number(value.toFixed(2));
+        },
+
+        // The area column and the absorption coefficient columns of the area table
+        is_numeric_column: function(column_id) {
+            const match = /^col-(\d+)$/.exec(column_id);
+            return match !== null && (match[1] === '2' || Number(match[1]) >= 5);
+        },
+
+        // Rounds a room parameter to two decimals when its input loses the focus, invalid values are cleared
+        round_value: function(n_blur, value) {
+            const home = window.dash_clientside.home;
+            if (value === null || value === undefined) {
+                return window.dash_clientside.no_update;
+            }
+            const number = home.parse_number(value);
+            const rounded = number === null ? null : home.round_2(number);
+            // Unchanged values are not sent, so the graph is not recalculated
+            return rounded === value ? window.dash_clientside.no_update : rounded;
+        },
+
+        // Rounds the edited cell of the area table to two decimals and reverts invalid input.
+        // Only the one changed cell is validated, added or deleted rows are accepted as they are.
+        validate_table_data: function(timestamp, data, data_previous) {
+            const home = window.dash_clientside.home;
+            const no_update = window.dash_clientside.no_update;
+            if (!data || !data_previous || data.length !== data_previous.length) {
+                return no_update;
+            }
+            let row = -1;
+            let column = null;
+            for (let i = 0; i < data.length && row === -1; i++) {
+                const previous_row = data_previous[i] || {};
+                const changed = Object.keys(data[i]).filter(key => data[i][key] !== previous_row[key]);
+                if (changed.length > 0) {
+                    row = i;
+                    column = changed[0];
+                }
+            }
+            if (row === -1 || !home.is_numeric_column(column)) {
+                return no_update;
+            }
+            const value = data[row][column];
+            const previous = data_previous[row][column] === undefined ? null : data_previous[row][column];
+            let result;
+            if (typeof value === 'string') {
+                if (value.replace(/,/g, '.').trim() === '') {
+                    // The user may clear a cell
+                    return no_update;
+                }
+                const number = home.parse_number(value);
+                result = number === null ? previous : home.round_2(number);
+            } else if (typeof value === 'number') {
+                result = home.round_2(value);
+            } else {
+                result = previous;
+            }
+            if (result === value) {
+                return no_update;
+            }
+            const rows = data.slice();
+            rows[row] = Object.assign({}, data[row], {[column]: result});
+            return rows;
+        }
+    }
+});
@@ -0,0 +1,76 @@
+"""
+Benchmark of the vectorized room_batch engine against a loop over reverberation_time objects.
+
+Run from the repository root:
+
+    python -m benchmarks.batch_throughput --rooms 5000 --surfaces 12
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.reverberation_calc import room, material, surface, reverberation_time, room_batch, reverberation_formulas
+
+
+def make_portfolio(n_rooms, n_surfaces, seed=0):
+    """Creates random rooms with surfaces as objects and as struct-of-arrays."""
+    rng = np.random.default_rng(seed)
+    volume = rng.uniform(30, 3000, n_rooms).round(2)
+    temperature = rng.choice([18.0, 20.0, 22.0], n_rooms)
+    rel_humidity = rng.choice([40.0, 50.0, 60.0], n_rooms)
+    pressure = np.full(n_rooms, 101.325)
+    room_index = np.repeat(np.arange(n_rooms), n_surfaces)
+    area = rng.uniform(1, 100, n_rooms * n_surfaces).round(2)
+    axis = np.tile(np.arange(n_surfaces) % 3, n_rooms)
+    coefficients = rng.uniform(0.01, 1.0, (n_rooms * n_surfaces, 8)).round(2)
+    coefficients[rng.random(n_rooms * n_surfaces) < 0.05, 0] = np.nan
+
+    rooms, surfaces = [], []
+    for i in range(n_rooms):
+        calc_room = room(float(volume[i]))
+        calc_room.set_temperature(float(temperature[i]))
+        calc_room.set_rel_humidity(float(rel_humidity[i]))
+        calc_room.set_pressure(float(pressure[i]))
+        rooms.append(calc_room)
+        surfaces.append([
+            surface(f"Surface {j}", float(area[i * n_surfaces + j]),
+                    material(f"Material {j}", coefficients[i * n_surfaces + j].tolist()), axis=j % 3)
+            for j in range(n_surfaces)
+        ])
+    arrays = (volume, temperature, rel_humidity, pressure, room_index, area, coefficients, axis)
+    return rooms, surfaces, arrays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--surfaces", type=int, default=10)
+    args = parser.parse_args()
+
+    rooms, surfaces, arrays = make_portfolio(args.rooms, args.surfaces)
+
+    start = time.perf_counter()
+    looped = np.array([reverberation_time(r, s).reverberation_time for r, s in zip(rooms, surfaces)])
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = room_batch(*arrays).calculate_reverberation_time()
+    batch_time = time.perf_counter() - start
+
+    np.testing.assert_allclose(batched, looped, equal_nan=True)
+    print(f"rooms: {args.rooms}, surfaces per room: {args.surfaces}")
+    print(f"loop over reverberation_time: {loop_time:8.3f} s ({args.rooms / loop_time:12.0f} rooms/s)")
+    print(f"room_batch:                   {batch_time:8.3f} s ({args.rooms / batch_time:12.0f} rooms/s)")
+    print(f"speedup: {loop_time / batch_time:.1f}x")
+
+    start = time.perf_counter()
+    batch = room_batch(*arrays)
+    for formula in reverberation_formulas:
+        batch.calculate_reverberation_time(formula=formula)
+    all_formulas_time = time.perf_counter() - start
+    print(f"room_batch, all {len(reverberation_formulas)} formulas: {all_formulas_time:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
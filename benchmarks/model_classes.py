@@ -0,0 +1,97 @@
+"""
+Benchmark of the slotted model classes and their array constructors against unslotted equivalents.
+
+Run from the repository root:
+
+    python -m benchmarks.model_classes --surfaces 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.reverberation_calc import material, surface, octave_bands
+
+
+class dict_material:
+    """The material class as it was before __slots__, storing its attributes in a __dict__."""
+
+    def __init__(self, name, absorption_coefficient, bands=octave_bands):
+        if not isinstance(name, str):
+            raise TypeError("Name must be a string.")
+        if not isinstance(absorption_coefficient, list):
+            raise TypeError("Absorption coefficient must be a list.")
+        if not all(isinstance(ac, (int, float)) for ac in absorption_coefficient):
+            raise ValueError("Absorption coefficient must be a list of numeric values.")
+        if any(ac < 0 for ac in absorption_coefficient):
+            raise ValueError("Absorption coefficient values must be non-negative.")
+        if len(absorption_coefficient) != len(bands):
+            raise ValueError("Absorption coefficient list must contain exactly one value per band.")
+        self.name = name
+        self.bands = bands
+        self.absorption_coefficient = np.array(absorption_coefficient)
+        self.price = None
+
+
+class dict_surface:
+    """The surface class as it was before __slots__, storing its attributes in a __dict__."""
+
+    def __init__(self, name, area, material, axis=None):
+        if not isinstance(name, str):
+            raise TypeError("Name must be a string.")
+        if not isinstance(area, (int, float)):
+            raise TypeError("Area must be an integer or float.")
+        self.name = name
+        self.area = area
+        self.material = material
+        self.axis = None
+        if axis is not None:
+            if axis not in (0, 1, 2) or isinstance(axis, bool):
+                raise ValueError("Axis must be 0 (x), 1 (y) or 2 (z).")
+            self.axis = int(axis)
+
+
+def measure(build):
+    """Returns the run time in s and the peak of the allocated memory in bytes of build()."""
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--surfaces", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.surfaces
+    names = [f"Surface {i}" for i in range(n)]
+    areas = rng.uniform(1, 100, n).round(2)
+    coefficients = rng.uniform(0.01, 1.0, (n, 8)).round(2)
+    axis = np.arange(n) % 3
+    area_list, coefficient_lists, axis_list = areas.tolist(), coefficients.tolist(), axis.tolist()
+
+    candidates = {
+        "unslotted classes": lambda: [dict_surface(names[i], area_list[i], dict_material(names[i], coefficient_lists[i]), axis_list[i]) for i in range(n)],
+        "slotted classes": lambda: [surface(names[i], area_list[i], material(names[i], coefficient_lists[i]), axis_list[i]) for i in range(n)],
+        "surface.from_arrays": lambda: surface.from_arrays(names, areas, coefficients, axis=axis),
+        "surface.from_arrays, trusted": lambda: surface.from_arrays(names, areas, coefficients, axis=axis, trusted=True),
+    }
+    print(f"surfaces with one material each: {n}")
+    reference = None
+    for label, build in candidates.items():
+        elapsed, peak = measure(build)
+        reference = reference or (elapsed, peak)
+        print(f"{label:30s} {elapsed:8.3f} s ({n / elapsed:10.0f} surfaces/s, {reference[0] / elapsed:5.1f}x)"
+              f"  {peak / 2**20:8.1f} MiB ({peak / n:6.0f} B/surface)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark of the payload sizes of the surface table and graph callbacks with full and partial (dash.Patch) updates.
+
+Run from the repository root:
+
+    python -m benchmarks.patch_payload --rows 10 100 1000
+"""
+import argparse
+from contextvars import copy_context
+
+from dash._callback_context import context_value
+from dash._utils import AttributeDict, to_json
+
+from pages import home
+
+
+def make_table(n_rows):
+    """Creates an area table with n_rows surfaces."""
+    return [
+        {"col-1": f"Surface {i}", "col-2": 10 + i % 7, "col-3": "💾", "col-4": f"Material {i % 20}",
+         **{col_id: round(0.05 + 0.01 * (i % 20) + 0.05 * j, 2) for j, col_id in enumerate(home.alpha_columns)},
+         "col-delete": "🗑️"}
+        for i in range(n_rows)
+    ]
+
+
+def size(value):
+    """Returns the size of a callback value in bytes, serialized like a Dash response."""
+    return len(to_json(value).encode())
+
+
+def delete_row(table, row_index):
+    """Calls handle_table_interactions for a click on the delete icon of a row."""
+    def run():
+        context_value.set(AttributeDict(triggered_inputs=[{"prop_id": "area-table.active_cell", "value": None}]))
+        return home.handle_table_interactions({"row": row_index, "column_id": "col-delete"}, None, False, table)
+    return copy_context().run(run)[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    material = {"name": "Glass wool 50 mm", **{f"{f:g}": 0.5 for f in home.calculation_bands.get_frequencies()}}
+    print(f"{'rows':>6s} {'action':16s} {'full request':>13s} {'full response':>14s} {'patch request':>14s} {'patch response':>15s}")
+    for n_rows in args.rows:
+        table = make_table(n_rows)
+        inputs = (200, 3, 20, 50, 1013.25, "A3", True, False)
+
+        # Before: the table was sent to the server as State and returned as a whole
+        added = table + [home.initial_empty_row]
+        changed = [dict(row) for row in table]
+        changed[n_rows // 2].update({"col-4": material["name"], **dict(zip(home.alpha_columns, list(material.values())[1:]))})
+        deleted = table[:n_rows // 2] + table[n_rows // 2 + 1:]
+        results = {
+            "add row": (size(table), size(added), 0, size(home.add_row_to_surface_table(1))),
+            "set material": (size(table), size(changed), 0, size(home.update_area_table_with_material({"row": 0}, [material], n_rows // 2)[0])),
+            "delete row": (size(table), size(deleted), size(table), size(delete_row(table, n_rows // 2))),
+        }
+
+        # The graph is first drawn in full, the next change of an area only updates the y values
+        figure, signature = home.update_graph_with_calculation(table, *inputs)
+        changed_area = [dict(row) for row in table]
+        changed_area[0]["col-2"] += 1
+        full_figure, _ = home.update_graph_with_calculation(changed_area, *inputs)
+        patch, _ = home.update_graph_with_calculation(changed_area, *inputs, figure_signature=signature)
+        results["graph"] = (size(table), size(full_figure), size(table), size(patch))
+
+        for action, (full_request, full_response, patch_request, patch_response) in results.items():
+            print(f"{n_rows:6d} {action:16s} {full_request:13d} {full_response:14d} {patch_request:14d} {patch_response:15d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark of the spectral_index nearest-neighbour search against a vectorized scan over all materials.
+
+Run from the repository root:
+
+    python -m benchmarks.spectral_search --materials 100000 --queries 300
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.spectral_index import spectral_index
+
+
+def make_catalog(n_materials, seed=0):
+    """Creates a random catalog of smooth absorption spectra, with missing 63 Hz and 8 kHz bands for some materials."""
+    rng = np.random.default_rng(seed)
+    low, high = rng.uniform(0, 1, (2, n_materials, 1))
+    slope = np.linspace(0, 1, 8)
+    coefficients = np.clip(low + (high - low) * slope + rng.normal(0, 0.05, (n_materials, 8)), 0, 1.2).round(2)
+    coefficients[rng.random(n_materials) < 0.6, 0] = np.nan
+    coefficients[rng.random(n_materials) < 0.5, 7] = np.nan
+    return coefficients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--materials", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    coefficients = make_catalog(args.materials)
+    rng = np.random.default_rng(1)
+    queries = coefficients[rng.integers(args.materials, size=args.queries)] + rng.normal(0, 0.05, (args.queries, 8))
+    queries[::3, 0] = np.nan
+
+    start = time.perf_counter()
+    tree = spectral_index(coefficients)
+    build_time = time.perf_counter() - start
+    scan = spectral_index(coefficients, brute_force_limit=args.materials)
+
+    timings = {}
+    for label, index in (("spectral_index (kd_tree)", tree), ("vectorized scan", scan)):
+        times = []
+        for query in queries:
+            start = time.perf_counter()
+            index.query(query, args.k)
+            times.append(time.perf_counter() - start)
+        timings[label] = np.array(times)
+    for query in queries[:20]:
+        np.testing.assert_array_equal(tree.query(query, args.k)[0], scan.query(query, args.k)[0])
+
+    print(f"materials: {args.materials}, queries: {args.queries}, k: {args.k}")
+    print(f"kd_tree build: {build_time:8.3f} s")
+    for label, times in timings.items():
+        print(f"{label:26s} median {np.median(times) * 1e3:7.3f} ms, p95 {np.percentile(times, 95) * 1e3:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ optimization application. It includes components for inputting room parameters,
 defining room surfaces, and visualizing the calculated reverberation time.
 """
 import dash
-from dash import html, dcc, callback, Input, Output, State, dash_table, clientside_callback
+from dash import html, dcc, callback, Input, Output, State, dash_table, clientside_callback, ClientsideFunction
 import dash_daq as daq
 import dash_bootstrap_components as dbc
 
@@ -13,7 +13,14 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+import json
 from src import reverberation_calc
+from src.uncertainty import reverberation_time_uncertainty
+from src.material_search import get_material_search
+from src.result_cache import result_cache, canonical_key
+from src.job_manager import get_job_manager
+from src.material_optimizer import material_optimizer
+from src.report import room_report
 
 
 if not os.environ.get("SPHINX_BUILD"):
@@ -25,38 +32,117 @@ if not os.environ.get("SPHINX_BUILD"):
         pass
 
 
-# Load material database
-try:
-    df_materials = pd.read_csv("materials.csv")
-except FileNotFoundError:
-    df_materials = pd.DataFrame()
+# Material database
+# The selection modal pages through the database on the server, so only one page
+# of materials is sent to the browser at a time
+material_page_size = 15
 
 # Define Dropdown Data
 df_room_usage = pd.DataFrame(
     {"options": ["no requirements", "A1", "A2", "A3", "A4", "A5", "B1", "B2", "B3", "B4", "B5"]}
 )
 
+# Frequency bands of the calculation, one absorption coefficient column per band
+calculation_bands = reverberation_calc.octave_bands
+alpha_columns = [f"col-{i + 5}" for i in range(len(calculation_bands))]
+
+
+def get_row_spectrum(row):
+    """Return the absorption coefficients of an area-table row.
+
+    Empty or invalid cells are returned as NaN, decimal commas are accepted.
+
+    Parameters
+    ----------
+    row : dict
+        A row of the 'area-table'.
+
+    Returns
+    -------
+    np.ndarray
+        The absorption coefficient of every calculation band.
+    """
+    values = [str(row.get(col_id, '')).replace(',', '.').strip() for col_id in alpha_columns]
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+
+
+def to_float(value, default):
+    """Convert an input value to float, accepting decimal commas, or return the default."""
+    if value is None or value == '':
+        return default
+    try:
+        return float(str(value).replace(',', '.'))
+    except (ValueError, TypeError):
+        return default
+
+
+def safe_float(val):
+    """Convert a table cell to float, accepting decimal commas.
+
+    The clientside validation should have already formatted the numbers, but this is
+    the final guard. Empty, invalid or infinite values become np.nan.
+    """
+    if isinstance(val, str):
+        val = val.replace(',', '.').strip()
+    try:
+        if val == '' or val is None:
+            return np.nan
+        val = float(val)
+    except (ValueError, TypeError):
+        return np.nan
+    return val if np.isfinite(val) else np.nan
+
+
+def parse_surface_rows(table_data):
+    """Parse the rows of the area-table that are part of the calculation.
+
+    Parameters
+    ----------
+    table_data : list[dict]
+        Data from the surface definition table.
+
+    Returns
+    -------
+    list[tuple]
+        The surface label, area, material name and absorption coefficients of every
+        row with a positive area.
+    """
+    rows = []
+    for row in table_data or []:
+        try:
+            area = safe_float(row.get('col-2'))
+            if area > 0:
+                absorb_coeffs = [safe_float(row.get(col_id)) for col_id in alpha_columns]
+                rows.append((row.get('col-1') or "Unnamed Surface", area, row.get('col-4') or "Unnamed Material", absorb_coeffs))
+        except (ValueError, TypeError, AttributeError):
+            # This will now primarily catch issues if the row structure is unexpected
+            continue
+    return rows
+
+
+# Number of Monte Carlo samples of the P5/P95 uncertainty band in the graph
+uncertainty_samples = 20000
+
+# Figures of the graph callback, keyed on the parsed numeric inputs, so that repeated
+# triggers with the same values skip the calculation and the figure construction.
+# If GRAPH_CACHE_DIR is set, the figures are shared with other workers through this directory
+graph_cache = result_cache(maxsize=64, directory=os.environ.get("GRAPH_CACHE_DIR") or None)
+
 # Define table columns
 column_definitions = []
 column_definitions.append({"name": "Surface Label", "id": "col-1", "editable": True})
 column_definitions.append({"name": "Area m²", "id": "col-2", "editable": True})
 column_definitions.append({"name": "DB", "id": "col-3", "editable": False})
 column_definitions.append({"name": "Sound absorber", "id": "col-4", "editable": True})
-column_definitions.append({"name": "α₆₃", "id": "col-5", "editable": True})
-column_definitions.append({"name": "α₁₂₅", "id": "col-6", "editable": True})
-column_definitions.append({"name": "α₂₅₀", "id": "col-7", "editable": True})
-column_definitions.append({"name": "α₅₀₀", "id": "col-8", "editable": True})
-column_definitions.append({"name": "α₁₀₀₀", "id": "col-9", "editable": True})
-column_definitions.append({"name": "α₂₀₀₀", "id": "col-10", "editable": True})
-column_definitions.append({"name": "α₄₀₀₀", "id": "col-11", "editable": True})
-column_definitions.append({"name": "α₈₀₀₀", "id": "col-12", "editable": True}) 
+for col_id, frequency in zip(alpha_columns, calculation_bands.get_frequencies()):
+    column_definitions.append({"name": "α" + str(frequency).translate(str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")), "id": col_id, "editable": True})
 
 # Add the delete column as the last one
 column_definitions.append({"name": "", "id": "col-delete", "editable": False})
 table_columns = column_definitions
 
 # Define the initial empty row with icons
-initial_empty_row = {f"col-{i+1}": "💾" if f"col-{i+1}" == "col-3" else "" for i in range(12)}
+initial_empty_row = {f"col-{i+1}": "💾" if f"col-{i+1}" == "col-3" else "" for i in range(4 + len(alpha_columns))}
 initial_empty_row["col-3"] = "💾" 
 initial_empty_row["col-delete"] = "🗑️"
 
@@ -65,6 +151,7 @@ initial_empty_row["col-delete"] = "🗑️"
 layout = dbc.Container(
     [
         dcc.Store(id='active-row-index-store'),
+        dcc.Store(id='graph-figure-signature'),
         dbc.Row(
             [
                 dbc.Col([html.H1("RoomAcousticWizard", className="app-brand")]),
@@ -164,6 +251,32 @@ layout = dbc.Container(
                             ],
                             style={"textAlign": "left"},
                         ),
+                        html.Div(
+                            [
+                                html.Br(),
+                                html.Label("Show Uncertainty (P5/P95)"),
+                                html.Div(
+                                    [
+                                        html.Span("Off"),
+                                        daq.ToggleSwitch(
+                                            id="uncertainty-toggle-switch",
+                                            value=False,
+                                            color="#3DED97",
+                                            size=40,
+                                            theme={"dark": True},
+                                        ),
+                                        html.Span("On"),
+                                    ],
+                                    style={
+                                        "display": "flex",
+                                        "align-items": "center",
+                                        "gap": "10px",
+                                    },
+                                ),
+                            ],
+                            style={"textAlign": "left"},
+                            title="Monte Carlo band of the reverberation time for uncertain absorption coefficients, areas and climate",
+                        ),
                     ],
                     width=3,
                 ),
@@ -246,6 +359,35 @@ layout = dbc.Container(
                 ),
             ]
         ),
+        dbc.Row(
+            [
+                dbc.Col(
+                    [
+                        html.Br(),
+                        html.H5(children="Material Optimization"),
+                        html.Button(
+                            "Optimize materials",
+                            id="optimize-button",
+                            n_clicks=0,
+                            title="Searches materials of the database for all surfaces in a background job",
+                            className="my-button",
+                        ),
+                        html.Button(
+                            "Cancel",
+                            id="optimize-cancel-button",
+                            n_clicks=0,
+                            className="my-button",
+                            style={"marginLeft": "10px"},
+                        ),
+                        dbc.Progress(id="optimize-progress", value=0, className="mt-2", style={"height": "20px"}),
+                        html.Div(id="optimize-status", className="mt-2"),
+                        dcc.Interval(id="optimize-interval", interval=1000, disabled=True),
+                        dcc.Store(id="optimize-job-id"),
+                    ]
+                ),
+            ],
+            className="no-print",
+        ),
         dbc.Row(
             [
                 dbc.Col(
@@ -256,10 +398,10 @@ layout = dbc.Container(
                             "Export PDF",
                             id="export",
                             n_clicks=0,
-                            title="The grid search may take several minutes",
+                            title="Download a PDF report with the room parameters, the reverberation time and the surfaces",
                             className="my-button no-print",
                         ),
-                        html.Div(id="placeholder"),
+                        dcc.Download(id="report-download"),
                     ]
                 ),
             ],
@@ -297,10 +439,9 @@ layout = dbc.Container(
 @callback(
     Output('area-table', 'data', allow_duplicate=True), # allow_duplicate needed if another callback modifies data
     Input('add-row-button', 'n_clicks'),
-    State('area-table', 'data'),
     prevent_initial_call=True
 )
-def add_row_to_surface_table(n_clicks, rows):
+def add_row_to_surface_table(n_clicks):
     """Add a new row to the surface definition table.
 
     This callback is triggered when the "Add Row" button is clicked. It appends a new,
@@ -310,18 +451,16 @@ def add_row_to_surface_table(n_clicks, rows):
     ----------
     n_clicks : int
         The number of times the 'add-row-button' has been clicked.
-    rows : list
-        The existing data in the 'area-table'.
 
     Returns
     -------
-    list
-        The updated data for the 'area-table' with the new row added.
+    dash.Patch
+        A partial update of the 'area-table' data that appends the new row, so the
+        existing rows are neither sent to the server nor back to the browser.
     """
-    if rows is None:
-        rows = []
-    new_row_data = {f"col-{i+1}": "💾" if f"col-{i+1}" == "col-3" else "" for i in range(12)}
+    new_row_data = {f"col-{i+1}": "💾" if f"col-{i+1}" == "col-3" else "" for i in range(4 + len(alpha_columns))}
     new_row_data["col-delete"] = "🗑️" # Add delete icon to new rows
+    rows = dash.Patch()
     rows.append(new_row_data)
     return rows
 
@@ -359,7 +498,7 @@ def handle_table_interactions(active_cell, close_clicks, modal_is_open, table_da
     -------
     tuple
         A tuple containing the updated modal state, new modal content,
-        updated table data, and the stored active row index.
+        a partial update of the table data, and the stored active row index.
     """
     
     
@@ -383,11 +522,27 @@ def handle_table_interactions(active_cell, close_clicks, modal_is_open, table_da
             # Click action on DB icon in the main table
             if col_id == "col-3":
                 stored_row_index = row_index
-                if not df_materials.empty:
+                try:
+                    search = get_material_search()
+                    # Only the first page is sent, further pages are requested by update_material_selection_page
+                    first_page, total = search.query(page_size=material_page_size)
+                except FileNotFoundError:
+                    search = None
+                if search is not None:
+                    columns = search.database.columns
                     modal_table_component = dash_table.DataTable(
                         id='material-selection-table',
-                        columns=[{"name": i, "id": i} for i in df_materials.columns],
-                        data=df_materials.to_dict('records'), # type: ignore
+                        columns=[{"name": i, "id": i, "type": "text" if i == columns[0] else "numeric"} for i in columns],
+                        data=first_page,
+                        page_action='custom',
+                        page_current=0,
+                        page_size=material_page_size,
+                        page_count=search.get_page_count(total, material_page_size),
+                        sort_action='custom',
+                        sort_mode='single',
+                        sort_by=[],
+                        filter_action='custom',
+                        filter_query='',
                         style_table={'overflowY': 'auto', 'height': '400px', 'overflowX': 'auto', 'minWidth': '100%'},
                         style_cell={
                             'textAlign': 'left',
@@ -405,7 +560,25 @@ def handle_table_interactions(active_cell, close_clicks, modal_is_open, table_da
                         },
                     )
                     new_modal_content = html.Div(
-                        modal_table_component, 
+                        [
+                            dbc.Input(
+                                id='material-search-input',
+                                type='search',
+                                placeholder='Search materials...',
+                                debounce=True,
+                                className='mb-2',
+                            ),
+                            dbc.Button(
+                                "Similar materials",
+                                id='material-similar-button',
+                                n_clicks=0,
+                                color='secondary',
+                                size='sm',
+                                className='mb-2',
+                            ),
+                            html.Div(f"{total} materials", id='material-search-count', className='mb-2'),
+                            modal_table_component,
+                        ],
                         className='material-table-container'
                     )
                 else:
@@ -414,14 +587,91 @@ def handle_table_interactions(active_cell, close_clicks, modal_is_open, table_da
                 new_modal_state = True
             
             elif col_id == "col-delete": # Click on Delete icon in the main table
-                updated_rows = [row for i, row in enumerate(table_data) if i != row_index]
-                new_table_data = updated_rows
+                # Only the deletion of the row is sent back to the browser
+                new_table_data = dash.Patch()
+                del new_table_data[row_index]
                 new_modal_state = False 
                 return new_modal_state, new_modal_content, new_table_data, stored_row_index
         
     return new_modal_state, new_modal_content, new_table_data, stored_row_index
 
 
+# Callback for the server-side paging, sorting, filtering and search of the material selection table
+@callback(
+    Output('material-selection-table', 'data'),
+    Output('material-selection-table', 'page_count'),
+    Output('material-selection-table', 'page_current'),
+    Output('material-search-count', 'children'),
+    Output('material-similar-button', 'children'),
+    Input('material-search-input', 'value'),
+    Input('material-selection-table', 'page_current'),
+    Input('material-selection-table', 'page_size'),
+    Input('material-selection-table', 'sort_by'),
+    Input('material-selection-table', 'filter_query'),
+    Input('material-similar-button', 'n_clicks'),
+    State('active-row-index-store', 'data'),
+    State('area-table', 'data'),
+    prevent_initial_call=True
+)
+def update_material_selection_page(search_text, page_current, page_size, sort_by, filter_query, similar_clicks, active_row_index, area_table_data):
+    """Return one page of the material database for the material selection table.
+
+    The table uses page_action='custom', so the browser only ever holds the current page.
+    The search text is matched fuzzily against the material names and ranks the results,
+    sorting and filtering follow the header controls of the table. Any change of the
+    search, the sorting, the filter or the similarity mode jumps back to the first page.
+
+    The "Similar materials" button toggles a mode that only lists the materials whose
+    absorption spectra are closest to the coefficients already entered in the row the
+    modal was opened for, closest first.
+
+    Parameters
+    ----------
+    search_text : str or None
+        The text of the search input.
+    page_current : int
+        The index of the requested page.
+    page_size : int
+        The number of rows per page.
+    sort_by : list
+        The sorting of the table.
+    filter_query : str
+        The filter query of the table.
+    similar_clicks : int or None
+        Number of clicks on the "Similar materials" button.
+    active_row_index : int or None
+        The index of the row in 'area-table' the modal was opened for.
+    area_table_data : list
+        The current data in the 'area-table'.
+
+    Returns
+    -------
+    tuple
+        The rows of the page, the number of pages, the index of the page, the text
+        with the number of matching materials and the label of the similarity button.
+    """
+    triggered_id = dash.callback_context.triggered[0]["prop_id"].split(".")
+    if triggered_id[0] in ('material-search-input', 'material-similar-button') or triggered_id[-1] in ('sort_by', 'filter_query'):
+        page_current = 0
+    page_size = page_size or material_page_size
+    spectrum, button_label, message = None, "Similar materials", ""
+    if (similar_clicks or 0) % 2 == 1:
+        button_label = "All materials"
+        if active_row_index is not None and area_table_data and active_row_index < len(area_table_data):
+            spectrum = get_row_spectrum(area_table_data[active_row_index])
+        if spectrum is None or np.isnan(spectrum).all():
+            spectrum = None
+            message = "Enter absorption coefficients in the row to find similar materials. "
+    search = get_material_search()
+    try:
+        records, total = search.query(search_text or "", filter_query or "", sort_by, page_current or 0, page_size, spectrum=spectrum)
+    except ValueError as e:
+        # Filter expressions are often incomplete while they are typed
+        return [], 1, 0, str(e), button_label
+    count_text = f"{total} most similar materials" if spectrum is not None else f"{total} materials"
+    return records, search.get_page_count(total, page_size), page_current or 0, message + count_text, button_label
+
+
 # Callback to update area-table with selected material
 @callback(
     Output('area-table', 'data', allow_duplicate=True),
@@ -429,10 +679,9 @@ def handle_table_interactions(active_cell, close_clicks, modal_is_open, table_da
     Input('material-selection-table', 'active_cell'),
     State('material-selection-table', 'data'),
     State('active-row-index-store', 'data'),
-    State('area-table', 'data'),
     prevent_initial_call=True
 )
-def update_area_table_with_material(active_cell, material_data, active_row_index, area_table_data):
+def update_area_table_with_material(active_cell, material_data, active_row_index):
     """Update the area table with data from the selected material of the material database.
 
     This callback is triggered when a cell in the material selection modal table is clicked.
@@ -447,13 +696,12 @@ def update_area_table_with_material(active_cell, material_data, active_row_index
         The data from the 'material-selection-table'.
     active_row_index : int
         The index of the row in 'area-table' to be updated.
-    area_table_data : list
-        The current data in the 'area-table'.
 
     Returns
     -------
     tuple
-        A tuple containing the updated 'area-table' data and a boolean to close the modal.
+        A tuple containing a partial update of the 'area-table' data, which sets only the
+        cells of the material, and a boolean to close the modal.
     """
     if not active_cell or active_row_index is None:
         return dash.no_update, dash.no_update
@@ -461,162 +709,234 @@ def update_area_table_with_material(active_cell, material_data, active_row_index
     selected_material_row_index = active_cell['row']
     selected_material = material_data[selected_material_row_index]
 
-    # The row from area-table to be updated
-    target_row = area_table_data[active_row_index]
-
-    # Update the values
-    target_row['col-4'] = selected_material['name']
-    target_row['col-5'] = selected_material['63']
-    target_row['col-6'] = selected_material['125']
-    target_row['col-7'] = selected_material['250']
-    target_row['col-8'] = selected_material['500']
-    target_row['col-9'] = selected_material['1000']
-    target_row['col-10'] = selected_material['2000']
-    target_row['col-11'] = selected_material['4000']
-    target_row['col-12'] = selected_material['8000']
+    # Update the cells of the row from area-table
+    area_table_data = dash.Patch()
+    area_table_data[active_row_index]['col-4'] = selected_material['name']
+    for col_id, frequency in zip(alpha_columns, calculation_bands.get_frequencies()):
+        area_table_data[active_row_index][col_id] = selected_material[str(frequency)]
 
     # Close modal
     return area_table_data, False
 
 
-@callback(
-    Output('input_room_volume', 'value'),
-    Input('input_room_volume', 'n_blur'),
-    State('input_room_volume', 'value')
-)
-def round_room_volume(n_blur, value):
-    if value is None:
-        return None
-    try:
-        return round(float(value), 2)
-    except (ValueError, TypeError):
-        return None
+# Room parameters are rounded to two decimals in the browser when an input loses the focus,
+# see assets/clientside.js
+for input_id in ["input_room_volume", "input_room_height", "input_room_temperature", "input_room_humidity", "input_room_pressure"]:
+    clientside_callback(
+        ClientsideFunction(namespace="home", function_name="round_value"),
+        Output(input_id, 'value'),
+        Input(input_id, 'n_blur'),
+        State(input_id, 'value'),
+    )
 
-@callback(
-    Output('input_room_height', 'value'),
-    Input('input_room_height', 'n_blur'),
-    State('input_room_height', 'value')
-)
-def round_room_height(n_blur, value):
-    if value is None:
-        return None
-    try:
-        return round(float(value), 2)
-    except (ValueError, TypeError):
-        return None
 
-@callback(
-    Output('input_room_temperature', 'value'),
-    Input('input_room_temperature', 'n_blur'),
-    State('input_room_temperature', 'value')
+# The edited cell of the area table is validated and rounded in the browser, so an edit
+# does not send the whole table and its previous state to the server.
+# update_graph_with_calculation parses all values again as the final guard.
+clientside_callback(
+    ClientsideFunction(namespace="home", function_name="validate_table_data"),
+    Output('area-table', 'data', allow_duplicate=True),
+    Input('area-table', 'data_timestamp'),
+    State('area-table', 'data'),
+    State('area-table', 'data_previous'),
+    prevent_initial_call=True
 )
-def round_room_temperature(n_blur, value):
-    if value is None:
-        return None
-    try:
-        return round(float(value), 2)
-    except (ValueError, TypeError):
-        return None
 
-@callback(
-    Output('input_room_humidity', 'value'),
-    Input('input_room_humidity', 'n_blur'),
-    State('input_room_humidity', 'value')
-)
-def round_room_humidity(n_blur, value):
-    if value is None:
-        return None
-    try:
-        return round(float(value), 2)
-    except (ValueError, TypeError):
-        return None
 
-@callback(
-    Output('input_room_pressure', 'value'),
-    Input('input_room_pressure', 'n_blur'),
-    State('input_room_pressure', 'value')
-)
-def round_room_pressure(n_blur, value):
-    if value is None:
-        return None
-    try:
-        return round(float(value), 2)
-    except (ValueError, TypeError):
-        return None
+def get_figure_update(figure, previous_signature):
+    """Return a partial update of the graph if only the y values and the title changed.
+
+    The signature of a figure is the hash of all its properties except for the y values of
+    the traces and the title. If it equals the signature of the figure shown in the graph,
+    only the y arrays of the traces (reverberation time, tolerance range and uncertainty band)
+    and the title are sent to the browser.
+
+    Parameters
+    ----------
+    figure : dict
+        The new figure as a JSON-compatible dict.
+    previous_signature : str or None
+        The signature of the figure shown in the graph.
+
+    Returns
+    -------
+    tuple
+        The figure or a dash.Patch of it, and the new signature or dash.no_update.
+    """
+    layout = figure.get("layout", {})
+    signature = canonical_key(
+        [{key: value for key, value in trace.items() if key != "y"} for trace in figure.get("data", [])],
+        {key: value for key, value in layout.items() if key != "title"},
+    )
+    if signature != previous_signature:
+        return figure, signature
+    patch = dash.Patch()
+    for i, trace in enumerate(figure["data"]):
+        patch["data"][i]["y"] = trace.get("y")
+    patch["layout"]["title"] = layout.get("title")
+    return patch, dash.no_update
+
+
+def optimize_materials_job(context, volume, height, temp, humidity, pressure, room_usage, air_damp_activated, rows, n_restarts=256, block_size=32):
+    """Search materials of the database for all surfaces in a background job.
+
+    The search runs in blocks of restarts, see material_optimizer.search, and reports its
+    progress and checks for cancellation after every block.
+
+    Parameters
+    ----------
+    context : job_context
+        The context of the job, see src.job_manager.
+    volume, height, temp, humidity, pressure : float
+        The room parameters, the pressure in hPa.
+    room_usage : str
+        The room usage type according to DIN 18041.
+    air_damp_activated : bool
+        State of the air dampening toggle switch.
+    rows : list[tuple]
+        The surface rows, see parse_surface_rows.
+    n_restarts : int, optional
+        The number of random start assignments (default is 256).
+    block_size : int, optional
+        The number of restarts between two progress reports (default is 32).
+
+    Returns
+    -------
+    dict
+        The assigned material of every surface, the objective, the reverberation time and
+        whether it lies within the DIN 18041 limits.
+    """
+    calc_room = reverberation_calc.room(volume)
+    if height:
+        calc_room.set_height(height)
+    calc_room.set_temperature(temp)
+    calc_room.set_rel_humidity(humidity)
+    calc_room.set_pressure(pressure / 10) # Convert hPa to kPa
+    materials = reverberation_calc.material_table(calculation_bands)
+    surfaces = [
+        reverberation_calc.surface(surface_name, area, materials.get_material(materials.add(mat_name, absorb_coeffs)))
+        for surface_name, area, mat_name, absorb_coeffs in rows
+    ]
+    context.set_progress(0, "Preparing the candidate materials")
+    optimizer = material_optimizer(calc_room, room_usage, surfaces, air_damp_calc=air_damp_activated, bands=calculation_bands)
+    best = None
+    for start in range(0, n_restarts, block_size):
+        context.check_cancelled()
+        result = optimizer.search(n_restarts=min(block_size, n_restarts - start), block_size=block_size, n_workers=1, seed=start)
+        if best is None or result.score < best.score:
+            best = result
+        done = min(start + block_size, n_restarts)
+        context.set_progress(done / n_restarts, f"{done} of {n_restarts} start assignments searched, best deviation {best.score:.3f}")
+    return {
+        "assignment": [
+            {"surface": calc_surface.get_surface_name(), "material": calc_material.get_name()}
+            for calc_surface, calc_material in zip(surfaces, best.assignment)
+        ],
+        "score": best.score,
+        "within_limits": best.within_limits,
+        "reverberation_time": best.reverberation_time.tolist(),
+    }
 
 
+# Start or cancel a material optimization in the background
 @callback(
-    Output('area-table', 'data', allow_duplicate=True),
-    Input('area-table', 'data_timestamp'),
+    Output('optimize-job-id', 'data'),
+    Output('optimize-interval', 'disabled'),
+    Output('optimize-status', 'children'),
+    Input('optimize-button', 'n_clicks'),
+    Input('optimize-cancel-button', 'n_clicks'),
+    State('optimize-job-id', 'data'),
     State('area-table', 'data'),
-    State('area-table', 'data_previous'),
+    State("input_room_volume", "value"),
+    State("input_room_height", "value"),
+    State("input_room_temperature", "value"),
+    State("input_room_humidity", "value"),
+    State("input_room_pressure", "value"),
+    State("dropdown_room_usage", "value"),
+    State("my-toggle-switch", "value"),
     prevent_initial_call=True
 )
-def validate_and_format_table_data(timestamp, data, data_previous):
-    """
-    Validate and format the data in the area-table.
-    Ensures that area and alpha values are numeric and rounded to two decimal places.
-    Reverts invalid inputs to their previous state.
+def start_or_cancel_optimization(start_clicks, cancel_clicks, job_id, table_data, volume, height, temp, humidity, pressure, room_usage, air_damp_activated):
+    """Start a material optimization job or cancel the running one.
+
+    The job runs in the process pool of the job manager, so the request returns at once
+    and the graph stays responsive. Its progress is polled by poll_optimization.
+
+    Returns
+    -------
+    tuple
+        The id of the job, the disabled state of the polling interval and a status message.
     """
-    if data is None or data_previous is None:
-        raise dash.exceptions.PreventUpdate
-
-    # If a row was added or deleted, the lengths will be different.
-    # In this case, we don't want to validate, so we allow the update to proceed
-    # without modification from this callback.
-    if len(data) != len(data_previous):
-        return data
-
-    # Find the changed cell
-    changed_row_idx, changed_col_id = -1, ''
-    for i in range(len(data)):
-        # Using .get() to avoid KeyErrors if a column was somehow removed
-        diff_keys = [key for key in data[i] if data[i].get(key) != data_previous[i].get(key)]
-        if diff_keys:
-            changed_row_idx = i
-            changed_col_id = diff_keys[0]
-            break
-
-    if changed_row_idx == -1:
-        raise dash.exceptions.PreventUpdate
-
-    # List of columns to validate
-    editable_numeric_cols = [f'col-{i}' for i in range(2, 13) if i not in [3, 4]]
-
-    if changed_col_id in editable_numeric_cols:
-        value = data[changed_row_idx][changed_col_id]
-        prev_value = data_previous[changed_row_idx][changed_col_id]
-
-        if isinstance(value, str):
-            cleaned_value = value.replace(',', '.').strip()
-            if cleaned_value == '':
-                # Allow user to clear the cell
-                return data
-
-            # Check for valid float format
-            if cleaned_value.count('.') <= 1 and (cleaned_value.replace('.', '', 1).isdigit() or (cleaned_value.startswith('-') and cleaned_value[1:].replace('.', '', 1).isdigit())):
-                try:
-                    num_value = float(cleaned_value)
-                    data[changed_row_idx][changed_col_id] = round(num_value, 2)
-                except (ValueError, TypeError):
-                    # Revert if conversion fails
-                    data[changed_row_idx][changed_col_id] = prev_value
-            else:
-                # Revert if format is invalid
-                data[changed_row_idx][changed_col_id] = prev_value
-        elif isinstance(value, (int, float)):
-            data[changed_row_idx][changed_col_id] = round(value, 2)
-        # If value is None or other type, and it's a change, revert it.
-        elif value != prev_value:
-             data[changed_row_idx][changed_col_id] = prev_value
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    jobs = get_job_manager()
+
+    if triggered_id == "optimize-cancel-button":
+        if job_id and jobs.cancel(job_id):
+            return dash.no_update, dash.no_update, "Cancelling the optimization..."
+        return dash.no_update, dash.no_update, dash.no_update
+
+    if not room_usage or room_usage == "no requirements":
+        return dash.no_update, dash.no_update, "Please select a room usage type for the optimization."
+    rows = parse_surface_rows(table_data)
+    if not rows:
+        return dash.no_update, dash.no_update, "Valid surface data is required for the optimization."
+    if job_id:
+        # Only one optimization per page
+        jobs.cancel(job_id)
+    try:
+        job_id = jobs.submit(
+            optimize_materials_job, to_float(volume, 30), to_float(height, None), to_float(temp, 20),
+            to_float(humidity, 50), to_float(pressure, 1013.25), room_usage, bool(air_damp_activated), rows,
+            name="material optimization",
+        )
+    except RuntimeError as e:
+        return dash.no_update, dash.no_update, str(e)
+    return job_id, False, "Waiting for a free worker..."
 
 
-    return data
+# Poll the progress and the result of the material optimization
+@callback(
+    Output('optimize-progress', 'value'),
+    Output('optimize-progress', 'label'),
+    Output('optimize-status', 'children', allow_duplicate=True),
+    Output('optimize-interval', 'disabled', allow_duplicate=True),
+    Input('optimize-interval', 'n_intervals'),
+    State('optimize-job-id', 'data'),
+    prevent_initial_call=True
+)
+def poll_optimization(n_intervals, job_id):
+    """Show the progress of the material optimization job and its result when finished.
+
+    Returns
+    -------
+    tuple
+        The progress in percent, the label of the progress bar, the status or result and
+        the disabled state of the polling interval, which stops once the job is over.
+    """
+    status = get_job_manager().get_status(job_id) if job_id else None
+    if status is None:
+        return 0, "", "", True
+    percent = round(100 * status["progress"])
+    if status["status"] == "finished":
+        result = status["result"]
+        verdict = "within" if result["within_limits"] else "not within"
+        return 100, "100 %", html.Div([
+            html.P(f"The reverberation time with these materials is {verdict} the DIN 18041 limits (deviation {result['score']:.3f})."),
+            html.Ul([html.Li(f"{item['surface']}: {item['material']}") for item in result["assignment"]]),
+        ]), True
+    if status["status"] == "failed":
+        return percent, f"{percent} %", f"The optimization failed: {status['error']}", True
+    if status["status"] == "cancelled":
+        return percent, f"{percent} %", "The optimization was cancelled.", True
+    message = status["message"] if status["status"] == "running" else "Waiting for a free worker..."
+    return percent, f"{percent} %", message, False
 
 
 # Connect all inputs to the calculation module and update the graph
 @callback(
     Output('fig-transformed', 'figure'),
+    Output('graph-figure-signature', 'data'),
     [
         Input('area-table', 'data'),
         Input("input_room_volume", "value"),
@@ -626,9 +946,11 @@ def validate_and_format_table_data(timestamp, data, data_previous):
         Input("input_room_pressure", "value"),
         Input("dropdown_room_usage", "value"),
         Input("my-toggle-switch", "value"),
-    ]
+        Input("uncertainty-toggle-switch", "value"),
+    ],
+    State('graph-figure-signature', 'data'),
 )
-def update_graph_with_calculation(table_data, volume, height, temp, humidity, pressure, room_usage, air_damp_activated):
+def update_graph_with_calculation(table_data, volume, height, temp, humidity, pressure, room_usage, air_damp_activated, uncertainty_activated=False, figure_signature=None):
     """Update the graph based on all user inputs by calling the calculation module.
 
     This callback gathers all room parameters and surface definitions from the user interface,
@@ -654,21 +976,18 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
         Selected room usage type from the dropdown.
     air_damp_activated : bool
         State of the air dampening toggle switch.
+    uncertainty_activated : bool, optional
+        State of the uncertainty toggle switch. If active, the P5/P95 band of a
+        Monte Carlo uncertainty analysis is plotted around the reverberation time.
+    figure_signature : str, optional
+        The structure signature of the figure shown in the graph, see get_figure_update.
 
     Returns
     -------
-    plotly.graph_objects.Figure
-        An updated Plotly figure with the calculated reverberation time.
+    tuple
+        The updated Plotly figure with the calculated reverberation time, or a partial update
+        of its y values, and the structure signature of the shown figure.
     """
-    # Helper to convert input to float, handling commas.
-    def to_float(value, default):
-        if value is None or value == '':
-            return default
-        try:
-            return float(str(value).replace(',', '.'))
-        except (ValueError, TypeError):
-            return default
-
     # Default values for numeric inputs
     volume = to_float(volume, 30)
     height = to_float(height, None)
@@ -676,8 +995,22 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
     humidity = to_float(humidity, 50)
     pressure = to_float(pressure, 1013.25) # hPa
 
-    # Standard octave bands for the x-axis
-    frequency_bands = [63, 125, 250, 500, 1000, 2000, 4000, 8000]
+    # Parse the surface rows, only rows with a positive area are part of the calculation
+    rows = parse_surface_rows(table_data)
+
+    # Labels and material names are not part of the figure, so they are not part of the key
+    cache_key = canonical_key(
+        calculation_bands.get_frequencies(), [(area, coeffs) for _, area, _, coeffs in rows],
+        volume, height, temp, humidity, pressure, room_usage, bool(air_damp_activated),
+        bool(uncertainty_activated), uncertainty_samples,
+    )
+    if volume and rows:
+        cached_figure = graph_cache.get(cache_key)
+        if cached_figure is not None:
+            return get_figure_update(cached_figure, figure_signature)
+
+    # Frequency bands of the calculation for the x-axis
+    frequency_bands = calculation_bands.get_frequencies()
 
     # Create a default empty figure and pre-format the axes
     fig = go.Figure()
@@ -699,7 +1032,7 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
     )
 
     if not volume or not table_data:
-        return fig
+        return fig, None
 
     try:
         # Create Room Object
@@ -711,48 +1044,20 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
         calc_room.set_pressure(pressure / 10) # Convert hPa to kPa
 
         # Create Surface Objects
+        # Rows with the same material share one interned material object
+        materials = reverberation_calc.material_table(calculation_bands)
         surfaces = []
-        for row in table_data:
+        for surface_name, area, mat_name, absorb_coeffs in rows:
             try:
-                # Use a helper to safely convert values to float, defaulting to np.nan for empty strings
-                def safe_float(val):
-                    # The validation callback should have already formatted the numbers,
-                    # but this is a safeguard.
-                    if isinstance(val, str):
-                        val = val.replace(',', '.').strip()
-                    try:
-                        # Return NaN if the value is an empty string or cannot be converted
-                        if val == '' or val is None:
-                            return np.nan
-                        return float(val)
-                    except (ValueError, TypeError):
-                        return np.nan
-
-                area = safe_float(row.get('col-2'))
-                if area is not None and area > 0 and not np.isnan(area):
-                    absorb_coeffs = [
-                        safe_float(row.get('col-5')),
-                        safe_float(row.get('col-6')),
-                        safe_float(row.get('col-7')),
-                        safe_float(row.get('col-8')),
-                        safe_float(row.get('col-9')),
-                        safe_float(row.get('col-10')),
-                        safe_float(row.get('col-11')),
-                        safe_float(row.get('col-12'))
-                    ]
-                    mat_name = row.get('col-4') or "Unnamed Material"
-                    surface_name = row.get('col-1') or "Unnamed Surface"
-                    
-                    material = reverberation_calc.material(mat_name, absorb_coeffs)
-                    surface = reverberation_calc.surface(surface_name, area, material)
-                    surfaces.append(surface)
+                material = materials.get_material(materials.add(mat_name, absorb_coeffs))
+                surfaces.append(reverberation_calc.surface(surface_name, area, material))
             except (ValueError, TypeError):
-                # This will now primarily catch issues if the row structure is unexpected
+                # Rows with invalid absorption coefficients are skipped
                 continue
 
         if not surfaces:
             fig.update_layout(title_text="Valid surface data is required for calculation.")
-            return fig
+            return fig, None
 
         # Calculate reverberation time
         reverb_obj = reverberation_calc.reverberation_time(calc_room, surfaces, air_damp_calc=air_damp_activated)
@@ -762,12 +1067,18 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
         })
 
         # Get target reverberation time range
+        # The limits are cached per room type, volume, height and speed of sound, and
+        # deviations from the scope of DIN 18041 are returned as flags instead of warnings
+        din_messages = []
         if room_usage != "no requirements":
-            limits = reverberation_calc.DIN_18041_limits(calc_room, room_usage)
+            T_upper_limit, T_lower_limit, _, din_flags = reverberation_calc.DIN_18041_limits_lookup(
+                room_usage, volume, height, calc_room.get_c(), calculation_bands
+            )
+            din_messages = reverberation_calc.describe_DIN_18041_flags(din_flags, room_usage)
             df_target = pd.DataFrame({
                 'Frequency': reverb_obj.frequency_bands,
-                'T_max': limits.T_upper_limit,
-                'T_min': limits.T_lower_limit
+                'T_max': T_upper_limit,
+                'T_min': T_lower_limit
             })
         else:
             df_target = pd.DataFrame()
@@ -797,6 +1108,26 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
 
 
         # Plotting
+        if uncertainty_activated:
+            uncertainty = reverberation_time_uncertainty(reverb_obj).run(n_samples=uncertainty_samples, seed=0)
+            P5, P95 = uncertainty.get_percentiles((5, 95))
+            fig.add_trace(go.Scatter(
+                x=df_reverb['Frequency'],
+                y=P95,
+                fill=None,
+                mode='lines',
+                line_color='rgba(61,237,151,0.3)',
+                showlegend=False
+            ))
+            fig.add_trace(go.Scatter(
+                x=df_reverb['Frequency'],
+                y=P5,
+                fill='tonexty', # fill area between P95 and P5
+                mode='lines',
+                line_color='rgba(61,237,151,0.3)',
+                name='P5/P95 Uncertainty',
+            ))
+
         fig.add_trace(go.Scatter(
             x=df_reverb['Frequency'], 
             y=df_reverb['Reverberation Time'],
@@ -824,7 +1155,7 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
             ))
 
         fig.update_layout(
-            title_text="Reverberation Time Calculation with DIN 18041 requirements",
+            title_text="<br>".join(["Reverberation Time Calculation with DIN 18041 requirements"] + din_messages),
             xaxis_title="Frequency in Hz",
             yaxis_title="Reverberation Time in s",
             yaxis=dict(range=[0, None]),
@@ -845,23 +1176,76 @@ def update_graph_with_calculation(table_data, volume, height, temp, humidity, pr
                 )
         )
 
+        figure = json.loads(fig.to_json())
+        graph_cache.put(cache_key, figure)
+        return get_figure_update(figure, figure_signature)
+
     except Exception as e:
         fig.update_layout(title_text=f"An error occurred: {e}")
 
-    return fig
+    return fig, None
 
 
-# Clientside callback to trigger browser print
-clientside_callback(
-    """
-    function(n_clicks) {
-        if (n_clicks > 0) {
-            window.print();
-        }
-        return '';
-    }
-    """,
-    Output('placeholder', 'children'),
-    Input('export', 'n_clicks'),
+@callback(
+    Output("report-download", "data"),
+    Input("export", "n_clicks"),
+    State("area-table", "data"),
+    State("input_room_volume", "value"),
+    State("input_room_height", "value"),
+    State("input_room_temperature", "value"),
+    State("input_room_humidity", "value"),
+    State("input_room_pressure", "value"),
+    State("dropdown_room_usage", "value"),
+    State("my-toggle-switch", "value"),
     prevent_initial_call=True
-)
\ No newline at end of file
+)
+def export_report(n_clicks, table_data, volume, height, temp, humidity, pressure, room_usage, air_damp_activated):
+    """Render the PDF report of the room on the server and send it to the browser.
+
+    The figure of the report is cached by its data, see room_report.render_figure, so
+    repeated exports of an unchanged room only lay out the text and tables.
+
+    Parameters
+    ----------
+    n_clicks : int
+        Number of clicks on the export button.
+    table_data : list[dict]
+        Data from the surface definition table.
+    volume, height, temp, humidity, pressure : float
+        The room parameters, the pressure in hPa.
+    room_usage : str
+        Selected room usage type from the dropdown.
+    air_damp_activated : bool
+        State of the air dampening toggle switch.
+
+    Returns
+    -------
+    dict or dash.no_update
+        The PDF file for the download component, no_update without a volume or valid surfaces.
+    """
+    volume = to_float(volume, 30)
+    height = to_float(height, None)
+    rows = parse_surface_rows(table_data)
+    if not n_clicks or not volume or not rows:
+        return dash.no_update
+
+    calc_room = reverberation_calc.room(volume)
+    if height:
+        calc_room.set_height(height)
+    calc_room.set_temperature(to_float(temp, 20))
+    calc_room.set_rel_humidity(to_float(humidity, 50))
+    calc_room.set_pressure(to_float(pressure, 1013.25) / 10) # Convert hPa to kPa
+    materials = reverberation_calc.material_table(calculation_bands)
+    surfaces = []
+    for surface_name, area, mat_name, absorb_coeffs in rows:
+        try:
+            surfaces.append(reverberation_calc.surface(surface_name, area, materials.get_material(materials.add(mat_name, absorb_coeffs))))
+        except (ValueError, TypeError):
+            # Rows with invalid absorption coefficients are skipped like in the graph
+            continue
+    if not surfaces:
+        return dash.no_update
+
+    report = room_report("Room", calc_room, surfaces, type=room_usage or "no requirements",
+                         air_damp_calc=bool(air_damp_activated), bands=calculation_bands)
+    return dcc.send_bytes(report.render(), "reverberation_report.pdf")
\ No newline at end of file
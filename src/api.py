@@ -0,0 +1,87 @@
+"""
+REST API of the calculator, registered on the Flask server of the Dash app.
+
+POST /api/v1/reverberation calculates the reverberation time and the DIN 18041 limits of one or many rooms, see room_io.room_definition for the format of a room.
+
+The request body is either JSON, a single room, a list of rooms or an object with a "rooms" list, or NDJSON (Content-Type application/x-ndjson) with one room per line.
+The response is JSON {"results": [...]} or, for NDJSON requests and requests with "Accept: application/x-ndjson", NDJSON with one result per line. NDJSON requests are read and answered in chunks, so the memory use of the server does not depend on the number of rooms.
+The optional query parameters are formula (default is "sabine") and chunk_size (default is 1000). The formulas "fitzroy" and "arau_puchades" need the axis of every surface.
+"""
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from src.reverberation_calc import reverberation_formulas
+from src.room_io import iter_room_results
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+ndjson_mimetype = "application/x-ndjson"
+max_chunk_size = 10000
+
+
+def _iter_ndjson(stream, block_size=1 << 16):
+    # Parses the lines of the request body lazily from blocks, which is much faster than iterating over the lines of the stream.
+    # Invalid lines become an error result of their room.
+    rest = b""
+    while True:
+        block = stream.read(block_size)
+        lines = (rest + block).split(b"\n")
+        rest = lines.pop() if block else b""
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Invalid JSON: {e}")
+        if not block:
+            return
+
+
+def _error(message, status=400):
+    return jsonify({"error": message}), status
+
+
+@api.post("/reverberation")
+def reverberation():
+    formula = request.args.get("formula", "sabine")
+    if formula not in reverberation_formulas:
+        return _error(f"Formula must be one of {sorted(reverberation_formulas)}.")
+    try:
+        chunk_size = int(request.args.get("chunk_size", 1000))
+    except ValueError:
+        return _error("Chunk size must be an integer.")
+    if not 0 < chunk_size <= max_chunk_size:
+        return _error(f"Chunk size must be between 1 and {max_chunk_size}.")
+
+    if request.mimetype == ndjson_mimetype:
+        definitions = _iter_ndjson(request.stream)
+        stream = True
+    else:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict) and isinstance(body.get("rooms"), list):
+            definitions = body["rooms"]
+        elif isinstance(body, dict):
+            definitions = [body]
+        elif isinstance(body, list):
+            definitions = body
+        else:
+            return _error("The body must be a room, a list of rooms or an object with a list of rooms in JSON or NDJSON.")
+        stream = request.accept_mimetypes.best_match(["application/json", ndjson_mimetype]) == ndjson_mimetype
+
+    results = iter_room_results(definitions, chunk_size=chunk_size, formula=formula)
+    if not stream:
+        return jsonify({"results": list(results)})
+
+    def generate():
+        # Lines are sent in blocks of about one chunk, not one by one
+        lines = []
+        for result in results:
+            lines.append(json.dumps(result, separators=(",", ":")))
+            if len(lines) >= chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    return Response(stream_with_context(generate()), mimetype=ndjson_mimetype)
@@ -0,0 +1,500 @@
+"""
+Headless batch calculation of project files with many rooms, e.g. for nightly DIN 18041 compliance checks of building portfolios.
+
+Run from the repository root:
+
+    python -m src.batch rooms.csv results.csv --workers 8
+    python -m src.batch rooms.csv results.csv --workers 8 --resume
+"""
+import argparse
+import concurrent.futures
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.reverberation_calc import octave_bands, reverberation_formulas
+from src.room_io import iter_room_results
+from src.material_database import get_material_database
+from src.project_file import project_file, is_project
+
+# Column labels of the octave bands from 63 Hz to 8 kHz
+band_labels = [f"{frequency:g}" for frequency in octave_bands.get_frequencies()]
+
+# Columns of the room parameters in tabular project files, all but room and volume are optional
+room_columns = ("room", "volume", "height", "temperature", "rel_humidity", "pressure", "type", "air_damping")
+
+# Status of a room in the results
+room_status = ("pass", "fail", "incomplete", "no requirements", "error")
+
+checkpoint_version = 1
+
+
+def get_input_format(path):
+    """
+    Returns the format of a project file by its extension: "csv", "json", "ndjson" or "parquet", or "project" for a project directory, see project_file.
+
+    Raises
+    ------
+    ValueError
+        If the extension is not supported.
+    """
+    if is_project(path):
+        return "project"
+    extension = os.path.splitext(path)[1].lower()
+    formats = {".csv": "csv", ".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet"}
+    if extension not in formats:
+        raise ValueError(f"Project files must be project directories or {', '.join(formats)} files.")
+    return formats[extension]
+
+
+def _require_parquet():
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("Parquet files need the pyarrow package, install it with pip install pyarrow.")
+
+
+def _column(df, column):
+    # The values of a column as Python objects, missing values are None
+    if column not in df.columns:
+        return [None] * len(df)
+    return [None if value != value else value for value in df[column].tolist()]
+
+
+def _table_to_rooms(df):
+    # Converts the rows of a table, one surface per row, to room definitions, see iter_project_rooms
+    columns = [column for column in room_columns if column in df.columns]
+    room_values = list(zip(*(_column(df, column) for column in columns)))
+    area = _column(df, "area")
+    material = _column(df, "material")
+    # Whole numbers of a column with missing values are read as floats
+    axis = [int(value) if isinstance(value, float) and value.is_integer() else value for value in _column(df, "axis")]
+    # Missing coefficients stay NaN, which room_definition reads as unknown
+    alpha = df.reindex(columns=band_labels).to_numpy(dtype=float)
+    # A new room starts where the room id changes
+    room_id = df["room"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, room_id[1:] != room_id[:-1]])
+    ends = np.r_[starts[1:], len(df)]
+    rooms = []
+    for start, end in zip(starts, ends):
+        definition = {key: value for key, value in zip(columns, room_values[start]) if value is not None}
+        definition["id"] = definition.pop("room")
+        if "air_damping" in definition:
+            definition["air_damping"] = str(definition["air_damping"]).strip().lower() in ("1", "1.0", "true", "yes")
+        definition["surfaces"] = [
+            {"area": area[i], "material": material[i]} if material[i] is not None else {"area": area[i], "absorption_coefficient": alpha[i].tolist()}
+            for i in range(start, end)
+        ]
+        for i, surface in zip(range(start, end), definition["surfaces"]):
+            if axis[i] is not None:
+                surface["axis"] = axis[i]
+        rooms.append(definition)
+    return rooms
+
+
+def iter_project_rooms(path, input_format=None, chunk_size=50000):
+    """
+    Reads the room definitions of a project file lazily, see room_io.room_definition for the keys of a room.
+
+    Project directories are read room by room, see project_file. JSON files hold a list of rooms or an object with a "rooms" list, NDJSON files one room per line.
+    CSV and Parquet files hold one surface per row with the columns room (the id of the room), volume, height, temperature, rel_humidity, pressure, type and air_damping for the room, which are read from the first row of a room, and area, material (the name of a material of the material database) or the absorption coefficients in the columns 63 to 8000 and optionally axis (0, 1 or 2, needed by the Fitzroy and Arau-Puchades formulas) for the surface. The rows of a room must be consecutive.
+
+    Parameters
+    ----------
+    path : str
+        The path of the project file.
+    input_format : str, optional
+        The format of the file (default is None, which uses the extension, see get_input_format).
+    chunk_size : int, optional
+        The number of rows of CSV and Parquet files read at once (default is 50000).
+
+    Yields
+    ------
+    dict
+        The definition of every room in the order of the file.
+
+    Raises
+    ------
+    ValueError
+        If a table has no room, volume or area column.
+    """
+    input_format = input_format or get_input_format(path)
+    if input_format == "project":
+        yield from project_file(path).iter_rooms()
+        return
+    if input_format == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield from data["rooms"] if isinstance(data, dict) and "rooms" in data else data if isinstance(data, list) else [data]
+        return
+    if input_format == "ndjson":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        yield ValueError(f"Invalid JSON: {e}")
+        return
+
+    if input_format == "parquet":
+        _require_parquet()
+        import pyarrow.parquet
+        chunks = (batch.to_pandas() for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_size, dtype={"room": str, "type": str, "material": str})
+    rest = None
+    for df in chunks:
+        df = df.rename(columns=str)
+        if not {"room", "volume", "area"} <= set(df.columns):
+            raise ValueError("Tables must have the columns room, volume and area.")
+        if rest is not None:
+            df = pd.concat([rest, df], ignore_index=True)
+        # The last room may continue in the next chunk
+        last = df["room"].to_numpy() == df["room"].iloc[-1]
+        last_start = len(df) - np.argmin(last[::-1]) if not last.all() else 0
+        rest = df.iloc[last_start:]
+        if last_start > 0:
+            yield from _table_to_rooms(df.iloc[:last_start])
+    if rest is not None and len(rest):
+        yield from _table_to_rooms(rest)
+
+
+def get_result_table(results):
+    """
+    Converts the results of iter_room_results into a table with one row per room.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results.
+
+    Returns
+    -------
+    pd.DataFrame
+        The columns index, id, status (see room_status), failed_bands (the bands outside the limits, separated by ";"), the reverberation time rt_63 ... rt_8000, the limits t_min_63 ... t_max_8000 in s and the error message.
+    """
+    n = len(results)
+    reverberation_time = np.full((n, len(band_labels)), np.nan)
+    T_upper_limit = np.full((n, len(band_labels)), np.nan)
+    T_lower_limit = np.full((n, len(band_labels)), np.nan)
+    is_error = np.zeros(n, dtype=bool)
+    has_limits = np.zeros(n, dtype=bool)
+    for i, result in enumerate(results):
+        if "error" in result:
+            is_error[i] = True
+            continue
+        reverberation_time[i] = np.array(result["reverberation_time"], dtype=float)
+        limits = result["DIN_18041_limits"]
+        if limits is not None:
+            has_limits[i] = True
+            T_upper_limit[i] = np.array(limits["T_upper_limit"], dtype=float)
+            T_lower_limit[i] = np.array(limits["T_lower_limit"], dtype=float)
+
+    # Bands without requirement have an upper limit of 0, like in room_report.get_band_status
+    required = has_limits[:, np.newaxis] & np.isfinite(T_upper_limit) & (T_upper_limit > 0)
+    with np.errstate(invalid="ignore"):
+        failed = required & ((reverberation_time > T_upper_limit) | (reverberation_time < T_lower_limit))
+    unknown = required & np.isnan(reverberation_time)
+    status = np.select(
+        [is_error, ~required.any(axis=1), failed.any(axis=1), unknown.any(axis=1)],
+        ["error", "no requirements", "fail", "incomplete"],
+        "pass",
+    )
+    labels = np.array(band_labels)
+    table = {
+        "index": [result["index"] for result in results],
+        "id": [None if result.get("id") is None else str(result["id"]) for result in results],
+        "status": status,
+        "failed_bands": [";".join(labels[row]) for row in failed],
+    }
+    for name, values in (("rt", reverberation_time), ("t_min", T_lower_limit), ("t_max", T_upper_limit)):
+        for j, label in enumerate(band_labels):
+            table[f"{name}_{label}"] = values[:, j]
+    table["error"] = [result.get("error") for result in results]
+    return pd.DataFrame(table)
+
+
+def _calculate_shard(start, definitions, formula, materials_path):
+    # Runs in a worker process, the indices of the results are shifted to the position of the shard in the project
+    database = get_material_database(materials_path) if materials_path else None
+    results = list(iter_room_results(definitions, chunk_size=len(definitions) or 1, formula=formula, database=database))
+    for result in results:
+        result["index"] += start
+    return get_result_table(results)
+
+
+class batch_report:
+    """
+    Defines a "batch_report" object with the progress of a batch_runner run.
+
+    Attributes
+    ----------
+    rooms_done : int
+        The number of rooms calculated in this run.
+    rooms_failed : int
+        The number of rooms of this run that did not pass DIN 18041.
+    rooms_invalid : int
+        The number of rooms of this run with an error.
+    rooms_skipped : int
+        The number of rooms of a resumed run that were calculated before.
+    shards_done : int
+        The number of shards written in this run.
+    elapsed : float
+        The time since the start of the run in s.
+    """
+
+    def __init__(self):
+        self.rooms_done = 0
+        self.rooms_failed = 0
+        self.rooms_invalid = 0
+        self.rooms_skipped = 0
+        self.shards_done = 0
+        self.elapsed = 0.0
+
+    @property
+    def rooms_per_second(self):
+        """The number of rooms calculated per second in this run."""
+        return self.rooms_done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class batch_runner:
+    """
+    Defines a "batch_runner" object that calculates the rooms of a project file in a process pool and writes their results as they complete.
+
+    The rooms are split into shards of shard_size rooms in the order of the project file. Every worker process calculates a whole shard with the vectorized room_io.calculate_rooms, and the main process writes the result table of every finished shard, see get_result_table.
+    CSV results are appended to one file, in the order in which the shards finish, the index column holds the position of the room in the project file. Parquet results are written as one file per shard into a directory, which pandas.read_parquet reads as one table.
+    After every shard a checkpoint file next to the results records the finished shards and the size of the written CSV file. An interrupted run continues with resume=True: the CSV file is cut back to the last checkpoint and only the missing shards are calculated. The checkpoint is removed when the run is complete.
+
+    Attributes
+    ----------
+    input_path : str
+        The path of the project file.
+    output_path : str
+        The path of the CSV file or the Parquet directory of the results.
+    output_format : str
+        The format of the results, "csv" or "parquet".
+    n_workers : int
+        The number of worker processes.
+    shard_size : int
+        The number of rooms per shard.
+    formula : str
+        The name of the reverberation formula.
+    materials_path : str or None
+        The path of the material CSV file for surfaces with a material.
+    checkpoint_path : str
+        The path of the checkpoint file.
+    """
+
+    def __init__(self, input_path, output_path, n_workers=None, shard_size=1000, formula="sabine", materials_path=None, input_format=None):
+        """
+        Initializes a batch_runner object.
+
+        Parameters
+        ----------
+        input_path : str
+            The path of the project file, see iter_project_rooms.
+        output_path : str
+            The path of the results, a .csv file or a .parquet directory.
+        n_workers : int, optional
+            The number of worker processes (default is None, which uses the number of CPUs). With 1 worker the shards are calculated in the calling process.
+        shard_size : int, optional
+            The number of rooms per shard (default is 1000).
+        formula : str, optional
+            The name of the formula in reverberation_formulas (default is "sabine").
+        materials_path : str, optional
+            The path of the material CSV file (default is None, which uses "materials.csv" in the working directory of the workers).
+        input_format : str, optional
+            The format of the project file (default is None, which uses the extension, see get_input_format).
+
+        Raises
+        ------
+        ValueError
+            If n_workers or shard_size is not a positive integer, the formula is not registered or a format is not supported.
+        ImportError
+            If a Parquet file is read or written without pyarrow.
+        """
+        n_workers = (os.cpu_count() or 1) if n_workers is None else n_workers
+        if not isinstance(n_workers, int) or n_workers <= 0:
+            raise ValueError("Number of workers must be a positive integer.")
+        if not isinstance(shard_size, int) or shard_size <= 0:
+            raise ValueError("Shard size must be a positive integer.")
+        if formula not in reverberation_formulas:
+            raise ValueError(f"Formula must be one of {sorted(reverberation_formulas)}.")
+        self.input_path = input_path
+        self.input_format = input_format or get_input_format(input_path)
+        self.output_path = output_path
+        extension = os.path.splitext(output_path)[1].lower()
+        if extension not in (".csv", ".parquet"):
+            raise ValueError("Results must be written to a .csv file or a .parquet directory.")
+        self.output_format = extension[1:]
+        if "parquet" in (self.input_format, self.output_format):
+            _require_parquet()
+        self.n_workers = n_workers
+        self.shard_size = shard_size
+        self.formula = formula
+        self.materials_path = os.path.abspath(materials_path) if materials_path else None
+        self.checkpoint_path = output_path.rstrip(os.sep) + ".checkpoint.json"
+
+    def _get_fingerprint(self):
+        # A checkpoint is only valid for the same project file and settings
+        stat = os.stat(os.path.join(self.input_path, "manifest.json") if self.input_format == "project" else self.input_path)
+        return {"version": checkpoint_version, "input": os.path.abspath(self.input_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                "shard_size": self.shard_size, "formula": self.formula, "output_format": self.output_format}
+
+    def _write_checkpoint(self, checkpoint):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.checkpoint_path)), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _start(self, resume):
+        # Returns the checkpoint to continue from, a new run removes earlier results
+        fingerprint = self._get_fingerprint()
+        if resume and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("fingerprint") != fingerprint:
+                raise ValueError("The checkpoint belongs to another project file or other settings, start a new run without resume.")
+            if self.output_format == "csv":
+                with open(self.output_path, "r+b") as f:
+                    f.truncate(checkpoint["csv_offset"])
+            return checkpoint
+        if self.output_format == "csv":
+            open(self.output_path, "wb").close()
+        else:
+            os.makedirs(self.output_path, exist_ok=True)
+            for name in os.listdir(self.output_path):
+                if name.startswith("part-") and name.endswith(".parquet"):
+                    os.remove(os.path.join(self.output_path, name))
+        checkpoint = {"fingerprint": fingerprint, "completed": [], "csv_offset": 0}
+        self._write_checkpoint(checkpoint)
+        return checkpoint
+
+    def _write(self, shard_index, table, checkpoint):
+        if self.output_format == "csv":
+            with open(self.output_path, "ab") as f:
+                table.to_csv(f, header=checkpoint["csv_offset"] == 0, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint["csv_offset"] = f.tell()
+        else:
+            path = os.path.join(self.output_path, f"part-{shard_index:06d}.parquet")
+            table.to_parquet(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+        checkpoint["completed"].append(shard_index)
+        self._write_checkpoint(checkpoint)
+
+    def _iter_shards(self):
+        shard = []
+        for definition in iter_project_rooms(self.input_path, self.input_format):
+            shard.append(definition)
+            if len(shard) == self.shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    def iter_run(self, resume=False):
+        """
+        Runs the batch and yields the progress after every written shard.
+
+        Parameters
+        ----------
+        resume : bool, optional
+            A flag indicating whether an interrupted run is continued from its checkpoint (default is False, which starts a new run and removes earlier results).
+
+        Yields
+        ------
+        batch_report
+            The progress of the run, the same object is updated.
+        """
+        start_time = time.perf_counter()
+        checkpoint = self._start(resume)
+        completed = set(checkpoint["completed"])
+        report = batch_report()
+
+        def finish(shard_index, table):
+            self._write(shard_index, table, checkpoint)
+            report.rooms_done += len(table)
+            report.rooms_failed += int((table["status"] == "fail").sum())
+            report.rooms_invalid += int((table["status"] == "error").sum())
+            report.shards_done += 1
+            report.elapsed = time.perf_counter() - start_time
+            return report
+
+        shards = ((i, shard) for i, shard in enumerate(self._iter_shards()))
+        if self.n_workers == 1:
+            for shard_index, shard in shards:
+                if shard_index in completed:
+                    report.rooms_skipped += len(shard)
+                    continue
+                yield finish(shard_index, _calculate_shard(shard_index * self.shard_size, shard, self.formula, self.materials_path))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+                pending = {}
+                try:
+                    for shard_index, shard in shards:
+                        if shard_index in completed:
+                            report.rooms_skipped += len(shard)
+                            continue
+                        # At most two shards per worker are held in memory
+                        while len(pending) >= 2 * self.n_workers:
+                            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                            for future in done:
+                                yield finish(pending.pop(future), future.result())
+                        future = executor.submit(_calculate_shard, shard_index * self.shard_size, shard, self.formula, self.materials_path)
+                        pending[future] = shard_index
+                    for future in concurrent.futures.as_completed(list(pending)):
+                        yield finish(pending.pop(future), future.result())
+                finally:
+                    for future in pending:
+                        future.cancel()
+        os.remove(self.checkpoint_path)
+        report.elapsed = time.perf_counter() - start_time
+        yield report
+
+    def run(self, resume=False):
+        """
+        Runs the batch, see iter_run.
+
+        Returns
+        -------
+        batch_report
+            The progress of the finished run.
+        """
+        report = batch_report()
+        for report in self.iter_run(resume):
+            pass
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project", help="the project directory or file (.csv, .json, .ndjson or .parquet)")
+    parser.add_argument("output", help="the results (.csv file or .parquet directory)")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes (default: number of CPUs)")
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--formula", default="sabine", choices=sorted(reverberation_formulas))
+    parser.add_argument("--materials", default=None, help="the material CSV file (default: materials.csv in the working directory)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run from its checkpoint")
+    args = parser.parse_args()
+
+    runner = batch_runner(args.project, args.output, args.workers, args.shard_size, args.formula, args.materials)
+    last_print = 0.0
+    report = None
+    for report in runner.iter_run(resume=args.resume):
+        if time.perf_counter() - last_print >= 1:
+            last_print = time.perf_counter()
+            print(f"{report.rooms_done + report.rooms_skipped:12d} rooms, {report.rooms_per_second:10.0f} rooms/s", file=sys.stderr)
+    if report is not None:
+        print(f"calculated {report.rooms_done} rooms in {report.elapsed:.2f} s ({report.rooms_per_second:.0f} rooms/s), "
+              f"{report.rooms_failed} failed DIN 18041, {report.rooms_invalid} invalid, {report.rooms_skipped} from the checkpoint; results in {runner.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+# States of a job, the last three are final
+job_states = ("queued", "running", "finished", "failed", "cancelled")
+
+_schema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    pid INTEGER,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+)
+"""
+
+
+def _connect(store_path):
+    # One short-lived connection per operation, so that processes and threads never share a connection
+    connection = sqlite3.connect(store_path, timeout=30, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def _update(store_path, job_id, **values):
+    with closing(_connect(store_path)) as connection:
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values.values(), job_id))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class job_cancelled(Exception):
+    """
+    Raised by job_context.check_cancelled inside a job whose cancellation was requested.
+    """
+
+
+class job_context:
+    """
+    Defines a "job_context" object that a job function receives as first argument to report its progress and to check for cancellation.
+
+    Progress updates are written to the job store at most every min_interval seconds, except for the final value 1.
+
+    Attributes
+    ----------
+    job_id : str
+        The id of the running job.
+    """
+
+    def __init__(self, store_path, job_id, min_interval=0.2):
+        self._store_path = store_path
+        self.job_id = job_id
+        self._min_interval = min_interval
+        self._last_update = 0.0
+
+    def set_progress(self, progress, message=""):
+        """
+        Reports the progress of the job.
+
+        Parameters
+        ----------
+        progress : float
+            The completed fraction of the job between 0 and 1.
+        message : str, optional
+            A short description of the current step (default is "").
+        """
+        now = time.monotonic()
+        if progress < 1 and now - self._last_update < self._min_interval:
+            return
+        self._last_update = now
+        _update(self._store_path, self.job_id, progress=min(max(float(progress), 0.0), 1.0), message=str(message))
+
+    def is_cancelled(self):
+        """
+        Returns True if the cancellation of the job was requested.
+        """
+        with closing(_connect(self._store_path)) as connection:
+            row = connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (self.job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    def check_cancelled(self):
+        """
+        Raises job_cancelled if the cancellation of the job was requested. Jobs call it between their steps.
+
+        Raises
+        ------
+        job_cancelled
+            If the cancellation of the job was requested.
+        """
+        if self.is_cancelled():
+            raise job_cancelled(self.job_id)
+
+
+def _run_job(store_path, job_id, function, args, kwargs):
+    # Runs a job in a worker process and records its outcome in the job store
+    context = job_context(store_path, job_id)
+    if context.is_cancelled():
+        _update(store_path, job_id, status="cancelled", finished=time.time())
+        return
+    _update(store_path, job_id, status="running", started=time.time(), pid=os.getpid())
+    try:
+        result = function(context, *args, **kwargs)
+        _update(store_path, job_id, status="finished", progress=1.0, result=json.dumps(result), finished=time.time())
+    except job_cancelled:
+        _update(store_path, job_id, status="cancelled", finished=time.time())
+    except Exception as e:
+        _update(store_path, job_id, status="failed", error=f"{type(e).__name__}: {e}", message=traceback.format_exc(limit=5), finished=time.time())
+
+
+class job_manager:
+    """
+    Defines a "job_manager" object that runs long calculations such as material optimizations in a local process pool, outside of the web requests.
+
+    Jobs are module-level functions that receive a job_context as first argument and return a JSON-serializable result. The state, progress and result of every job are kept in a SQLite file, so that all processes using the same file, e.g. the gunicorn workers of a deployment, can poll and cancel every job regardless of the process that started it.
+    Every job_manager runs at most max_workers jobs at once and accepts at most max_queued further jobs. Jobs that were queued or running in a process that no longer exists are marked as failed when a job_manager opens the store.
+    If a worker process dies, e.g. because it ran out of memory, the jobs of the pool fail and the next job starts a new pool.
+
+    Attributes
+    ----------
+    store_path : str
+        The path of the SQLite file of the job store.
+    max_workers : int
+        The maximum number of jobs running at once in this process.
+    max_queued : int
+        The maximum number of jobs of this process waiting for a free worker.
+    retention : float
+        The time in s after which finished, failed and cancelled jobs are removed from the store.
+    """
+
+    def __init__(self, store_path=None, max_workers=2, max_queued=8, retention=86400):
+        """
+        Initializes a job_manager object and creates the job store if necessary.
+
+        Parameters
+        ----------
+        store_path : str, optional
+            The path of the SQLite file (default is None, which uses ".jobs.sqlite" in the current working directory).
+        max_workers : int, optional
+            The maximum number of jobs running at once in this process (default is 2).
+        max_queued : int, optional
+            The maximum number of jobs of this process waiting for a free worker (default is 8).
+        retention : int or float, optional
+            The time in s after which finished, failed and cancelled jobs are removed from the store (default is 86400).
+
+        Raises
+        ------
+        ValueError
+            If max_workers is not a positive integer or max_queued is negative.
+        """
+        if not isinstance(max_workers, int) or max_workers <= 0:
+            raise ValueError("Max workers must be a positive integer.")
+        if not isinstance(max_queued, int) or max_queued < 0:
+            raise ValueError("Max queued must be a non-negative integer.")
+        self.store_path = os.path.abspath(store_path or os.path.join(os.getcwd(), ".jobs.sqlite"))
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        with closing(_connect(self.store_path)) as connection:
+            connection.execute(_schema)
+            # Jobs of processes that no longer exist never finish
+            for job_id, pid in connection.execute("SELECT id, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall():
+                if pid is not None and not _pid_alive(pid):
+                    connection.execute("UPDATE jobs SET status = 'failed', error = 'The job was interrupted.', finished = ? WHERE id = ?", (time.time(), job_id))
+
+    def submit(self, function, *args, name=None, **kwargs):
+        """
+        Starts a job in the process pool.
+
+        Parameters
+        ----------
+        function : callable
+            A module-level function, called as function(context, *args, **kwargs) with a job_context. It must return a JSON-serializable result.
+        *args, **kwargs
+            The picklable arguments of the function.
+        name : str, optional
+            A name of the job for display (default is None, which uses the name of the function).
+
+        Returns
+        -------
+        str
+            The id of the job.
+
+        Raises
+        ------
+        RuntimeError
+            If this job_manager already has max_workers running and max_queued waiting jobs, or the job could not be started.
+        """
+        with self._lock:
+            self._futures = {job_id: future for job_id, future in self._futures.items() if not future.done()}
+            if len(self._futures) >= self.max_workers + self.max_queued:
+                raise RuntimeError("Too many jobs, please wait until a job has finished.")
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            # The job is stored before it is submitted, a worker may start it at once
+            with closing(_connect(self.store_path)) as connection:
+                connection.execute("DELETE FROM jobs WHERE status IN ('finished', 'failed', 'cancelled') AND finished < ?", (now - self.retention,))
+                connection.execute("INSERT INTO jobs (id, name, status, pid, created) VALUES (?, ?, 'queued', ?, ?)",
+                                   (job_id, name or getattr(function, "__name__", "job"), os.getpid(), now))
+            try:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                executor = self._executor
+                future = executor.submit(_run_job, self.store_path, job_id, function, args, kwargs)
+            except BrokenProcessPool:
+                # A worker died before the pool noticed it, the job is submitted once more to a new pool
+                self._discard_executor(self._executor)
+                try:
+                    executor = self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    future = executor.submit(_run_job, self.store_path, job_id, function, args, kwargs)
+                except Exception as e:
+                    self._discard_executor(self._executor)
+                    _update(self.store_path, job_id, status="failed", error=f"{type(e).__name__}: {e}", finished=time.time())
+                    raise RuntimeError("The job could not be started, please try again.") from e
+            self._futures[job_id] = future
+        future.add_done_callback(lambda future: self._on_done(job_id, future, executor))
+        return job_id
+
+    def _discard_executor(self, executor):
+        # Forgets a broken pool, so that the next job starts a new one. The caller holds the lock.
+        if executor is not None and self._executor is executor:
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, job_id, future, executor):
+        # Jobs normally record their own outcome, this covers cancelled futures and crashed workers
+        if future.cancelled():
+            _update(self.store_path, job_id, status="cancelled", finished=time.time())
+        elif future.exception() is not None:
+            if isinstance(future.exception(), BrokenProcessPool):
+                with self._lock:
+                    self._discard_executor(executor)
+            _update(self.store_path, job_id, status="failed", error=f"{type(future.exception()).__name__}: {future.exception()}", finished=time.time())
+
+    def get_status(self, job_id):
+        """
+        Returns the state of a job.
+
+        Parameters
+        ----------
+        job_id : str
+            The id of the job.
+
+        Returns
+        -------
+        dict or None
+            The id, name, status (see job_states), progress, message, result, error and the times created, started and finished of the job, None if the job is unknown.
+        """
+        with closing(_connect(self.store_path)) as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        status = dict(row)
+        status["result"] = json.loads(status["result"]) if status["result"] is not None else None
+        del status["cancel_requested"], status["pid"]
+        return status
+
+    def cancel(self, job_id):
+        """
+        Requests the cancellation of a job. Queued jobs never start, running jobs stop at their next call of job_context.check_cancelled.
+
+        Parameters
+        ----------
+        job_id : str
+            The id of the job.
+
+        Returns
+        -------
+        bool
+            True if the job was queued or running, otherwise False.
+        """
+        with closing(_connect(self.store_path)) as connection:
+            cursor = connection.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')", (job_id,))
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return cursor.rowcount > 0
+
+    def wait(self, job_id, timeout=None, poll_interval=0.05):
+        """
+        Waits until a job is finished, failed or cancelled.
+
+        Parameters
+        ----------
+        job_id : str
+            The id of the job.
+        timeout : int or float, optional
+            The maximum waiting time in s (default is None, which waits without limit).
+        poll_interval : float, optional
+            The time in s between two lookups of the state (default is 0.05).
+
+        Returns
+        -------
+        dict or None
+            The state of the job, see get_status.
+
+        Raises
+        ------
+        TimeoutError
+            If the job is still queued or running after the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.get_status(job_id)
+            if status is None or status["status"] in job_states[2:]:
+                return status
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish within {timeout} s.")
+            time.sleep(poll_interval)
+
+    def shutdown(self, wait=True):
+        """
+        Stops the process pool. Queued jobs of this job_manager are cancelled.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            A flag indicating whether to wait for the running jobs (default is True).
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_managers = {}
+
+def get_job_manager(store_path=None):
+    """
+    Returns the shared job_manager object of this process for a job store.
+
+    The maximum number of concurrent jobs per process is read from the environment variable JOB_WORKERS (default is 2).
+
+    Parameters
+    ----------
+    store_path : str, optional
+        The path of the SQLite file (default is None, which uses the environment variable JOB_STORE or ".jobs.sqlite" in the current working directory).
+
+    Returns
+    -------
+    job_manager
+        The job manager of this process for the store.
+    """
+    store_path = os.path.abspath(store_path or os.environ.get("JOB_STORE") or os.path.join(os.getcwd(), ".jobs.sqlite"))
+    if store_path not in _managers:
+        _managers[store_path] = job_manager(store_path, max_workers=int(os.environ.get("JOB_WORKERS", 2)))
+    return _managers[store_path]
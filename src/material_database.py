@@ -1,7 +1,320 @@
 import numpy as np
 import pandas as pd
+import hashlib
+import json
 import os
 
+from src.spectral_index import spectral_index
+
+# Version of the binary cache layout, caches of other versions are rebuilt
+cache_version = 1
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    # SHA-256 of the file content, read in chunks
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write(path, write):
+    # Writes to a temporary file in the same directory and renames it, so readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class material_database:
+    """
+    Defines a "material_database" object that parses the material CSV file once into a binary cache and memory-maps it for all later loads.
+
+    The cache consists of the material names and the float64 absorption coefficient matrix as .npy files, named after the SHA-256 hash of the CSV content, and a small JSON file with the modification time, size and hash of the CSV it was built from.
+    Before every access the CSV is checked with a single os.stat call. If its modification time or size changed, the content hash decides whether the cache is reused or rebuilt.
+    All files are written atomically, so processes such as gunicorn workers can share one cache directory and the mapped pages of the operating system's page cache.
+
+    Attributes
+    ----------
+    csv_path : str
+        The path of the material CSV file, with the material name in the first column and one absorption coefficient column per octave band from 63 Hz to 8 kHz.
+    cache_dir : str
+        The directory of the binary cache.
+    columns : list of str
+        The column names of the CSV file.
+    names : np.ndarray
+        The names of all materials, memory-mapped.
+    coefficients : np.ndarray
+        The absorption coefficients of all materials, memory-mapped, shape (n_materials, 8).
+    sha256 : str
+        The SHA-256 hash of the CSV content the loaded cache was built from.
+    load_count : int
+        The number of times the cache was loaded by this object.
+    build_count : int
+        The number of times the CSV was parsed by this object.
+    """
+
+    def __init__(self, csv_path=None, cache_dir=None):
+        """
+        Initializes a material_database object and loads the cache, building it if necessary.
+
+        Parameters
+        ----------
+        csv_path : str, optional
+            The path of the material CSV file (default is None, which uses "materials.csv" in the current working directory).
+        cache_dir : str, optional
+            The directory of the binary cache (default is None, which uses ".material_cache" next to the CSV file).
+
+        Raises
+        ------
+        FileNotFoundError
+            If the CSV file does not exist.
+        """
+        if csv_path is None:
+            csv_path = os.path.join(os.getcwd(), "materials.csv")
+        self.csv_path = os.path.abspath(csv_path)
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(self.csv_path), ".material_cache")
+        self.cache_dir = cache_dir
+        self._stem = os.path.splitext(os.path.basename(self.csv_path))[0]
+        self._stat = None
+        self.load_count = 0
+        self.build_count = 0
+        self._load()
+
+    def __len__(self):
+        self.refresh()
+        return len(self.names)
+
+    def _meta_path(self):
+        return os.path.join(self.cache_dir, f"{self._stem}.meta.json")
+
+    def _data_paths(self, digest):
+        prefix = os.path.join(self.cache_dir, f"{self._stem}-{digest[:16]}")
+        return f"{prefix}.names.npy", f"{prefix}.coefficients.npy"
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("version") == cache_version else None
+
+    def _build(self, digest):
+        # Parses the CSV and writes the content-addressed .npy files, which are never modified afterwards
+        df = pd.read_csv(self.csv_path)
+        names = df.iloc[:, 0].astype(str).to_numpy(dtype=str)
+        coefficients = np.ascontiguousarray(df.iloc[:, [1, 2, 3, 4, 5, 6, 7, 8]].to_numpy(dtype=float))
+        names_path, coefficients_path = self._data_paths(digest)
+        _atomic_write(names_path, lambda f: np.save(f, names))
+        _atomic_write(coefficients_path, lambda f: np.save(f, coefficients))
+        self.build_count += 1
+        return [str(column) for column in df.columns[:9]]
+
+    def _load(self):
+        stat = os.stat(self.csv_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = self._read_meta()
+        if meta is not None and meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+            digest = meta["sha256"]
+        else:
+            digest = _file_hash(self.csv_path)
+        names_path, coefficients_path = self._data_paths(digest)
+        if meta is not None and meta["sha256"] == digest and os.path.exists(names_path) and os.path.exists(coefficients_path):
+            columns = meta["columns"]
+        else:
+            columns = self._build(digest)
+        if meta is None or (meta["sha256"], meta["mtime_ns"], meta["size"]) != (digest, stat.st_mtime_ns, stat.st_size):
+            new_meta = {"version": cache_version, "sha256": digest, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "columns": columns}
+            _atomic_write(self._meta_path(), lambda f: f.write(json.dumps(new_meta).encode("utf-8")))
+            if meta is not None and meta["sha256"] != digest:
+                # Processes that still map the old files keep their pages until they reload
+                for path in self._data_paths(meta["sha256"]):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        self.columns = columns
+        try:
+            names, coefficients = np.load(names_path, mmap_mode="r"), np.load(coefficients_path, mmap_mode="r")
+        except FileNotFoundError:
+            # Another process removed the files after the CSV changed again
+            self._build(digest)
+            names, coefficients = np.load(names_path, mmap_mode="r"), np.load(coefficients_path, mmap_mode="r")
+        self.names = names
+        self.coefficients = coefficients
+        self.sha256 = digest
+        self._name_index = None
+        self._spectral_index = None
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+        self.load_count += 1
+
+    def refresh(self):
+        """
+        Reloads the database if the modification time or size of the CSV file changed since the last load.
+
+        Returns
+        -------
+        bool
+            True if the database was reloaded.
+        """
+        stat = os.stat(self.csv_path)
+        if (stat.st_mtime_ns, stat.st_size) == self._stat:
+            return False
+        self._load()
+        return True
+
+    def get(self, idx):
+        """
+        Returns a material by its index in the CSV file.
+
+        Parameters
+        ----------
+        idx : int
+            The index of the material.
+
+        Returns
+        -------
+        tuple
+            The material name (str) and its absorption coefficients (np.ndarray).
+        """
+        self.refresh()
+        return str(self.names[idx]), np.array(self.coefficients[idx])
+
+    def get_index(self, name):
+        """
+        Returns the index of a material by its name.
+
+        Parameters
+        ----------
+        name : str
+            The name of the material. For duplicate names, the first material is returned.
+
+        Returns
+        -------
+        int
+            The index of the material.
+
+        Raises
+        ------
+        KeyError
+            If no material has this name.
+        """
+        self.refresh()
+        if self._name_index is None:
+            self._name_index = {}
+            for idx, material_name in enumerate(self.names.tolist()):
+                self._name_index.setdefault(material_name, idx)
+        return self._name_index[name]
+
+    def get_by_name(self, name):
+        """
+        Returns a material by its name.
+
+        Parameters
+        ----------
+        name : str
+            The name of the material.
+
+        Returns
+        -------
+        tuple
+            The material name (str) and its absorption coefficients (np.ndarray).
+
+        Raises
+        ------
+        KeyError
+            If no material has this name.
+        """
+        return self.get(self.get_index(name))
+
+    def get_many(self, indices):
+        """
+        Returns many materials by their indices in one step.
+
+        Parameters
+        ----------
+        indices : array_like of int
+            The indices of the materials.
+
+        Returns
+        -------
+        tuple
+            The material names (np.ndarray) and their absorption coefficients (np.ndarray) with one row per index.
+        """
+        self.refresh()
+        indices = np.asarray(indices, dtype=np.intp)
+        return self.names[indices], self.coefficients[indices]
+
+    def nearest(self, spectrum, k=5, min_bands=1):
+        """
+        Returns the materials whose absorption spectra are most similar to a target spectrum.
+
+        The distance is the root mean square difference over the bands known in both spectra. The spectral_index is built on first use and rebuilt after the database was reloaded.
+
+        Parameters
+        ----------
+        spectrum : array_like
+            The target absorption coefficients, one per octave band from 63 Hz to 8 kHz. Unknown bands are NaN and ignored.
+        k : int, optional
+            The number of materials (default is 5).
+        min_bands : int, optional
+            The minimum number of bands known in both spectra (default is 1).
+
+        Returns
+        -------
+        tuple
+            The indices of the materials (np.ndarray) and their distances (np.ndarray), closest first.
+        """
+        self.refresh()
+        if self._spectral_index is None:
+            self._spectral_index = spectral_index(self.coefficients)
+        return self._spectral_index.query(spectrum, k, min_bands)
+
+    def to_dataframe(self):
+        """
+        Returns the database as a pandas DataFrame with the columns of the CSV file.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per material.
+        """
+        self.refresh()
+        data = {self.columns[0]: self.names.tolist()}
+        data.update({column: self.coefficients[:, i] for i, column in enumerate(self.columns[1:])})
+        return pd.DataFrame(data)
+
+
+_databases = {}
+
+def get_material_database(csv_path=None):
+    """
+    Returns the shared material_database object of a CSV file, creating it on first use.
+
+    Parameters
+    ----------
+    csv_path : str, optional
+        The path of the material CSV file (default is None, which uses "materials.csv" in the current working directory).
+
+    Returns
+    -------
+    material_database
+        The material database of this process for the CSV file.
+    """
+    if csv_path is None:
+        csv_path = os.path.join(os.getcwd(), "materials.csv")
+    csv_path = os.path.abspath(csv_path)
+    if csv_path not in _databases:
+        _databases[csv_path] = material_database(csv_path)
+    return _databases[csv_path]
+
 def get_database_material(idx):
     """
     Retrieves the material name and absorption coefficients from a CSV file based on the given index.
@@ -18,10 +331,23 @@ def get_database_material(idx):
         A tuple containing the material name material_name (str) and an array of absorption coefficients abs_coeff (np.ndarray).
         The absorption coefficients are expected to be in the columns 1 to 8 of the CSV file.
     """
-
-    path = os.getcwd()
-    df = pd.read_csv(os.path.join(path, "materials.csv"))
-    material_name = df.iloc[idx, 0]
-    abs_coeff = df.iloc[idx, [1, 2, 3, 4, 5, 6, 7, 8]].to_numpy(dtype=float)
+    material_name, abs_coeff = get_material_database().get(idx)
 
     return material_name,abs_coeff
+
+def get_database_materials():
+    """
+    Retrieves the names and absorption coefficients of all materials from the CSV file "materials.csv" in the current working directory.
+
+    Returns
+    -------
+    tuple
+        A tuple containing an array of material names material_names (np.ndarray) and a matrix of absorption coefficients abs_coeff (np.ndarray) with one row per material.
+        The absorption coefficients are expected to be in the columns 1 to 8 of the CSV file.
+    """
+    database = get_material_database()
+    database.refresh()
+    material_names = np.array(database.names.tolist(), dtype=object)
+    abs_coeff = np.array(database.coefficients)
+
+    return material_names,abs_coeff
@@ -0,0 +1,367 @@
+"""
+Streaming import of manufacturer absorber catalogs into the material database.
+
+Run from the repository root:
+
+    python -m src.material_import catalog.csv --target materials.csv
+"""
+import argparse
+import csv
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.reverberation_calc import band_set, octave_bands, third_octave_bands
+
+# Names of the column holding the material name, compared case-insensitively
+name_columns = ("name", "material", "product", "product name", "bezeichnung", "produkt")
+
+# Default limit above which absorption coefficients are rejected as invalid. Measured values slightly above 1 are common and object absorbers such as seats, given per m² of floor, reach about 4
+max_absorption_coefficient = 5.0
+
+# Reasons for rejecting a catalog row, a row is counted under the first reason that applies
+rejection_reasons = ("no name", "no coefficients", "negative coefficient", "coefficient too large")
+
+_band_pattern = re.compile(r"^\D*?(\d+(?:[.,]\d+)?)\s*(k?)\s*(?:hz)?\s*$", re.IGNORECASE)
+
+
+def parse_band_column(column):
+    """
+    Returns the frequency of a band column name, e.g. 125 for "125", "125 Hz" or "alpha_125" and 1000 for "1k" or "1 kHz".
+
+    Parameters
+    ----------
+    column : str
+        The column name.
+
+    Returns
+    -------
+    float or None
+        The frequency in Hz, None if the column is not a band column.
+    """
+    match = _band_pattern.match(str(column).strip())
+    if match is None:
+        return None
+    frequency = float(match.group(1).replace(",", "."))
+    return frequency * 1000 if match.group(2) else frequency
+
+
+def detect_format(path, encoding="utf-8", sample_size=65536):
+    """
+    Detects the separator and the decimal mark of a CSV file from its beginning.
+
+    Parameters
+    ----------
+    path : str
+        The path of the CSV file.
+    encoding : str, optional
+        The encoding of the file (default is "utf-8").
+    sample_size : int, optional
+        The number of characters inspected (default is 65536).
+
+    Returns
+    -------
+    tuple
+        The separator (str) and the decimal mark (str).
+    """
+    with open(path, "r", encoding=encoding, newline="") as f:
+        sample = f.read(sample_size)
+    try:
+        sep = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        sep = ","
+    # Decimal commas are only possible if the comma does not separate the fields
+    body = sample.split("\n", 1)[-1]
+    decimal = "," if sep != "," and re.search(r"\d,\d", body) and not re.search(r"\d\.\d", body) else "."
+    return sep, decimal
+
+
+def content_hash(names, coefficients):
+    """
+    Returns a 64 bit hash of every material from its name and its absorption coefficients rounded to four decimals.
+
+    Parameters
+    ----------
+    names : array_like
+        The material names, shape (N,). Leading and trailing whitespace is ignored.
+    coefficients : array_like
+        The absorption coefficients, shape (N, n_bands). NaN values are hashed consistently.
+
+    Returns
+    -------
+    np.ndarray
+        The hashes, shape (N,), dtype uint64.
+    """
+    coefficients = np.round(np.asarray(coefficients, dtype=float), 4) + 0.0
+    frame = pd.DataFrame(coefficients)
+    frame.insert(0, "name", pd.Series(names, dtype=str).str.strip().to_numpy())
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class import_report:
+    """
+    Defines an "import_report" object with the running statistics of a material import.
+
+    Attributes
+    ----------
+    rows_read : int
+        The number of rows read from the catalog.
+    rows_imported : int
+        The number of materials appended to the material database.
+    rows_duplicate : int
+        The number of rows whose name and coefficients were already part of the database or of an earlier row.
+    rows_invalid : int
+        The number of rejected rows without a name, without any coefficient on the octave bands or with negative, infinite or too large coefficients.
+    rows_rejected : dict
+        The number of rejected rows by reason, see rejection_reasons.
+    chunks : int
+        The number of processed chunks.
+    elapsed : float
+        The run time of the import in s.
+    bands : band_set
+        The bands found in the catalog.
+    """
+
+    def __init__(self, bands):
+        self.rows_read = 0
+        self.rows_imported = 0
+        self.rows_duplicate = 0
+        self.rows_invalid = 0
+        self.rows_rejected = dict.fromkeys(rejection_reasons, 0)
+        self.chunks = 0
+        self.elapsed = 0.0
+        self.bands = bands
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"import_report(rows_read={self.rows_read}, rows_imported={self.rows_imported}, rows_duplicate={self.rows_duplicate}, "
+                f"rows_invalid={self.rows_invalid}, rows_per_second={self.rows_per_second:.0f})")
+
+
+class material_importer:
+    """
+    Defines a "material_importer" object that appends manufacturer catalogs to a material CSV file without loading the catalog or the material database as a whole.
+
+    The catalog is read in chunks of chunk_size rows. Every chunk is converted to the octave bands of the material class with band_set.convert, rounded to four decimals, validated with vectorized checks and deduplicated by content_hash against the materials already present.
+    The new materials are written to a copy of the material CSV file, which replaces the original atomically at the end, so that the material_database never sees a partial import and an interrupted import leaves the database unchanged.
+
+    Attributes
+    ----------
+    target : str
+        The path of the material CSV file the materials are appended to.
+    chunk_size : int
+        The number of catalog rows parsed at once.
+    max_absorption_coefficient : float
+        The largest accepted absorption coefficient.
+    """
+
+    def __init__(self, target=None, chunk_size=50000, max_absorption_coefficient=max_absorption_coefficient):
+        """
+        Initializes a material_importer object.
+
+        Parameters
+        ----------
+        target : str, optional
+            The path of the material CSV file (default is None, which uses "materials.csv" in the current working directory).
+        chunk_size : int, optional
+            The number of catalog rows parsed at once (default is 50000).
+        max_absorption_coefficient : int or float, optional
+            The largest accepted absorption coefficient, rows with larger values are rejected (default is 5, which accepts object absorbers such as the seats of materials.csv).
+
+        Raises
+        ------
+        ValueError
+            If the chunk size or the largest absorption coefficient is not positive.
+        """
+        if target is None:
+            target = os.path.join(os.getcwd(), "materials.csv")
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError("Chunk size must be a positive integer.")
+        if not isinstance(max_absorption_coefficient, (int, float)) or not max_absorption_coefficient > 0:
+            raise ValueError("Maximum absorption coefficient must be a positive value.")
+        self.target = target
+        self.chunk_size = chunk_size
+        self.max_absorption_coefficient = max_absorption_coefficient
+
+    def _known_hashes(self):
+        # Hashes of the materials already in the target, read chunk by chunk
+        known = set()
+        if not os.path.exists(self.target):
+            return known
+        for chunk in pd.read_csv(self.target, chunksize=self.chunk_size):
+            coefficients = chunk.iloc[:, 1:1 + len(octave_bands)].to_numpy(dtype=float)
+            known.update(content_hash(chunk.iloc[:, 0].astype(str).to_numpy(), coefficients).tolist())
+        return known
+
+    def _columns(self, path, sep, encoding, name_column):
+        header = pd.read_csv(path, sep=sep, encoding=encoding, nrows=0).columns.tolist()
+        frequencies = {column: parse_band_column(column) for column in header}
+        band_columns = sorted((column for column in header if frequencies[column] is not None), key=frequencies.get)
+        if not band_columns:
+            raise ValueError("The catalog has no band columns such as '125', '125 Hz' or '1 kHz'.")
+        band_frequencies = [frequencies[column] for column in band_columns]
+        if len(set(band_frequencies)) != len(band_frequencies):
+            raise ValueError("The catalog has more than one column for the same band.")
+        if name_column is None:
+            candidates = [column for column in header if str(column).strip().casefold() in name_columns]
+            others = [column for column in header if frequencies[column] is None]
+            if not candidates and not others:
+                raise ValueError("The catalog has no column with material names.")
+            name_column = candidates[0] if candidates else others[0]
+        elif name_column not in header:
+            raise ValueError(f"The catalog has no column {name_column!r}.")
+        # Catalogs on octave or third-octave bands use the exact band edges, others are treated as custom bands
+        if set(band_frequencies) <= set(octave_bands.nominal):
+            bands = band_set(band_frequencies, name="catalog", fraction=1)
+        elif set(band_frequencies) <= set(third_octave_bands.nominal):
+            bands = band_set(band_frequencies, name="catalog", fraction=3)
+        else:
+            bands = band_set(band_frequencies, name="catalog")
+        return name_column, band_columns, bands
+
+    def _validate(self, names, coefficients):
+        # Index of the first reason in rejection_reasons of every row, -1 for valid rows with a name and at least one octave band value, all values finite, non-negative and not too large
+        return np.select([names == "", np.isnan(coefficients).all(axis=1), (coefficients < 0).any(axis=1),
+                          (coefficients > self.max_absorption_coefficient).any(axis=1)], range(len(rejection_reasons)), -1)
+
+    def iter_import(self, path, name_column=None, sep=None, decimal=None, encoding="utf-8", method=None):
+        """
+        Imports a catalog chunk by chunk and yields the running import_report after every chunk.
+
+        Parameters
+        ----------
+        path : str
+            The path of the catalog CSV file.
+        name_column : str, optional
+            The column with the material names (default is None, which uses a column named e.g. "name", "material" or "product", else the first column that is not a band column).
+        sep : str, optional
+            The field separator (default is None, which detects it from the beginning of the file).
+        decimal : str, optional
+            The decimal mark, "." or "," (default is None, which detects it from the beginning of the file).
+        encoding : str, optional
+            The encoding of the catalog (default is "utf-8").
+        method : str, optional
+            The method of band_set.convert for catalogs on other bands than octave bands (default is None, which averages finer bands and interpolates coarser ones).
+
+        Yields
+        ------
+        import_report
+            The statistics of the import so far. The material database is only replaced after the last chunk.
+
+        Raises
+        ------
+        ValueError
+            If the catalog has no band columns or no name column.
+        """
+        start = time.perf_counter()
+        if sep is None or decimal is None:
+            detected_sep, detected_decimal = detect_format(path, encoding)
+            sep = detected_sep if sep is None else sep
+            decimal = detected_decimal if decimal is None else decimal
+        name_column, band_columns, bands = self._columns(path, sep, encoding, name_column)
+        report = import_report(bands)
+        known = self._known_hashes()
+
+        tmp_path = f"{self.target}.{os.getpid()}.tmp"
+        if os.path.exists(self.target):
+            shutil.copyfile(self.target, tmp_path)
+            with open(tmp_path, "rb+") as f:
+                # The appended rows must start on a new line
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+        else:
+            pd.DataFrame(columns=["name"] + [f"{f:g}" for f in octave_bands.nominal]).to_csv(tmp_path, index=False)
+        try:
+            reader = pd.read_csv(path, sep=sep, decimal=decimal, encoding=encoding, usecols=[name_column] + band_columns,
+                                 dtype={name_column: str}, keep_default_na=False, na_values=["", "nan", "NaN", "-", "n/a"],
+                                 chunksize=self.chunk_size)
+            for chunk in reader:
+                values = chunk[band_columns]
+                if decimal == "." and (values.dtypes == object).any():
+                    # Single values with decimal commas in an otherwise dotted catalog
+                    values = values.apply(lambda column: pd.to_numeric(column.astype(str).str.replace(",", ".", regex=False), errors="coerce"))
+                coefficients = values.to_numpy(dtype=float)
+                if bands != octave_bands:
+                    coefficients = bands.convert(coefficients, octave_bands, method=method)
+                # Four decimals are stored, which also keeps the float formatting of the CSV file short
+                coefficients = np.round(coefficients, 4)
+                names = chunk[name_column].fillna("").astype(str).str.strip().to_numpy()
+                reason = self._validate(names, coefficients)
+                valid = reason < 0
+                hashes = content_hash(names, coefficients)
+                new = np.zeros(len(chunk), dtype=bool)
+                for row in np.flatnonzero(valid).tolist():
+                    if hashes[row] not in known:
+                        known.add(hashes[row])
+                        new[row] = True
+                if new.any():
+                    rows = pd.DataFrame(coefficients[new], columns=[f"{f:g}" for f in octave_bands.nominal])
+                    rows.insert(0, "name", names[new])
+                    rows.to_csv(tmp_path, mode="a", header=False, index=False, na_rep="nan")
+                report.rows_read += len(chunk)
+                report.rows_invalid += int((~valid).sum())
+                for name, count in zip(rejection_reasons, np.bincount(reason[~valid], minlength=len(rejection_reasons)).tolist()):
+                    report.rows_rejected[name] += count
+                report.rows_imported += int(new.sum())
+                report.rows_duplicate += int(valid.sum() - new.sum())
+                report.chunks += 1
+                report.elapsed = time.perf_counter() - start
+                yield report
+            os.replace(tmp_path, self.target)
+            report.elapsed = time.perf_counter() - start
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def import_csv(self, path, name_column=None, sep=None, decimal=None, encoding="utf-8", method=None):
+        """
+        Imports a catalog and returns the final import_report, see iter_import.
+
+        Returns
+        -------
+        import_report
+            The statistics of the import.
+        """
+        report = None
+        for report in self.iter_import(path, name_column, sep, decimal, encoding, method):
+            pass
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("catalog", help="the catalog CSV file")
+    parser.add_argument("--target", default=None, help="the material CSV file (default: materials.csv in the working directory)")
+    parser.add_argument("--name-column", default=None)
+    parser.add_argument("--sep", default=None)
+    parser.add_argument("--decimal", default=None, choices=[".", ","])
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--max-absorption-coefficient", type=float, default=max_absorption_coefficient,
+                        help=f"the largest accepted absorption coefficient (default: {max_absorption_coefficient:g})")
+    args = parser.parse_args()
+
+    importer = material_importer(args.target, args.chunk_size, args.max_absorption_coefficient)
+    report = None
+    for report in importer.iter_import(args.catalog, args.name_column, args.sep, args.decimal, args.encoding):
+        print(f"{report.rows_read:12d} rows read, {report.rows_imported:10d} imported, "
+              f"{report.rows_duplicate:10d} duplicates, {report.rows_invalid:10d} invalid, {report.rows_per_second:10.0f} rows/s")
+    if report is not None:
+        print(f"bands of the catalog: {report.bands.describe()}")
+        for reason, count in report.rows_rejected.items():
+            if count:
+                print(f"rejected {count} rows: {reason}")
+        print(f"imported {report.rows_imported} materials into {importer.target} in {report.elapsed:.2f} s ({report.rows_per_second:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.reverberation_calc import room, material, surface, octave_bands, band_set, DIN_18041_limits, default_air_damp_cache, _surface_coefficient
+from src.material_database import get_database_materials
+
+
+def _score(Aeq, problem):
+    # Objective of one or many assignments from their Aeq (..., bands), see material_optimizer
+    return _score_reverberation_time(problem["K"] / (Aeq + problem["A_air"]), problem)
+
+
+def _score_reverberation_time(T, problem):
+    # Objective of one or many assignments from their reverberation time (..., bands)
+    mid = problem["T_mid"]
+    deviation = np.abs(T - mid) / mid
+    outside = (np.maximum(problem["T_lower_limit"] - T, 0) + np.maximum(T - problem["T_upper_limit"], 0)) / mid
+    return (deviation + problem["penalty"] * outside).mean(axis=-1)
+
+
+def _local_search(contrib, problem, n_restarts, max_sweeps, rng):
+    # Coordinate descent from n_restarts random assignments at once: for every surface all candidate
+    # materials of all restarts are evaluated as one (restarts, materials, bands) block
+    n_surfaces, n_materials, _ = contrib.shape
+    rows = np.arange(n_restarts)
+    assignment = rng.integers(0, n_materials, (n_restarts, n_surfaces))
+    Aeq = problem["base"] + contrib[np.arange(n_surfaces), assignment].sum(axis=1)
+    score = _score(Aeq, problem)
+    evaluated = n_restarts
+    for _ in range(max_sweeps):
+        improved = False
+        for s in rng.permutation(n_surfaces):
+            candidates = (Aeq - contrib[s, assignment[:, s]])[:, None, :] + contrib[s][None, :, :]
+            scores = _score(candidates, problem)
+            evaluated += scores.size
+            best = scores.argmin(axis=1)
+            best_score = scores[rows, best]
+            better = best_score < score - 1e-12
+            if better.any():
+                improved = True
+                assignment[better, s] = best[better]
+                Aeq[better] = candidates[rows[better], best[better]]
+                score[better] = best_score[better]
+        if not improved:
+            break
+    best = int(score.argmin())
+    return float(score[best]), assignment[best].copy(), evaluated
+
+
+def _search_task(shared_name, shape, problem, n_restarts, max_sweeps, seed):
+    # Runs one block of restarts in a worker process on the shared, read-only contribution matrix
+    shared = shared_memory.SharedMemory(name=shared_name)
+    try:
+        contrib = np.ndarray(shape, dtype=float, buffer=shared.buf)
+        contrib.flags.writeable = False
+        result = _local_search(contrib, problem, n_restarts, max_sweeps, np.random.default_rng(seed))
+        del contrib
+        return result
+    finally:
+        shared.close()
+
+
+class optimization_result:
+    """
+    Defines an "optimization_result" object that holds the best material assignment found by a material_optimizer.
+
+    Attributes
+    ----------
+    assignment : list of material
+        The material assigned to each surface of the optimizer, in the order of its surfaces.
+    indices : np.ndarray
+        The indices of the assigned materials in the candidate list for the free surfaces.
+    score : float
+        The value of the objective function, see material_optimizer.
+    reverberation_time : np.ndarray
+        The reverberation time in s for all frequency bands of the optimizer.
+    within_limits : bool
+        True if the reverberation time lies within the DIN 18041 limits in all evaluated frequency bands.
+    n_evaluated : int
+        The number of evaluated assignments up to this result.
+    elapsed : float
+        The time in s since the start of the search.
+    statistics : dict or None
+        The pruning statistics of material_optimizer.solve (None for heuristic searches).
+    """
+
+    def __init__(self, optimizer, indices, score, n_evaluated, elapsed, statistics=None):
+        self.optimizer = optimizer
+        self.statistics = statistics
+        self.indices = np.asarray(indices)
+        self.score = score
+        self.n_evaluated = n_evaluated
+        self.elapsed = elapsed
+        self.reverberation_time = optimizer.calculate_reverberation_time(self.indices)
+        self.assignment = optimizer.get_assignment(self.indices)
+        T = self.reverberation_time[optimizer.band_mask]
+        self.within_limits = bool(np.all((T >= optimizer.T_lower_limit[optimizer.band_mask]) & (T <= optimizer.T_upper_limit[optimizer.band_mask])))
+
+    def __repr__(self):
+        return f"optimization_result(score={self.score:.4g}, within_limits={self.within_limits}, n_evaluated={self.n_evaluated})"
+
+    def get_surfaces(self):
+        """
+        Returns new surface objects with the assigned materials. The surfaces of the optimizer are not changed.
+
+        Returns
+        -------
+        list of surface
+            The surfaces with the names, areas and axes of the optimizer surfaces and the assigned materials.
+        """
+        return [surface(calc_surface.get_surface_name(), calc_surface.get_area(), calc_material, axis=calc_surface.get_axis())
+                for calc_surface, calc_material in zip(self.optimizer.surfaces, self.assignment)]
+
+
+class material_optimizer:
+    r"""
+    Defines a "material_optimizer" object that searches material assignments for the surfaces of a room, so that the reverberation time lies within the tolerance range of DIN 18041 with minimal deviation from its center.
+
+    The reverberation time is calculated with the Sabine formula as in reverberation_time. Because Aeq is a sum over the surfaces, the contribution area $\cdot$ absorption coefficient of every candidate material on every free surface is precomputed once as a matrix of shape (surfaces, materials, bands), and an assignment is evaluated by summing one row per surface.
+
+    The objective of an assignment is
+
+    $$J = \frac{1}{N} \sum_b \frac{|T_b - T_{mid, b}| + p \cdot (\max(T_{lower, b} - T_b, 0) + \max(T_b - T_{upper, b}, 0))}{T_{mid, b}}$$
+
+    where $T_{mid, b}$ is the center of the tolerance range, $p$ is the penalty for leaving the range and the sum runs over the $N$ evaluated frequency bands.
+
+    The search is a coordinate descent from random assignments: all candidate materials of one surface are evaluated at once for a block of restarts, and blocks of restarts run in parallel worker processes that share the read-only contribution matrix. The search is a heuristic, see material_optimizer.iter_search; material_optimizer.solve finds the optimum by branch and bound.
+
+    Attributes
+    ----------
+    calc_room : room
+        The room for which the materials are optimized.
+    type : str
+        The room type according to DIN 18041.
+    surfaces : list of surface
+        The surfaces of the room.
+    fixed : list of surface
+        The surfaces that keep their material.
+    materials : list of material
+        The candidate materials for the free surfaces.
+    coefficients : np.ndarray
+        The absorption coefficients of the candidate materials on the calculation bands, one row per material.
+    bands : band_set
+        The frequency bands of the calculation.
+    band_mask : np.ndarray
+        A boolean mask of the evaluated frequency bands.
+    T_upper_limit : np.ndarray
+        The upper limit for the reverberation time in s according to DIN 18041.
+    T_lower_limit : np.ndarray
+        The lower limit for the reverberation time in s according to DIN 18041.
+    penalty : float
+        The weight of the distance outside the tolerance range in the objective.
+    statistics : dict
+        The pruning statistics of the last call of material_optimizer.solve.
+    """
+
+    def __init__(self, calc_room, type, surfaces, materials=None, fixed=None, air_damp_calc=True, bands=None, band_mask=None, penalty=10.0):
+        """
+        Initializes a material_optimizer object.
+
+        Parameters
+        ----------
+        calc_room : room
+            The room for which the materials are optimized, which is an instance of the room class.
+        type : str
+            The room type according to DIN 18041 (e.g., "A1", "B2"), see DIN_18041_limits.
+        surfaces : list of surface
+            The surfaces of the room.
+        materials : list of material, optional
+            The candidate materials for the free surfaces (default is None, which uses all materials of the material database "materials.csv").
+        fixed : list of surface, optional
+            Surfaces of the list surfaces that keep their material (default is None, which optimizes all surfaces).
+        air_damp_calc : bool, optional
+            A flag indicating whether air damping is considered in the calculation (default is True).
+        bands : band_set, optional
+            The frequency bands of the calculation (default is None, which uses octave_bands).
+        band_mask : array_like of bool, optional
+            The frequency bands in which the objective is evaluated (default is None, which uses all bands with DIN 18041 limits in which the coefficients of all candidate materials and fixed surfaces are defined).
+        penalty : int or float, optional
+            The weight of the distance outside the tolerance range in the objective (default is 10).
+
+        Raises
+        ------
+        TypeError
+            If the room, surfaces, materials or bands are not instances of their classes.
+        ValueError
+            If the surfaces or materials are empty, a fixed surface is not in the list of surfaces, no surface is free or no frequency band can be evaluated.
+        """
+        if not isinstance(calc_room, room):
+            raise TypeError("Room must be an instance of the room class.")
+        if not isinstance(surfaces, list) or not all(isinstance(calc_surface, surface) for calc_surface in surfaces):
+            raise TypeError("Surfaces must be a list of instances of the surface class.")
+        if len(surfaces) == 0:
+            raise ValueError("Surfaces list cannot be empty.")
+        if materials is None:
+            names, coefficients = get_database_materials()
+            materials = [material(str(name), coefficient.tolist()) for name, coefficient in zip(names, coefficients)]
+        if not isinstance(materials, list) or not all(isinstance(calc_material, material) for calc_material in materials):
+            raise TypeError("Materials must be a list of instances of the material class.")
+        if len(materials) == 0:
+            raise ValueError("Materials list cannot be empty.")
+        fixed = [] if fixed is None else list(fixed)
+        if not all(any(calc_surface is other for other in surfaces) for calc_surface in fixed):
+            raise ValueError("Fixed surfaces must be contained in the surfaces list.")
+        bands = octave_bands if bands is None else bands
+        if not isinstance(bands, band_set):
+            raise TypeError("Bands must be an instance of the band_set class.")
+        if not isinstance(penalty, (int, float)) or penalty < 0:
+            raise ValueError("Penalty must be a non-negative number.")
+
+        self.calc_room = calc_room
+        self.type = type
+        self.surfaces = surfaces
+        self.fixed = fixed
+        self.materials = materials
+        self.bands = bands
+        self.penalty = float(penalty)
+        self.statistics = {}
+        self._free = [i for i, calc_surface in enumerate(surfaces) if not any(calc_surface is other for other in fixed)]
+        if len(self._free) == 0:
+            raise ValueError("At least one surface must not be fixed.")
+
+        limits = DIN_18041_limits(calc_room, type, bands=bands)
+        self.T_upper_limit = np.asarray(limits.T_upper_limit, dtype=float)
+        self.T_lower_limit = np.asarray(limits.T_lower_limit, dtype=float)
+
+        volume = calc_room.get_volume()
+        self.K = 55.3 * volume / calc_room.get_c()
+        if air_damp_calc:
+            self.A_air = 4 * volume * default_air_damp_cache.get(bands.get_frequencies(), calc_room.get_temperature(), calc_room.get_rel_humidity(), calc_room.get_pressure())
+        else:
+            self.A_air = np.zeros(len(bands))
+
+        # contrib[s, j, b]: contribution of candidate material j on free surface s in band b
+        coefficients = np.array([calc_material.get_absorption_coefficient(bands) for calc_material in materials], dtype=float)
+        areas = np.array([surfaces[i].get_area() for i in self._free], dtype=float)
+        self.coefficients = coefficients
+        self.contrib = areas[:, None, None] * coefficients[None, :, :]
+        self.base = np.zeros(len(bands))
+        for calc_surface in fixed:
+            self.base = self.base + calc_surface.get_area() * np.asarray(_surface_coefficient(calc_surface, bands), dtype=float)
+
+        if band_mask is None:
+            band_mask = (np.isfinite(self.T_upper_limit) & np.isfinite(self.T_lower_limit) & (self.T_upper_limit > 0)
+                         & np.isfinite(coefficients).all(axis=0) & np.isfinite(self.base))
+        band_mask = np.asarray(band_mask, dtype=bool)
+        if band_mask.shape != (len(bands),):
+            raise ValueError(f"Band mask must contain exactly {len(bands)} values for the frequency bands {bands.describe()}.")
+        if not band_mask.any():
+            raise ValueError("No frequency band with DIN 18041 limits in which all candidate materials are defined.")
+        self.band_mask = band_mask
+
+    def _problem(self):
+        # The arrays of the objective restricted to the evaluated bands, small enough to be sent to every worker
+        mask = self.band_mask
+        return {
+            "K": self.K,
+            "A_air": self.A_air[mask],
+            "base": self.base[mask],
+            "T_upper_limit": self.T_upper_limit[mask],
+            "T_lower_limit": self.T_lower_limit[mask],
+            "T_mid": (self.T_upper_limit[mask] + self.T_lower_limit[mask]) / 2,
+            "penalty": self.penalty,
+        }
+
+    def calculate_reverberation_time(self, indices):
+        """
+        Calculates the reverberation time in s of an assignment in all frequency bands.
+
+        Parameters
+        ----------
+        indices : array_like of int
+            The indices of the candidate materials for the free surfaces.
+
+        Returns
+        -------
+        np.ndarray
+            The reverberation time in s for the frequency bands.
+        """
+        indices = np.asarray(indices)
+        Aeq = self.base + self.contrib[np.arange(len(self._free)), indices].sum(axis=0)
+        return self.K / (Aeq + self.A_air)
+
+    def get_assignment(self, indices):
+        """
+        Returns the materials of an assignment for all surfaces.
+
+        Parameters
+        ----------
+        indices : array_like of int
+            The indices of the candidate materials for the free surfaces.
+
+        Returns
+        -------
+        list of material
+            The material of each surface; fixed surfaces keep their material.
+        """
+        assignment = [calc_surface.get_material() for calc_surface in self.surfaces]
+        for i, j in zip(self._free, indices):
+            assignment[i] = self.materials[int(j)]
+        return assignment
+
+    def iter_search(self, n_restarts=256, block_size=32, max_sweeps=20, n_workers=None, seed=None):
+        """
+        Searches material assignments and yields every improvement of the best assignment as soon as its block of restarts is finished.
+
+        Stopping the iteration early cancels the pending blocks, so the generator can be used with a time budget or until the first result within the limits.
+
+        Parameters
+        ----------
+        n_restarts : int, optional
+            The number of random start assignments (default is 256).
+        block_size : int, optional
+            The number of restarts evaluated together in one vectorized block and worker task (default is 32).
+        max_sweeps : int, optional
+            The maximum number of passes over all surfaces per block (default is 20).
+        n_workers : int, optional
+            The number of worker processes (default is None, which uses the number of CPUs). With 1 worker the search runs in the calling process.
+        seed : int, optional
+            The seed of the random start assignments (default is None).
+
+        Yields
+        ------
+        optimization_result
+            The best assignment found so far.
+        """
+        if n_restarts < 1 or block_size < 1:
+            raise ValueError("Number of restarts and block size must be positive.")
+        start = time.perf_counter()
+        problem = self._problem()
+        contrib = np.ascontiguousarray(self.contrib[:, :, self.band_mask])
+        sizes = [min(block_size, n_restarts - i) for i in range(0, n_restarts, block_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        n_workers = (os.cpu_count() or 1) if n_workers is None else n_workers
+        best_score = np.inf
+        n_evaluated = 0
+
+        if n_workers == 1 or len(sizes) == 1:
+            for size, block_seed in zip(sizes, seeds):
+                score, indices, evaluated = _local_search(contrib, problem, size, max_sweeps, np.random.default_rng(block_seed))
+                n_evaluated += evaluated
+                if score < best_score:
+                    best_score = score
+                    yield optimization_result(self, indices, score, n_evaluated, time.perf_counter() - start)
+            return
+
+        shared = shared_memory.SharedMemory(create=True, size=contrib.nbytes)
+        executor = ProcessPoolExecutor(max_workers=min(n_workers, len(sizes)))
+        try:
+            np.ndarray(contrib.shape, dtype=float, buffer=shared.buf)[...] = contrib
+            futures = [executor.submit(_search_task, shared.name, contrib.shape, problem, size, max_sweeps, block_seed)
+                       for size, block_seed in zip(sizes, seeds)]
+            for future in as_completed(futures):
+                score, indices, evaluated = future.result()
+                n_evaluated += evaluated
+                if score < best_score:
+                    best_score = score
+                    yield optimization_result(self, indices, score, n_evaluated, time.perf_counter() - start)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            shared.close()
+            shared.unlink()
+
+    def search(self, n_restarts=256, block_size=32, max_sweeps=20, n_workers=None, seed=None):
+        """
+        Searches material assignments and returns the best one, see material_optimizer.iter_search.
+
+        Returns
+        -------
+        optimization_result
+            The best assignment found.
+        """
+        result = None
+        for result in self.iter_search(n_restarts, block_size, max_sweeps, n_workers, seed):
+            pass
+        return result
+
+
+    def solve(self, time_budget=None, gap=0.0, within_limits=True, initial_restarts=64, seed=None):
+        """
+        Searches the assignment with the minimal objective by branch and bound.
+
+        The free surfaces are assigned one after another in the order of decreasing area. Aeq is a sum of non-negative contributions, so the unassigned surfaces add at least the sum of their smallest and at most the sum of their largest contributions in every band. This bounds the reverberation time of all completions of a partial assignment to an interval per band. Since the objective of a band is smallest at the center of the tolerance range, evaluating it at the center clipped to the interval bounds the objective of all completions from below. Subtrees whose bound is not below the best objective found so far are pruned, as well as subtrees whose interval misses the tolerance range in a band if within_limits is set.
+
+        The bounds of all candidate materials of a surface are calculated in one vectorized step and visited in the order of their bounds, and the candidates of the last surface are evaluated for all open partial assignments in one step. Candidate materials with equal coefficients and surfaces with equal areas are only enumerated once.
+
+        Parameters
+        ----------
+        time_budget : int or float, optional
+            The maximum run time in s (default is None, which searches until the optimum is proven). If the budget is exceeded, the best assignment found so far is returned.
+        gap : int or float, optional
+            The absolute tolerance of the objective; subtrees that cannot improve the best objective by more than gap are pruned (default is 0, which finds the exact optimum).
+        within_limits : bool, optional
+            A flag indicating whether only assignments within the DIN 18041 limits in all evaluated bands are accepted (default is True).
+        initial_restarts : int, optional
+            The number of restarts of the heuristic search, see material_optimizer.search, that provides the initial best assignment (default is 64, 0 starts without an initial assignment).
+        seed : int, optional
+            The seed of the initial heuristic search (default is None).
+
+        Returns
+        -------
+        optimization_result or None
+            The best assignment found, or None if no assignment was found, e.g. if no assignment is within the limits. The pruning statistics are stored in the attribute statistics of the optimizer and of the result: the number of bounded partial assignments (nodes), pruned subtrees (pruned) and evaluated complete assignments (leaves), the elapsed time and whether the optimum is proven, i.e. the search finished within the time budget.
+        """
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError("Time budget must be positive.")
+        if gap < 0:
+            raise ValueError("Gap must be non-negative.")
+        start = time.perf_counter()
+        problem = self._problem()
+        K, A_air, T_mid = problem["K"], problem["A_air"], problem["T_mid"]
+        T_lower_limit, T_upper_limit = problem["T_lower_limit"], problem["T_upper_limit"]
+
+        def bound_of(T_min, T_max):
+            bound = _score_reverberation_time(np.clip(T_mid, T_min, T_max), problem)
+            if within_limits:
+                bound[np.any((T_max < T_lower_limit) | (T_min > T_upper_limit), axis=-1)] = np.inf
+            return bound
+
+        # Candidates with equal coefficients in the evaluated bands give equal results
+        _, candidates = np.unique(self.coefficients[:, self.band_mask], axis=0, return_index=True)
+        candidates = np.sort(candidates)
+        areas = np.array([self.surfaces[i].get_area() for i in self._free], dtype=float)
+        order = np.argsort(-areas, kind="stable")
+        contrib = self.contrib[order][:, candidates][:, :, self.band_mask]
+        n_surfaces, n_candidates, n_bands = contrib.shape
+        # Consecutive surfaces with equal areas are interchangeable, so their candidates are enumerated in non-decreasing order
+        symmetric = np.zeros(n_surfaces + 1, dtype=bool)
+        symmetric[1:n_surfaces] = areas[order][1:] == areas[order][:-1]
+        suffix_lo = np.zeros((n_surfaces + 1, n_bands))
+        suffix_hi = np.zeros((n_surfaces + 1, n_bands))
+        for k in range(n_surfaces - 1, -1, -1):
+            suffix_lo[k] = suffix_lo[k + 1] + contrib[k].min(axis=0)
+            suffix_hi[k] = suffix_hi[k + 1] + contrib[k].max(axis=0)
+
+        best_score, best_indices = np.inf, None
+        n_evaluated = 0
+        if initial_restarts > 0:
+            initial = self.search(n_restarts=initial_restarts, n_workers=1, seed=seed)
+            n_evaluated = initial.n_evaluated
+            if initial.within_limits or not within_limits:
+                best_score, best_indices = initial.score, initial.indices
+        statistics = {"nodes": 0, "pruned": 0, "leaves": 0, "initial_score": best_score}
+        path = np.zeros(n_surfaces, dtype=int)
+        timed_out = False
+
+        def improve(score):
+            nonlocal best_score, best_indices
+            best_score = float(score)
+            best_indices = np.empty(n_surfaces, dtype=int)
+            best_indices[order] = candidates[path]
+
+        def branch(k, Aeq, lower_index):
+            nonlocal timed_out
+            if time_budget is not None and time.perf_counter() - start > time_budget:
+                timed_out = True
+                return
+            children = Aeq + contrib[k]
+            bound = bound_of(K / (children + suffix_hi[k + 1] + A_air), K / (children + suffix_lo[k + 1] + A_air))
+            bound[:lower_index] = np.inf
+            statistics["nodes"] += n_candidates - lower_index
+            if k == n_surfaces - 2:
+                # The children are complete up to the last surface, whose candidates are evaluated for all open children at once
+                open_children = np.flatnonzero(bound < best_score - gap)
+                statistics["pruned"] += n_candidates - lower_index - len(open_children)
+                if len(open_children) == 0:
+                    return
+                T = K / (children[open_children, None, :] + contrib[k + 1][None, :, :] + A_air)
+                scores = bound_of(T, T)
+                if symmetric[k + 1]:
+                    scores[np.arange(n_candidates)[None, :] < open_children[:, None]] = np.inf
+                statistics["leaves"] += scores.size
+                i, j = np.unravel_index(scores.argmin(), scores.shape)
+                if scores[i, j] < best_score - gap:
+                    path[k], path[k + 1] = open_children[i], j
+                    improve(scores[i, j])
+                return
+            ranking = np.argsort(bound, kind="stable")
+            for position, j in enumerate(ranking[:n_candidates - lower_index]):
+                if bound[j] >= best_score - gap:
+                    statistics["pruned"] += n_candidates - lower_index - position
+                    return
+                path[k] = j
+                if k == n_surfaces - 1:
+                    # A single free surface: the bound of a complete assignment is its objective
+                    statistics["leaves"] += 1
+                    improve(bound[j])
+                else:
+                    branch(k + 1, children[j], j if symmetric[k + 1] else 0)
+                    if timed_out:
+                        return
+
+        branch(0, problem["base"], 0)
+        statistics["elapsed"] = time.perf_counter() - start
+        statistics["proven_optimal"] = not timed_out
+        statistics["evaluated"] = statistics["nodes"] + statistics["leaves"] + n_evaluated
+        self.statistics = statistics
+        if best_indices is None:
+            return None
+        return optimization_result(self, best_indices, best_score, statistics["evaluated"], statistics["elapsed"], statistics=statistics)
@@ -0,0 +1,350 @@
+import math
+import re
+import unicodedata
+
+import numpy as np
+
+from src.material_database import get_material_database
+
+
+def normalize(text):
+    """
+    Normalizes a text for searching: accents are removed, the text is case folded and every run of non-alphanumeric characters becomes a single space.
+
+    Parameters
+    ----------
+    text : str
+        The text to normalize.
+
+    Returns
+    -------
+    str
+        The normalized text.
+    """
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"[^\W_]+", text.casefold()))
+
+
+def _trigram_codes(normalized, prefix=False):
+    # Trigrams of normalized texts as uint64 codes of three 21 bit code points, with the row of every trigram.
+    # Every word is padded with two spaces in front and at least one behind, a prefix query leaves out the
+    # trailing space of its last word so that "conc" matches all trigrams of "concrete".
+    padded = np.char.add("  ", np.char.replace(np.asarray(normalized, dtype=str), " ", "  "))
+    if not prefix:
+        padded = np.char.add(padded, " ")
+    chars = padded.view(np.uint32).reshape(len(padded), -1).astype(np.uint64)
+    codes = (chars[:, :-2] << np.uint64(42)) | (chars[:, 1:-1] << np.uint64(21)) | chars[:, 2:]
+    # Shorter texts are zero padded to the longest one
+    valid = chars[:, 2:] != 0
+    rows = np.broadcast_to(np.arange(len(padded))[:, np.newaxis], codes.shape)[valid]
+    return rows, codes[valid]
+
+
+class trigram_index:
+    """
+    Defines a "trigram_index" object for ranked fuzzy search over a list of names.
+
+    Every name is split into padded word trigrams, and the indices of all names containing a trigram are stored as one posting list.
+    The trigrams are extracted for all names at once with NumPy and the posting lists are kept in one array with offsets.
+    A query only touches the posting lists of its own trigrams. The shared trigrams of all names are counted in one np.bincount, and the names are ranked by:
+
+    1. names starting with the query,
+    2. names containing the query,
+    3. the trigram similarity $|Q \\cap N| / |Q \\cup N|$, which tolerates typos and word order.
+
+    Attributes
+    ----------
+    names : list of str
+        The indexed names.
+    """
+
+    def __init__(self, names):
+        """
+        Initializes a trigram_index object and builds the posting lists.
+
+        Parameters
+        ----------
+        names : sequence of str
+            The names to index.
+        """
+        self.names = [str(name) for name in names]
+        self._normalized = np.array([normalize(name) for name in self.names], dtype=str)
+        rows, codes = _trigram_codes(self._normalized) if self.names else (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.uint64))
+        # The trigrams are generated row by row, so a stable sort keeps the rows of every trigram ascending
+        order = np.argsort(codes, kind="stable")
+        rows, codes = rows[order], codes[order]
+        new_gram = np.ones(len(codes), dtype=bool)
+        new_gram[1:] = codes[1:] != codes[:-1]
+        # Every trigram is counted once per name
+        first = new_gram.copy()
+        first[1:] |= rows[1:] != rows[:-1]
+        rows, codes, new_gram = rows[first], codes[first], new_gram[first]
+        starts = np.flatnonzero(new_gram)
+        self._grams = codes[starts]
+        self._offsets = np.append(starts, len(codes))
+        self._postings = rows.astype(np.int32)
+        self._n_grams = np.bincount(rows, minlength=len(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, limit=None, min_score=0.1):
+        """
+        Returns the names matching a query, best match first.
+
+        Parameters
+        ----------
+        query : str
+            The search text. The last word may be unfinished.
+        limit : int, optional
+            The maximum number of results (default is None, which returns all matches).
+        min_score : float, optional
+            The minimum score of a result, where a trigram similarity of 1 equals an identical set of trigrams (default is 0.1).
+
+        Returns
+        -------
+        tuple
+            The indices of the matching names (np.ndarray) and their scores (np.ndarray), sorted by descending score and ascending index.
+            An empty query matches every name with a score of 0.
+        """
+        text = normalize(query)
+        if not text:
+            indices = np.arange(len(self.names))[:limit]
+            return indices, np.zeros(len(indices))
+        grams = np.unique(_trigram_codes([text], prefix=True)[1])
+        position = np.searchsorted(self._grams, grams)
+        found = position < len(self._grams)
+        found[found] = self._grams[position[found]] == grams[found]
+        position = position[found]
+        if not len(position):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        postings = [self._postings[self._offsets[i]:self._offsets[i + 1]] for i in position]
+        counts = np.bincount(np.concatenate(postings), minlength=len(self.names))
+        candidates = np.flatnonzero(counts)
+        shared = counts[candidates]
+        similarity = shared / (len(grams) + self._n_grams[candidates] - shared)
+        normalized = self._normalized[candidates]
+        score = similarity + np.char.startswith(normalized, text) + 0.5 * (np.char.find(normalized, text) >= 0)
+        keep = score >= min_score
+        candidates, score = candidates[keep], score[keep]
+        order = np.lexsort((candidates, -score))[:limit]
+        return candidates[order], score[order]
+
+
+# Operators of the DataTable filter syntax, with and without the "s" (case sensitive) and "i" (case insensitive) prefixes
+_filter_operators = {
+    "=": "eq", "eq": "eq", "!=": "ne", "ne": "ne",
+    "<": "lt", "lt": "lt", "<=": "le", "le": "le",
+    ">": "gt", "gt": "gt", ">=": "ge", "ge": "ge",
+    "contains": "contains",
+}
+
+_filter_pattern = re.compile(r"\{(?P<column>[^}]+)\}\s+(?P<operator>\S+)\s+(?P<value>.+)")
+
+
+def parse_filter_query(filter_query):
+    """
+    Splits the filter_query of a Dash DataTable into its single conditions.
+
+    Parameters
+    ----------
+    filter_query : str
+        The filter query, e.g. '{name} icontains plaster && {500} >= 0.5'.
+
+    Returns
+    -------
+    list of tuple
+        The conditions as (column, operator, value) with the operators "eq", "ne", "lt", "le", "gt", "ge" or "contains".
+        Values are converted to float where possible, quotes are removed.
+
+    Raises
+    ------
+    ValueError
+        If a condition cannot be parsed or uses an unsupported operator.
+    """
+    conditions = []
+    for part in filter_query.split(" && ") if filter_query else []:
+        match = _filter_pattern.fullmatch(part.strip())
+        if match is None:
+            raise ValueError(f"Filter condition {part!r} cannot be parsed.")
+        operator = match["operator"]
+        if operator not in _filter_operators and operator[:1] in ("s", "i"):
+            operator = operator[1:]
+        if operator not in _filter_operators:
+            raise ValueError(f"Filter operator {match['operator']!r} is not supported.")
+        value = match["value"].strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+        else:
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        conditions.append((match["column"], _filter_operators[operator], value))
+    return conditions
+
+
+class material_search:
+    """
+    Defines a "material_search" object that answers paged, filtered and sorted queries on a material_database, e.g. for a DataTable with page_action='custom'.
+
+    The trigram_index is rebuilt whenever the database was reloaded from a changed CSV file.
+
+    Attributes
+    ----------
+    database : material_database
+        The searched material database.
+    index : trigram_index
+        The index over the material names.
+    """
+
+    def __init__(self, database):
+        """
+        Initializes a material_search object.
+
+        Parameters
+        ----------
+        database : material_database
+            The material database to search.
+        """
+        self.database = database
+        self.index = None
+        self._sha256 = None
+
+    def _refresh(self):
+        self.database.refresh()
+        if self._sha256 != self.database.sha256:
+            self.index = trigram_index(self.database.names.tolist())
+            self._sha256 = self.database.sha256
+
+    def _filter(self, indices, conditions):
+        names_column, band_columns = self.database.columns[0], self.database.columns[1:]
+        for column, operator, value in conditions:
+            if column == names_column:
+                names = self.index._normalized[indices]
+                text = normalize(f"{value:g}" if isinstance(value, float) else value)
+                if operator == "contains":
+                    mask = np.char.find(names, text) >= 0
+                elif operator in ("eq", "ne"):
+                    mask = (names == text) == (operator == "eq")
+                else:
+                    raise ValueError(f"Operator {operator!r} is not supported for the column {column!r}.")
+            elif column in band_columns:
+                if not isinstance(value, float):
+                    raise ValueError(f"The filter value of the column {column!r} must be a number.")
+                values = self.database.coefficients[indices, band_columns.index(column)]
+                mask = {
+                    "eq": np.equal, "ne": np.not_equal, "lt": np.less, "le": np.less_equal, "gt": np.greater, "ge": np.greater_equal,
+                    "contains": np.equal,
+                }[operator](values, value)
+            else:
+                raise ValueError(f"Column {column!r} is not part of the material database.")
+            indices = indices[mask]
+        return indices
+
+    def _sort(self, indices, sort_by):
+        names_column, band_columns = self.database.columns[0], self.database.columns[1:]
+        # The last sort key is applied first, stable sorts keep its order for ties of the earlier keys
+        for sort in reversed(sort_by):
+            column, descending = sort["column_id"], sort.get("direction") == "desc"
+            if column == names_column:
+                names = self.index._normalized[indices]
+                if descending:
+                    # Sorting the reversed names keeps ties in their previous order
+                    order = len(names) - 1 - np.argsort(names[::-1], kind="stable")[::-1]
+                else:
+                    order = np.argsort(names, kind="stable")
+            elif column in band_columns:
+                values = self.database.coefficients[indices, band_columns.index(column)]
+                # Missing values are always sorted last
+                order = np.argsort(-values if descending else values, kind="stable")
+            else:
+                raise ValueError(f"Column {column!r} is not part of the material database.")
+            indices = indices[order]
+        return indices
+
+    def query(self, text="", filter_query="", sort_by=None, page_current=0, page_size=20, spectrum=None, n_similar=50):
+        """
+        Searches, filters, sorts and pages the material database.
+
+        Parameters
+        ----------
+        text : str, optional
+            The fuzzy search text for the material names, results are ranked by relevance unless sort_by is given (default is "").
+        filter_query : str, optional
+            The filter_query of the DataTable, see parse_filter_query (default is "").
+        sort_by : list of dict, optional
+            The sort_by of the DataTable with the keys "column_id" and "direction" (default is None, which keeps the relevance or database order).
+        page_current : int, optional
+            The index of the requested page (default is 0).
+        page_size : int, optional
+            The number of rows per page (default is 20).
+        spectrum : array_like, optional
+            A target absorption spectrum. If given, only the n_similar materials with the most similar spectra are searched, closest first (default is None).
+        n_similar : int, optional
+            The number of similar materials for a spectrum (default is 50).
+
+        Returns
+        -------
+        tuple
+            The rows of the requested page as records (list of dict) with the column names of the CSV file and the total number of matching materials (int).
+        """
+        self._refresh()
+        indices, _ = self.index.search(text or "")
+        if spectrum is not None:
+            similar, _ = self.database.nearest(spectrum, n_similar)
+            indices = similar[np.isin(similar, indices)] if text else similar
+        indices = self._filter(indices, parse_filter_query(filter_query))
+        if sort_by:
+            indices = self._sort(indices, sort_by)
+        start = max(int(page_current or 0), 0) * page_size
+        names, coefficients = self.database.get_many(indices[start:start + page_size])
+        names_column, band_columns = self.database.columns[0], self.database.columns[1:]
+        records = [
+            {names_column: name, **dict(zip(band_columns, row))}
+            for name, row in zip(names.tolist(), coefficients.tolist())
+        ]
+        return records, len(indices)
+
+    def get_page_count(self, total, page_size=20):
+        """
+        Returns the number of pages for a number of results, at least 1.
+
+        Parameters
+        ----------
+        total : int
+            The number of results.
+        page_size : int, optional
+            The number of rows per page (default is 20).
+
+        Returns
+        -------
+        int
+            The number of pages.
+        """
+        return max(math.ceil(total / page_size), 1)
+
+
+_searches = {}
+
+def get_material_search(csv_path=None):
+    """
+    Returns the shared material_search object of the material database of a CSV file.
+
+    Parameters
+    ----------
+    csv_path : str, optional
+        The path of the material CSV file (default is None, which uses "materials.csv" in the current working directory).
+
+    Returns
+    -------
+    material_search
+        The material search of this process for the CSV file.
+    """
+    database = get_material_database(csv_path)
+    if database.csv_path not in _searches:
+        _searches[database.csv_path] = material_search(database)
+    return _searches[database.csv_path]
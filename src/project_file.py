@@ -0,0 +1,313 @@
+import datetime
+import json
+import os
+import tempfile
+import uuid
+
+import numpy as np
+
+from src.reverberation_calc import octave_bands
+from src.room_io import room_definition
+from src.material_database import get_material_database
+
+project_format = "raumakustik-project"
+schema_version = 1
+
+# Functions that upgrade the manifest of an older schema version to the next version, by version
+_migrations = {}
+
+# Arrays of a project, the room arrays have one entry per room, the surface arrays one per surface
+room_arrays = ("room_id", "volume", "height", "temperature", "rel_humidity", "pressure", "type", "air_damping", "surface_start")
+surface_arrays = ("surface_name", "area", "absorption_coefficient", "material", "axis")
+
+
+def _atomic_write(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_project(path, rooms, name="", database=None):
+    """
+    Writes rooms into a project directory, replacing its earlier content.
+
+    The project consists of a JSON manifest and one .npy file per column, see project_file. The arrays are written first and the manifest last, each atomically, so readers see either the old or the new project. The column files listed in the old manifest are removed afterwards, readers that mapped them keep their data. Other files in the directory are kept.
+
+    Parameters
+    ----------
+    path : str
+        The project directory, created if necessary. It must be empty or hold a project.
+    rooms : iterable of dict
+        The rooms in the format of room_io.room_definition. Surfaces may have a name. A material given by its name or index is stored as a reference together with its absorption coefficients from the material database, so the project does not change if the database changes.
+    name : str, optional
+        The name of the project (default is "").
+    database : material_database, optional
+        The material database for surfaces with a material (default is None, which uses get_material_database() on first use).
+
+    Returns
+    -------
+    project_file
+        The written project.
+
+    Raises
+    ------
+    ValueError
+        If a room is invalid, the message names the room, or if the directory is not empty and holds no project.
+    """
+    columns = {column: [] for column in room_arrays + surface_arrays}
+    material_names = {}
+    surface_start = 0
+    for index, definition in enumerate(rooms):
+        try:
+            calc_room = room_definition(definition, database)
+        except ValueError as e:
+            raise ValueError(f"Room {index}: {e}") from None
+        coefficients = calc_room.absorption_coefficient
+        has_material = calc_room.material_index >= 0
+        if has_material.any():
+            database = get_material_database() if database is None else database
+            coefficients[has_material] = database.get_many(calc_room.material_index[has_material])[1]
+        for surface, material_index in zip(definition["surfaces"], calc_room.material_index):
+            material = surface.get("material")
+            if material_index >= 0:
+                material = database.get(int(material_index))[0]
+            material = material if isinstance(material, str) else None
+            columns["surface_name"].append(str(surface.get("name") or ""))
+            columns["material"].append(-1 if not material else material_names.setdefault(material, len(material_names)))
+        columns["room_id"].append("" if calc_room.id is None else str(calc_room.id))
+        for column in ("volume", "height", "temperature", "rel_humidity", "type", "air_damping"):
+            columns[column].append(getattr(calc_room, column))
+        columns["pressure"].append(calc_room.pressure * 10) # Convert kPa to hPa
+        columns["surface_start"].append(surface_start)
+        surface_start += len(calc_room.area)
+        columns["area"].append(calc_room.area)
+        columns["axis"].append(calc_room.axis)
+        columns["absorption_coefficient"].append(coefficients)
+    columns["surface_start"].append(surface_start)
+
+    n_bands = len(octave_bands)
+    arrays = {
+        "room_id": np.array(columns["room_id"], dtype=str),
+        "volume": np.array(columns["volume"], dtype=float),
+        "height": np.array(columns["height"], dtype=float),
+        "temperature": np.array(columns["temperature"], dtype=float),
+        "rel_humidity": np.array(columns["rel_humidity"], dtype=float),
+        "pressure": np.array(columns["pressure"], dtype=float),
+        "type": np.array(columns["type"], dtype=str),
+        "air_damping": np.array(columns["air_damping"], dtype=bool),
+        "surface_start": np.array(columns["surface_start"], dtype=np.int64),
+        "surface_name": np.array(columns["surface_name"], dtype=str),
+        "area": np.concatenate(columns["area"]) if columns["area"] else np.empty(0),
+        "absorption_coefficient": np.concatenate(columns["absorption_coefficient"]) if columns["area"] else np.empty((0, n_bands)),
+        "material": np.array(columns["material"], dtype=np.int32),
+        "axis": np.concatenate(columns["axis"]) if columns["area"] else np.empty(0, dtype=np.int8),
+        "material_name": np.array(list(material_names), dtype=str),
+    }
+
+    # Only a project directory is overwritten, other files are never touched
+    previous_files = []
+    if is_project(path):
+        try:
+            with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+                previous_files = list(json.load(f).get("files", {}).values())
+        except (OSError, ValueError, AttributeError):
+            raise ValueError(f"{path} holds an unreadable project manifest.") from None
+    elif os.path.isdir(path) and os.listdir(path):
+        raise ValueError(f"{path} is not empty and holds no project.")
+    os.makedirs(path, exist_ok=True)
+    # The files of every version have their own names, so the old files stay valid until the new manifest is written
+    token = uuid.uuid4().hex[:12]
+    files = {}
+    for column, values in arrays.items():
+        files[column] = f"{column}-{token}.npy"
+        _atomic_write(os.path.join(path, files[column]), lambda f: np.save(f, values))
+    manifest = {
+        "format": project_format,
+        "schema_version": schema_version,
+        "name": str(name),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "bands": octave_bands.get_frequencies(),
+        "n_rooms": len(arrays["volume"]),
+        "n_surfaces": len(arrays["area"]),
+        "files": files,
+    }
+    _atomic_write(os.path.join(path, "manifest.json"), lambda f: f.write(json.dumps(manifest, indent=1).encode("utf-8")))
+    for file_name in previous_files:
+        # Column files are plain names in the project directory
+        if file_name not in files.values() and os.path.basename(file_name) == file_name:
+            try:
+                os.remove(os.path.join(path, file_name))
+            except FileNotFoundError:
+                pass
+    return project_file(path)
+
+
+def is_project(path):
+    """
+    Returns True if a path is a project directory with a manifest.
+    """
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, "manifest.json"))
+
+
+class project_file:
+    """
+    Defines a "project_file" object that opens a project directory of many rooms and loads every room on demand.
+
+    A project stores the rooms, surfaces, material references and climate settings as columns in .npy files next to a JSON manifest with the schema version, the counts of rooms and surfaces and the file of every column.
+    The surfaces of all rooms are stored in one ragged layout: the surfaces of room $i$ are the rows surface_start[i] to surface_start[i + 1] of the surface columns.
+    Opening a project only reads the manifest. Every column is memory-mapped on first use, and a room reads only its own rows, so large buildings open in milliseconds and rooms are loaded when they are needed.
+
+    The columns are:
+
+    - room_id, volume, height, temperature, rel_humidity, pressure, type and air_damping with one entry per room, the height is NaN if unknown and the pressure is in hPa
+    - surface_start with one more entry than rooms
+    - surface_name, area, absorption_coefficient, material and axis with one entry per surface, absorption_coefficient has one column per octave band and NaN for unknown values, material is the index into material_name or -1, axis is the room axis the surface is perpendicular to or -1 and missing in projects written before it was added
+    - material_name with the names of the referenced materials
+
+    Attributes
+    ----------
+    path : str
+        The project directory.
+    manifest : dict
+        The manifest, upgraded to the current schema version.
+    name : str
+        The name of the project.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a project directory.
+
+        Parameters
+        ----------
+        path : str
+            The project directory.
+
+        Raises
+        ------
+        ValueError
+            If the directory holds no project, or a project of a newer or unknown schema version.
+        """
+        try:
+            with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            raise ValueError(f"{path} is not a project directory.") from None
+        if not isinstance(manifest, dict) or manifest.get("format") != project_format:
+            raise ValueError(f"{path} is not a project directory.")
+        version = manifest.get("schema_version")
+        if not isinstance(version, int) or version > schema_version:
+            raise ValueError(f"The project was written with schema version {version}, this version reads up to {schema_version}.")
+        while manifest["schema_version"] < schema_version:
+            if manifest["schema_version"] not in _migrations:
+                raise ValueError(f"Projects of schema version {manifest['schema_version']} are not supported.")
+            manifest = _migrations[manifest["schema_version"]](manifest, path)
+        self.path = path
+        self.manifest = manifest
+        self.name = manifest.get("name", "")
+        self._arrays = {}
+        self._index = None
+
+    def __len__(self):
+        return self.manifest["n_rooms"]
+
+    def get_array(self, column):
+        """
+        Returns a column of the project, memory-mapped and read-only, see the class description.
+
+        Parameters
+        ----------
+        column : str
+            The name of the column.
+
+        Returns
+        -------
+        np.ndarray
+            The column.
+        """
+        if column not in self._arrays:
+            self._arrays[column] = np.load(os.path.join(self.path, self.manifest["files"][column]), mmap_mode="r")
+        return self._arrays[column]
+
+    def get_room(self, index):
+        """
+        Loads one room.
+
+        Parameters
+        ----------
+        index : int
+            The index of the room.
+
+        Returns
+        -------
+        dict
+            The room in the format of room_io.room_definition with the surfaces' names, areas, material names, absorption coefficients (None for unknown values) and axes if known.
+
+        Raises
+        ------
+        IndexError
+            If the project has no room with this index.
+        """
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"The project has no room {index}.")
+        index = index % len(self)
+        start, end = self.get_array("surface_start")[index:index + 2].tolist()
+        room = {"id": str(self.get_array("room_id")[index])}
+        for column in ("volume", "height", "temperature", "rel_humidity", "pressure"):
+            value = float(self.get_array(column)[index])
+            if value == value:
+                room[column] = value
+        room["type"] = str(self.get_array("type")[index])
+        room["air_damping"] = bool(self.get_array("air_damping")[index])
+        material_names = self.get_array("material_name")
+        coefficients = np.array(self.get_array("absorption_coefficient")[start:end])
+        axes = self.get_array("axis")[start:end].tolist() if "axis" in self.manifest["files"] else [-1] * (end - start)
+        room["surfaces"] = [
+            {
+                "name": str(name),
+                "area": area,
+                "material": str(material_names[material]) if material >= 0 else None,
+                "absorption_coefficient": [None if value != value else value for value in values],
+                **({"axis": axis} if axis >= 0 else {}),
+            }
+            for name, area, material, values, axis in zip(self.get_array("surface_name")[start:end].tolist(), self.get_array("area")[start:end].tolist(),
+                                                          self.get_array("material")[start:end].tolist(), coefficients.tolist(), axes)
+        ]
+        return room
+
+    def get_room_index(self, room_id):
+        """
+        Returns the index of a room by its id, the index of all ids is built on first use.
+
+        Raises
+        ------
+        KeyError
+            If no room has this id.
+        """
+        if self._index is None:
+            self._index = {}
+            for index, value in enumerate(self.get_array("room_id").tolist()):
+                self._index.setdefault(value, index)
+        return self._index[str(room_id)]
+
+    def iter_rooms(self, start=0, stop=None):
+        """
+        Loads the rooms one by one.
+
+        Parameters
+        ----------
+        start, stop : int, optional
+            The range of room indices (default is all rooms).
+
+        Yields
+        ------
+        dict
+            The rooms, see get_room.
+        """
+        for index in range(start, len(self) if stop is None else min(stop, len(self))):
+            yield self.get_room(index)
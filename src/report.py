@@ -0,0 +1,667 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import datetime
+import math
+import os
+import re
+import zlib
+
+import numpy as np
+
+from src.reverberation_calc import reverberation_time, DIN_18041_limits_lookup, describe_DIN_18041_flags, octave_bands
+from src.result_cache import result_cache, canonical_key
+
+# Version of the figure rendering, cached figures of other versions are not used
+figure_version = 1
+
+# A4 portrait in pt
+page_width = 595.28
+page_height = 841.89
+margin = 40
+
+# Widths of the ASCII characters 32 to 126 of Helvetica in 1/1000 em
+_helvetica_widths = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+
+def text_width(text, size, bold=False):
+    """
+    Returns the approximate width of a text in the Helvetica font in pt.
+
+    Parameters
+    ----------
+    text : str
+        The text.
+    size : int or float
+        The font size in pt.
+    bold : bool, optional
+        A flag indicating whether the bold font is used (default is False).
+
+    Returns
+    -------
+    float
+        The width in pt. Characters outside of ASCII count as 556/1000 em.
+    """
+    width = sum(_helvetica_widths[ord(char) - 32] if 32 <= ord(char) <= 126 else 556 for char in text)
+    return width * size / 1000 * (1.05 if bold else 1.0)
+
+
+def fit_text(text, width, size, bold=False):
+    """
+    Shortens a text with an ellipsis, so that it fits into a width in pt.
+    """
+    text = str(text)
+    if text_width(text, size, bold) <= width:
+        return text
+    while text and text_width(text + "...", size, bold) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def _string(text):
+    # A PDF string in the WinAnsi encoding of the standard fonts
+    data = str(text).encode("cp1252", errors="replace")
+    return "(" + data.decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _color(color, stroke=False):
+    return f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} {'RG' if stroke else 'rg'}"
+
+
+def text_operators(x, y, text, size=10, bold=False, align="left", color=(0, 0, 0)):
+    """
+    Returns the PDF operators that draw a text with its baseline at y.
+
+    Parameters
+    ----------
+    x, y : float
+        The position in pt, x is the left end, the center or the right end depending on align.
+    text : str
+        The text.
+    size : int or float, optional
+        The font size in pt (default is 10).
+    bold : bool, optional
+        A flag indicating whether the bold font is used (default is False).
+    align : str, optional
+        "left", "center" or "right" (default is "left").
+    color : tuple, optional
+        The RGB color with components between 0 and 1 (default is black).
+
+    Returns
+    -------
+    str
+        The PDF operators.
+    """
+    if align != "left":
+        x -= text_width(text, size, bold) / (2 if align == "center" else 1)
+    return f"BT {_color(color)} /{'F2' if bold else 'F1'} {size:g} Tf {x:.2f} {y:.2f} Td {_string(text)} Tj ET\n"
+
+
+def path_operators(points, close=False):
+    """
+    Returns the PDF operators of a path through points, without painting it.
+    """
+    ops = [f"{points[0][0]:.2f} {points[0][1]:.2f} m"]
+    ops.extend(f"{x:.2f} {y:.2f} l" for x, y in points[1:])
+    if close:
+        ops.append("h")
+    return " ".join(ops) + "\n"
+
+
+def line_operators(points, width=1.0, color=(0, 0, 0), dash=None):
+    """
+    Returns the PDF operators that stroke a polyline.
+
+    Parameters
+    ----------
+    points : list of tuple
+        The points (x, y) in pt.
+    width : float, optional
+        The line width in pt (default is 1).
+    color : tuple, optional
+        The RGB color (default is black).
+    dash : tuple, optional
+        The lengths of dashes and gaps in pt (default is None, which draws a solid line).
+
+    Returns
+    -------
+    str
+        The PDF operators.
+    """
+    dash_operator = f"[{' '.join(f'{d:g}' for d in dash)}] 0 d " if dash else ""
+    return f"q {_color(color, stroke=True)} {width:g} w 1 j {dash_operator}{path_operators(points)}S Q\n"
+
+
+def rect_operators(x, y, width, height, fill=None, stroke=None, line_width=0.5):
+    """
+    Returns the PDF operators that fill and/or stroke a rectangle.
+    """
+    paint = "B" if fill and stroke else "f" if fill else "S"
+    colors = (_color(fill) + " " if fill else "") + (_color(stroke, stroke=True) + " " if stroke else "")
+    return f"q {colors}{line_width:g} w {x:.2f} {y:.2f} {width:.2f} {height:.2f} re {paint} Q\n"
+
+
+class pdf_document:
+    """
+    Defines a "pdf_document" object, a minimal PDF writer for vector graphics and text in the standard fonts Helvetica (F1), Helvetica-Bold (F2) and Symbol (F3).
+
+    Every page is a list of PDF operators, which are compressed with zlib when the document is written. Text is encoded in WinAnsi (cp1252); other characters are replaced by "?", Greek letters are available in the Symbol font, e.g. "a" for α.
+
+    Attributes
+    ----------
+    width : float
+        The page width in pt.
+    height : float
+        The page height in pt.
+    pages : list of list of str
+        The operators of every page.
+    """
+
+    def __init__(self, width=page_width, height=page_height):
+        self.width = width
+        self.height = height
+        self.pages = []
+
+    def add_page(self):
+        """
+        Adds an empty page, all drawing goes to the last page.
+        """
+        self.pages.append([])
+
+    def draw(self, operators):
+        """
+        Appends PDF operators to the last page.
+        """
+        if not self.pages:
+            self.add_page()
+        self.pages[-1].append(operators)
+
+    def text(self, x, y, text, size=10, bold=False, align="left", color=(0, 0, 0)):
+        """
+        Draws a text on the last page, see text_operators.
+        """
+        self.draw(text_operators(x, y, text, size, bold, align, color))
+
+    def line(self, points, width=1.0, color=(0, 0, 0), dash=None):
+        """
+        Draws a polyline on the last page, see line_operators.
+        """
+        self.draw(line_operators(points, width, color, dash))
+
+    def rect(self, x, y, width, height, fill=None, stroke=None, line_width=0.5):
+        """
+        Draws a rectangle on the last page, see rect_operators.
+        """
+        self.draw(rect_operators(x, y, width, height, fill, stroke, line_width))
+
+    def to_bytes(self):
+        """
+        Returns the document as PDF file content.
+
+        Returns
+        -------
+        bytes
+            The PDF file.
+        """
+        if not self.pages:
+            self.add_page()
+        n_pages = len(self.pages)
+        # Objects: 1 catalog, 2 page tree, 3 to 5 fonts, then a page and its content stream for every page
+        page_ids = [6 + 2 * i for i in range(n_pages)]
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {n_pages} >>".encode(),
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Symbol >>",
+        ]
+        for page_id, operators in zip(page_ids, self.pages):
+            objects.append(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width:g} {self.height:g}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R /F3 5 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+            )
+            stream = zlib.compress("".join(operators).encode("latin-1"))
+            objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+        output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, content in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b"%d 0 obj\n" % number + content + b"\nendobj\n"
+        xref = len(output)
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+        return bytes(output)
+
+    def save(self, path):
+        """
+        Writes the document to a PDF file.
+        """
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+def _nice_step(span, max_ticks=6):
+    for step in (0.1, 0.2, 0.25, 0.5, 1, 2, 2.5, 5, 10, 20, 50):
+        if span / step <= max_ticks:
+            return step
+    return 10 ** math.ceil(math.log10(span))
+
+
+def render_reverberation_figure(frequencies, T, T_max=None, T_min=None, width=515, height=260):
+    """
+    Returns the PDF operators of the reverberation time figure, with the origin at the lower left corner of the figure.
+
+    The figure shows the reverberation time over the frequency on a logarithmic axis from 50 Hz to 10 kHz, like the graph of the home page, and the DIN 18041 tolerance range as a filled band.
+
+    Parameters
+    ----------
+    frequencies : list of int or float
+        The center frequencies of the bands in Hz.
+    T : array_like
+        The reverberation time in s for every band, NaN for unknown values.
+    T_max, T_min : array_like, optional
+        The limits of the tolerance range in s (default is None, which draws no tolerance range). Bands with an upper limit of 0 have no requirement.
+    width, height : float, optional
+        The size of the figure in pt (default is 515 x 260).
+
+    Returns
+    -------
+    str
+        The PDF operators.
+    """
+    frequencies = np.asarray(frequencies, dtype=float)
+    T = np.asarray(T, dtype=float)
+    left, bottom, right, top = 42, 34, 8, 26
+    plot_width, plot_height = width - left - right, height - bottom - top
+    values = [T[np.isfinite(T)]]
+    if T_max is not None:
+        T_max, T_min = np.asarray(T_max, dtype=float), np.asarray(T_min, dtype=float)
+        values.append(T_max[np.isfinite(T_max)])
+    values = np.concatenate(values)
+    y_max = max(float(values.max()) * 1.1, 0.1) if len(values) else 1.0
+    step = _nice_step(y_max)
+    y_max = math.ceil(y_max / step - 1e-9) * step
+    log_min, log_max = math.log10(50), math.log10(10000)
+
+    def x_of(frequency):
+        return left + (math.log10(frequency) - log_min) / (log_max - log_min) * plot_width
+
+    def y_of(value):
+        return bottom + value / y_max * plot_height
+
+    ops = []
+    grey, light_grey = (0.35, 0.35, 0.35), (0.85, 0.85, 0.85)
+    for i in range(int(round(y_max / step)) + 1):
+        y = y_of(i * step)
+        if i > 0:
+            ops.append(line_operators([(left, y), (left + plot_width, y)], 0.4, light_grey))
+        ops.append(text_operators(left - 4, y - 3, f"{i * step:g}", 8, align="right", color=grey))
+    for frequency in frequencies:
+        x = x_of(frequency)
+        ops.append(line_operators([(x, bottom), (x, bottom + plot_height)], 0.4, light_grey))
+        ops.append(text_operators(x, bottom - 11, f"{frequency:g}", 8, align="center", color=grey))
+
+    if T_max is not None:
+        # The tolerance range as one polygon along the upper limit and back along the lower limit
+        required = np.isfinite(T_max) & np.isfinite(T_min) & (T_max > 0)
+        if required.any():
+            upper = [(x_of(f), y_of(t)) for f, t in zip(frequencies[required], T_max[required])]
+            lower = [(x_of(f), y_of(t)) for f, t in zip(frequencies[required][::-1], T_min[required][::-1])]
+            ops.append(f"q {_color((1.0, 0.82, 0.82))} {path_operators(upper + lower, close=True)}f Q\n")
+            ops.append(line_operators(upper, 0.8, (0.9, 0.42, 0.42)))
+            ops.append(line_operators(lower, 0.8, (0.9, 0.42, 0.42)))
+
+    # The reverberation time, interrupted at unknown values, with a marker at every band
+    green = (0.11, 0.62, 0.36)
+    points = [(x_of(f), y_of(t)) if np.isfinite(t) else None for f, t in zip(frequencies, T)]
+    segment = []
+    for point in points + [None]:
+        if point is None:
+            if len(segment) > 1:
+                ops.append(line_operators(segment, 1.8, green))
+            segment = []
+        else:
+            segment.append(point)
+    for point in points:
+        if point is not None:
+            ops.append(rect_operators(point[0] - 2, point[1] - 2, 4, 4, fill=green))
+
+    ops.append(rect_operators(left, bottom, plot_width, plot_height, stroke=(0, 0, 0), line_width=0.6))
+    ops.append(text_operators(left + plot_width / 2, 4, "Frequency in Hz", 9, align="center"))
+    ops.append(f"BT {_color((0, 0, 0))} /F1 9 Tf 0 1 -1 0 10 {bottom + plot_height / 2 - text_width('Reverberation time in s', 9) / 2:.2f} Tm {_string('Reverberation time in s')} Tj ET\n")
+    # Legend above the plot area
+    y = bottom + plot_height + 9
+    ops.append(line_operators([(left, y + 3), (left + 18, y + 3)], 1.8, green))
+    ops.append(text_operators(left + 22, y, "Reverberation time", 8))
+    if T_max is not None:
+        ops.append(rect_operators(left + 120, y, 18, 7, fill=(1.0, 0.82, 0.82), stroke=(0.9, 0.42, 0.42)))
+        ops.append(text_operators(left + 142, y, "DIN 18041 tolerance range", 8))
+    return "".join(ops)
+
+
+_figure_caches = {}
+
+def get_figure_cache(directory=None):
+    """
+    Returns the shared result_cache of this process for rendered figures.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory of the shared tier of the cache (default is None, which uses the environment variable REPORT_CACHE_DIR or keeps the figures only in memory).
+
+    Returns
+    -------
+    result_cache
+        The figure cache.
+    """
+    directory = directory or os.environ.get("REPORT_CACHE_DIR") or None
+    if directory not in _figure_caches:
+        _figure_caches[directory] = result_cache(maxsize=256, directory=directory)
+    return _figure_caches[directory]
+
+
+class room_report:
+    """
+    Defines a "room_report" object with the results of one room, which are rendered into a PDF report.
+
+    The report contains the room parameters, the reverberation time figure with the DIN 18041 tolerance range, the results per frequency band and the surface table.
+    The operators of the figure are cached by the hash of its data, so reports of rooms with the same results, and repeated renders of one room, draw the figure only once.
+
+    Attributes
+    ----------
+    name : str
+        The name of the room.
+    calc_room : room
+        The room.
+    surfaces : list of surface
+        The surfaces of the room.
+    type : str
+        The room type according to DIN 18041, "no requirements" for none.
+    bands : band_set
+        The frequency bands of the calculation.
+    reverberation_time : np.ndarray
+        The reverberation time in s.
+    Aeq : np.ndarray
+        The equivalent sound absorption area in m$^2$.
+    T_upper_limit, T_lower_limit : np.ndarray or None
+        The DIN 18041 limits in s, None without requirements.
+    messages : list of str
+        The notes on the scope of DIN 18041, see describe_DIN_18041_flags.
+    """
+
+    def __init__(self, name, calc_room, surfaces, type="no requirements", air_damp_calc=True, bands=None):
+        """
+        Initializes a room_report object and calculates the results.
+
+        Parameters
+        ----------
+        name : str
+            The name of the room.
+        calc_room : room
+            The room, which is an instance of the room class.
+        surfaces : list of surface
+            The surfaces of the room.
+        type : str, optional
+            The room type according to DIN 18041 (default is "no requirements").
+        air_damp_calc : bool, optional
+            A flag indicating whether air damping is considered in the calculation (default is True).
+        bands : band_set, optional
+            The frequency bands of the calculation (default is None, which uses octave_bands).
+        """
+        self.name = str(name)
+        self.calc_room = calc_room
+        self.surfaces = surfaces
+        self.type = type or "no requirements"
+        self.air_damp_calc = air_damp_calc
+        self.bands = octave_bands if bands is None else bands
+        reverb = reverberation_time(calc_room, surfaces, air_damp_calc=air_damp_calc, bands=self.bands)
+        self.reverberation_time = np.asarray(reverb.reverberation_time, dtype=float)
+        self.Aeq = np.asarray(reverb.Aeq, dtype=float)
+        self.T_upper_limit = self.T_lower_limit = None
+        self.messages = []
+        if self.type != "no requirements":
+            T_upper_limit, T_lower_limit, _, flags = DIN_18041_limits_lookup(self.type, calc_room.get_volume(), calc_room.get_height(), calc_room.get_c(), self.bands)
+            self.T_upper_limit, self.T_lower_limit = np.array(T_upper_limit), np.array(T_lower_limit)
+            self.messages = describe_DIN_18041_flags(flags, self.type)
+
+    def get_band_status(self):
+        """
+        Returns the comparison of the reverberation time with the DIN 18041 limits for every band.
+
+        Returns
+        -------
+        list of str
+            "ok", "too long", "too short", or "" for bands without requirement.
+        """
+        if self.T_upper_limit is None:
+            return [""] * len(self.bands)
+        status = []
+        for T, T_max, T_min in zip(self.reverberation_time, self.T_upper_limit, self.T_lower_limit):
+            if not (np.isfinite(T_max) and T_max > 0) or not np.isfinite(T):
+                status.append("")
+            else:
+                status.append("too long" if T > T_max else "too short" if T < T_min else "ok")
+        return status
+
+    def render_figure(self, figure_cache=None, width=515, height=260):
+        """
+        Returns the PDF operators of the reverberation time figure, from the figure cache if possible.
+
+        Parameters
+        ----------
+        figure_cache : result_cache, optional
+            The cache of rendered figures (default is None, which uses get_figure_cache()).
+        width, height : float, optional
+            The size of the figure in pt (default is 515 x 260).
+
+        Returns
+        -------
+        str
+            The PDF operators, see render_reverberation_figure.
+        """
+        figure_cache = get_figure_cache() if figure_cache is None else figure_cache
+        frequencies = self.bands.get_frequencies()
+        limits = None if self.T_upper_limit is None else (self.T_upper_limit.tolist(), self.T_lower_limit.tolist())
+        key = canonical_key("reverberation figure", figure_version, frequencies, self.reverberation_time.tolist(), limits, width, height)
+        operators = figure_cache.get(key)
+        if operators is None:
+            operators = render_reverberation_figure(frequencies, self.reverberation_time, *(limits or (None, None)), width=width, height=height)
+            figure_cache.put(key, operators)
+        return operators
+
+    def render(self, figure_cache=None):
+        """
+        Renders the report.
+
+        Parameters
+        ----------
+        figure_cache : result_cache, optional
+            The cache of rendered figures (default is None, which uses get_figure_cache()).
+
+        Returns
+        -------
+        bytes
+            The PDF file.
+        """
+        doc = pdf_document()
+        doc.add_page()
+        content_width = doc.width - 2 * margin
+        y = doc.height - margin - 16
+        doc.text(margin, y, fit_text(f"Reverberation time report: {self.name}", content_width, 16, bold=True), 16, bold=True)
+        y -= 16
+        doc.text(margin, y, f"Created {datetime.date.today().isoformat()}, calculated according to DIN 18041 and DIN EN ISO 354", 8, color=(0.35, 0.35, 0.35))
+
+        # Room parameters in two columns
+        height = self.calc_room.get_height()
+        parameters = [
+            ("Volume", f"{self.calc_room.get_volume():g} m³"),
+            ("Room usage", self.type),
+            ("Height", f"{height:g} m" if height else "-"),
+            ("Air damping", "considered" if self.air_damp_calc else "not considered"),
+            ("Temperature", f"{self.calc_room.get_temperature():g} °C"),
+            ("Total area", f"{sum(calc_surface.get_area() for calc_surface in self.surfaces):.2f} m²"),
+            ("Relative humidity", f"{self.calc_room.get_rel_humidity():g} %"),
+            ("Surfaces", f"{len(self.surfaces)}"),
+            ("Air pressure", f"{self.calc_room.get_pressure() * 10:g} hPa"),
+        ]
+        y -= 24
+        for i, (label, value) in enumerate(parameters):
+            x = margin + (i % 2) * content_width / 2
+            doc.text(x, y, label, 9, bold=True)
+            doc.text(x + 95, y, value, 9)
+            if i % 2 == 1 or i == len(parameters) - 1:
+                y -= 13
+        for message in self.messages:
+            doc.text(margin, y, fit_text(message, content_width, 8), 8, color=(0.7, 0.2, 0.2))
+            y -= 11
+
+        # Figure
+        y -= 270
+        doc.draw(f"q 1 0 0 1 {margin:.2f} {y:.2f} cm\n{self.render_figure(figure_cache)}Q\n")
+
+        # Results per band
+        y -= 28
+        doc.text(margin, y, "Results per frequency band", 11, bold=True)
+        y -= 16
+        bands = [f"{f:g} Hz" for f in self.bands.get_frequencies()]
+        label_width = 115
+        column_width = (content_width - label_width) / len(bands)
+
+        def format_values(values, digits=2):
+            return ["-" if values is None or not np.isfinite(v) else f"{v:.{digits}f}" for v in (values if values is not None else [np.nan] * len(bands))]
+
+        limits = (None, None)
+        if self.T_upper_limit is not None:
+            # Bands without requirement have an upper limit of 0
+            required = np.isfinite(self.T_upper_limit) & (self.T_upper_limit > 0)
+            limits = (np.where(required, self.T_upper_limit, np.nan), np.where(required, self.T_lower_limit, np.nan))
+        rows = [
+            ("Frequency", bands),
+            ("T in s", format_values(self.reverberation_time)),
+            ("T min in s", format_values(limits[1])),
+            ("T max in s", format_values(limits[0])),
+            ("Aeq in m²", format_values(self.Aeq, 1)),
+            ("DIN 18041", self.get_band_status()),
+        ]
+        for i, (label, values) in enumerate(rows):
+            if i == 0:
+                doc.rect(margin, y - 3.5, content_width, 13, fill=(0.9, 0.9, 0.9))
+            doc.text(margin + 3, y, label, 8, bold=(i == 0))
+            for j, value in enumerate(values):
+                color = (0.75, 0.15, 0.15) if value in ("too long", "too short") else (0, 0, 0)
+                doc.text(margin + label_width + (j + 1) * column_width - 3, y, value, 8, bold=(i == 0), align="right", color=color)
+            y -= 13
+
+        # Surface table, continued on further pages
+        y -= 18
+        doc.text(margin, y, "Surfaces", 11, bold=True)
+        y -= 16
+        name_width, area_width, material_width = 95, 45, 135
+        alpha_width = (content_width - name_width - area_width - material_width) / len(bands)
+
+        def header(y):
+            doc.rect(margin, y - 3.5, content_width, 13, fill=(0.9, 0.9, 0.9))
+            doc.text(margin + 3, y, "Surface", 7.5, bold=True)
+            doc.text(margin + name_width + area_width - 3, y, "Area m²", 7.5, bold=True, align="right")
+            doc.text(margin + name_width + area_width + 6, y, "Material", 7.5, bold=True)
+            for j, frequency in enumerate(self.bands.get_frequencies()):
+                x = margin + name_width + area_width + material_width + (j + 1) * alpha_width - 3
+                doc.text(x, y, f"{frequency:g}", 7.5, bold=True, align="right")
+                # α from the Symbol font
+                doc.draw(f"BT /F3 7.5 Tf {x - text_width(f'{frequency:g}', 7.5, True) - 5.5:.2f} {y:.2f} Td (a) Tj ET\n")
+
+        header(y)
+        for calc_surface in self.surfaces:
+            y -= 12
+            if y < margin:
+                doc.add_page()
+                y = doc.height - margin - 10
+                header(y)
+                y -= 12
+            calc_material = calc_surface.get_material()
+            doc.text(margin + 3, y, fit_text(calc_surface.get_surface_name(), name_width - 6, 7.5), 7.5)
+            doc.text(margin + name_width + area_width - 3, y, f"{calc_surface.get_area():.2f}", 7.5, align="right")
+            doc.text(margin + name_width + area_width + 6, y, fit_text(calc_material.get_name(), material_width - 9, 7.5), 7.5)
+            for j, value in enumerate(format_values(calc_material.get_absorption_coefficient(self.bands))):
+                doc.text(margin + name_width + area_width + material_width + (j + 1) * alpha_width - 3, y, value, 7.5, align="right")
+        return doc.to_bytes()
+
+    def save(self, path, figure_cache=None):
+        """
+        Renders the report into a PDF file.
+        """
+        with open(path, "wb") as f:
+            f.write(self.render(figure_cache))
+
+
+def _render_task(report, path, cache_directory):
+    report.save(path, get_figure_cache(cache_directory))
+    return path
+
+
+def get_report_filename(index, name):
+    """
+    Returns the file name of a report in a batch, e.g. "003_Room_1.01.pdf".
+    """
+    name = re.sub(r"[^\w.-]+", "_", str(name)).strip("_")[:60] or "room"
+    return f"{index:03d}_{name}.pdf"
+
+
+def iter_render_reports(reports, output_dir, n_workers=None, cache_directory=None):
+    """
+    Renders reports in parallel worker processes and yields every report as soon as its file is written.
+
+    Parameters
+    ----------
+    reports : list of room_report
+        The reports, e.g. of all rooms of a building.
+    output_dir : str
+        The directory of the PDF files, created if necessary. The files are named by get_report_filename.
+    n_workers : int, optional
+        The number of worker processes (default is None, which uses the number of CPUs). With 1 worker the reports are rendered in the calling process.
+    cache_directory : str, optional
+        The directory of the shared figure cache of all workers (default is None, which uses REPORT_CACHE_DIR or a cache per process).
+
+    Yields
+    ------
+    tuple
+        The index of the report in reports (int) and the path of its PDF file (str).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [os.path.join(output_dir, get_report_filename(i, report.name)) for i, report in enumerate(reports)]
+    n_workers = (os.cpu_count() or 1) if n_workers is None else n_workers
+    if n_workers == 1 or len(reports) <= 1:
+        for i, (report, path) in enumerate(zip(reports, paths)):
+            yield i, _render_task(report, path, cache_directory)
+        return
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(reports))) as executor:
+        futures = {executor.submit(_render_task, report, path, cache_directory): i for i, (report, path) in enumerate(zip(reports, paths))}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def render_reports(reports, output_dir, n_workers=None, cache_directory=None):
+    """
+    Renders reports in parallel worker processes, see iter_render_reports.
+
+    Returns
+    -------
+    list of str
+        The paths of the PDF files in the order of the reports.
+    """
+    paths = [None] * len(reports)
+    for i, path in iter_render_reports(reports, output_dir, n_workers, cache_directory):
+        paths[i] = path
+    return paths
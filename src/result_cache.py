@@ -0,0 +1,218 @@
+from collections import OrderedDict
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+
+
+def canonical_key(*parts):
+    """
+    Returns a SHA-256 hex digest of JSON-compatible values, e.g. the parsed inputs of a calculation.
+
+    Floats are hashed by their exact value, NaN and infinite values are allowed, and -0.0 equals 0.0.
+
+    Parameters
+    ----------
+    *parts : object
+        Values built from dict, list, tuple, str, int, float, bool and None.
+
+    Returns
+    -------
+    str
+        The digest of the values.
+    """
+    def canonical(value):
+        if isinstance(value, float):
+            return value + 0.0 if math.isfinite(value) else repr(value)
+        if isinstance(value, (list, tuple)):
+            return [canonical(item) for item in value]
+        if isinstance(value, dict):
+            return {str(name): canonical(item) for name, item in value.items()}
+        return value
+
+    text = json.dumps(canonical(list(parts)), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class result_cache:
+    """
+    Defines a "result_cache" object, a bounded LRU cache for calculation results such as Plotly figures, with an optional directory as second tier.
+
+    The in-process tier keeps up to maxsize results. If a directory is given, every result is also stored there as a JSON file named after its key, so that processes such as gunicorn workers share their results. Results missing in memory are looked up in the directory and moved into memory.
+    Results must therefore be JSON-serializable, e.g. the dict of Figure.to_json(). Files are written atomically, and the oldest files are removed once the directory holds more than disk_maxsize results.
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of results in memory.
+    directory : str or None
+        The directory of the shared tier, None if results are only kept in memory.
+    disk_maxsize : int
+        The maximum number of result files in the directory.
+    hits : int
+        The number of lookups answered from memory.
+    disk_hits : int
+        The number of lookups answered from the directory.
+    misses : int
+        The number of lookups without a result.
+    """
+
+    def __init__(self, maxsize=64, directory=None, disk_maxsize=4096):
+        """
+        Initializes an empty result_cache object.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            The maximum number of results in memory (default is 64).
+        directory : str, optional
+            The directory of the shared tier, created if necessary (default is None, which keeps results only in memory).
+        disk_maxsize : int, optional
+            The maximum number of result files in the directory (default is 4096).
+
+        Raises
+        ------
+        ValueError
+            If maxsize or disk_maxsize is not a positive integer.
+        """
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError("Maxsize must be a positive integer.")
+        if not isinstance(disk_maxsize, int) or disk_maxsize <= 0:
+            raise ValueError("Disk maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.directory = directory
+        self.disk_maxsize = disk_maxsize
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Returns the result for a key.
+
+        Parameters
+        ----------
+        key : str
+            The key of the result, e.g. from canonical_key.
+
+        Returns
+        -------
+        object or None
+            The cached result, None on a miss. Results are shared, callers must not modify them.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.directory is not None:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            except (FileNotFoundError, ValueError):
+                value = None
+            if value is not None:
+                self._remember(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Stores a result in memory and, if a directory is set, in the directory.
+
+        Parameters
+        ----------
+        key : str
+            The key of the result.
+        value : object
+            The JSON-serializable result, not None.
+        """
+        self._remember(key, value)
+        if self.directory is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, separators=(",", ":"))
+            os.replace(tmp_path, self._path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % 64 == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """
+        Removes the oldest result files until the directory holds at most disk_maxsize results.
+        """
+        if self.directory is None:
+            return
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    files.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    pass
+        files.sort()
+        for _, path in files[:max(len(files) - self.disk_maxsize, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Removed by another process
+                pass
+
+    def clear(self):
+        """
+        Removes all results from memory and resets the counters. The files of the directory are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        """
+        Returns the statistics of the cache.
+
+        Returns
+        -------
+        dict
+            The number of hits from memory and from the directory, the misses, the hit rate, and the current and maximum size in memory.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
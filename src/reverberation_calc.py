@@ -1,5 +1,8 @@
 import numpy as np
+import functools
+import threading
 import warnings
+from collections import OrderedDict
 
 class room:
     """
@@ -26,6 +29,8 @@ class room:
         The speed of sound in air in m/s, calculated based on temperature and relative humidity.
     """
 
+    __slots__ = ("volume", "temperature", "pressure", "rel_humidity", "height", "c")
+
     def __init__(self, volume):
         """
         Initializes a room object with a specified volume and default values for temperature, pressure, relative humidity, and speed of sound.
@@ -233,6 +238,57 @@ class room:
 
 
 
+def air_absorption(frequency, temperature=20, rel_humidity=50, pressure=101.325, ref_pressure=101.325, ref_temperature=293.15):
+    r"""
+    Calculates the sound absorption of air $alpha$ in dB/m and $m$ in 1/m according to ISO 9613-1 and DIN EN ISO 354 without any Python loop.
+
+    Temperature, relative humidity and pressure are broadcast against each other to a climate grid of shape C. The frequencies are appended as the last axis, so the results have the shape C + frequency.shape.
+    For example, 8760 hourly climates and 1/12-octave frequencies with 121 entries give results of shape (8760, 121).
+    Complex temperatures, humidities or pressures are propagated, so derivatives are available by the complex-step method, e.g. $\partial m / \partial T = \mathrm{Im}(m(T + ih)) / h$.
+
+    Parameters
+    ----------
+    frequency : array_like
+        The frequencies in Hz.
+    temperature : array_like, optional
+        The temperature in °C (default is 20 °C).
+    rel_humidity : array_like, optional
+        The relative humidity in % (default is 50 %).
+    pressure : array_like, optional
+        The pressure in kPa (default is 101.325 kPa).
+    ref_pressure : int or float, optional
+        The reference pressure in kPa (default is 101.325 kPa).
+    ref_temperature : int or float, optional
+        The reference temperature in Kelvin (default is 293.15 °K, which is 20 °C).
+
+    Returns
+    -------
+    tuple of np.ndarray
+        The sound absorption coefficient $alpha$ in dB/m and $m$ in 1/m.
+    """
+    frequency = np.asarray(frequency, dtype=float)
+    temperature, rel_humidity, pressure = np.broadcast_arrays(temperature, rel_humidity, pressure)
+    expand = (Ellipsis,) + (np.newaxis,) * frequency.ndim
+    # Complex climates are kept complex, which allows complex-step derivatives of the kernel
+    T = (np.asarray(temperature, dtype=np.result_type(temperature, float)) + 273.15)[expand]
+    rel_humidity = np.asarray(rel_humidity, dtype=np.result_type(rel_humidity, float))[expand]
+    p_rel = (np.asarray(pressure, dtype=np.result_type(pressure, float)) / ref_pressure)[expand]
+    T_rel = T / ref_temperature
+
+    # Molar concentration of water vapour according to ISO 9613-1 Annex B
+    h = (rel_humidity * 10**(-6.8346 * ((273.16 / T)**1.261) + 4.6151)) / (p_rel * ref_pressure / 101.325)
+    f_rO = p_rel * (24.0 + 4.04e4 * h * ((0.02 + h) / (0.391 + h)))
+    f_rN = p_rel * T_rel**(-0.5) * (9.0 + 280.0 * h * np.exp(-4.170 * (T_rel**(-1.0 / 3.0) - 1.0)))
+    f_squared = frequency**2.0
+    alpha = 8.686 * f_squared * ((1.84e-11 * p_rel**(-1.0) * T_rel**0.5) +
+                                 T_rel**(-5.0 / 2.0) *
+                                 (0.01275 * np.exp(-2239.1 / T) / (f_rO + f_squared / f_rO) +
+                                  0.1068 * np.exp(-3352.0 / T) / (f_rN + f_squared / f_rN)))  # dB/m
+    m = (alpha * 1000) / 4350
+    return alpha, m
+
+
+
 class air_damp:
     """
     Defines an "air_damp" object that calculates the sound absorption coefficient $m$ in 1/m of air based on frequency, temperature, humidity, and pressure according to DIN EN ISO 354, based on $alpha$ from ISO 9613-1.
@@ -459,22 +515,388 @@ class air_damp:
         if not hasattr(self, 'pressure'):
             raise ValueError("Pressure must be set before calculating coefficient.")
         else:
-            alpha = np.zeros(len(self.frequency))
-            f_rO = (self.pressure/self.ref_pressure)*(24.0+4.04*(10.0**4.0)*self.abs_humidity*((0.02+self.abs_humidity)/(0.391+self.abs_humidity)))
-            f_rN = (self.pressure/self.ref_pressure)*((self.temperature/self.ref_temperature)**(-(1.0/2.0)))*(9.0+280.0*self.abs_humidity*np.exp(-4.170*(((self.temperature/self.ref_temperature)**(-(1.0/3.0)))-1.0)))
-            for i, f in enumerate(self.frequency):
-                alpha[i] = 8.686*(f**2.0)*((1.84*(10.0**(-11.0))*((self.pressure/self.ref_pressure)**(-1.0))*((self.temperature/self.ref_temperature)**(1.0/2.0)))+
-                                 ((self.temperature/self.ref_temperature)**(-5.0/2.0))*
-                                 (0.01275*np.exp(-2239.1/self.temperature)*((f_rO+((f**2.0)/f_rO))**(-1.0))+
-                                  0.1068*np.exp(-3352.0/self.temperature)*((f_rN+((f**2.0)/f_rN))**(-1.0))))# dB/m
-
-            m = (alpha*1000)/4350
+            self.calculate_abs_humidity()
+            alpha, m = air_absorption(self.frequency, self.get_temperature(), self.rel_humidity, self.pressure,
+                                      ref_pressure=self.ref_pressure, ref_temperature=self.ref_temperature)
             self.alpha = alpha
             self.m = m
             return m
     
 
-        
+
+class air_damp_cache:
+    """
+    Defines an "air_damp_cache" object, a bounded LRU cache for the sound absorption coefficient $m$ in 1/m of air.
+
+    Entries are keyed on the climate (temperature, relative humidity, pressure) and the set of frequencies. The climate is quantized to the configured resolutions before the lookup, and $m$ is evaluated at the quantized climate, so all conditions that fall into the same cell share one entry.
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of cached $m$ vectors (default is 128).
+    temperature_resolution : float
+        The quantization step of the temperature in °C (default is 0.01 °C).
+    humidity_resolution : float
+        The quantization step of the relative humidity in % (default is 0.01 %).
+    pressure_resolution : float
+        The quantization step of the pressure in kPa (default is 0.001 kPa).
+    hits : int
+        The number of lookups answered from the cache.
+    misses : int
+        The number of lookups that required an evaluation of air_absorption.
+    """
+
+    def __init__(self, maxsize=128, temperature_resolution=0.01, humidity_resolution=0.01, pressure_resolution=0.001):
+        """
+        Initializes an empty air_damp_cache object.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            The maximum number of cached $m$ vectors (default is 128).
+        temperature_resolution : float, optional
+            The quantization step of the temperature in °C (default is 0.01 °C).
+        humidity_resolution : float, optional
+            The quantization step of the relative humidity in % (default is 0.01 %).
+        pressure_resolution : float, optional
+            The quantization step of the pressure in kPa (default is 0.001 kPa).
+
+        Raises
+        ------
+        ValueError
+            If maxsize is not a positive integer or a resolution is not positive.
+        """
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError("Maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.set_resolution(temperature_resolution, humidity_resolution, pressure_resolution)
+
+    def set_resolution(self, temperature_resolution=0.01, humidity_resolution=0.01, pressure_resolution=0.001):
+        """
+        Sets the quantization steps of the cache keys. All cached entries are invalidated.
+
+        Parameters
+        ----------
+        temperature_resolution : float, optional
+            The quantization step of the temperature in °C (default is 0.01 °C).
+        humidity_resolution : float, optional
+            The quantization step of the relative humidity in % (default is 0.01 %).
+        pressure_resolution : float, optional
+            The quantization step of the pressure in kPa (default is 0.001 kPa).
+
+        Raises
+        ------
+        ValueError
+            If a resolution is not positive.
+        """
+        if min(temperature_resolution, humidity_resolution, pressure_resolution) <= 0:
+            raise ValueError("Resolutions must be positive values.")
+        self.temperature_resolution = temperature_resolution
+        self.humidity_resolution = humidity_resolution
+        self.pressure_resolution = pressure_resolution
+        self.clear()
+
+    def _key(self, frequency, temperature, rel_humidity, pressure):
+        return (tuple(float(f) for f in frequency),
+                round(temperature / self.temperature_resolution),
+                round(rel_humidity / self.humidity_resolution),
+                round(pressure / self.pressure_resolution))
+
+    def get(self, frequency, temperature, rel_humidity, pressure):
+        """
+        Returns the sound absorption coefficient $m$ in 1/m of air, evaluating and caching it on a miss.
+
+        Parameters
+        ----------
+        frequency : list of int or float
+            A list of frequencies in Hz.
+        temperature : int or float
+            The temperature in °C.
+        rel_humidity : int or float
+            The relative humidity in %.
+        pressure : int or float
+            The pressure in kPa.
+
+        Returns
+        -------
+        np.ndarray
+            The read-only sound absorption coefficient $m$ in 1/m for the given frequencies.
+        """
+        key = self._key(frequency, temperature, rel_humidity, pressure)
+        with self._lock:
+            m = self._entries.get(key)
+            if m is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return m
+            self.misses += 1
+        _, m = air_absorption(key[0], key[1] * self.temperature_resolution, key[2] * self.humidity_resolution, key[3] * self.pressure_resolution)
+        m.flags.writeable = False
+        with self._lock:
+            self._entries[key] = m
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return m
+
+    def invalidate(self, frequency, temperature, rel_humidity, pressure):
+        """
+        Removes the entry for the given frequencies and climate from the cache.
+
+        Returns
+        -------
+        bool
+            True if an entry was removed, otherwise False.
+        """
+        key = self._key(frequency, temperature, rel_humidity, pressure)
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        """
+        Removes all entries from the cache and resets the hit and miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        """
+        Returns the statistics of the cache.
+
+        Returns
+        -------
+        dict
+            The number of hits and misses, the hit rate, and the current and maximum size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# Shared cache used by reverberation_time
+default_air_damp_cache = air_damp_cache()
+
+
+
+class band_set:
+    r"""
+    Defines a "band_set" object that describes the frequency bands of a calculation, e.g. octave bands, third-octave bands or a custom set of bands.
+
+    Values given per band (absorption coefficients, reverberation times, limits) are converted between band sets with a conversion matrix, so that an array of shape (N, bands) is converted in one matrix product.
+
+    Attributes
+    ----------
+    name : str
+        The name of the band set.
+    nominal : tuple
+        The nominal center frequencies of the bands in Hz.
+    frequencies : np.ndarray
+        The exact center frequencies of the bands in Hz. For fractional-octave band sets these are the base-two midband frequencies $1000 \cdot 2^{k/b}$ Hz.
+    fraction : int or None
+        The bandwidth designator $b$ for 1/b-octave bands, None for custom bands.
+    lower_edges : np.ndarray
+        The lower band edge frequencies in Hz.
+    upper_edges : np.ndarray
+        The upper band edge frequencies in Hz.
+    """
+
+    def __init__(self, frequencies, name="custom", fraction=None):
+        """
+        Initializes a band_set object with specified nominal center frequencies.
+
+        Parameters
+        ----------
+        frequencies : list of int or float
+            The nominal center frequencies of the bands in Hz, in ascending order.
+        name : str, optional
+            The name of the band set (default is "custom").
+        fraction : int, optional
+            The bandwidth designator $b$ for 1/b-octave bands (default is None for custom bands, whose edges are the geometric means of neighbouring center frequencies).
+
+        Raises
+        ------
+        ValueError
+            If the frequencies are empty, not positive or not strictly ascending.
+        """
+        if len(frequencies) == 0:
+            raise ValueError("Frequency list cannot be empty.")
+        nominal = np.asarray(frequencies, dtype=float)
+        if nominal.ndim != 1 or np.any(nominal <= 0) or np.any(np.diff(nominal) <= 0):
+            raise ValueError("Frequencies must be positive and strictly ascending.")
+        self.name = name
+        self.nominal = tuple(frequencies)
+        self.fraction = fraction
+        if fraction is not None:
+            self.frequencies = 1000 * 2.0**(np.round(fraction * np.log2(nominal / 1000)) / fraction)
+            self.lower_edges = self.frequencies * 2.0**(-1 / (2 * fraction))
+            self.upper_edges = self.frequencies * 2.0**(1 / (2 * fraction))
+        else:
+            self.frequencies = nominal
+            inner_edges = np.sqrt(nominal[1:] * nominal[:-1])
+            if len(nominal) > 1:
+                self.lower_edges = np.concatenate(([nominal[0]**2 / inner_edges[0]], inner_edges))
+                self.upper_edges = np.concatenate((inner_edges, [nominal[-1]**2 / inner_edges[-1]]))
+            else:
+                self.lower_edges = nominal / np.sqrt(2)
+                self.upper_edges = nominal * np.sqrt(2)
+        self._conversion_matrices = {}
+
+    @classmethod
+    def octave(cls):
+        """
+        Returns the octave bands from 63 Hz to 8000 Hz.
+        """
+        return cls([63, 125, 250, 500, 1000, 2000, 4000, 8000], name="octave", fraction=1)
+
+    @classmethod
+    def third_octave(cls):
+        """
+        Returns the third-octave bands from 50 Hz to 10 kHz.
+        """
+        return cls([50, 63, 80, 100, 125, 160, 200, 250, 315, 400, 500, 630, 800, 1000, 1250, 1600,
+                    2000, 2500, 3150, 4000, 5000, 6300, 8000, 10000], name="third-octave", fraction=3)
+
+    def __len__(self):
+        return len(self.nominal)
+
+    def __eq__(self, other):
+        return isinstance(other, band_set) and np.array_equal(self.frequencies, other.frequencies)
+
+    def __hash__(self):
+        return hash(tuple(self.frequencies))
+
+    def __repr__(self):
+        return f"band_set({list(self.nominal)}, name={self.name!r})"
+
+    def get_frequencies(self):
+        """
+        Returns the nominal center frequencies of the bands in Hz.
+
+        Returns
+        -------
+        list
+            The nominal center frequencies in Hz.
+        """
+        return list(self.nominal)
+
+    def describe(self):
+        """
+        Returns the nominal center frequencies as text, e.g. "63, 125, ..., and 8000 Hz".
+        """
+        names = [f"{f:g}" for f in self.nominal]
+        if len(names) == 1:
+            return f"{names[0]} Hz"
+        return f"{', '.join(names[:-1])}, and {names[-1]} Hz"
+
+    def get_conversion_matrix(self, target, method=None, extrapolate="nan"):
+        """
+        Returns the matrix converting values on these bands to values on the target bands.
+
+        Parameters
+        ----------
+        target : band_set
+            The band set to convert to.
+        method : str, optional
+            "mean" averages all source bands whose center lies in a target band (aggregation to coarser bands), "interpolate" interpolates linearly over the logarithm of the frequency and "step" takes the value of the source band containing the target center. The default is "mean" for coarser targets and "interpolate" otherwise.
+        extrapolate : str, optional
+            "nan" leaves target bands without source data empty, "hold" repeats the value of the nearest source band (default is "nan").
+
+        Returns
+        -------
+        np.ndarray
+            The conversion matrix of shape (len(target), len(self)). Rows of target bands without source data are zero.
+        """
+        if method is None:
+            method = "mean" if len(target) < len(self) else "interpolate"
+        if method not in ("mean", "interpolate", "step"):
+            raise ValueError("Method must be 'mean', 'interpolate' or 'step'.")
+        if extrapolate not in ("nan", "hold"):
+            raise ValueError("Extrapolate must be 'nan' or 'hold'.")
+        key = (tuple(target.frequencies), method, extrapolate)
+        if key in self._conversion_matrices:
+            return self._conversion_matrices[key]
+
+        source = np.log2(self.frequencies)
+        center = np.log2(target.frequencies)[:, np.newaxis]
+        if method == "mean":
+            inside = (self.frequencies >= target.lower_edges[:, np.newaxis]) & (self.frequencies < target.upper_edges[:, np.newaxis])
+            matrix = inside / np.maximum(inside.sum(axis=1, keepdims=True), 1)
+        elif method == "step":
+            matrix = ((target.frequencies[:, np.newaxis] >= self.lower_edges) & (target.frequencies[:, np.newaxis] < self.upper_edges)).astype(float)
+        else:
+            # Linear interpolation weights between the two neighbouring source centers
+            upper = np.clip(np.searchsorted(source, center[:, 0]), 1, max(len(self) - 1, 1))
+            lower = upper - 1
+            matrix = np.zeros((len(target), len(self)))
+            rows = np.arange(len(target))
+            if len(self) == 1:
+                matrix[:, 0] = source[0] == center[:, 0]
+            else:
+                weight = (center[:, 0] - source[lower]) / (source[upper] - source[lower])
+                inside = (weight >= 0) & (weight <= 1)
+                matrix[rows[inside], lower[inside]] = 1 - weight[inside]
+                matrix[rows[inside], upper[inside]] += weight[inside]
+        if extrapolate == "hold":
+            empty = matrix.sum(axis=1) == 0
+            nearest = np.where(center[:, 0] < source[0], 0, len(self) - 1)
+            matrix[empty, nearest[empty]] = 1
+        matrix.flags.writeable = False
+        self._conversion_matrices[key] = matrix
+        return matrix
+
+    def convert(self, values, target, method=None, extrapolate="nan"):
+        """
+        Converts values given on these bands to the target bands.
+
+        A NaN value propagates to every target band it contributes to, and target bands without source data are NaN unless extrapolate is "hold".
+
+        Parameters
+        ----------
+        values : array_like
+            The values on these bands, shape (..., len(self)).
+        target : band_set
+            The band set to convert to.
+        method : str, optional
+            The conversion method, see get_conversion_matrix.
+        extrapolate : str, optional
+            The treatment of target bands outside the source bands, see get_conversion_matrix.
+
+        Returns
+        -------
+        np.ndarray
+            The values on the target bands, shape (..., len(target)).
+        """
+        values = np.asarray(values, dtype=float)
+        if values.shape[-1] != len(self):
+            raise ValueError(f"Values must contain {len(self)} entries in the last axis.")
+        if target == self:
+            return values.copy()
+        matrix = self.get_conversion_matrix(target, method, extrapolate)
+        nan_mask = np.isnan(values)
+        result = np.where(nan_mask, 0.0, values) @ matrix.T
+        result[(nan_mask @ (matrix.T != 0)) > 0] = np.nan
+        result[..., matrix.sum(axis=1) == 0] = np.nan
+        return result
+
+
+# Band sets used throughout the calculation
+octave_bands = band_set.octave()
+third_octave_bands = band_set.third_octave()
+
+
+
 class material:
     """
     Defines a "material" object with properties such as name, absorption coefficient (and price).
@@ -485,11 +907,15 @@ class material:
         The name of the material.
     absorption_coefficient : list
         The absorption coefficient of the material at different frequencies.
+    bands : band_set
+        The frequency bands of the absorption coefficients (default is octave_bands).
     price : int or float, optional
         The price of the material as €/m$^2$ (default is None).
     """
 
-    def __init__(self, name, absorption_coefficient):
+    __slots__ = ("name", "bands", "absorption_coefficient", "price")
+
+    def __init__(self, name, absorption_coefficient, bands=None):
         """
         Initializes a material object with a specified name and absorption coefficient.
 
@@ -499,6 +925,8 @@ class material:
             The name of the material.
         absorption_coefficient : list of float
             A list of absorption coefficients at different frequencies.
+        bands : band_set, optional
+            The frequency bands of the absorption coefficients (default is None, which uses octave_bands).
 
         Raises
         -------
@@ -511,8 +939,12 @@ class material:
         ValueError
             If the absorption coefficient list contains negative values.
         ValueError
-            If the absorption coefficient list does not contain exactly 8 values for the frequency bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.
+            If the absorption coefficient list does not contain exactly one value per frequency band, e.g. 8 values for the octave bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.
         """
+        if bands is None:
+            bands = octave_bands
+        if not isinstance(bands, band_set):
+            raise TypeError("Bands must be an instance of the band_set class.")
         if not isinstance(name, str):
             raise TypeError("Name must be a string.")
         if not isinstance(absorption_coefficient, list):
@@ -523,13 +955,64 @@ class material:
             raise ValueError("Absorption coefficient list cannot be empty.")
         if any(ac < 0 for ac in absorption_coefficient):
             raise ValueError("Absorption coefficient values must be non-negative.")
-        if len(absorption_coefficient) != 8:
-            raise ValueError("Absorption coefficient list must contain exactly 8 values for the frequency bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.")
+        if len(absorption_coefficient) != len(bands):
+            raise ValueError(f"Absorption coefficient list must contain exactly {len(bands)} values for the frequency bands {bands.describe()}.")
         self.name = name
+        self.bands = bands
         self.absorption_coefficient = np.array(absorption_coefficient)
         # self.frequency_weight = self.get_frequency_weight()
         self.price = None
 
+    @classmethod
+    def from_array(cls, name, absorption_coefficient, bands=None, trusted=False):
+        """
+        Creates a material from a NumPy array of absorption coefficients, validating the whole array at once instead of value by value.
+
+        Parameters
+        ----------
+        name : str
+            The name of the material.
+        absorption_coefficient : array_like
+            The absorption coefficients, one per frequency band. Missing values are given as NaN.
+        bands : band_set, optional
+            The frequency bands of the absorption coefficients (default is None, which uses octave_bands).
+        trusted : bool, optional
+            If True, the inputs are not validated at all, e.g. for data that has been validated as a whole before (default is False).
+
+        Returns
+        -------
+        material
+            The new material. The absorption coefficients are stored as a float array without copying where possible.
+
+        Raises
+        -------
+        TypeError
+            If the name is not a string, the bands are not a band_set or the absorption coefficients are not numeric.
+        ValueError
+            If the absorption coefficients are negative, infinite or not exactly one value per frequency band.
+        """
+        if bands is None:
+            bands = octave_bands
+        if not trusted:
+            if not isinstance(bands, band_set):
+                raise TypeError("Bands must be an instance of the band_set class.")
+            if not isinstance(name, str):
+                raise TypeError("Name must be a string.")
+            absorption_coefficient = np.asarray(absorption_coefficient)
+            if absorption_coefficient.dtype.kind not in "iuf":
+                raise TypeError("Absorption coefficient must be an array of numeric values.")
+            absorption_coefficient = absorption_coefficient.astype(float, copy=False)
+            if absorption_coefficient.shape != (len(bands),):
+                raise ValueError(f"Absorption coefficient array must contain exactly {len(bands)} values for the frequency bands {bands.describe()}.")
+            if np.any(absorption_coefficient < 0) or np.any(np.isinf(absorption_coefficient)):
+                raise ValueError("Absorption coefficient values must be finite and non-negative.")
+        calc_material = cls.__new__(cls)
+        calc_material.name = name
+        calc_material.bands = bands
+        calc_material.absorption_coefficient = absorption_coefficient
+        calc_material.price = None
+        return calc_material
+
     def set_absorption_coefficient(self, absorption_coefficient):
         """
         Sets the absorption coefficient of the material.
@@ -550,7 +1033,7 @@ class material:
         ValueError
             If the absorption coefficient list contains negative values.
         ValueError
-            If the absorption coefficient list does not contain exactly 8 values for the frequency bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.
+            If the absorption coefficient list does not contain exactly one value per frequency band of the material.
         """
         if not isinstance(absorption_coefficient, list):
             raise TypeError("Absorption coefficient must be a list.")
@@ -560,20 +1043,38 @@ class material:
             raise ValueError("Absorption coefficient list cannot be empty.")
         if any(ac < 0 for ac in absorption_coefficient):
             raise ValueError("Absorption coefficient values must be non-negative.")
-        if len(absorption_coefficient) != 8:
-            raise ValueError("Absorption coefficient list must contain exactly 8 values for the frequency bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.")
+        if len(absorption_coefficient) != len(self.bands):
+            raise ValueError(f"Absorption coefficient list must contain exactly {len(self.bands)} values for the frequency bands {self.bands.describe()}.")
         self.absorption_coefficient = absorption_coefficient
 
-    def get_absorption_coefficient(self):
+    def get_absorption_coefficient(self, bands=None):
         """
         Returns the absorption coefficient of the material.
 
+        Parameters
+        ----------
+        bands : band_set, optional
+            The frequency bands to return the absorption coefficient for (default is None, which returns the coefficients on the bands of the material). Other band sets are aggregated or interpolated with band_set.convert.
+
         Returns
         -------
         list
             The absorption coefficient of the material at different frequencies.
         """
-        return self.absorption_coefficient
+        if bands is None or bands == self.bands:
+            return self.absorption_coefficient
+        return self.bands.convert(self.absorption_coefficient, bands)
+
+    def get_bands(self):
+        """
+        Returns the frequency bands of the absorption coefficient.
+
+        Returns
+        -------
+        band_set
+            The frequency bands of the absorption coefficient.
+        """
+        return self.bands
     
     def set_name(self, name):
         """
@@ -658,9 +1159,13 @@ class surface:
         The area of the surface in m$^2$.
     material : material
         The material of the surface, which is an instance of the material class.
+    axis : int or None
+        The room axis the surface is perpendicular to (0 = x, 1 = y, 2 = z), needed for the Fitzroy and Arau-Puchades formulas (default is None).
     """
-    
-    def __init__(self, name, area, material):
+
+    __slots__ = ("name", "area", "material", "axis")
+
+    def __init__(self, name, area, material, axis=None):
         """
         Initializes a surface object with a specified name, area, and material.
 
@@ -672,6 +1177,8 @@ class surface:
             The area of the surface in m$^2$.
         material : material 
             The material of the surface, which is an instance of the material class.
+        axis : int, optional
+            The room axis the surface is perpendicular to (0 = x, 1 = y, 2 = z) (default is None).
         
         Raises
         -------
@@ -687,6 +1194,88 @@ class surface:
         self.name = name
         self.area = area
         self.material = material
+        self.axis = None
+        if axis is not None:
+            self.set_axis(axis)
+
+    @classmethod
+    def from_arrays(cls, names, areas, materials, axis=None, bands=None, trusted=False):
+        """
+        Creates many surfaces at once from arrays, validating every array as a whole instead of surface by surface.
+
+        Parameters
+        ----------
+        names : sequence of str
+            The names of the surfaces, shape (N,).
+        areas : array_like
+            The areas of the surfaces in m$^2$, shape (N,).
+        materials : sequence of material or array_like
+            Either one material object per surface or the absorption coefficients of every surface, shape (N, n_bands). For coefficients, one material per surface is created with the name of the surface.
+        axis : array_like, optional
+            The room axis every surface is perpendicular to (0 = x, 1 = y, 2 = z), shape (N,) (default is None).
+        bands : band_set, optional
+            The frequency bands of absorption coefficients given as an array (default is None, which uses octave_bands).
+        trusted : bool, optional
+            If True, the inputs are not validated at all, e.g. for data read from a validated project file (default is False).
+
+        Returns
+        -------
+        list of surface
+            The new surfaces.
+
+        Raises
+        -------
+        TypeError
+            If the names are not strings, the areas or absorption coefficients are not numeric or the materials are not instances of the material class.
+        ValueError
+            If the arrays do not have one entry per surface, the areas are not positive, the absorption coefficients are negative or the axes are not 0, 1 or 2.
+        """
+        if bands is None:
+            bands = octave_bands
+        areas = np.asarray(areas)
+        n_surfaces = len(areas)
+        coefficients = None
+        if not isinstance(materials, (list, tuple)):
+            coefficients = np.asarray(materials)
+        if not trusted:
+            if areas.ndim != 1 or areas.dtype.kind not in "iuf":
+                raise TypeError("Areas must be a one-dimensional array of numeric values.")
+            if not np.all(areas > 0) or np.any(np.isinf(areas)):
+                raise ValueError("Area must be a positive value.")
+            if len(names) != n_surfaces or not all(isinstance(name, str) for name in names):
+                raise TypeError("Names must be a sequence of one string per surface.")
+            if axis is not None:
+                axis = np.asarray(axis)
+                if axis.shape != (n_surfaces,) or axis.dtype.kind not in "iu" or not np.all(np.isin(axis, (0, 1, 2))):
+                    raise ValueError("Axis must be 0 (x), 1 (y) or 2 (z).")
+            if coefficients is None:
+                if len(materials) != n_surfaces:
+                    raise ValueError("Materials must contain one material per surface.")
+                if not all(isinstance(calc_material, material) for calc_material in materials):
+                    raise TypeError("Materials must be instances of the material class.")
+            else:
+                if not isinstance(bands, band_set):
+                    raise TypeError("Bands must be an instance of the band_set class.")
+                if coefficients.dtype.kind not in "iuf":
+                    raise TypeError("Absorption coefficient must be an array of numeric values.")
+                if coefficients.shape != (n_surfaces, len(bands)):
+                    raise ValueError(f"Absorption coefficient array must have the shape ({n_surfaces}, {len(bands)}) for the frequency bands {bands.describe()}.")
+                if np.any(coefficients < 0) or np.any(np.isinf(coefficients)):
+                    raise ValueError("Absorption coefficient values must be finite and non-negative.")
+        if coefficients is not None:
+            coefficients = coefficients.astype(float, copy=False)
+            materials = [material.from_array(name, row, bands, trusted=True) for name, row in zip(names, coefficients)]
+        area_values = areas.tolist()
+        axis_values = [None] * n_surfaces if axis is None else np.asarray(axis).tolist()
+        surfaces = []
+        for name, area, calc_material, surface_axis in zip(names, area_values, materials, axis_values):
+            calc_surface = cls.__new__(cls)
+            calc_surface.name = name
+            calc_surface.area = area
+            calc_surface.material = calc_material
+            calc_surface.axis = surface_axis
+            surfaces.append(calc_surface)
+        return surfaces
 
     def set_area(self, area):
         """
@@ -722,13 +1311,13 @@ class surface:
 
         return self.area
     
-    def set_material(self, material):
+    def set_material(self, calc_material):
         """
         Sets the material of the surface.
 
         Parameters
         ----------
-        material : material
+        calc_material : material
             The material of the surface, which is an instance of the material class.
 
         Raises
@@ -738,11 +1327,11 @@ class surface:
         ValueError
             If the material does not have an absorption coefficient defined.
         """
-        if not isinstance(material, material):
+        if not isinstance(calc_material, material):
             raise TypeError("Material must be an instance of the material class.")
-        if not hasattr(material, 'absorption_coefficient'):
+        if not hasattr(calc_material, 'absorption_coefficient'):
             raise ValueError("Material must have an absorption coefficient defined.")
-        self.material = material
+        self.material = calc_material
 
     def get_material(self):
         """
@@ -784,68 +1373,495 @@ class surface:
         """
         return self.name if hasattr(self, 'name') else None
 
+    def set_axis(self, axis):
+        """
+        Sets the room axis the surface is perpendicular to.
+
+        Parameters
+        ----------
+        axis : int
+            The room axis (0 = x, 1 = y, 2 = z).
+
+        Raises
+        -------
+        ValueError
+            If the axis is not 0, 1 or 2.
+        """
+        if axis not in (0, 1, 2) or isinstance(axis, bool):
+            raise ValueError("Axis must be 0 (x), 1 (y) or 2 (z).")
+        self.axis = int(axis)
+
+    def get_axis(self):
+        """
+        Returns the room axis the surface is perpendicular to.
+
+        Returns
+        -------
+        int or None
+            The room axis (0 = x, 1 = y, 2 = z) if it has been set, otherwise None.
+        """
+        return self.axis
+
+
+
+def _surface_coefficient(calc_surface, bands):
+    # Absorption coefficients of the surface material on the given bands, converted if the material uses other bands
+    calc_material = calc_surface.get_material()
+    if getattr(calc_material, 'bands', octave_bands) == bands:
+        return calc_material.get_absorption_coefficient()
+    return calc_material.get_absorption_coefficient(bands)
 
 
-class reverberation_time:
-    """
-    Defines a "reverberation_time" object that calculates the reverberation time of a room based on the extended Sabine formula from DIN EN ISO 354.
+
+class Aeq_accumulator:
+    r"""
+    Defines an "Aeq_accumulator" object that keeps the equivalent sound absorption area (Aeq) of a set of surfaces up to date under single-surface edits.
+
+    The accumulator stores the per-band sum of all finite contributions area $\cdot$ absorption coefficient and the per-band number of NaN contributions. Adding, removing or updating a surface therefore costs O(bands) regardless of the number of surfaces, and a band is NaN exactly as long as at least one of its contributions is NaN.
 
     Attributes
     ----------
-    calc_room : room
-        The room for which the reverberation time is calculated, which is an instance of the room class.
-    surfaces : list
-        A list of surfaces in the room, each of which is an instance of the surface class.
-    frequency_bands : list
-        A list of frequency bands in Hz for which the reverberation time is calculated.
-    air_damp_calc : bool, optional
-        A flag indicating whether air damping is considered in the calculation (default is True).
-    Aeq : int or float
-        The equivalent sound absorption area of the room in m$^2$, calculated based on the surfaces and their materials.
-    c : int or float
-        The speed of sound in air in m/s, calculated based on the room's temperature and pressure.
-    volume : int or float
-        The volume of the room in m$^3$.
-    air_damp : air_damp
-        An instance of the air_damp class that calculates the sound absorption coefficient of air based on frequency, temperature, humidity, and pressure.
-    reverberation_time : list
-        The calculated reverberation time of the room in s.
+    n_bands : int
+        The number of frequency bands (default is 8).
     """
-    
-    def __init__(self, calc_room, surfaces, air_damp_calc=True, meas_reverberation_time=None):
+
+    def __init__(self, n_bands=8):
         """
-        Initializes a reverberation_time object with a specified room, surfaces, and optional parameters for air damping calculation and measured reverberation time.
-        
+        Initializes an empty Aeq_accumulator object.
+
         Parameters
         ----------
-        calc_room : room
-            The room for which the reverberation time is calculated, which is an instance of the room class.
-        surfaces : list of surface
-            A list of surfaces in the room, each of which is an instance of the surface class.
-        air_damp_calc : bool, optional
-            A flag indicating whether air damping is considered in the calculation (default is True).
-        meas_reverberation_time : list of int or float, optional
-            A list of measured reverberation times of the room in s (default is None).
-        
-        Raises
-        -------
-        ValueError
-            If the room is not an instance of the room class.
-        TypeError
-            If the surfaces are not a list or if any surface is not an instance of the surface class.
-        ValueError
-            If the surfaces list is empty.
-        TypeError
-            If the air_damp_calc is not a boolean.
-        TypeError
-            If the measured reverberation time is not a list or if it contains non-numeric values.
-        ValueError
-            If the measured reverberation time list does not contain exactly 8 entries for the frequency bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.
-        ValueError
-            If the measured reverberation time list is empty or if it contains negative values.
+        n_bands : int, optional
+            The number of frequency bands (default is 8).
         """
-        if not isinstance(calc_room, room):
-            raise TypeError("Room must be an instance of the room class.")
+        self.n_bands = n_bands
+        self._entries = {}
+        self._sum = np.zeros(n_bands)
+        self._nan_count = np.zeros(n_bands, dtype=int)
+        self._changed = np.zeros(n_bands, dtype=bool)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _check(self, area, absorption_coefficient):
+        if not isinstance(area, (int, float)):
+            raise TypeError("Area must be an integer or float.")
+        absorption_coefficient = np.asarray(absorption_coefficient, dtype=float)
+        if absorption_coefficient.shape != (self.n_bands,):
+            raise ValueError(f"Absorption coefficient must contain exactly {self.n_bands} values.")
+        return absorption_coefficient
+
+    def _apply(self, contribution, sign):
+        nan_mask = np.isnan(contribution)
+        self._nan_count += sign * nan_mask
+        self._sum += sign * np.where(nan_mask, 0.0, contribution)
+
+    def add(self, key, area, absorption_coefficient):
+        """
+        Adds a surface to the accumulator.
+
+        Parameters
+        ----------
+        key : hashable
+            The key identifying the surface, e.g. the surface object itself.
+        area : int or float
+            The area of the surface in m$^2$.
+        absorption_coefficient : array_like
+            The absorption coefficients of the surface material.
+
+        Raises
+        ------
+        KeyError
+            If the key is already present.
+        """
+        if key in self._entries:
+            raise KeyError(f"Surface {key!r} is already part of the accumulator.")
+        absorption_coefficient = self._check(area, absorption_coefficient)
+        contribution = area * absorption_coefficient
+        self._entries[key] = (area, absorption_coefficient, contribution)
+        self._apply(contribution, 1)
+        self._changed |= contribution != 0
+
+    def add_many(self, keys, areas, absorption_coefficients):
+        """
+        Adds many surfaces to the accumulator in one vectorized step.
+
+        Parameters
+        ----------
+        keys : list of hashable
+            The keys identifying the surfaces.
+        areas : array_like
+            The areas of the surfaces in m$^2$, shape (N_surfaces,).
+        absorption_coefficients : array_like
+            The absorption coefficients of the surface materials, shape (N_surfaces, n_bands).
+
+        Raises
+        ------
+        KeyError
+            If a key is already present or given twice.
+        """
+        keys = list(keys)
+        if len(set(keys)) != len(keys) or any(key in self._entries for key in keys):
+            raise KeyError("Surfaces must not be added twice to the accumulator.")
+        areas = np.asarray(areas, dtype=float)
+        absorption_coefficients = np.asarray(absorption_coefficients, dtype=float).reshape(len(keys), self.n_bands)
+        contributions = absorption_coefficients * areas[:, np.newaxis]
+        nan_mask = np.isnan(contributions)
+        self._nan_count += nan_mask.sum(axis=0)
+        self._sum += np.where(nan_mask, 0.0, contributions).sum(axis=0)
+        self._changed |= (contributions != 0).any(axis=0)
+        self._entries.update(zip(keys, zip(areas.tolist(), absorption_coefficients, contributions)))
+
+    def remove(self, key):
+        """
+        Removes a surface from the accumulator.
+
+        Parameters
+        ----------
+        key : hashable
+            The key identifying the surface.
+
+        Raises
+        ------
+        KeyError
+            If the key is not present.
+        """
+        _, _, contribution = self._entries.pop(key)
+        self._apply(contribution, -1)
+        self._changed |= contribution != 0
+
+    def update(self, key, area=None, absorption_coefficient=None):
+        """
+        Updates the area and/or the absorption coefficients of a surface.
+
+        Parameters
+        ----------
+        key : hashable
+            The key identifying the surface.
+        area : int or float, optional
+            The new area of the surface in m$^2$ (default is None, which keeps the area).
+        absorption_coefficient : array_like, optional
+            The new absorption coefficients (default is None, which keeps the coefficients).
+
+        Raises
+        ------
+        KeyError
+            If the key is not present.
+        """
+        old_area, old_coefficient, old_contribution = self._entries[key]
+        area = old_area if area is None else area
+        absorption_coefficient = old_coefficient if absorption_coefficient is None else absorption_coefficient
+        absorption_coefficient = self._check(area, absorption_coefficient)
+        contribution = area * absorption_coefficient
+        self._apply(old_contribution, -1)
+        self._apply(contribution, 1)
+        self._entries[key] = (area, absorption_coefficient, contribution)
+        unchanged = (contribution == old_contribution) | (np.isnan(contribution) & np.isnan(old_contribution))
+        self._changed |= ~unchanged
+
+    def get_Aeq(self):
+        """
+        Returns the equivalent sound absorption area in m$^2$ of all surfaces.
+
+        Returns
+        -------
+        np.ndarray
+            The equivalent sound absorption area per band, NaN in every band with at least one NaN contribution.
+        """
+        Aeq = self._sum.copy()
+        Aeq[self._nan_count > 0] = np.nan
+        return Aeq
+
+    def pop_changed_bands(self):
+        """
+        Returns the bands whose Aeq changed since the last call and resets the change tracking.
+
+        Returns
+        -------
+        np.ndarray
+            A boolean mask of the changed bands.
+        """
+        changed = self._changed.copy()
+        self._changed[:] = False
+        return changed
+
+    def rebuild(self):
+        """
+        Recomputes the per-band sums from the stored contributions to remove the rounding drift of many incremental updates.
+        """
+        if self._entries:
+            contributions = np.array([contribution for _, _, contribution in self._entries.values()])
+            nan_mask = np.isnan(contributions)
+            self._sum = np.where(nan_mask, 0.0, contributions).sum(axis=0)
+            self._nan_count = nan_mask.sum(axis=0)
+        else:
+            self._sum = np.zeros(self.n_bands)
+            self._nan_count = np.zeros(self.n_bands, dtype=int)
+
+
+
+class material_table:
+    """
+    Defines a "material_table" object that interns materials by content into a single coefficient matrix, so that surfaces can refer to their material by an integer index.
+
+    Materials with the same name and the same absorption coefficients on the bands of the table (NaN included) are stored once, no matter how many material objects or table rows they come from. The equivalent sound absorption area of many surfaces is then a per-material sum of the areas followed by one matrix product.
+
+    Attributes
+    ----------
+    bands : band_set
+        The frequency bands of the coefficient matrix.
+    coefficients : np.ndarray
+        The read-only absorption coefficients of all interned materials, shape (n_materials, n_bands).
+    """
+
+    def __init__(self, bands=None, capacity=16):
+        """
+        Initializes an empty material_table object.
+
+        Parameters
+        ----------
+        bands : band_set, optional
+            The frequency bands of the coefficient matrix (default is None, which uses octave_bands). Materials on other bands are converted with band_set.convert when they are interned.
+        capacity : int, optional
+            The number of materials the coefficient matrix is allocated for initially, it grows as needed (default is 16).
+
+        Raises
+        ------
+        TypeError
+            If the bands are not a band_set or the capacity is not an integer.
+        ValueError
+            If the capacity is not positive.
+        """
+        if bands is None:
+            bands = octave_bands
+        if not isinstance(bands, band_set):
+            raise TypeError("Bands must be an instance of the band_set class.")
+        if not isinstance(capacity, int) or isinstance(capacity, bool):
+            raise TypeError("Capacity must be an integer.")
+        if capacity <= 0:
+            raise ValueError("Capacity must be a positive value.")
+        self.bands = bands
+        self._coefficients = np.empty((capacity, len(bands)))
+        self._materials = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self._materials)
+
+    @property
+    def coefficients(self):
+        coefficients = self._coefficients[:len(self._materials)]
+        coefficients.flags.writeable = False
+        return coefficients
+
+    def intern(self, calc_material):
+        """
+        Adds a material to the table unless a material with the same name and absorption coefficients is already present.
+
+        Parameters
+        ----------
+        calc_material : material
+            The material to intern.
+
+        Returns
+        -------
+        int
+            The index of the material in the table.
+
+        Raises
+        ------
+        TypeError
+            If the material is not an instance of the material class.
+        """
+        if not isinstance(calc_material, material):
+            raise TypeError("Material must be an instance of the material class.")
+        coefficient = np.asarray(calc_material.get_absorption_coefficient(self.bands), dtype=float)
+        # Adding 0.0 turns -0.0 into 0.0 and np.where gives every NaN the same bit pattern
+        key = (calc_material.get_name(), np.where(np.isnan(coefficient), np.nan, coefficient + 0.0).tobytes())
+        index = self._index.get(key)
+        if index is None:
+            index = len(self._materials)
+            if index == len(self._coefficients):
+                self._coefficients = np.concatenate([self._coefficients, np.empty_like(self._coefficients)])
+            self._coefficients[index] = coefficient
+            self._materials.append(calc_material)
+            self._index[key] = index
+        return index
+
+    def intern_many(self, materials):
+        """
+        Interns many materials, converting every distinct material object only once.
+
+        Parameters
+        ----------
+        materials : list of material
+            The materials to intern, usually with many repetitions of the same object.
+
+        Returns
+        -------
+        np.ndarray
+            The index of every material in the table, shape (N,).
+        """
+        known = {}
+        material_index = np.empty(len(materials), dtype=np.intp)
+        for i, calc_material in enumerate(materials):
+            index = known.get(id(calc_material))
+            if index is None:
+                index = known[id(calc_material)] = self.intern(calc_material)
+            material_index[i] = index
+        return material_index
+
+    def add(self, name, absorption_coefficient):
+        """
+        Interns a material given by its name and absorption coefficients on the bands of the table.
+
+        Parameters
+        ----------
+        name : str
+            The name of the material.
+        absorption_coefficient : array_like
+            The absorption coefficients, one per frequency band of the table. Missing values are given as NaN.
+
+        Returns
+        -------
+        int
+            The index of the material in the table.
+
+        Raises
+        ------
+        TypeError
+            If the name is not a string or the absorption coefficients are not numeric.
+        ValueError
+            If the absorption coefficients are negative, infinite or not exactly one value per frequency band.
+        """
+        return self.intern(material.from_array(name, absorption_coefficient, self.bands))
+
+    def get_material(self, index):
+        """
+        Returns the material object stored under an index. All surfaces with the same index share this object.
+
+        Parameters
+        ----------
+        index : int
+            The index of the material in the table.
+
+        Returns
+        -------
+        material
+            The first material object that was interned under this index.
+        """
+        return self._materials[index]
+
+    def calculate_Aeq(self, material_index, areas):
+        """
+        Calculates the equivalent sound absorption area in m$^2$ of surfaces given by their material index and area.
+
+        Parameters
+        ----------
+        material_index : array_like
+            The index of the material of every surface, shape (N_surfaces,).
+        areas : array_like
+            The area of every surface in m$^2$, shape (N_surfaces,).
+
+        Returns
+        -------
+        np.ndarray
+            The equivalent sound absorption area per band, NaN in every band in which a material with a missing coefficient is used.
+
+        Raises
+        ------
+        ValueError
+            If the arrays differ in shape or an index is not part of the table.
+        """
+        material_index = np.asarray(material_index, dtype=np.intp)
+        areas = np.asarray(areas, dtype=float)
+        if material_index.ndim != 1 or material_index.shape != areas.shape:
+            raise ValueError("Material index and areas must be one-dimensional arrays of the same length.")
+        if material_index.size and (material_index.min() < 0 or material_index.max() >= len(self)):
+            raise ValueError(f"Material index must refer to one of the {len(self)} materials of the table.")
+        total_area = np.bincount(material_index, weights=areas, minlength=len(self))
+        nan_mask = np.isnan(self.coefficients)
+        Aeq = total_area @ np.where(nan_mask, 0.0, self.coefficients)
+        Aeq[(total_area != 0) @ nan_mask] = np.nan
+        return Aeq
+
+
+
+class reverberation_time:
+    """
+    Defines a "reverberation_time" object that calculates the reverberation time of a room based on the extended Sabine formula from DIN EN ISO 354 or another registered reverberation formula.
+
+    Attributes
+    ----------
+    calc_room : room
+        The room for which the reverberation time is calculated, which is an instance of the room class.
+    surfaces : list
+        A list of surfaces in the room, each of which is an instance of the surface class.
+    bands : band_set
+        The frequency bands for which the reverberation time is calculated.
+    frequency_bands : list
+        A list of frequency bands in Hz for which the reverberation time is calculated.
+    air_damp_calc : bool, optional
+        A flag indicating whether air damping is considered in the calculation (default is True).
+    formula : str, optional
+        The name of the reverberation formula in reverberation_formulas (default is "sabine").
+    Aeq : int or float
+        The equivalent sound absorption area of the room in m$^2$, calculated based on the surfaces and their materials.
+    Aeq_accumulator : Aeq_accumulator
+        The accumulator holding the per-band sums behind Aeq, which allows surfaces to be added, removed or updated without a full rebuild.
+    c : int or float
+        The speed of sound in air in m/s, calculated based on the room's temperature and pressure.
+    volume : int or float
+        The volume of the room in m$^3$.
+    m : np.ndarray or None
+        The sound absorption coefficient of air in 1/m for the frequency bands, looked up once in default_air_damp_cache (None if air damping is not considered).
+    reverberation_time : list
+        The calculated reverberation time of the room in s.
+    """
+    
+    def __init__(self, calc_room, surfaces, air_damp_calc=True, meas_reverberation_time=None, formula="sabine", bands=None):
+        """
+        Initializes a reverberation_time object with a specified room, surfaces, and optional parameters for air damping calculation and measured reverberation time.
+        
+        Parameters
+        ----------
+        calc_room : room
+            The room for which the reverberation time is calculated, which is an instance of the room class.
+        surfaces : list of surface
+            A list of surfaces in the room, each of which is an instance of the surface class. A surface listed more than once is counted once per occurrence.
+        air_damp_calc : bool, optional
+            A flag indicating whether air damping is considered in the calculation (default is True).
+        meas_reverberation_time : list of int or float, optional
+            A list of measured reverberation times of the room in s (default is None).
+        formula : str, optional
+            The name of the reverberation formula in reverberation_formulas, e.g. "sabine", "eyring", "millington_sette", "fitzroy" or "arau_puchades" (default is "sabine").
+        bands : band_set, optional
+            The frequency bands of the calculation (default is None, which uses the bands of the first surface's material). Materials given on other bands are converted with band_set.convert.
+        
+        Raises
+        -------
+        ValueError
+            If the room is not an instance of the room class.
+        TypeError
+            If the surfaces are not a list or if any surface is not an instance of the surface class.
+        ValueError
+            If the surfaces list is empty.
+        TypeError
+            If the air_damp_calc is not a boolean.
+        TypeError
+            If the measured reverberation time is not a list or if it contains non-numeric values.
+        ValueError
+            If the measured reverberation time list does not contain exactly one entry per frequency band, e.g. 8 entries for the octave bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.
+        ValueError
+            If the measured reverberation time list is empty or if it contains negative values.
+        ValueError
+            If the formula is not registered in reverberation_formulas.
+        """
+        if not isinstance(calc_room, room):
+            raise TypeError("Room must be an instance of the room class.")
         if not isinstance(surfaces, list):
             raise TypeError("Surfaces must be a list.")
         if not all(isinstance(calc_surface, surface) for calc_surface in surfaces):
@@ -854,31 +1870,39 @@ class reverberation_time:
             raise ValueError("Surfaces list cannot be empty.")
         if not isinstance(air_damp_calc, bool):
             raise TypeError("Air damping calculation flag must be a boolean.")
+        if bands is None:
+            bands = getattr(surfaces[0].get_material(), 'bands', octave_bands)
+        if not isinstance(bands, band_set):
+            raise TypeError("Bands must be an instance of the band_set class.")
         if meas_reverberation_time is not None:
             if not isinstance(meas_reverberation_time, list):
                 raise TypeError("Measured reverberation time must be a list.")
             if not all(isinstance(mrt, (int, float)) for mrt in meas_reverberation_time):
                 raise ValueError("Measured reverberation time must be a list of numeric values.")
-            if len(meas_reverberation_time) != 8:
-                raise ValueError("Measured reverberation time must be a list containing 8 entries for the frequency bands 63, 125, 250, 500, 1000, 2000, 4000, and 8000 Hz.")
+            if len(meas_reverberation_time) != len(bands):
+                raise ValueError(f"Measured reverberation time must be a list containing {len(bands)} entries for the frequency bands {bands.describe()}.")
             if len(meas_reverberation_time) == 0:
                 raise ValueError("Measured reverberation time list cannot be empty.")
             if any(mrt < 0 for mrt in meas_reverberation_time):
                 raise ValueError("Measured reverberation time values must be non-negative.")
+        if formula not in reverberation_formulas:
+            raise ValueError(f"Formula must be one of {sorted(reverberation_formulas)}.")
         
 
         self.calc_room = calc_room
-        self.frequency_bands = [63, 125, 250, 500, 1000, 2000, 4000, 8000]
-        self.surfaces = surfaces
+        self.bands = bands
+        self.frequency_bands = bands.get_frequencies()
+        self.surfaces = list(surfaces)
         self.calculate_Aeq()
         self.c = calc_room.get_c()
         #self.materials = surfaces.materials
         self.volume = calc_room.volume
         self.air_damp_calc = air_damp_calc
-        self.air_damp = air_damp(self.frequency_bands)
-        self.air_damp.set_temperature(calc_room.get_temperature())
-        self.air_damp.set_pressure(calc_room.get_pressure())
-        self.air_damp.set_rel_humidity(calc_room.get_rel_humidity())
+        self.formula = formula
+        if air_damp_calc:
+            self.m = default_air_damp_cache.get(self.frequency_bands, calc_room.get_temperature(), calc_room.get_rel_humidity(), calc_room.get_pressure())
+        else:
+            self.m = None
         if meas_reverberation_time is not None:
             self.meas_reverberation_time = np.array(meas_reverberation_time)
         else:
@@ -902,16 +1926,150 @@ class reverberation_time:
         """
         if not all(hasattr(surface, 'get_material') and surface.get_material() is not None for surface in self.surfaces):
             raise ValueError("All surfaces must have a material with an absorption coefficient defined.")
-        coeffs = np.array([surface.get_material().get_absorption_coefficient() for surface in self.surfaces])
-        areas = np.array([surface.get_area() for surface in self.surfaces])
-        Aeq_octave = coeffs * areas[:, np.newaxis]
-        Aeq = np.nansum(Aeq_octave, axis=0)
-        nan_mask = np.isnan(Aeq_octave).any(axis=0)
-        Aeq[nan_mask] = np.nan
-        self.Aeq = Aeq
+        # Positions of every surface in self.surfaces, so surfaces are removed without searching the list.
+        # A surface listed more than once counts once per occurrence and is a single entry of the accumulator.
+        self._surface_positions = {}
+        for index, calc_surface in enumerate(self.surfaces):
+            self._surface_positions.setdefault(calc_surface, []).append(index)
+        unique_surfaces = list(self._surface_positions)
+        # Surfaces sharing a material are converted once and gathered from the interned coefficient matrix
+        materials = material_table(self.bands)
+        material_index = materials.intern_many([surface.get_material() for surface in unique_surfaces])
+        coeffs = materials.coefficients[material_index]
+        areas = np.array([len(self._surface_positions[surface]) * surface.get_area() for surface in unique_surfaces])
+        self.Aeq_accumulator = Aeq_accumulator(len(self.frequency_bands))
+        self.Aeq_accumulator.add_many(unique_surfaces, areas, coeffs)
+        self.Aeq_accumulator.pop_changed_bands()
+        self.Aeq = self.Aeq_accumulator.get_Aeq()
         return self.Aeq
 
-    def calculate_reverberation_time(self):
+    def _update_changed_bands(self, area_changed):
+        changed = self.Aeq_accumulator.pop_changed_bands()
+        self.Aeq = self.Aeq_accumulator.get_Aeq()
+        # Only Sabine depends on nothing but Aeq of each band, the other formulas and the total area couple all bands
+        if area_changed or self.formula != "sabine":
+            changed = np.ones_like(changed)
+            self.calculate_reverberation_time()
+        elif changed.any():
+            self.calculate_reverberation_time(bands=changed)
+        return changed
+
+    def add_surface(self, calc_surface):
+        """
+        Adds a surface to the room and recalculates the reverberation time, in all bands as the total area changes.
+        A surface that is already part of the room is counted once more.
+
+        Parameters
+        ----------
+        calc_surface : surface
+            The surface to add, which is an instance of the surface class.
+
+        Returns
+        -------
+        np.ndarray
+            A boolean mask of the frequency bands that were recalculated.
+
+        Raises
+        ------
+        TypeError
+            If the surface is not an instance of the surface class.
+        """
+        if not isinstance(calc_surface, surface):
+            raise TypeError("Surface must be an instance of the surface class.")
+        positions = self._surface_positions.setdefault(calc_surface, [])
+        positions.append(len(self.surfaces))
+        self.surfaces.append(calc_surface)
+        area = len(positions) * calc_surface.get_area()
+        if len(positions) == 1:
+            self.Aeq_accumulator.add(calc_surface, area, _surface_coefficient(calc_surface, self.bands))
+        else:
+            self.Aeq_accumulator.update(calc_surface, area)
+        return self._update_changed_bands(area_changed=True)
+
+    def remove_surface(self, calc_surface):
+        """
+        Removes a surface from the room and recalculates the reverberation time, in all bands as the total area changes.
+        The last surface of surfaces takes the place of the removed surface. A surface listed more than once is removed once.
+
+        Parameters
+        ----------
+        calc_surface : surface
+            The surface to remove.
+
+        Returns
+        -------
+        np.ndarray
+            A boolean mask of the frequency bands that were recalculated.
+
+        Raises
+        ------
+        ValueError
+            If the surface is the last surface of the room.
+        KeyError
+            If the surface is not part of the room.
+        """
+        if len(self.surfaces) == 1:
+            raise ValueError("Surfaces list cannot be empty.")
+        positions = self._surface_positions[calc_surface]
+        index = positions.pop()
+        if positions:
+            self.Aeq_accumulator.update(calc_surface, len(positions) * calc_surface.get_area())
+        else:
+            del self._surface_positions[calc_surface]
+            self.Aeq_accumulator.remove(calc_surface)
+        # The last surface takes the place of the removed one
+        last = self.surfaces.pop()
+        if index < len(self.surfaces):
+            self.surfaces[index] = last
+            last_positions = self._surface_positions[last]
+            last_positions[last_positions.index(len(self.surfaces))] = index
+        return self._update_changed_bands(area_changed=True)
+
+    def update_surface(self, calc_surface, area=None, calc_material=None):
+        """
+        Updates the area and/or the material of a surface of the room and recalculates the reverberation time.
+        Only the bands whose Aeq changed are recalculated with the Sabine formula if the area is kept, otherwise all bands.
+
+        Parameters
+        ----------
+        calc_surface : surface
+            The surface to update.
+        area : int or float, optional
+            The new area of the surface in m$^2$ (default is None, which keeps the area).
+        calc_material : material, optional
+            The new material of the surface (default is None, which keeps the material).
+
+        Returns
+        -------
+        np.ndarray
+            A boolean mask of the frequency bands that were recalculated.
+        """
+        n = len(self._surface_positions[calc_surface])
+        old_area = calc_surface.get_area()
+        if area is not None:
+            calc_surface.set_area(area)
+        if calc_material is not None:
+            calc_surface.set_material(calc_material)
+        self.Aeq_accumulator.update(calc_surface, n * calc_surface.get_area(), _surface_coefficient(calc_surface, self.bands))
+        return self._update_changed_bands(area_changed=calc_surface.get_area() != old_area)
+
+    def calculate_absorption_area(self):
+        """
+        Calculates the equivalent sound absorption area in m$^2$ of the selected reverberation formula, without air absorption.
+
+        For the Sabine formula this is Aeq. The other formulas are evaluated by their engine in reverberation_formulas on a room_batch holding this room.
+
+        Returns
+        -------
+        np.ndarray
+            The equivalent sound absorption area in m$^2$ for the frequency bands.
+        """
+        if self.formula == "sabine":
+            return self.Aeq
+        batch = room_batch.from_rooms([self.calc_room], [self.surfaces], bands=self.bands)
+        return batch.calculate_absorption_area(self.formula)[0]
+
+    def calculate_reverberation_time(self, bands=None):
         r"""
         Calculates the reverberation time of the room based on the extended Sabine formula, considering air damping if specified.
 
@@ -939,26 +2097,735 @@ class reverberation_time:
         is used to specify initial values for the extension with additional sound absorption areas. The reverberation time is then calculated as:
 
         $$T = \frac{55.3 \cdot V}{(A_{eq} + A_{eq, measured}) \cdot c}$$
+
+        For other formulas than Sabine, $A_{eq}$ is replaced by the equivalent sound absorption area of the formula, see calculate_absorption_area.
+
+        Parameters
+        ----------
+        bands : np.ndarray, optional
+            A boolean mask or index array of the frequency bands to recalculate (default is None, which recalculates all bands).
         """
+        if bands is None:
+            bands = slice(None)
+            reverberation_time = np.full(len(self.frequency_bands), np.nan)
+        else:
+            reverberation_time = np.array(self.reverberation_time, dtype=float)
+        Aeq = self.calculate_absorption_area()[bands]
+        if self.meas_reverberation_time is not None:
+            meas_reverberation_time = self.meas_reverberation_time[bands]
+
         # Calculate the reverberation time based on the optimized Sabine formula according to DIN EN ISO 354
         if self.air_damp_calc is True:
             # If air damping is considered, use the Sabine formula corrected by the speed of sound and air damping
+            m = self.m[bands]
             if self.meas_reverberation_time is not None:
                 # If measured reverberation time is provided, use the calculated equivalent sound absorption area to correct the measured reverberation time
-                Aeq_meas = ((55.3 / self.c) * (self.volume / (self.meas_reverberation_time))) - 4 * self.volume * self.air_damp.calculate_coefficient()
-                self.reverberation_time = (55.3 / self.c) * (self.volume / (self.Aeq + Aeq_meas + 4 * self.volume * self.air_damp.calculate_coefficient()))
+                Aeq_meas = ((55.3 / self.c) * (self.volume / (meas_reverberation_time))) - 4 * self.volume * m
+                reverberation_time[bands] = (55.3 / self.c) * (self.volume / (Aeq + Aeq_meas + 4 * self.volume * m))
             else:
-                self.reverberation_time = (55.3 / self.c) * (self.volume / (self.Aeq + 4 * self.volume * self.air_damp.calculate_coefficient()))
+                reverberation_time[bands] = (55.3 / self.c) * (self.volume / (Aeq + 4 * self.volume * m))
 
         if self.air_damp_calc == False:
             # If air damping is not considered, use the standard Sabine formula corrected by the speed of sound
             if self.meas_reverberation_time is not None:
                 # If measured reverberation time is provided, use the calculated equivalent sound absorption area to correct the measured reverberation time
-                Aeq_meas = (55.3 * self.volume) / (self.meas_reverberation_time * self.c)
-                self.reverberation_time = (55.3 * self.volume) / ((self.Aeq + Aeq_meas) * self.c)
+                Aeq_meas = (55.3 * self.volume) / (meas_reverberation_time * self.c)
+                reverberation_time[bands] = (55.3 * self.volume) / ((Aeq + Aeq_meas) * self.c)
             else:
-                self.reverberation_time = (55.3 * self.volume) / (self.Aeq * self.c)
+                reverberation_time[bands] = (55.3 * self.volume) / (Aeq * self.c)
+        self.reverberation_time = reverberation_time
+        return self.reverberation_time
+
+    def sensitivity(self):
+        r"""
+        Calculates the partial derivatives of the reverberation time with respect to the areas and absorption coefficients of all surfaces, the volume, the temperature and the relative humidity in one vectorized pass.
+
+        With the denominator $D$ of the Sabine formula, $T = \frac{55.3 \cdot V}{c \cdot D}$, the derivatives are
+
+        $$\frac{\partial T}{\partial S_i} = -\frac{T}{D} \alpha_i, \qquad \frac{\partial T}{\partial \alpha_i} = -\frac{T}{D} S_i, \qquad \frac{\partial T}{\partial V} = \frac{T}{V} - \frac{T}{D} \frac{\partial D}{\partial V}$$
+
+        where $D = A_{eq} + 4 \cdot V \cdot m$ with air damping, $D = A_{eq} + \frac{55.3 \cdot V}{c \cdot T_{measured}}$ with a measured reverberation time and $D = A_{eq}$ otherwise. The temperature changes $c = 331.6 + 0.6 \cdot \vartheta$ and $m$, the relative humidity only changes $m$. The derivatives of $m$ are calculated by the complex-step method from air_absorption.
+
+        Returns
+        -------
+        dict of np.ndarray
+            The derivatives of the reverberation time for the frequency bands:
+
+            - "area": $\partial T / \partial S_i$ in s/m$^2$, shape (surfaces, bands)
+            - "absorption_coefficient": $\partial T / \partial \alpha_i$ in s, shape (surfaces, bands), where the coefficient of a band only changes the reverberation time of this band
+            - "volume": $\partial T / \partial V$ in s/m$^3$, shape (bands,)
+            - "temperature": $\partial T / \partial \vartheta$ in s/°C, shape (bands,)
+            - "rel_humidity": $\partial T / \partial \varphi$ in s/%, shape (bands,)
+
+        Raises
+        ------
+        ValueError
+            If the formula is not "sabine".
+        """
+        if self.formula != "sabine":
+            raise ValueError("Sensitivities are only available for the Sabine formula.")
+        coeffs = np.array([_surface_coefficient(calc_surface, self.bands) for calc_surface in self.surfaces], dtype=float)
+        areas = np.array([calc_surface.get_area() for calc_surface in self.surfaces], dtype=float)
+        T = np.asarray(self.reverberation_time, dtype=float)
+        V, c = self.volume, self.c
+        D = (55.3 * V) / (c * T)
+        dT_dD = -T / D
+        dT_dc = -T / c
+        zero = np.zeros(len(T))
+        if self.meas_reverberation_time is not None:
+            # The air absorption cancels out, the measured absorption area depends on V and c
+            dD_dV = 55.3 / (c * self.meas_reverberation_time)
+            dD_dtemperature = -0.6 * 55.3 * V / (c**2 * self.meas_reverberation_time)
+            dD_drel_humidity = zero
+        elif self.air_damp_calc:
+            h = 1e-20
+            frequency, temperature, rel_humidity, pressure = self.frequency_bands, self.calc_room.get_temperature(), self.calc_room.get_rel_humidity(), self.calc_room.get_pressure()
+            dm_dtemperature = air_absorption(frequency, temperature + 1j * h, rel_humidity, pressure)[1].imag / h
+            dm_drel_humidity = air_absorption(frequency, temperature, rel_humidity + 1j * h, pressure)[1].imag / h
+            dD_dV = 4 * self.m
+            dD_dtemperature = 4 * V * dm_dtemperature
+            dD_drel_humidity = 4 * V * dm_drel_humidity
+        else:
+            dD_dV, dD_dtemperature, dD_drel_humidity = zero, zero, zero
+        return {
+            "area": dT_dD * coeffs,
+            "absorption_coefficient": dT_dD * areas[:, np.newaxis] * np.ones(len(T)),
+            "volume": T / V + dT_dD * dD_dV,
+            "temperature": dT_dc * 0.6 + dT_dD * dD_dtemperature,
+            "rel_humidity": dT_dD * dD_drel_humidity,
+        }
+
+
+class room_batch:
+    """
+    Defines a "room_batch" object that holds many rooms and their surfaces as flat arrays (struct-of-arrays), so that the reverberation time of all rooms is calculated in a few vectorized steps instead of one reverberation_time object per room.
+
+    The surfaces of all rooms are stored in one ragged layout: surface $i$ belongs to room room_index[i], has the area area[i] and the absorption coefficients absorption_coefficient[i, :].
+
+    Attributes
+    ----------
+    volume : np.ndarray
+        The volumes of the rooms in m$^3$, shape (N_rooms,).
+    temperature : np.ndarray
+        The temperatures of the rooms in °C, shape (N_rooms,).
+    rel_humidity : np.ndarray
+        The relative humidities of the rooms in %, shape (N_rooms,).
+    pressure : np.ndarray
+        The pressures of the rooms in kPa, shape (N_rooms,).
+    room_index : np.ndarray
+        The index of the room each surface belongs to, shape (N_surfaces,).
+    area : np.ndarray
+        The areas of the surfaces in m$^2$, shape (N_surfaces,).
+    absorption_coefficient : np.ndarray
+        The absorption coefficients of the surfaces, shape (N_surfaces, bands).
+    axis : np.ndarray or None
+        The room axis every surface is perpendicular to (0 = x, 1 = y, 2 = z, -1 = unknown), shape (N_surfaces,).
+    bands : band_set
+        The frequency bands of the calculation.
+    frequency_bands : list
+        A list of frequency bands in Hz for which the reverberation time is calculated.
+    c : np.ndarray
+        The speed of sound in air in m/s of every room, shape (N_rooms,).
+    Aeq : np.ndarray
+        The equivalent sound absorption area of every room in m$^2$, shape (N_rooms, bands).
+    """
+
+    def __init__(self, volume, temperature, rel_humidity, pressure, room_index, area, absorption_coefficient, axis=None, bands=None):
+        """
+        Initializes a room_batch object from struct-of-arrays inputs.
+
+        Parameters
+        ----------
+        volume : array_like
+            The volumes of the rooms in m$^3$, shape (N_rooms,).
+        temperature : array_like or float
+            The temperatures of the rooms in °C, shape (N_rooms,) or a scalar for all rooms.
+        rel_humidity : array_like or float
+            The relative humidities of the rooms in %, shape (N_rooms,) or a scalar for all rooms.
+        pressure : array_like or float
+            The pressures of the rooms in kPa, shape (N_rooms,) or a scalar for all rooms.
+        room_index : array_like of int
+            The index of the room each surface belongs to, shape (N_surfaces,).
+        area : array_like
+            The areas of the surfaces in m$^2$, shape (N_surfaces,).
+        absorption_coefficient : array_like
+            The absorption coefficients of the surfaces, shape (N_surfaces, bands). NaN marks an unknown coefficient.
+        axis : array_like of int, optional
+            The room axis every surface is perpendicular to (0 = x, 1 = y, 2 = z, -1 = unknown), shape (N_surfaces,), needed for the Fitzroy and Arau-Puchades formulas (default is None).
+        bands : band_set, optional
+            The frequency bands of the absorption coefficients (default is None, which uses octave_bands).
+
+        Raises
+        ------
+        ValueError
+            If the array shapes do not match, if a room has no surfaces or if a value is out of its valid range.
+        """
+        volume = np.atleast_1d(np.asarray(volume, dtype=float))
+        if volume.ndim != 1 or len(volume) == 0:
+            raise ValueError("Volume must be a non-empty one-dimensional array.")
+        n_rooms = len(volume)
+        temperature = np.broadcast_to(np.asarray(temperature, dtype=float), (n_rooms,))
+        rel_humidity = np.broadcast_to(np.asarray(rel_humidity, dtype=float), (n_rooms,))
+        pressure = np.broadcast_to(np.asarray(pressure, dtype=float), (n_rooms,))
+        room_index = np.asarray(room_index)
+        area = np.asarray(area, dtype=float)
+        absorption_coefficient = np.asarray(absorption_coefficient, dtype=float)
+
+        if not np.all(volume > 0):
+            raise ValueError("Volume must be a positive value.")
+        if np.any(temperature < -273.15):
+            raise ValueError("Temperature must be above absolute zero (-273.15 °C).")
+        if np.any((rel_humidity < 0) | (rel_humidity > 100)):
+            raise ValueError("Relative humidity must be between 0 and 100 %.")
+        if not np.all(pressure > 0):
+            raise ValueError("Pressure must be a positive value.")
+        if room_index.ndim != 1 or not np.issubdtype(room_index.dtype, np.integer):
+            raise ValueError("Room index must be a one-dimensional integer array.")
+        if area.shape != room_index.shape:
+            raise ValueError("Area must contain one entry per surface.")
+        if bands is None:
+            bands = octave_bands
+        if absorption_coefficient.shape != (len(room_index), len(bands)):
+            raise ValueError(f"Absorption coefficient must have the shape (N_surfaces, {len(bands)}) for the frequency bands {bands.describe()}.")
+        if len(room_index) > 0 and (room_index.min() < 0 or room_index.max() >= n_rooms):
+            raise ValueError("Room index must refer to an existing room.")
+        if np.any(np.bincount(room_index, minlength=n_rooms) == 0):
+            raise ValueError("Every room must have at least one surface.")
+        if np.any(absorption_coefficient < 0):
+            raise ValueError("Absorption coefficient values must be non-negative.")
+        if axis is not None:
+            axis = np.asarray(axis)
+            if axis.shape != room_index.shape or not np.all(np.isin(axis, (-1, 0, 1, 2))):
+                raise ValueError("Axis must contain one entry of -1, 0, 1 or 2 per surface.")
+
+        self.volume = volume
+        self.temperature = temperature
+        self.rel_humidity = rel_humidity
+        self.pressure = pressure
+        self.room_index = room_index
+        self.area = area
+        self.absorption_coefficient = absorption_coefficient
+        self.axis = axis
+        self.bands = bands
+        self.frequency_bands = bands.get_frequencies()
+        self.c = 331.6 + 0.6 * self.temperature
+        self.m = None
+        self._reductions = {}
+        self.calculate_Aeq()
+
+    @classmethod
+    def from_rooms(cls, rooms, surfaces, bands=None):
+        """
+        Creates a room_batch object from room and surface objects.
+
+        Parameters
+        ----------
+        rooms : list of room
+            The rooms of the batch.
+        surfaces : list of list of surface
+            The surfaces of every room, in the same order as the rooms.
+        bands : band_set, optional
+            The frequency bands of the batch (default is None, which uses the bands of the first surface's material).
+
+        Returns
+        -------
+        room_batch
+            The batch containing all rooms and their surfaces.
+        """
+        if len(rooms) != len(surfaces):
+            raise ValueError("A list of surfaces must be given for every room.")
+        room_index = np.repeat(np.arange(len(rooms)), [len(room_surfaces) for room_surfaces in surfaces])
+        flat_surfaces = [calc_surface for room_surfaces in surfaces for calc_surface in room_surfaces]
+        if bands is None:
+            bands = getattr(flat_surfaces[0].get_material(), 'bands', octave_bands) if flat_surfaces else octave_bands
+        axis = [getattr(calc_surface, 'axis', None) for calc_surface in flat_surfaces]
+        if all(surface_axis is None for surface_axis in axis):
+            axis = None
+        else:
+            axis = [-1 if surface_axis is None else surface_axis for surface_axis in axis]
+        materials = material_table(bands)
+        material_index = materials.intern_many([calc_surface.get_material() for calc_surface in flat_surfaces])
+        return cls(
+            volume=[calc_room.get_volume() for calc_room in rooms],
+            temperature=[calc_room.get_temperature() for calc_room in rooms],
+            rel_humidity=[calc_room.get_rel_humidity() for calc_room in rooms],
+            pressure=[calc_room.get_pressure() for calc_room in rooms],
+            room_index=room_index,
+            area=[calc_surface.get_area() for calc_surface in flat_surfaces],
+            absorption_coefficient=materials.coefficients[material_index],
+            axis=axis,
+            bands=bands,
+        )
+
+    def __len__(self):
+        return len(self.volume)
+
+    def segment_sum(self, values, segment=None, n_segments=None):
+        """
+        Sums per-surface values for every room (or for every other segment of the surfaces) in one weighted bincount.
+
+        Parameters
+        ----------
+        values : array_like
+            The per-surface values, shape (N_surfaces,) or (N_surfaces, bands).
+        segment : np.ndarray, optional
+            The segment index of every surface (default is None, which uses room_index).
+        n_segments : int, optional
+            The number of segments (default is None, which uses the number of rooms).
 
+        Returns
+        -------
+        np.ndarray
+            The sums per segment, shape (n_segments,) or (n_segments, bands).
+        """
+        if segment is None:
+            segment, n_segments = self.room_index, len(self)
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            return np.bincount(segment, weights=values, minlength=n_segments)
+        n_bands = values.shape[1]
+        flat_index = segment[:, np.newaxis] * n_bands + np.arange(n_bands)
+        return np.bincount(flat_index.ravel(), weights=values.ravel(), minlength=n_segments * n_bands).reshape(n_segments, n_bands)
+
+    def calculate_Aeq(self):
+        """
+        Calculates the equivalent sound absorption area (Aeq) in m$^2$ of every room.
+
+        All rooms and bands are reduced in one weighted bincount over the flattened (room, band) index. A NaN coefficient therefore propagates into the Aeq of its room and band, as in reverberation_time.calculate_Aeq.
+
+        Returns
+        -------
+        np.ndarray
+            The equivalent sound absorption area of every room in m$^2$, shape (N_rooms, bands).
+        """
+        self._reductions.clear()
+        self.Aeq = self.segment_sum(self.get_surface_absorption())
+        return self.Aeq
+
+    def _cached(self, name, function):
+        if name not in self._reductions:
+            self._reductions[name] = function()
+        return self._reductions[name]
+
+    def get_surface_absorption(self):
+        r"""
+        Returns the absorption area $S_i \cdot \alpha_i$ in m$^2$ of every surface, shape (N_surfaces, bands).
+        """
+        return self._cached("surface_absorption", lambda: self.absorption_coefficient * self.area[:, np.newaxis])
+
+    def get_total_area(self):
+        """
+        Returns the total surface area in m$^2$ of every room, shape (N_rooms,).
+        """
+        return self._cached("total_area", lambda: self.segment_sum(self.area))
+
+    def get_axis_sums(self):
+        """
+        Returns the surface area and the equivalent sound absorption area of every room, grouped by the axis the surfaces are perpendicular to.
+
+        Returns
+        -------
+        tuple of np.ndarray
+            The area per room and axis in m$^2$, shape (N_rooms, 3), and the equivalent sound absorption area per room and axis in m$^2$, shape (N_rooms, 3, bands).
+
+        Raises
+        ------
+        ValueError
+            If the axis of any surface is unknown.
+        """
+        if self.axis is None or np.any(self.axis < 0):
+            raise ValueError("All surfaces must have an axis (0, 1 or 2) for this formula.")
+
+        def axis_sums():
+            segment = self.room_index * 3 + self.axis
+            area = self.segment_sum(self.area, segment, 3 * len(self)).reshape(len(self), 3)
+            Aeq = self.segment_sum(self.get_surface_absorption(), segment, 3 * len(self)).reshape(len(self), 3, -1)
+            return area, Aeq
+        return self._cached("axis_sums", axis_sums)
+
+    def calculate_absorption_area(self, formula="sabine"):
+        """
+        Calculates the equivalent sound absorption area of every room with a registered reverberation formula.
+
+        Parameters
+        ----------
+        formula : str, optional
+            The name of the formula in reverberation_formulas (default is "sabine").
+
+        Returns
+        -------
+        np.ndarray
+            The equivalent sound absorption area without air absorption in m$^2$, shape (N_rooms, bands).
+
+        Raises
+        ------
+        ValueError
+            If the formula is not registered.
+        """
+        if formula not in reverberation_formulas:
+            raise ValueError(f"Formula must be one of {sorted(reverberation_formulas)}.")
+        return self._cached(("absorption_area", formula), lambda: reverberation_formulas[formula](self))
+
+    def calculate_air_damp(self):
+        """
+        Calculates the sound absorption coefficient $m$ in 1/m of air for every room.
+
+        Returns
+        -------
+        np.ndarray
+            The sound absorption coefficient $m$ of air in 1/m, shape (N_rooms, bands).
+        """
+        _, self.m = air_absorption(self.frequency_bands, self.temperature, self.rel_humidity, self.pressure)
+        return self.m
+
+    def calculate_reverberation_time(self, air_damp_calc=True, meas_reverberation_time=None, formula="sabine"):
+        """
+        Calculates the reverberation time of every room with the same formulas as reverberation_time.calculate_reverberation_time.
+
+        The air absorption and the reductions shared between formulas are computed once per batch, so evaluating further formulas on the same batch only adds the formula specific terms.
+
+        Parameters
+        ----------
+        air_damp_calc : bool, optional
+            A flag indicating whether air damping is considered in the calculation (default is True).
+        meas_reverberation_time : array_like, optional
+            The measured reverberation times of the rooms in s, shape (N_rooms, bands) (default is None).
+        formula : str, optional
+            The name of the formula in reverberation_formulas (default is "sabine").
+
+        Returns
+        -------
+        np.ndarray
+            The reverberation time of every room in s, shape (N_rooms, bands).
+        """
+        if not isinstance(air_damp_calc, bool):
+            raise TypeError("Air damping calculation flag must be a boolean.")
+        volume = self.volume[:, np.newaxis]
+        c = self.c[:, np.newaxis]
+        if air_damp_calc:
+            A_air = 4 * volume * (self.m if self.m is not None else self.calculate_air_damp())
+        else:
+            A_air = 0
+        if meas_reverberation_time is not None:
+            meas_reverberation_time = np.asarray(meas_reverberation_time, dtype=float)
+            if meas_reverberation_time.shape != self.Aeq.shape:
+                raise ValueError("Measured reverberation time must have the shape (N_rooms, bands).")
+            if np.any(meas_reverberation_time < 0):
+                raise ValueError("Measured reverberation time values must be non-negative.")
+            Aeq_meas = ((55.3 / c) * (volume / meas_reverberation_time)) - A_air
+        else:
+            Aeq_meas = 0
+        A = self.calculate_absorption_area(formula)
+        self.reverberation_time = (55.3 / c) * (volume / (A + Aeq_meas + A_air))
+        return self.reverberation_time
+
+
+def reverberation_time_batch(volume, temperature, rel_humidity, pressure, room_index, area, absorption_coefficient, air_damp_calc=True, meas_reverberation_time=None, formula="sabine", axis=None, bands=None):
+    """
+    Calculates the reverberation time of many rooms at once from struct-of-arrays inputs.
+
+    This is a shortcut for room_batch(...).calculate_reverberation_time(...), see room_batch for a description of the parameters.
+
+    Returns
+    -------
+    np.ndarray
+        The reverberation time of every room in s, shape (N_rooms, bands).
+    """
+    batch = room_batch(volume, temperature, rel_humidity, pressure, room_index, area, absorption_coefficient, axis=axis, bands=bands)
+    return batch.calculate_reverberation_time(air_damp_calc=air_damp_calc, meas_reverberation_time=meas_reverberation_time, formula=formula)
+
+
+
+# Registry of reverberation formula engines
+reverberation_formulas = {}
+
+
+def register_reverberation_formula(name):
+    r"""
+    Registers a function as reverberation formula engine under the given name.
+
+    An engine receives a room_batch and returns the equivalent sound absorption area $A$ in m$^2$ without air absorption, shape (N_rooms, bands), such that
+
+    $$T = \frac{55.3}{c} \cdot \frac{V}{A + 4 \cdot V \cdot m}$$
+
+    reproduces the formula. The air damping and the measured reverberation time correction are therefore applied identically for every engine.
+
+    Parameters
+    ----------
+    name : str
+        The name under which the formula is selectable.
+
+    Returns
+    -------
+    function
+        A decorator registering the engine.
+    """
+    def decorator(engine):
+        reverberation_formulas[name] = engine
+        return engine
+    return decorator
+
+
+@register_reverberation_formula("sabine")
+def sabine_absorption_area(batch):
+    r"""
+    Sabine: $A = \sum_i S_i \alpha_i$.
+    """
+    return batch.Aeq
+
+
+@register_reverberation_formula("eyring")
+def eyring_absorption_area(batch):
+    r"""
+    Eyring: $A = -S \ln(1 - \bar{\alpha})$ with the area weighted mean absorption coefficient $\bar{\alpha} = A_{eq} / S$, which must be below 1.
+    """
+    S = batch.get_total_area()[:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = batch.Aeq / S
+    _check_absorption_below_one(batch, alpha, "Eyring formula requires a mean absorption coefficient below 1")
+    return -S * np.log1p(-alpha)
+
+
+@register_reverberation_formula("millington_sette")
+def millington_sette_absorption_area(batch):
+    r"""
+    Millington-Sette: $A = -\sum_i S_i \ln(1 - \alpha_i)$, every $\alpha_i$ must be below 1.
+    """
+    _check_absorption_below_one(batch, batch.absorption_coefficient, "Millington-Sette formula requires absorption coefficients below 1", per_surface=True)
+    return batch.segment_sum(-batch.area[:, np.newaxis] * np.log1p(-batch.absorption_coefficient))
+
+
+def _check_absorption_below_one(batch, alpha, requirement, per_surface=False):
+    # ln(1 - alpha) is -inf for alpha = 1 and undefined above, which would silently give T = 0 or NaN. NaN marks unknown values and passes.
+    # alpha has one row per room, or per surface if per_surface is True, and the bands in the last axis
+    invalid = np.argwhere(alpha >= 1)
+    if len(invalid) == 0:
+        return
+    position = tuple(invalid[0])
+    row, band = position[0], position[-1]
+    where = []
+    room = batch.room_index[row] if per_surface else row
+    if len(batch.volume) > 1:
+        where.append(f"room {room}")
+    if per_surface:
+        where.append(f"surface {row - np.flatnonzero(batch.room_index == room)[0]}")
+    if len(position) == 3:
+        where.append(f"axis {position[1]}")
+    where = ", ".join(where).capitalize() if where else "The room"
+    raise ValueError(f"{where} has {alpha[position]:g} at {batch.frequency_bands[band]:g} Hz, but the {requirement}.")
+
+
+def _axis_absorption_areas(batch, name):
+    # Eyring absorption area -S ln(1 - alpha_k) of the surfaces perpendicular to each axis k and the area share S_k / S of the axis
+    area, Aeq = batch.get_axis_sums()
+    S = batch.get_total_area()[:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = Aeq / area[..., np.newaxis]
+    _check_absorption_below_one(batch, alpha, f"{name} formula requires a mean absorption coefficient below 1 on every axis")
+    A_axis = -S[..., np.newaxis] * np.log1p(-alpha)
+    return (area / S)[..., np.newaxis], A_axis
+
+
+@register_reverberation_formula("fitzroy")
+def fitzroy_absorption_area(batch):
+    r"""
+    Fitzroy: $T = \sum_k \frac{S_k}{S} T_k$ with the Eyring reverberation time $T_k$ of the mean absorption coefficient of the surfaces perpendicular to axis $k$, which gives $A = 1 / \sum_k \frac{S_k}{S A_k}$.
+    """
+    weight, A_axis = _axis_absorption_areas(batch, "Fitzroy")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 1 / np.where(weight > 0, weight / A_axis, 0).sum(axis=1)
+
+
+@register_reverberation_formula("arau_puchades")
+def arau_puchades_absorption_area(batch):
+    r"""
+    Arau-Puchades: $T = \prod_k T_k^{S_k / S}$, which gives $A = \prod_k A_k^{S_k / S}$.
+    """
+    weight, A_axis = _axis_absorption_areas(batch, "Arau-Puchades")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.exp(np.where(weight > 0, weight * np.log(A_axis), 0).sum(axis=1))
+
+
+
+# Tolerance ranges of DIN 18041 relative to T_soll on the octave bands 63 ... 8000 Hz
+_DIN_18041_tolerance = {
+    "A": (np.array((1.7, 1.45, 1.2, 1.2, 1.2, 1.2, 1.2, 1.2)), np.array((0.5, 0.65, 0.8, 0.8, 0.8, 0.8, 0.65, 0.5))),
+    "B": (np.array((0, 0, 1, 1, 1, 1, 0, 0)), np.array((0, 0, 0, 0, 0, 0, 0, 0))),
+}
+# Type A: T_soll = slope * log10(V) + offset, recommended volume range in m³
+_DIN_18041_A_types = {
+    "A1": (0.45, 0.07, 30, 1000),
+    "A2": (0.37, 0.14, 50, 5000),
+    "A3": (0.32, 0.17, 30, 5000),
+    "A4": (0.26, 0.14, 30, 500),
+    "A5": (0.75, 1.0, 200, np.inf),
+}
+# Type B: A/V = constant for heights up to 2.5 m, else 1 / (offset + 4.69 * log10(h))
+_DIN_18041_B_types = {
+    "B2": (0.15, 4.8),
+    "B3": (0.20, 3.13),
+    "B4": (0.25, 2.13),
+    "B5": (0.30, 1.47),
+}
+DIN_18041_types = ("no requirements",) + tuple(_DIN_18041_A_types) + ("B1",) + tuple(_DIN_18041_B_types)
+
+# Bits of the flags returned by DIN_18041_limits_batch
+DIN_18041_flags = {
+    "volume_below_range": 1,
+    "volume_above_range": 2,
+    "no_requirements": 4,
+    "height_required": 8,
+}
+
+
+def describe_DIN_18041_flags(flags, type):
+    """
+    Returns the messages of the flags of a room type, e.g. to show them in the user interface or to emit them as warnings.
+
+    Parameters
+    ----------
+    flags : int
+        The flags of one room, see DIN_18041_limits_batch.
+    type : str
+        The room type according to DIN 18041.
+
+    Returns
+    -------
+    list of str
+        The messages of the set flags.
+    """
+    messages = []
+    if type in _DIN_18041_A_types:
+        _, _, volume_min, volume_max = _DIN_18041_A_types[type]
+        if flags & DIN_18041_flags["volume_below_range"]:
+            messages.append(f"According to DIN 18041, the room volume should be at least {volume_min} m³ for type {type}.")
+        if flags & DIN_18041_flags["volume_above_range"]:
+            messages.append(f"According to DIN 18041, the room volume should be smaller than {volume_max} m³ for type {type}.")
+    if type == "B1" and flags & DIN_18041_flags["no_requirements"]:
+        messages.append("According to DIN 18041, there are no requirements for type B1.")
+    if flags & DIN_18041_flags["height_required"]:
+        messages.append(f"According to DIN 18041, the room height is required for type {type}.")
+    return messages
+
+
+def DIN_18041_limits_batch(volume, height, c, type, bands=None):
+    """
+    Calculates the limits for reverberation time according to DIN 18041 for many rooms at once, see DIN_18041_limits.
+
+    Instead of warnings, deviations from the scope of DIN 18041 are returned as flags per room, a combination of the bits in DIN_18041_flags:
+
+    - volume_below_range / volume_above_range: the volume is outside the recommended range of the type A room type
+    - no_requirements: the room type is B1 or "no requirements"
+    - height_required: the room height is missing for a type B room type; its limits are NaN
+
+    Parameters
+    ----------
+    volume : array_like
+        The volumes of the rooms in m$^3$, shape (N,).
+    height : array_like or None
+        The heights of the rooms in m, shape (N,) or a scalar; None or NaN for unknown heights.
+    c : array_like
+        The speed of sound in m/s, shape (N,) or a scalar.
+    type : str or array_like of str
+        The room types according to DIN 18041, shape (N,) or a single type for all rooms.
+    bands : band_set, optional
+        The frequency bands of the limits (default is None, which uses octave_bands).
+
+    Returns
+    -------
+    tuple of np.ndarray
+        The upper limits and the lower limits in s, shape (N, bands), T_soll in s, shape (N,), and the flags, shape (N,).
+
+    Raises
+    ------
+    ValueError
+        If a volume is not positive or a room type is not valid.
+    """
+    volume = np.atleast_1d(np.asarray(volume, dtype=float))
+    n = len(volume)
+    height = np.broadcast_to(np.array(np.nan if height is None else height, dtype=float), (n,))
+    c = np.broadcast_to(np.asarray(c, dtype=float), (n,))
+    type = np.broadcast_to(np.asarray(type, dtype=object), (n,))
+    if not np.all(volume > 0):
+        raise ValueError("Volume must be a positive value.")
+    unique_types = set(type.tolist())
+    if not unique_types <= set(DIN_18041_types):
+        raise ValueError("Type must be a valid room type according to DIN 18041 (e.g., 'A1', 'B2') or 'no requirements'.")
+
+    T_soll = np.full(n, np.nan)
+    flags = np.zeros(n, dtype=np.int64)
+    tolerance = np.full((n, 2, len(octave_bands)), np.nan)
+    for room_type in unique_types:
+        mask = type == room_type
+        if room_type in _DIN_18041_A_types:
+            slope, offset, volume_min, volume_max = _DIN_18041_A_types[room_type]
+            V = volume[mask]
+            flags[mask] |= np.where(V < volume_min, DIN_18041_flags["volume_below_range"], 0)
+            flags[mask] |= np.where(V > volume_max, DIN_18041_flags["volume_above_range"], 0)
+            T_soll[mask] = slope * np.log10(V) + offset
+            tolerance[mask] = _DIN_18041_tolerance["A"]
+        elif room_type == "B1":
+            flags[mask] |= DIN_18041_flags["no_requirements"]
+            T_soll[mask] = 0
+            tolerance[mask] = _DIN_18041_tolerance["B"]
+        elif room_type in _DIN_18041_B_types:
+            A_V_low, offset = _DIN_18041_B_types[room_type]
+            h = height[mask]
+            flags[mask] |= np.where(np.isnan(h), DIN_18041_flags["height_required"], 0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                A_V = np.where(h <= 2.5, A_V_low, 1 / (offset + 4.69 * np.log10(h)))
+            T_soll[mask] = (55.3 / c[mask]) * (1 / A_V)
+            tolerance[mask] = _DIN_18041_tolerance["B"]
+        else:
+            flags[mask] |= DIN_18041_flags["no_requirements"]
+
+    T_upper_limit = tolerance[:, 0] * T_soll[:, np.newaxis]
+    # The lower limit of type B is zero regardless of T_soll
+    T_lower_limit = np.where(tolerance[:, 1] == 0, tolerance[:, 1], tolerance[:, 1] * T_soll[:, np.newaxis])
+
+    if bands is not None and bands != octave_bands:
+        # The A tolerance ranges are piecewise linear over log(f), the B ranges are steps per octave
+        is_A = np.array([str(room_type).startswith("A") for room_type in type])
+        converted = []
+        for limit in (T_upper_limit, T_lower_limit):
+            result = np.empty((n, len(bands)))
+            result[is_A] = octave_bands.convert(limit[is_A], bands, method="interpolate", extrapolate="hold")
+            result[~is_A] = octave_bands.convert(limit[~is_A], bands, method="step", extrapolate="hold")
+            converted.append(result)
+        T_upper_limit, T_lower_limit = converted
+    return T_upper_limit, T_lower_limit, T_soll, flags
+
+
+@functools.lru_cache(maxsize=1024)
+def DIN_18041_limits_lookup(type, volume, height=None, c=343.6, bands=None):
+    """
+    Returns the limits for reverberation time according to DIN 18041 of a single room, cached per (type, volume, height, c, bands), see DIN_18041_limits_batch.
+
+    Repeated calls with the same key, e.g. on every refresh of the user interface, return the cached read-only arrays without recalculation. Use DIN_18041_limits_lookup.cache_info() for the cache statistics.
+
+    Parameters
+    ----------
+    type : str
+        The room type according to DIN 18041.
+    volume : int or float
+        The volume of the room in m$^3$.
+    height : int or float, optional
+        The height of the room in m (default is None, which is required for type A rooms only).
+    c : int or float, optional
+        The speed of sound in m/s (default is 343.6 m/s, which is the speed of sound at 20 °C).
+    bands : band_set, optional
+        The frequency bands of the limits (default is None, which uses octave_bands).
+
+    Returns
+    -------
+    tuple
+        The upper limit and the lower limit in s (read-only np.ndarray), T_soll in s (float) and the flags (int).
+    """
+    T_upper_limit, T_lower_limit, T_soll, flags = DIN_18041_limits_batch(volume, height, c, type, bands)
+    T_upper_limit, T_lower_limit = T_upper_limit[0], T_lower_limit[0]
+    T_upper_limit.flags.writeable = False
+    T_lower_limit.flags.writeable = False
+    return T_upper_limit, T_lower_limit, float(T_soll[0]), int(flags[0])
 
 
 class DIN_18041_limits:
@@ -981,10 +2848,14 @@ class DIN_18041_limits:
         The upper limit for reverberation time in s according to DIN 18041, calculated based on the target reverberation time.
     T_lower_limit : np.array
         The lower limit for reverberation time in s according to DIN 18041, calculated based on the target reverberation time.
+    bands : band_set
+        The frequency bands of the limits. The tolerance ranges of DIN 18041 are defined on octave bands and are interpolated over the logarithm of the frequency for other band sets.
+    flags : int
+        The deviations from the scope of DIN 18041 as a combination of the bits in DIN_18041_flags, which are also emitted as warnings.
 
     """
     
-    def __init__(self, calc_room, type):
+    def __init__(self, calc_room, type, bands=None):
         """
         Initializes a DIN_18041_limits object with a specified room and room type.
         
@@ -994,6 +2865,8 @@ class DIN_18041_limits:
             The room for which the limits are calculated, which is an instance of the room class.
         type : str
             The type of room according to DIN 18041, specified as a string (e.g., "A1", "B2", or 'no requirements'). 
+        bands : band_set, optional
+            The frequency bands of the limits (default is None, which uses octave_bands).
 
         Raises
         -------
@@ -1013,118 +2886,26 @@ class DIN_18041_limits:
         self.volume = self.calc_room.volume
         self.c = self.calc_room.c
         self.type = str(type)
+        self.bands = octave_bands if bands is None else bands
         self.get_limits()
         
 
     def get_limits(self):
         """
         Calculates the limits for reverberation time in s according to DIN 18041 based on room type, volume, and height.
+
+        The limits are calculated with DIN_18041_limits_batch, and its flags are emitted as warnings.
         
         Returns
         -------
         list of float
             A list containing the upper and lower limits for reverberation time in s according to DIN 18041.
         """
-
-        # Get the limits Tsoll for reverberation time according to DIN 18041 based on room type, volume and height
-        self.T_soll = None
-        match self.type[0]:
-            case "A":
-                T_upper_limit_A = np.array((1.7,1.45,1.2,1.2,1.2,1.2,1.2,1.2))
-                T_lower_limit_A = np.array((0.5,0.65,0.8,0.8,0.8,0.8,0.65,0.5))
-
-                match self.type[1]:
-                    case "1":
-                        if self.volume < 30:
-                            warnings.warn("According to DIN 18041, the room volume should be at least 30 m³ for type A1.")
-                        if self.volume > 1000:
-                            warnings.warn("According to DIN 18041, the room volume should be smaller than 1000 m³ for type A1.")
-                        
-                        self.T_soll = 0.45*np.log10(self.volume) + 0.07
-
-                    case "2":
-                        if self.volume < 50:
-                            warnings.warn("According to DIN 18041, the room volume should be at least 50 m³ for type A2.")
-                        if self.volume > 5000:
-                            warnings.warn("According to DIN 18041, the room volume should be smaller than 5000 m³ for type A2.")
-                        
-                        self.T_soll = 0.37*np.log10(self.volume) + 0.14
-
-                    case "3":
-                        if self.volume < 30:
-                            warnings.warn("According to DIN 18041, the room volume should be at least 30 m³ for type A3.")
-                        if self.volume > 5000:
-                            warnings.warn("According to DIN 18041, the room volume should be smaller than 5000 m³ for type A3.")
-                        
-                        self.T_soll = 0.32*np.log10(self.volume) + 0.17
-
-                    case "4":
-                        if self.volume < 30:
-                            warnings.warn("According to DIN 18041, the room volume should be at least 30 m³ for type A4.")
-                        if self.volume > 500:
-                            warnings.warn("According to DIN 18041, the room volume should be smaller than 500 m³ for type A4.")
-                        
-                        self.T_soll = 0.26*np.log10(self.volume) + 0.14
-
-                    case "5":
-                        if self.volume < 200:
-                            warnings.warn("According to DIN 18041, the room volume should be at least 200 m³ for type A5.")
-                        if self.volume > 9999:
-                            self.T_soll = 2
-                        
-                        self.T_soll = 0.75*np.log10(self.volume) + 1
-
-                self.T_upper_limit = T_upper_limit_A*self.T_soll
-                self.T_lower_limit = T_lower_limit_A*self.T_soll
-
-            case "B":
-                T_upper_limit_B = np.array((0,0,1,1,1,1,0,0))
-                T_lower_limit_B = np.array((0,0,0,0,0,0,0,0))
-
-                match self.type[1]:
-                    case "1":
-                        warnings.warn("According to DIN 18041, there are no requirements for type B1.")
-                        self.T_soll = 0
-                    case "2":
-                        if self.calc_room.height <= 2.5:
-                            A_V = 0.15
-                        if self.calc_room.height > 2.5:
-                            A_V = 1/(4.8 + 4.69 * np.log10(self.calc_room.height))
-
-                    case "3":
-                        if self.calc_room.height <= 2.5:
-                            A_V = 0.20
-                        if self.calc_room.height > 2.5:
-                            A_V = 1/(3.13 + 4.69 * np.log10(self.calc_room.height))
-
-                    case "4":
-                        if self.calc_room.height <= 2.5:
-                            A_V = 0.25
-                        if self.calc_room.height > 2.5:
-                            A_V = 1/(2.13 + 4.69 * np.log10(self.calc_room.height))
-
-                    case "5":
-                        if self.calc_room.height <= 2.5:
-                            A_V = 0.30
-                        if self.calc_room.height > 2.5:
-                            A_V = 1/(1.47 + 4.69 * np.log10(self.calc_room.height))
-
-                if self.T_soll == 0:
-                    self.T_soll = 0
-                else:
-                    self.T_soll = (55.3/self.c) * (self.volume / (A_V * self.volume))
-
-                self.T_upper_limit = T_upper_limit_B * self.T_soll
-                self.T_lower_limit = T_lower_limit_B
-
-            case _:
-                raise ValueError("Invalid room type specified.")
-            
-                        
-        match self.type:
-            case "no requirements":
-                self.T_soll = np.nan
-                self.T_upper_limit = np.array([np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan])
-                self.T_lower_limit = np.array([np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan])
-            
+        T_upper_limit, T_lower_limit, T_soll, flags = DIN_18041_limits_batch(self.volume, self.calc_room.height, self.c, self.type, self.bands)
+        self.T_upper_limit = T_upper_limit[0]
+        self.T_lower_limit = T_lower_limit[0]
+        self.T_soll = T_soll[0]
+        self.flags = int(flags[0])
+        for message in describe_DIN_18041_flags(self.flags, self.type):
+            warnings.warn(message)
         return (self.T_upper_limit, self.T_lower_limit)
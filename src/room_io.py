@@ -0,0 +1,329 @@
+import math
+
+import numpy as np
+
+from src.reverberation_calc import room_batch, DIN_18041_limits_batch, DIN_18041_types, describe_DIN_18041_flags, octave_bands, reverberation_formulas
+from src.material_database import get_material_database
+
+
+class room_definition:
+    """
+    Defines a "room_definition" object, one validated room of a bulk calculation, e.g. of a request of the REST API.
+
+    Rooms are given as dicts (parsed JSON objects) with the keys:
+
+    - id: any JSON value that is returned with the result (optional)
+    - volume: the volume in m$^3$
+    - height: the height in m (optional, required for DIN 18041 type B rooms)
+    - temperature: the temperature in °C (default is 20)
+    - rel_humidity: the relative humidity in % (default is 50)
+    - pressure: the air pressure in hPa (default is 1013.25)
+    - type: the room type according to DIN 18041 (default is "no requirements")
+    - air_damping: a flag indicating whether air damping is considered (default is True)
+    - surfaces: a non-empty list of surfaces with an area and either an absorption_coefficient list with one value per octave band from 63 Hz to 8 kHz, null for unknown values, or a material, which is the index or the name of a material of the material database, and optionally the axis the surface is perpendicular to (0 = x, 1 = y, 2 = z), which the Fitzroy and Arau-Puchades formulas require
+
+    Attributes
+    ----------
+    id : object
+        The id of the room, None if not given.
+    volume, height, temperature, rel_humidity, pressure : float
+        The room parameters, the height is NaN if not given and the pressure is in kPa.
+    type : str
+        The room type according to DIN 18041.
+    air_damping : bool
+        A flag indicating whether air damping is considered.
+    area : np.ndarray
+        The areas of the surfaces in m$^2$, shape (N_surfaces,).
+    absorption_coefficient : np.ndarray
+        The absorption coefficients of the surfaces, shape (N_surfaces, 8), NaN for surfaces with a material.
+    material_index : np.ndarray
+        The index of the material of the database of every surface, -1 for surfaces with absorption coefficients, shape (N_surfaces,). The coefficients of all materials of a batch are read at once in calculate_rooms.
+    axis : np.ndarray
+        The room axis every surface is perpendicular to, -1 if not given, shape (N_surfaces,).
+    """
+
+    def __init__(self, definition, database=None):
+        """
+        Initializes a room_definition object and validates the definition.
+
+        Parameters
+        ----------
+        definition : dict
+            The definition of the room, see above.
+        database : material_database, optional
+            The material database for surfaces with a material (default is None, which uses get_material_database() on first use).
+
+        Raises
+        ------
+        ValueError
+            If the definition is not a dict, a value is missing or invalid, or a material is unknown.
+        """
+        if not isinstance(definition, dict):
+            raise ValueError("A room must be a JSON object.")
+        self.id = definition.get("id")
+        self.volume = _number(definition, "volume")
+        if not self.volume > 0:
+            raise ValueError("Volume must be a positive value.")
+        self.height = _number(definition, "height", math.nan)
+        if self.height <= 0:
+            raise ValueError("Height must be a positive value.")
+        self.temperature = _number(definition, "temperature", 20)
+        if self.temperature < -273.15:
+            raise ValueError("Temperature must be above absolute zero (-273.15 °C).")
+        self.rel_humidity = _number(definition, "rel_humidity", 50)
+        if not 0 <= self.rel_humidity <= 100:
+            raise ValueError("Relative humidity must be between 0 and 100 %.")
+        self.pressure = _number(definition, "pressure", 1013.25) / 10 # Convert hPa to kPa
+        if not self.pressure > 0:
+            raise ValueError("Pressure must be a positive value.")
+        self.type = definition.get("type") or "no requirements"
+        if self.type not in DIN_18041_types:
+            raise ValueError(f"Type must be one of {', '.join(DIN_18041_types)}.")
+        self.air_damping = definition.get("air_damping", True)
+        if not isinstance(self.air_damping, bool):
+            raise ValueError("Air damping must be true or false.")
+
+        surfaces = definition.get("surfaces")
+        if not isinstance(surfaces, list) or not surfaces:
+            raise ValueError("Surfaces must be a non-empty list.")
+        self.area = np.empty(len(surfaces))
+        self.absorption_coefficient = np.full((len(surfaces), len(octave_bands)), np.nan)
+        self.material_index = np.full(len(surfaces), -1, dtype=np.intp)
+        self.axis = np.full(len(surfaces), -1, dtype=np.int8)
+        coefficient_rows = []
+        coefficient_lists = []
+        for i, surface in enumerate(surfaces):
+            if not isinstance(surface, dict):
+                raise ValueError(f"Surface {i} must be a JSON object.")
+            try:
+                self.area[i] = _number(surface, "area")
+                if not self.area[i] >= 0:
+                    raise ValueError("Area must be a non-negative value.")
+                if "absorption_coefficient" in surface:
+                    coefficient_rows.append(i)
+                    coefficient_lists.append(surface["absorption_coefficient"])
+                else:
+                    self.material_index[i] = _material_index(surface.get("material"), database)
+                axis = surface.get("axis")
+                if axis is not None:
+                    if type(axis) is not int or axis not in (0, 1, 2):
+                        raise ValueError("Axis must be 0 (x), 1 (y) or 2 (z).")
+                    self.axis[i] = axis
+            except ValueError as e:
+                raise ValueError(f"Surface {i}: {e}") from None
+        if coefficient_rows:
+            self.absorption_coefficient[coefficient_rows] = _coefficient_matrix(coefficient_rows, coefficient_lists)
+
+
+# Formulas that need the axis of every surface
+_axis_formulas = ("fitzroy", "arau_puchades")
+
+# Types of numbers in parsed JSON, bool is excluded on purpose
+_json_numbers = (int, float)
+
+
+def _coefficients(values):
+    # Unknown coefficients are null, the reverberation time of their band is unknown as well
+    if (not isinstance(values, list) or len(values) != len(octave_bands)
+            or not all(value is None or type(value) in _json_numbers for value in values)):
+        raise ValueError(f"Absorption coefficient must be a list of {len(octave_bands)} numbers or nulls for the frequency bands {octave_bands.describe()}.")
+    coefficients = np.array(values, dtype=float)
+    if np.any(coefficients < 0) or np.any(np.isinf(coefficients)):
+        raise ValueError("Absorption coefficient values must be non-negative.")
+    return coefficients
+
+
+def _coefficient_matrix(rows, lists):
+    # The coefficients of all surfaces of a room are checked at once, lists of plain numbers need no check per value
+    try:
+        matrix = np.array(lists)
+    except ValueError:
+        matrix = None
+    if matrix is not None and matrix.shape == (len(lists), len(octave_bands)) and matrix.dtype.kind in "fiu":
+        matrix = matrix.astype(float, copy=False)
+        if not (np.any(matrix < 0) or np.any(np.isinf(matrix))):
+            return matrix
+    # The check per surface finds the first invalid surface
+    matrix = np.empty((len(lists), len(octave_bands)))
+    for j, (i, values) in enumerate(zip(rows, lists)):
+        try:
+            matrix[j] = _coefficients(values)
+        except ValueError as e:
+            raise ValueError(f"Surface {i}: {e}") from None
+    return matrix
+
+
+def _material_index(material, database):
+    if material is None:
+        raise ValueError("Either an absorption coefficient or a material is required.")
+    database = get_material_database() if database is None else database
+    if type(material) is int:
+        if not 0 <= material < len(database):
+            raise ValueError(f"Unknown material {material}.")
+        return material
+    if isinstance(material, str):
+        try:
+            return database.get_index(material)
+        except KeyError:
+            raise ValueError(f"Unknown material {material!r}.") from None
+    raise ValueError("Material must be the index or the name of a material.")
+
+
+def _number(definition, key, default=None):
+    # Returns a finite float of a dict entry, JSON has no NaN, so NaN marks a missing optional value
+    value = definition.get(key)
+    if value is None:
+        if default is None:
+            raise ValueError(f"{key.capitalize().replace('_', ' ')} is required.")
+        return float(default)
+    if type(value) not in _json_numbers or not math.isfinite(value):
+        raise ValueError(f"{key.capitalize().replace('_', ' ')} must be a finite number.")
+    return float(value)
+
+
+def _to_lists(values):
+    # Rounds a matrix to 6 decimals in one step, JSON has no NaN or Infinity, so unknown values and e.g. the infinite reverberation time of a room without absorption become null
+    rounded = np.round(values, 6)
+    lists = rounded.tolist()
+    for i in np.flatnonzero(~np.isfinite(rounded).all(axis=1)):
+        lists[i] = [value if math.isfinite(value) else None for value in lists[i]]
+    return lists
+
+
+def calculate_rooms(rooms, formula="sabine", database=None):
+    """
+    Calculates the reverberation time and the DIN 18041 limits of many rooms in one vectorized step with room_batch and DIN_18041_limits_batch.
+
+    Parameters
+    ----------
+    rooms : list of room_definition
+        The validated rooms.
+    formula : str, optional
+        The name of the formula in reverberation_formulas (default is "sabine").
+    database : material_database, optional
+        The material database of the surfaces with a material (default is None, which uses get_material_database()).
+
+    Returns
+    -------
+    list of dict
+        The result of every room with its id, the reverberation time and the equivalent sound absorption area per octave band and the DIN 18041 limits. Unknown and infinite values, e.g. the reverberation time of a room without absorption, are None.
+    """
+    if not rooms:
+        return []
+    absorption_coefficient = np.concatenate([calc_room.absorption_coefficient for calc_room in rooms])
+    material_index = np.concatenate([calc_room.material_index for calc_room in rooms])
+    has_material = material_index >= 0
+    if has_material.any():
+        database = get_material_database() if database is None else database
+        absorption_coefficient[has_material] = database.get_many(material_index[has_material])[1]
+    batch = room_batch(
+        volume=[calc_room.volume for calc_room in rooms],
+        temperature=[calc_room.temperature for calc_room in rooms],
+        rel_humidity=[calc_room.rel_humidity for calc_room in rooms],
+        pressure=[calc_room.pressure for calc_room in rooms],
+        room_index=np.repeat(np.arange(len(rooms)), [len(calc_room.area) for calc_room in rooms]),
+        area=np.concatenate([calc_room.area for calc_room in rooms]),
+        absorption_coefficient=absorption_coefficient,
+        axis=np.concatenate([calc_room.axis for calc_room in rooms]),
+    )
+    air_damping = np.array([calc_room.air_damping for calc_room in rooms])
+    reverberation_time = batch.calculate_reverberation_time(air_damp_calc=True, formula=formula) if air_damping.any() else None
+    if not air_damping.all():
+        without_air_damping = batch.calculate_reverberation_time(air_damp_calc=False, formula=formula)
+        reverberation_time = without_air_damping if reverberation_time is None else np.where(air_damping[:, np.newaxis], reverberation_time, without_air_damping)
+    Aeq = batch.calculate_absorption_area(formula)
+
+    types = [calc_room.type for calc_room in rooms]
+    T_upper_limit, T_lower_limit, T_soll, flags = DIN_18041_limits_batch(batch.volume, [calc_room.height for calc_room in rooms], batch.c, types)
+    reverberation_time, Aeq, T_upper_limit, T_lower_limit = _to_lists(reverberation_time), _to_lists(Aeq), _to_lists(T_upper_limit), _to_lists(T_lower_limit)
+    T_soll = _to_lists(T_soll[:, np.newaxis])
+    messages = {}
+    results = []
+    for i, calc_room in enumerate(rooms):
+        limits = None
+        if calc_room.type != "no requirements":
+            key = (int(flags[i]), calc_room.type)
+            if key not in messages:
+                messages[key] = describe_DIN_18041_flags(*key)
+            limits = {
+                "type": calc_room.type,
+                "T_soll": T_soll[i][0],
+                "T_upper_limit": T_upper_limit[i],
+                "T_lower_limit": T_lower_limit[i],
+                "messages": messages[key],
+            }
+        results.append({
+            "id": calc_room.id,
+            "reverberation_time": reverberation_time[i],
+            "Aeq": Aeq[i],
+            "DIN_18041_limits": limits,
+        })
+    return results
+
+
+def iter_room_results(definitions, chunk_size=1000, formula="sabine", database=None):
+    """
+    Calculates the results of a stream of room definitions in chunks, so that the memory use does not depend on the number of rooms.
+
+    Invalid rooms do not stop the calculation, their result contains the error message instead.
+
+    Parameters
+    ----------
+    definitions : iterable of dict
+        The room definitions, see room_definition. ValueError items, e.g. for lines of a file that are no valid JSON, are returned as errors.
+    chunk_size : int, optional
+        The number of rooms calculated in one vectorized step (default is 1000).
+    formula : str, optional
+        The name of the formula in reverberation_formulas (default is "sabine").
+    database : material_database, optional
+        The material database for surfaces with a material (default is None, which uses get_material_database() on first use).
+
+    Yields
+    ------
+    dict
+        The result of every room in the order of the definitions with its index, see calculate_rooms, or its index, id and error.
+
+    Raises
+    ------
+    ValueError
+        If chunk_size is not a positive integer or the formula is not registered.
+    """
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError("Chunk size must be a positive integer.")
+    if formula not in reverberation_formulas:
+        raise ValueError(f"Formula must be one of {sorted(reverberation_formulas)}.")
+
+    def flush(chunk):
+        rooms = [calc_room for _, calc_room in chunk if isinstance(calc_room, room_definition)]
+        try:
+            results = calculate_rooms(rooms, formula, database)
+        except ValueError:
+            # A room the formula cannot calculate, e.g. with Eyring and a mean absorption coefficient of 1, only fails itself
+            results = []
+            for calc_room in rooms:
+                try:
+                    results.extend(calculate_rooms([calc_room], formula, database))
+                except ValueError as e:
+                    results.append({"id": calc_room.id, "error": str(e)})
+        results = iter(results)
+        for index, calc_room in chunk:
+            result = next(results) if isinstance(calc_room, room_definition) else calc_room
+            yield {"index": index, **result}
+
+    chunk = []
+    for index, definition in enumerate(definitions):
+        try:
+            if isinstance(definition, ValueError):
+                raise definition
+            calc_room = room_definition(definition, database)
+            # Checked here, so that such rooms do not fail the calculation of their whole chunk
+            if formula in _axis_formulas and np.any(calc_room.axis < 0):
+                raise ValueError("All surfaces must have an axis (0, 1 or 2) for this formula.")
+            chunk.append((index, calc_room))
+        except ValueError as e:
+            room_id = definition.get("id") if isinstance(definition, dict) else None
+            chunk.append((index, {"id": room_id, "error": str(e)}))
+        if len(chunk) >= chunk_size:
+            yield from flush(chunk)
+            chunk = []
+    yield from flush(chunk)
@@ -0,0 +1,261 @@
+import numpy as np
+
+
+def masked_rms_distance(coefficients, spectrum, min_bands=1):
+    """
+    Calculates the root mean square difference between absorption spectra over the bands known in both spectra.
+
+    Parameters
+    ----------
+    coefficients : array_like
+        The absorption coefficients of the materials, shape (n_materials, n_bands). Missing values are NaN.
+    spectrum : array_like
+        The target spectrum, shape (n_bands,). Missing values are NaN.
+    min_bands : int, optional
+        The minimum number of shared bands, materials with fewer shared bands get an infinite distance (default is 1).
+
+    Returns
+    -------
+    np.ndarray
+        The distance of every material, shape (n_materials,).
+    """
+    coefficients = np.asarray(coefficients, dtype=float)
+    spectrum = np.asarray(spectrum, dtype=float)
+    diff = coefficients - spectrum
+    known = ~np.isnan(diff)
+    n_shared = known.sum(axis=-1)
+    squared = np.where(known, diff, 0.0)
+    squared *= squared
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distance = np.sqrt(squared.sum(axis=-1) / n_shared)
+    distance[n_shared < max(min_bands, 1)] = np.inf
+    return distance
+
+
+class kd_tree:
+    """
+    Defines a "kd_tree" object over points without missing values for nearest-neighbour search in a subspace of their dimensions.
+
+    The points are split at the median of the dimension with the largest spread until a node holds at most leaf_size points.
+    The points are reordered so that every leaf covers a contiguous range, and every leaf stores the bounding box of its points.
+    Blocks of neighbouring leaves store the bounding box of their leaves as a second, coarser level.
+    A query computes the distance bounds of all blocks in one vectorized step, expands the blocks closer than the k-th best match into the bounds of their leaves and visits the closest leaves in growing batches, until no block or leaf is closer than the k-th best match.
+
+    Attributes
+    ----------
+    points : np.ndarray
+        The points in tree order, shape (n_points, n_dims).
+    indices : np.ndarray
+        The original index of every point in tree order, shape (n_points,).
+    """
+
+    def __init__(self, points, indices=None, leaf_size=32, block_size=32):
+        """
+        Initializes a kd_tree object and builds the tree.
+
+        Parameters
+        ----------
+        points : array_like
+            The points, shape (n_points, n_dims), without NaN.
+        indices : array_like, optional
+            The index reported for every point (default is None, which uses the row numbers).
+        leaf_size : int, optional
+            The maximum number of points of a leaf (default is 32).
+        block_size : int, optional
+            The number of neighbouring leaves that share a bounding box of the upper level (default is 32).
+
+        Raises
+        ------
+        ValueError
+            If there are no points.
+        """
+        points = np.asarray(points, dtype=float)
+        if len(points) == 0:
+            raise ValueError("A kd_tree needs at least one point.")
+        indices = np.arange(len(points)) if indices is None else np.asarray(indices)
+        order = np.arange(len(points))
+        leaves = []
+        stack = [(0, len(points))]
+        while stack:
+            start, end = stack.pop()
+            if end - start > leaf_size:
+                node_points = points[order[start:end]]
+                dim = int(np.argmax(node_points.max(axis=0) - node_points.min(axis=0)))
+                middle = (end - start) // 2
+                order[start:end] = order[start:end][np.argpartition(node_points[:, dim], middle)]
+                # The left half is split first, so the leaves are found in the order of their ranges
+                stack.append((start + middle, end))
+                stack.append((start, start + middle))
+            else:
+                leaves.append((start, end))
+        self.points = points[order]
+        self.indices = indices[order]
+        self._leaf_start = np.array([start for start, _ in leaves], dtype=np.intp)
+        self._leaf_end = np.array([end for _, end in leaves], dtype=np.intp)
+        self._lower = np.minimum.reduceat(self.points, self._leaf_start, axis=0)
+        self._upper = np.maximum.reduceat(self.points, self._leaf_start, axis=0)
+        # Neighbouring leaves come from the same subtrees, so blocks of them have tight bounding boxes as well
+        self._block_size = block_size
+        block_start = np.arange(0, len(leaves), block_size)
+        self._block_lower = np.minimum.reduceat(self._lower, block_start, axis=0)
+        self._block_upper = np.maximum.reduceat(self._upper, block_start, axis=0)
+
+    def __len__(self):
+        return len(self.points)
+
+    def query(self, spectrum, dims, best_distance, best_index, k, scale):
+        """
+        Updates the k best matches with the points of the tree, using only some dimensions.
+
+        Parameters
+        ----------
+        spectrum : np.ndarray
+            The query point on the dimensions dims.
+        dims : np.ndarray
+            The dimensions of the tree that are compared.
+        best_distance : np.ndarray
+            The distances of the best matches found so far, ascending, at most k.
+        best_index : np.ndarray
+            The indices of the best matches found so far.
+        k : int
+            The number of matches.
+        scale : float
+            The divisor of the sum of squares, the distance is sqrt(sum / scale).
+
+        Returns
+        -------
+        tuple
+            The updated distances and indices of the best matches.
+        """
+        def box_bound(lower, upper):
+            gap = np.maximum(lower[:, dims] - spectrum, 0.0)
+            gap += np.maximum(spectrum - upper[:, dims], 0.0)
+            gap *= gap
+            return np.sqrt(gap.sum(axis=1) / scale)
+
+        n_leaves = len(self._leaf_start)
+        block_bound = box_bound(self._block_lower, self._block_upper)
+        leaf_bound = np.full(n_leaves, np.inf)
+        batch_size = 4
+        while True:
+            full = len(best_distance) == k
+            # Blocks are expanded into the bounds of their leaves once they are closer than the k-th best match
+            blocks = np.flatnonzero(block_bound <= best_distance[-1]) if full else np.argmin(block_bound)[np.newaxis]
+            blocks = blocks[np.isfinite(block_bound[blocks])]
+            if len(blocks):
+                block_bound[blocks] = np.inf
+                expanded = np.concatenate([np.arange(block * self._block_size, min((block + 1) * self._block_size, n_leaves)) for block in blocks.tolist()])
+                leaf_bound[expanded] = box_bound(self._lower[expanded], self._upper[expanded])
+            if full:
+                leaves = np.flatnonzero(leaf_bound <= best_distance[-1])
+                leaves = leaves[np.argsort(leaf_bound[leaves], kind="stable")[:batch_size]]
+            else:
+                leaves = np.argpartition(leaf_bound, batch_size - 1)[:batch_size] if batch_size < n_leaves else np.arange(n_leaves)
+                leaves = leaves[np.isfinite(leaf_bound[leaves])]
+            if not len(leaves):
+                if len(blocks) or (not full and np.isfinite(block_bound).any()):
+                    continue
+                break
+            # Visited leaves are never visited again
+            leaf_bound[leaves] = np.inf
+            rows = np.concatenate([np.arange(start, end) for start, end in zip(self._leaf_start[leaves].tolist(), self._leaf_end[leaves].tolist())])
+            diff = self.points[rows][:, dims] - spectrum
+            distance = np.sqrt((diff * diff).sum(axis=1) / scale)
+            best_distance = np.concatenate([best_distance, distance])
+            best_index = np.concatenate([best_index, self.indices[rows]])
+            order = np.lexsort((best_index, best_distance))[:k]
+            best_distance, best_index = best_distance[order], best_index[order]
+            batch_size *= 2
+        return best_distance, best_index
+
+
+class spectral_index:
+    """
+    Defines a "spectral_index" object for finding the materials with the most similar absorption spectra.
+
+    The distance of two spectra is the root mean square difference over the bands known in both (see masked_rms_distance).
+    Small catalogs are compared with one vectorized distance computation. Large catalogs are grouped by their pattern of missing bands, and every group gets a kd_tree over its known bands.
+    A query searches the groups one after another, and the best distance found so far prunes the trees of the later groups.
+
+    Attributes
+    ----------
+    coefficients : np.ndarray
+        The absorption coefficients of the materials, shape (n_materials, n_bands).
+    """
+
+    def __init__(self, coefficients, leaf_size=32, brute_force_limit=4096):
+        """
+        Initializes a spectral_index object.
+
+        Parameters
+        ----------
+        coefficients : array_like
+            The absorption coefficients of the materials, shape (n_materials, n_bands). Missing values are NaN.
+        leaf_size : int, optional
+            The maximum number of materials of a kd_tree leaf (default is 32).
+        brute_force_limit : int, optional
+            Catalogs with at most this number of materials are searched without trees (default is 4096).
+
+        Raises
+        ------
+        ValueError
+            If the coefficients are not a two-dimensional array.
+        """
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        if self.coefficients.ndim != 2:
+            raise ValueError("Absorption coefficients must be a two-dimensional array.")
+        self._groups = None
+        if len(self.coefficients) > brute_force_limit:
+            known = ~np.isnan(self.coefficients)
+            patterns, group = np.unique(known, axis=0, return_inverse=True)
+            self._groups = []
+            for pattern_index, pattern in enumerate(patterns):
+                members = np.flatnonzero(group.ravel() == pattern_index)
+                if pattern.any():
+                    tree = kd_tree(self.coefficients[np.ix_(members, pattern)], members, leaf_size)
+                    self._groups.append((np.flatnonzero(pattern), tree))
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def query(self, spectrum, k=5, min_bands=1):
+        """
+        Returns the materials with the most similar absorption spectra.
+
+        Parameters
+        ----------
+        spectrum : array_like
+            The target spectrum, shape (n_bands,). Unknown bands are NaN and ignored.
+        k : int, optional
+            The number of materials (default is 5).
+        min_bands : int, optional
+            The minimum number of bands known in both spectra (default is 1).
+
+        Returns
+        -------
+        tuple
+            The indices of the materials (np.ndarray) and their distances (np.ndarray), closest first. Materials sharing fewer than min_bands known bands with the spectrum are never returned.
+
+        Raises
+        ------
+        ValueError
+            If the spectrum does not have one value per band or k is not positive.
+        """
+        spectrum = np.asarray(spectrum, dtype=float)
+        if spectrum.shape != (self.coefficients.shape[1],):
+            raise ValueError(f"Spectrum must contain exactly {self.coefficients.shape[1]} values.")
+        if not isinstance(k, (int, np.integer)) or k <= 0:
+            raise ValueError("k must be a positive integer.")
+        if self._groups is None:
+            distance = masked_rms_distance(self.coefficients, spectrum, min_bands)
+            candidates = np.flatnonzero(np.isfinite(distance))
+            order = np.lexsort((candidates, distance[candidates]))[:k]
+            return candidates[order], distance[candidates][order]
+        best_distance, best_index = np.empty(0), np.empty(0, dtype=np.intp)
+        query_known = ~np.isnan(spectrum)
+        for bands, tree in self._groups:
+            dims = np.flatnonzero(query_known[bands])
+            if len(dims) < max(min_bands, 1):
+                continue
+            best_distance, best_index = tree.query(spectrum[bands[dims]], dims, best_distance, best_index, k, len(dims))
+        return best_index, best_distance
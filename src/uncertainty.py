@@ -0,0 +1,369 @@
+import numpy as np
+
+from src.reverberation_calc import reverberation_time, room_batch
+
+
+class streaming_histogram:
+    """
+    Defines a "streaming_histogram" object that summarizes a stream of values per frequency band, so that percentiles, mean and standard deviation are available without keeping the values.
+
+    The values of every band are counted in logarithmic bins between lower and upper. Values outside this range are counted in an underflow and an overflow bin that reach to the exact minimum and maximum, and NaN values are counted separately. Percentiles are interpolated within the bins, so their relative resolution is the relative bin width (upper / lower)$^{1 / n\\_bins}$ - 1.
+
+    Attributes
+    ----------
+    lower : np.ndarray
+        The lower end of the logarithmic bins per band.
+    upper : np.ndarray
+        The upper end of the logarithmic bins per band.
+    n_bins : int
+        The number of logarithmic bins.
+    counts : np.ndarray
+        The counts of the underflow bin, the logarithmic bins and the overflow bin per band, shape (bands, n_bins + 2).
+    count : np.ndarray
+        The number of finite values per band.
+    nan_count : np.ndarray
+        The number of NaN values per band.
+    minimum : np.ndarray
+        The smallest value per band.
+    maximum : np.ndarray
+        The largest value per band.
+    """
+
+    def __init__(self, lower, upper, n_bins=2048):
+        """
+        Initializes an empty streaming_histogram object.
+
+        Parameters
+        ----------
+        lower : array_like
+            The positive lower end of the logarithmic bins per band.
+        upper : array_like
+            The upper end of the logarithmic bins per band, larger than lower.
+        n_bins : int, optional
+            The number of logarithmic bins (default is 2048).
+
+        Raises
+        ------
+        ValueError
+            If lower is not positive, upper is not larger than lower or n_bins is not positive.
+        """
+        lower = np.atleast_1d(np.asarray(lower, dtype=float))
+        upper = np.broadcast_to(np.asarray(upper, dtype=float), lower.shape).copy()
+        if lower.ndim != 1 or not np.all(lower > 0) or not np.all(upper > lower):
+            raise ValueError("Histogram range must satisfy 0 < lower < upper in every band.")
+        if not isinstance(n_bins, int) or n_bins < 1:
+            raise ValueError("Number of bins must be a positive integer.")
+        self.lower = lower
+        self.upper = upper
+        self.n_bins = n_bins
+        self._log_lower = np.log(lower)
+        self._log_width = (np.log(upper) - self._log_lower) / n_bins
+        n_bands = len(lower)
+        self.counts = np.zeros((n_bands, n_bins + 2), dtype=np.int64)
+        self.count = np.zeros(n_bands, dtype=np.int64)
+        self.nan_count = np.zeros(n_bands, dtype=np.int64)
+        self.minimum = np.full(n_bands, np.inf)
+        self.maximum = np.full(n_bands, -np.inf)
+        self._mean = np.zeros(n_bands)
+        self._M2 = np.zeros(n_bands)
+
+    def update(self, values):
+        """
+        Adds values to the histogram.
+
+        Parameters
+        ----------
+        values : array_like
+            The values, shape (N, bands).
+        """
+        values = np.asarray(values, dtype=float)
+        n_bands = len(self.lower)
+        if values.ndim != 2 or values.shape[1] != n_bands:
+            raise ValueError(f"Values must have the shape (N, {n_bands}).")
+        finite = np.isfinite(values)
+        self.nan_count += np.count_nonzero(~finite, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            index = np.floor((np.log(values) - self._log_lower) / self._log_width)
+        # Underflow bin 0, logarithmic bins 1 ... n_bins, overflow bin n_bins + 1
+        index = np.clip(np.nan_to_num(index, nan=-1, posinf=self.n_bins, neginf=-1), -1, self.n_bins) + 1
+        flat = (index.astype(np.int64) + np.arange(n_bands) * (self.n_bins + 2))[finite]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+        # Merge mean and sum of squared deviations of the chunk (Chan et al.)
+        count = np.count_nonzero(finite, axis=0)
+        masked = np.where(finite, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = masked.sum(axis=0) / count
+        M2 = (np.where(finite, values - mean, 0.0) ** 2).sum(axis=0)
+        total = self.count + count
+        has_values = count > 0
+        delta = mean - self._mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._mean = np.where(has_values, self._mean + delta * count / total, self._mean)
+            self._M2 = np.where(has_values, self._M2 + M2 + delta ** 2 * self.count * count / total, self._M2)
+        self.count = total
+        self.minimum = np.minimum(self.minimum, np.where(finite, values, np.inf).min(axis=0))
+        self.maximum = np.maximum(self.maximum, np.where(finite, values, -np.inf).max(axis=0))
+
+    def get_mean(self):
+        """
+        Returns the mean of the finite values per band (NaN for bands without finite values).
+        """
+        return np.where(self.count > 0, self._mean, np.nan)
+
+    def get_std(self):
+        """
+        Returns the sample standard deviation of the finite values per band (NaN for bands with less than two finite values).
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self._M2 / (self.count - 1)), np.nan)
+
+    def get_percentiles(self, q):
+        """
+        Returns percentiles of the finite values per band, interpolated within the bins.
+
+        Parameters
+        ----------
+        q : array_like
+            The percentiles between 0 and 100.
+
+        Returns
+        -------
+        np.ndarray
+            The percentiles, shape (len(q), bands). Bands without finite values are NaN.
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if np.any((q < 0) | (q > 100)):
+            raise ValueError("Percentiles must be between 0 and 100.")
+        percentiles = np.full((len(q), len(self.lower)), np.nan)
+        for band in np.flatnonzero(self.count > 0):
+            edges = np.concatenate(([min(self.minimum[band], self.lower[band])],
+                                    np.geomspace(self.lower[band], self.upper[band], self.n_bins + 1),
+                                    [max(self.maximum[band], self.upper[band])]))
+            cumulative = np.cumsum(self.counts[band])
+            rank = q / 100 * self.count[band]
+            # The bin containing the rank and the position of the rank within the bin
+            index = np.minimum(np.searchsorted(cumulative, rank, side="left"), len(cumulative) - 1)
+            before = cumulative[index] - self.counts[band, index]
+            fraction = np.where(self.counts[band, index] > 0, (rank - before) / np.maximum(self.counts[band, index], 1), 0)
+            value = edges[index] + fraction * (edges[index + 1] - edges[index])
+            percentiles[:, band] = np.clip(value, self.minimum[band], self.maximum[band])
+        return percentiles
+
+
+class reverberation_time_uncertainty:
+    """
+    Defines a "reverberation_time_uncertainty" object that propagates the uncertainty of the absorption coefficients, areas and climate of a reverberation_time calculation to the reverberation time by Monte Carlo sampling.
+
+    Every sample perturbs the absorption coefficients by normally distributed absolute deviations, clipped at 0 and at the larger of 1 and the nominal value, so that object absorbers with coefficients above 1 keep their spread (just below 1 for the Millington-Sette formula, which requires coefficients below 1), the areas by normally distributed relative deviations and the temperature and relative humidity of the room by normally distributed deviations. The samples are drawn and evaluated in chunks of shape (samples, surfaces, bands) with room_batch, using the formula, air damping and measured reverberation time of the reverberation_time object. The Eyring, Fitzroy and Arau-Puchades formulas are undefined if the mean absorption coefficient of the room or of an axis reaches 1, the reverberation time of such samples is NaN in the affected bands and they are left out of the percentiles. Only a streaming_histogram of the results is kept, so the memory use is bounded by the chunk size and not by the number of samples.
+
+    Attributes
+    ----------
+    calc_reverberation_time : reverberation_time
+        The nominal calculation.
+    coefficient_std : np.ndarray
+        The standard deviation of the absorption coefficients, shape (surfaces, bands).
+    area_std : np.ndarray
+        The relative standard deviation of the areas, shape (surfaces,).
+    temperature_std : float
+        The standard deviation of the temperature in °C.
+    rel_humidity_std : float
+        The standard deviation of the relative humidity in %.
+    n_samples : int
+        The number of evaluated samples.
+    histogram : streaming_histogram or None
+        The summary of the sampled reverberation times (None before run is called).
+    """
+
+    def __init__(self, calc_reverberation_time, coefficient_std=0.05, area_std=0.02, temperature_std=1.0, rel_humidity_std=5.0):
+        """
+        Initializes a reverberation_time_uncertainty object.
+
+        Parameters
+        ----------
+        calc_reverberation_time : reverberation_time
+            The nominal calculation, which is an instance of the reverberation_time class.
+        coefficient_std : float or array_like, optional
+            The standard deviation of the absorption coefficients, a scalar or an array broadcastable to (surfaces, bands) (default is 0.05).
+        area_std : float or array_like, optional
+            The relative standard deviation of the areas, a scalar or an array of shape (surfaces,) (default is 0.02).
+        temperature_std : int or float, optional
+            The standard deviation of the temperature in °C (default is 1).
+        rel_humidity_std : int or float, optional
+            The standard deviation of the relative humidity in % (default is 5).
+
+        Raises
+        ------
+        TypeError
+            If calc_reverberation_time is not an instance of the reverberation_time class.
+        ValueError
+            If a standard deviation is negative or its shape does not match the surfaces and bands.
+        """
+        if not isinstance(calc_reverberation_time, reverberation_time):
+            raise TypeError("Reverberation time must be an instance of the reverberation_time class.")
+        template = room_batch.from_rooms([calc_reverberation_time.calc_room], [calc_reverberation_time.surfaces], bands=calc_reverberation_time.bands)
+        n_surfaces, n_bands = template.absorption_coefficient.shape
+        try:
+            coefficient_std = np.broadcast_to(np.asarray(coefficient_std, dtype=float), (n_surfaces, n_bands))
+            area_std = np.broadcast_to(np.asarray(area_std, dtype=float), (n_surfaces,))
+        except ValueError:
+            raise ValueError(f"Standard deviations must match {n_surfaces} surfaces and {n_bands} frequency bands.")
+        if np.any(coefficient_std < 0) or np.any(area_std < 0) or temperature_std < 0 or rel_humidity_std < 0:
+            raise ValueError("Standard deviations must be non-negative.")
+
+        self.calc_reverberation_time = calc_reverberation_time
+        self.coefficient_std = coefficient_std
+        self.area_std = area_std
+        self.temperature_std = float(temperature_std)
+        self.rel_humidity_std = float(rel_humidity_std)
+        self.n_samples = 0
+        self.histogram = None
+        self._template = template
+        self._coefficient_limit = np.fmax(template.absorption_coefficient, 1)
+        if calc_reverberation_time.formula == "millington_sette":
+            self._coefficient_limit = np.nextafter(1, 0)
+
+    def _undefined_bands(self, area, absorption_coefficient):
+        # Bands of the samples whose mean absorption coefficient of the room or of an axis reaches 1, shape (n, bands), None for other formulas
+        formula = self.calc_reverberation_time.formula
+        if formula == "eyring":
+            groups = [slice(None)]
+        elif formula in ("fitzroy", "arau_puchades"):
+            groups = [self._template.axis == axis for axis in range(3)]
+        else:
+            return None
+        undefined = np.zeros((absorption_coefficient.shape[0], absorption_coefficient.shape[2]), dtype=bool)
+        for group in groups:
+            group_area = area[:, group]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.einsum("ns,nsb->nb", group_area, absorption_coefficient[:, group]) / group_area.sum(axis=1)[:, np.newaxis]
+            undefined |= mean >= 1
+        return undefined
+
+    def _sample(self, n, rng):
+        # Draws and evaluates one chunk of n samples, shape (n, bands)
+        template = self._template
+        n_surfaces, n_bands = template.absorption_coefficient.shape
+        calc_reverberation_time = self.calc_reverberation_time
+        absorption_coefficient = template.absorption_coefficient + self.coefficient_std * rng.standard_normal((n, n_surfaces, n_bands))
+        np.clip(absorption_coefficient, 0, self._coefficient_limit, out=absorption_coefficient)
+        area = template.area * np.maximum(1 + self.area_std * rng.standard_normal((n, n_surfaces)), 0)
+        undefined = self._undefined_bands(area, absorption_coefficient)
+        if undefined is not None:
+            absorption_coefficient[np.broadcast_to(undefined[:, np.newaxis, :], absorption_coefficient.shape)] = np.nan
+        temperature = template.temperature[0] + self.temperature_std * rng.standard_normal(n)
+        rel_humidity = np.clip(template.rel_humidity[0] + self.rel_humidity_std * rng.standard_normal(n), 0, 100)
+        batch = room_batch(
+            volume=np.full(n, template.volume[0]),
+            temperature=temperature,
+            rel_humidity=rel_humidity,
+            pressure=template.pressure[0],
+            room_index=np.repeat(np.arange(n), n_surfaces),
+            area=area.ravel(),
+            absorption_coefficient=absorption_coefficient.reshape(n * n_surfaces, n_bands),
+            axis=None if template.axis is None else np.tile(template.axis, n),
+            bands=template.bands,
+        )
+        meas_reverberation_time = calc_reverberation_time.meas_reverberation_time
+        if meas_reverberation_time is not None:
+            meas_reverberation_time = np.broadcast_to(meas_reverberation_time, (n, n_bands))
+        return batch.calculate_reverberation_time(calc_reverberation_time.air_damp_calc, meas_reverberation_time, calc_reverberation_time.formula)
+
+    def iter_run(self, n_samples=100000, chunk_size=None, seed=None, max_chunk_bytes=32e6, n_bins=2048):
+        """
+        Samples the reverberation time chunk by chunk and yields the number of samples evaluated so far after every chunk, so that intermediate percentiles can be read from the histogram.
+
+        Parameters
+        ----------
+        n_samples : int, optional
+            The number of samples (default is 100000).
+        chunk_size : int, optional
+            The number of samples per chunk (default is None, which chooses the chunk size from max_chunk_bytes).
+        seed : int, optional
+            The seed of the random number generator (default is None).
+        max_chunk_bytes : int or float, optional
+            The approximate memory limit of one chunk in bytes if chunk_size is None (default is 32e6).
+        n_bins : int, optional
+            The number of logarithmic bins of the histogram (default is 2048).
+
+        Yields
+        ------
+        int
+            The number of samples evaluated so far.
+        """
+        if not isinstance(n_samples, int) or n_samples < 1:
+            raise ValueError("Number of samples must be a positive integer.")
+        n_surfaces, n_bands = self._template.absorption_coefficient.shape
+        if chunk_size is None:
+            # The coefficients, the flattened batch copy and the per surface absorption take about four arrays of this size
+            chunk_size = max(1, int(max_chunk_bytes // (4 * 8 * n_surfaces * n_bands)))
+        rng = np.random.default_rng(seed)
+        # The bins cover a factor of 4 around the nominal reverberation time; values beyond are kept in the under- and overflow bins
+        nominal = np.asarray(self.calc_reverberation_time.reverberation_time, dtype=float)
+        nominal = np.where(np.isfinite(nominal) & (nominal > 0), nominal, 1.0)
+        self.histogram = streaming_histogram(nominal / 4, nominal * 4, n_bins)
+        self.n_samples = 0
+        while self.n_samples < n_samples:
+            n = min(chunk_size, n_samples - self.n_samples)
+            self.histogram.update(self._sample(n, rng))
+            self.n_samples += n
+            yield self.n_samples
+
+    def run(self, n_samples=100000, chunk_size=None, seed=None, max_chunk_bytes=32e6, n_bins=2048):
+        """
+        Samples the reverberation time, see reverberation_time_uncertainty.iter_run.
+
+        Returns
+        -------
+        reverberation_time_uncertainty
+            The object itself with the updated histogram.
+        """
+        for _ in self.iter_run(n_samples, chunk_size, seed, max_chunk_bytes, n_bins):
+            pass
+        return self
+
+    def get_percentiles(self, q=(5, 50, 95)):
+        """
+        Returns percentiles of the sampled reverberation time in s.
+
+        Parameters
+        ----------
+        q : array_like, optional
+            The percentiles between 0 and 100 (default is (5, 50, 95)).
+
+        Returns
+        -------
+        np.ndarray
+            The percentiles of the reverberation time in s, shape (len(q), bands).
+
+        Raises
+        ------
+        ValueError
+            If no samples have been evaluated.
+        """
+        if self.histogram is None:
+            raise ValueError("No samples have been evaluated, call run first.")
+        return self.histogram.get_percentiles(q)
+
+    def get_summary(self, q=(5, 50, 95)):
+        """
+        Returns a summary of the sampled reverberation time.
+
+        Parameters
+        ----------
+        q : array_like, optional
+            The percentiles between 0 and 100 (default is (5, 50, 95)).
+
+        Returns
+        -------
+        dict
+            The number of samples, the mean and standard deviation in s per band, the number of samples without a result per band, e.g. for unknown absorption coefficients, and the percentiles in s per band keyed by percentile.
+        """
+        percentiles = self.get_percentiles(q)
+        return {
+            "n_samples": self.n_samples,
+            "mean": self.histogram.get_mean(),
+            "std": self.histogram.get_std(),
+            "nan_count": self.histogram.nan_count,
+            "percentiles": {p: percentiles[i] for i, p in enumerate(q)},
+        }
@@ -0,0 +1,65 @@
+import json
+import pytest
+from flask import Flask
+from src.api import api
+
+@pytest.fixture
+def client():
+    """Provides a test client of a Flask app with the API."""
+    app = Flask(__name__)
+    app.register_blueprint(api)
+    return app.test_client()
+
+ROOM = {"id": "R1", "volume": 200, "height": 3, "type": "A3", "surfaces": [{"area": 160, "absorption_coefficient": [0.2] * 8}]}
+
+def test_reverberation_json(client):
+    response = client.post("/api/v1/reverberation", json=ROOM)
+    assert response.status_code == 200
+    [result] = response.get_json()["results"]
+    assert result["id"] == "R1" and len(result["reverberation_time"]) == 8
+    assert result["DIN_18041_limits"]["type"] == "A3"
+    response = client.post("/api/v1/reverberation?formula=eyring", json={"rooms": [ROOM, {"volume": 1}]})
+    results = response.get_json()["results"]
+    assert results[0]["reverberation_time"][3] < result["reverberation_time"][3]
+    assert "error" in results[1]
+    assert client.post("/api/v1/reverberation", data="x", content_type="application/json").status_code == 400
+    assert client.post("/api/v1/reverberation?formula=x", json=ROOM).status_code == 400
+    assert client.post("/api/v1/reverberation?chunk_size=0", json=ROOM).status_code == 400
+
+def test_reverberation_ndjson(client):
+    body = "\n".join(json.dumps(dict(ROOM, id=i)) for i in range(25)) + "\n{invalid\n\n"
+    response = client.post("/api/v1/reverberation?chunk_size=10", data=body, content_type="application/x-ndjson")
+    assert response.mimetype == "application/x-ndjson"
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [result["index"] for result in results] == list(range(26))
+    assert [result["id"] for result in results[:25]] == list(range(25))
+    assert results[25]["error"].startswith("Invalid JSON")
+    # JSON requests may ask for an NDJSON response
+    response = client.post("/api/v1/reverberation", json=[ROOM, ROOM], headers={"Accept": "application/x-ndjson"})
+    assert len(response.get_data(as_text=True).splitlines()) == 2
+
+@pytest.mark.filterwarnings("ignore:divide by zero")
+def test_reverberation_without_absorption(client):
+    def reject_constant(name):
+        raise ValueError(f"{name} is no valid JSON")
+
+    room = dict(ROOM, air_damping=False, surfaces=[{"area": 160, "absorption_coefficient": [0] * 8}])
+    response = client.post("/api/v1/reverberation", json=room)
+    [result] = json.loads(response.get_data(as_text=True), parse_constant=reject_constant)["results"]
+    assert result["reverberation_time"] == [None] * 8
+    response = client.post("/api/v1/reverberation", json=room, headers={"Accept": "application/x-ndjson"})
+    result = json.loads(response.get_data(as_text=True), parse_constant=reject_constant)
+    assert result["reverberation_time"] == [None] * 8
+
+def test_reverberation_axis_formulas(client):
+    surfaces = [{"area": area, "absorption_coefficient": [0.3] * 8, "axis": axis}
+                for axis, area in ((0, 12), (1, 15), (2, 20)) for _ in "ab"]
+    room = dict(ROOM, volume=60, surfaces=surfaces)
+    eyring = client.post("/api/v1/reverberation?formula=eyring", json=room).get_json()["results"][0]
+    for formula in ("fitzroy", "arau_puchades"):
+        results = client.post(f"/api/v1/reverberation?formula={formula}", json=[room, ROOM]).get_json()["results"]
+        assert results[0]["reverberation_time"] == pytest.approx(eyring["reverberation_time"])
+        assert results[1]["error"] == "All surfaces must have an axis (0, 1 or 2) for this formula."
+    room = dict(ROOM, surfaces=[{"area": 10, "absorption_coefficient": [0.3] * 8, "axis": 3}])
+    [result] = client.post("/api/v1/reverberation", json=room).get_json()["results"]
+    assert result["error"] == "Surface 0: Axis must be 0 (x), 1 (y) or 2 (z)."
@@ -0,0 +1,105 @@
+import importlib.util
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from src.batch import batch_runner, iter_project_rooms, get_result_table, band_labels
+from src.room_io import iter_room_results
+
+MATERIALS = """name,63,125,250,500,1000,2000,4000,8000
+Carpet,0.02,0.05,0.1,0.2,0.45,0.65,0.7,0.7
+"""
+
+@pytest.fixture
+def project(tmp_path):
+    """Provides a CSV project file with 23 rooms, one surface per row, and a material file."""
+    rng = np.random.default_rng(1)
+    rows = []
+    for room in range(23):
+        volume = rng.uniform(50, 1000)
+        for surface in range(3):
+            row = {"room": f"R{room}", "volume": volume, "height": 3, "type": ["A3", "B3", None][room % 3], "area": rng.uniform(10, 100)}
+            if surface == 2:
+                row["material"] = "Carpet"
+            else:
+                row.update({label: rng.uniform(0.05, 0.6) for label in band_labels})
+            rows.append(row)
+    rows[4]["250"] = np.nan
+    rows[9]["volume"] = -1
+    pd.DataFrame(rows).to_csv(tmp_path / "rooms.csv", index=False)
+    (tmp_path / "materials.csv").write_text(MATERIALS)
+    return tmp_path
+
+def test_iter_project_rooms(project):
+    rooms = list(iter_project_rooms(str(project / "rooms.csv"), chunk_size=7))
+    # Rooms split across chunks are joined
+    assert [room["id"] for room in rooms] == [f"R{i}" for i in range(23)]
+    assert all(len(room["surfaces"]) == 3 for room in rooms)
+    assert rooms[1]["surfaces"][2] == {"area": rooms[1]["surfaces"][2]["area"], "material": "Carpet"}
+    assert "type" not in rooms[2]
+    # The optional axis column is read as integers
+    table = pd.read_csv(project / "rooms.csv")
+    table["axis"] = [0, 1, None] * 23
+    table.to_csv(project / "axis.csv", index=False)
+    surfaces = next(iter_project_rooms(str(project / "axis.csv")))["surfaces"]
+    assert [surface.get("axis") for surface in surfaces] == [0, 1, None] and type(surfaces[0]["axis"]) is int
+    path = project / "rooms.json"
+    path.write_text(json.dumps({"rooms": rooms}))
+    assert list(iter_project_rooms(str(path))) == json.loads(json.dumps(rooms))
+
+def test_get_result_table():
+    room = {"volume": 200, "height": 3, "type": "A3", "surfaces": [{"area": 150, "absorption_coefficient": [0.2] * 8}]}
+    definitions = [room, dict(room, type="no requirements"), dict(room, surfaces=[{"area": 150, "absorption_coefficient": [0.02] * 8}]),
+                   dict(room, surfaces=[{"area": 150, "absorption_coefficient": [0.2, 0.2, None, 0.2, 0.2, 0.2, 0.2, 0.2]}]), {"volume": 0}]
+    table = get_result_table(list(iter_room_results(definitions)))
+    assert table["status"].tolist() == ["pass", "no requirements", "fail", "incomplete", "error"]
+    assert table["failed_bands"].iloc[2] == "63;125;250;500;1000;2000;4000;8000"
+    assert table["error"].iloc[4] == "Volume must be a positive value."
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_batch_runner(project, n_workers):
+    output = str(project / "results.csv")
+    runner = batch_runner(str(project / "rooms.csv"), output, n_workers=n_workers, shard_size=5, materials_path=str(project / "materials.csv"))
+    report = runner.run()
+    assert (report.rooms_done, report.rooms_invalid, report.shards_done) == (23, 1, 5)
+    results = pd.read_csv(output).sort_values("index")
+    assert results["index"].tolist() == list(range(23))
+    assert results["status"].iloc[3] == "error" and results["status"].iloc[2] == "no requirements"
+    assert not (project / "results.csv.checkpoint.json").exists()
+
+def test_batch_runner_resume(project):
+    output = project / "results.csv"
+    runner = batch_runner(str(project / "rooms.csv"), str(output), n_workers=1, shard_size=5, materials_path=str(project / "materials.csv"))
+    expected = (runner.run(), output.read_bytes())[1]
+    # The run is interrupted after two shards, while a third shard was partly written
+    run = runner.iter_run()
+    next(run)
+    next(run)
+    run.close()
+    with open(output, "a") as f:
+        f.write("10,R10,pa")
+    report = runner.run(resume=True)
+    assert (report.rooms_skipped, report.rooms_done) == (10, 13)
+    assert output.read_bytes() == expected
+    # Another shard size does not match the checkpoint
+    run = runner.iter_run()
+    next(run)
+    run.close()
+    with pytest.raises(ValueError):
+        batch_runner(str(project / "rooms.csv"), str(output), n_workers=1, shard_size=7).run(resume=True)
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow is installed")
+def test_batch_runner_parquet_requires_pyarrow(project):
+    with pytest.raises(ImportError):
+        batch_runner(str(project / "rooms.csv"), str(project / "results.parquet"))
+
+def test_batch_runner_formula(project):
+    output = project / "results.csv"
+    with pytest.raises(ValueError, match="Formula must be one of"):
+        batch_runner(str(project / "rooms.csv"), str(output), n_workers=1, formula="foo")
+    assert not output.exists()
+    table = pd.read_csv(project / "rooms.csv")
+    table["axis"] = [0, 1, 2] * 23
+    table.to_csv(project / "axis.csv", index=False)
+    runner = batch_runner(str(project / "axis.csv"), str(output), n_workers=1, formula="fitzroy", materials_path=str(project / "materials.csv"))
+    assert runner.run().rooms_invalid == 1
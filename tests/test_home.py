@@ -1,9 +1,14 @@
 import pytest
 from dash.testing.application_runners import import_app
+import dash
 from dash import Dash, html, dcc
 import pandas as pd
 from pages import home
 import numpy as np
+import json
+import os
+import shutil
+import subprocess
 
 @pytest.fixture
 def dash_app():
@@ -49,4 +54,86 @@ def test_update_graph_callback_with_valid_inputs():
 def test_update_graph_with_invalid_inputs():
     """Test the graph update callback with invalid or missing inputs."""
     # This test would require checking how the app handles invalid inputs. Not sure how to simulate this without a running server.
-    pass
\ No newline at end of file
+    pass
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js is required to run the clientside callbacks")
+def test_clientside_validation():
+    """Test the clientside rounding and table validation of assets/clientside.js with Node.js."""
+    script = """
+    global.window = {dash_clientside: {no_update: "no_update"}};
+    require(process.argv[1]);
+    const home = window.dash_clientside.home;
+    const previous = [{"col-1": "Wall", "col-2": 10, "col-5": 0.1}];
+    const edit = (column, value) => home.validate_table_data(1, [Object.assign({}, previous[0], {[column]: value})], previous);
+    console.log(JSON.stringify([
+        home.round_value(1, 12.345), home.round_value(1, 12.5), home.round_value(1, "1,255"), home.round_value(1, "abc"), home.round_value(1, null),
+        edit("col-2", "12,345"), edit("col-5", "-0.5"), edit("col-5", "1.2.3"), edit("col-5", ""), edit("col-5", 0.256), edit("col-1", "1,5"),
+        home.validate_table_data(1, previous.concat(previous), previous),
+    ]));
+    """
+    result = subprocess.run(["node", "-e", script, os.path.join(os.path.dirname(home.__file__), "..", "assets", "clientside.js")],
+                            capture_output=True, text=True, check=True)
+    row = {"col-1": "Wall", "col-2": 10, "col-5": 0.1}
+    assert json.loads(result.stdout) == [
+        12.35, "no_update", 1.25, None, "no_update",
+        [dict(row, **{"col-2": 12.35})], [dict(row, **{"col-5": -0.5})], [row], "no_update", [dict(row, **{"col-5": 0.26})], "no_update",
+        "no_update",
+    ]
+
+
+def test_partial_updates():
+    """Test that the table and graph callbacks return dash.Patch updates."""
+    operations = home.add_row_to_surface_table(1).to_plotly_json()["operations"]
+    assert [op["operation"] for op in operations] == ["Append"]
+    material = {"name": "Glass wool", **{f"{f:g}": 0.5 for f in home.calculation_bands.get_frequencies()}}
+    patch, is_open = home.update_area_table_with_material({"row": 0}, [material], 2)
+    operations = patch.to_plotly_json()["operations"]
+    assert is_open is False and {tuple(op["location"]) for op in operations} == {(2, col_id) for col_id in ["col-4"] + home.alpha_columns}
+
+    figure = {"data": [{"x": [1, 2], "y": [0.5, 0.6]}], "layout": {"title": {"text": "A"}, "yaxis": {"range": [0, None]}}}
+    full, signature = home.get_figure_update(figure, None)
+    assert full is figure
+    changed = {"data": [{"x": [1, 2], "y": [0.7, 0.8]}], "layout": {"title": {"text": "B"}, "yaxis": {"range": [0, None]}}}
+    patch, new_signature = home.get_figure_update(changed, signature)
+    assert new_signature is dash.no_update
+    assert [op["location"] for op in patch.to_plotly_json()["operations"]] == [["data", 0, "y"], ["layout", "title"]]
+    # A changed x axis needs the full figure
+    moved = {"data": [{"x": [1, 3], "y": [0.7, 0.8]}], "layout": figure["layout"]}
+    assert home.get_figure_update(moved, signature)[0] is moved
+
+
+class fake_job_context:
+    """Records the progress of a job that runs in the test process."""
+
+    def __init__(self):
+        self.progress = []
+
+    def set_progress(self, progress, message=""):
+        self.progress.append(progress)
+
+    def check_cancelled(self):
+        pass
+
+
+def test_optimize_materials_job():
+    """Test the material optimization job without a process pool."""
+    table_data = [
+        {'col-1': 'Wall', 'col-2': '100', 'col-4': 'Concrete', **{col_id: '0.02' for col_id in home.alpha_columns}},
+        {'col-1': 'Ceiling', 'col-2': '60', 'col-4': '', **{col_id: '' for col_id in home.alpha_columns}},
+    ]
+    context = fake_job_context()
+    result = home.optimize_materials_job(context, 200, 3, 20, 50, 1013.25, "A3", True, home.parse_surface_rows(table_data), n_restarts=8, block_size=4)
+    assert context.progress == [0, 0.5, 1.0]
+    assert [item["surface"] for item in result["assignment"]] == ["Wall", "Ceiling"]
+    assert len(result["reverberation_time"]) == len(home.calculation_bands)
+    json.dumps(result)
+
+def test_export_report():
+    """Test the server-side PDF export."""
+    table_data = [
+        {'col-1': 'Wall', 'col-2': '100', 'col-4': 'Concrete', **{col_id: '0.02' for col_id in home.alpha_columns}},
+        {'col-1': 'Ceiling', 'col-2': '60', 'col-4': 'Absorber', **{col_id: '0.8' for col_id in home.alpha_columns}},
+    ]
+    download = home.export_report(1, table_data, 200, 3, 20, 50, 1013.25, "A3", True)
+    assert download["filename"] == "reverberation_report.pdf" and download["base64"]
+    assert home.export_report(1, [], 200, 3, 20, 50, 1013.25, "A3", True) is dash.no_update
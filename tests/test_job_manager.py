@@ -0,0 +1,66 @@
+import os
+import time
+import pytest
+from src.job_manager import job_manager
+
+def count_job(context, n, delay=0.0):
+    """Counts to n and reports the progress after every step."""
+    for i in range(n):
+        context.check_cancelled()
+        time.sleep(delay)
+        context.set_progress((i + 1) / n, f"step {i + 1}")
+    return {"count": n}
+
+def failing_job(context):
+    raise ValueError("invalid input")
+
+def crashing_job(context):
+    os._exit(1)
+
+@pytest.fixture
+def manager(tmp_path):
+    """Provides a job manager with one worker and a temporary job store."""
+    manager = job_manager(str(tmp_path / "jobs.sqlite"), max_workers=1, max_queued=1)
+    yield manager
+    manager.shutdown()
+
+def test_job_result_and_failure(manager):
+    job_id = manager.submit(count_job, 3)
+    status = manager.wait(job_id, timeout=60)
+    assert status["status"] == "finished" and status["result"] == {"count": 3}
+    assert status["progress"] == 1.0 and status["name"] == "count_job"
+    status = manager.wait(manager.submit(failing_job), timeout=60)
+    assert status["status"] == "failed" and status["error"] == "ValueError: invalid input"
+    assert manager.get_status("unknown") is None
+
+def test_job_cancel_and_limits(manager):
+    running = manager.submit(count_job, 1000, delay=0.01)
+    queued = manager.submit(count_job, 1)
+    # One running and one queued job per worker process
+    with pytest.raises(RuntimeError):
+        manager.submit(count_job, 1)
+    deadline = time.monotonic() + 60
+    while manager.get_status(running)["status"] != "running" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.cancel(queued) and manager.cancel(running)
+    assert manager.wait(running, timeout=60)["status"] == "cancelled"
+    assert manager.wait(queued, timeout=60)["status"] == "cancelled"
+    assert manager.get_status(running)["progress"] < 1
+    assert not manager.cancel(running)
+
+def test_job_store_shared(manager, tmp_path):
+    job_id = manager.submit(count_job, 2)
+    manager.wait(job_id, timeout=60)
+    # Another process with the same store sees the job
+    other = job_manager(manager.store_path)
+    assert other.get_status(job_id)["result"] == {"count": 2}
+    with pytest.raises(ValueError):
+        job_manager(str(tmp_path / "other.sqlite"), max_workers=0)
+
+def test_job_worker_crash(manager):
+    status = manager.wait(manager.submit(crashing_job), timeout=60)
+    assert status["status"] == "failed" and "BrokenProcessPool" in status["error"]
+    # The next jobs start a new pool
+    for _ in range(2):
+        job_id = manager.submit(count_job, 2)
+        assert manager.wait(job_id, timeout=60)["result"] == {"count": 2}
@@ -0,0 +1,58 @@
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from src.material_database import material_database, get_database_material, get_database_materials
+
+CSV = """name,63,125,250,500,1000,2000,4000,8000
+Concrete,0.01,0.01,0.02,0.02,0.02,0.03,0.04,0.04
+"Plaster, smooth",nan,0.05,0.1,0.1,0.15,0.2,0.2,nan
+Carpet,0.02,0.05,0.1,0.2,0.45,0.65,0.7,0.7
+"""
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Provides a small material CSV file."""
+    path = tmp_path / "materials.csv"
+    path.write_text(CSV)
+    return str(path)
+
+def test_database_matches_csv(csv_path):
+    db = material_database(csv_path)
+    df = pd.read_csv(csv_path)
+    assert len(db) == 3
+    assert isinstance(db.coefficients, np.memmap)
+    name, coeffs = db.get(1)
+    assert name == "Plaster, smooth"
+    np.testing.assert_array_equal(coeffs, df.iloc[1, 1:9].to_numpy(dtype=float))
+    assert db.get_by_name("Carpet")[0] == "Carpet" and db.get_index("Carpet") == 2
+    names, coefficients = db.get_many([2, 0])
+    assert names.tolist() == ["Carpet", "Concrete"]
+    np.testing.assert_array_equal(coefficients, df.iloc[[2, 0], 1:9].to_numpy(dtype=float))
+    pd.testing.assert_frame_equal(db.to_dataframe(), df)
+    with pytest.raises(KeyError):
+        db.get_index("Unknown")
+
+def test_database_cache_is_reused_and_invalidated(csv_path):
+    db = material_database(csv_path)
+    assert db.build_count == 1
+    # A second process loads the memory-mapped cache without parsing the CSV
+    other = material_database(csv_path)
+    assert other.build_count == 0
+    assert not other.refresh()
+    # Touching the file without changing its content only costs a hash
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert other.refresh() and other.build_count == 0
+    with open(csv_path, "a") as f:
+        f.write("Absorber,0.2,0.4,0.8,0.95,0.95,0.9,0.85,0.8\n")
+    assert db.get_by_name("Absorber")[0] == "Absorber"
+    assert db.build_count == 2 and len(db) == 4
+    assert len([f for f in os.listdir(db.cache_dir) if f.endswith(".npy")]) == 2
+
+def test_database_functions_use_cwd(csv_path, monkeypatch):
+    monkeypatch.chdir(os.path.dirname(csv_path))
+    name, coeffs = get_database_material(0)
+    assert name == "Concrete" and coeffs.shape == (8,)
+    names, coefficients = get_database_materials()
+    assert names.tolist() == ["Concrete", "Plaster, smooth", "Carpet"] and coefficients.shape == (3, 8)
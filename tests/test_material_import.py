@@ -0,0 +1,93 @@
+import os
+import pytest
+import numpy as np
+from src.material_database import material_database
+from src.material_import import parse_band_column, detect_format, content_hash, material_importer
+
+MATERIALS = """name,63,125,250,500,1000,2000,4000,8000
+Concrete,0.01,0.01,0.02,0.02,0.02,0.03,0.04,0.04"""
+
+CATALOG = """Produkt;Dicke mm;125 Hz;250 Hz;500 Hz;1 kHz;2 kHz;4 kHz
+Absorber A;50;0,1;0,2;0,5;0,8;0,9;0,9
+Absorber A;50;0,1;0,2;0,5;0,8;0,9;0,9
+Absorber B;40;0,1;-0,2;0,5;0,8;0,9;0,9
+;40;0,1;0,2;0,5;0,8;0,9;0,9
+Absorber C;40;;;;;;
+Absorber D;60;0,15;0,35;0,7;0,95;1,05;1
+"""
+
+@pytest.fixture
+def paths(tmp_path):
+    """Provides a material CSV file and a vendor catalog with decimal commas."""
+    target = tmp_path / "materials.csv"
+    target.write_text(MATERIALS)
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text(CATALOG, encoding="utf-8")
+    return str(target), str(catalog)
+
+def test_parse_band_column():
+    assert parse_band_column("125") == 125
+    assert parse_band_column("125 Hz") == 125
+    assert parse_band_column("alpha_500") == 500
+    assert parse_band_column("1 kHz") == 1000
+    assert parse_band_column("1,25k") == 1250
+    assert parse_band_column("Dicke 50mm") is None
+    assert parse_band_column("name") is None
+
+def test_detect_format(paths):
+    assert detect_format(paths[1]) == (";", ",")
+    assert detect_format(paths[0]) == (",", ".")
+
+def test_content_hash():
+    coefficients = np.array([[0.1, np.nan], [0.1, np.nan], [0.10001, np.nan]])
+    hashes = content_hash(["A", " A ", "A"], coefficients)
+    assert hashes[0] == hashes[1] == hashes[2]
+    assert content_hash(["B"], coefficients[:1])[0] != hashes[0]
+
+def test_import_csv(paths):
+    target, catalog = paths
+    database = material_database(target)
+    report = material_importer(target, chunk_size=2).import_csv(catalog)
+    assert (report.rows_read, report.rows_imported, report.rows_duplicate, report.rows_invalid) == (6, 2, 1, 3)
+    assert report.rows_rejected == {"no name": 1, "no coefficients": 1, "negative coefficient": 1, "coefficient too large": 0}
+    assert report.chunks == 3 and report.rows_per_second > 0
+    assert report.bands.nominal == (125, 250, 500, 1000, 2000, 4000)
+    # The database picks up the appended materials
+    database.refresh()
+    assert database.names.tolist() == ["Concrete", "Absorber A", "Absorber D"]
+    np.testing.assert_allclose(database.coefficients[1], [np.nan, 0.1, 0.2, 0.5, 0.8, 0.9, 0.9, np.nan])
+    # A second import only finds duplicates and leaves the file unchanged
+    content = open(target).read()
+    report = material_importer(target).import_csv(catalog)
+    assert report.rows_imported == 0 and report.rows_duplicate == 3
+    assert open(target).read() == content
+
+def test_import_csv_object_absorbers(tmp_path):
+    # The shipped materials include seats and persons with coefficients up to 4.1
+    shipped = os.path.join(os.path.dirname(__file__), os.pardir, "materials.csv")
+    n_materials = len(material_database(shipped, cache_dir=str(tmp_path / "cache")).names)
+    report = material_importer(str(tmp_path / "materials.csv")).import_csv(shipped)
+    assert report.rows_invalid == 0 and report.rows_imported + report.rows_duplicate == n_materials
+    report = material_importer(str(tmp_path / "strict.csv"), max_absorption_coefficient=1.5).import_csv(shipped)
+    assert report.rows_rejected["coefficient too large"] == report.rows_invalid > 0
+    with pytest.raises(ValueError):
+        material_importer(max_absorption_coefficient=0)
+
+def test_import_csv_third_octave_bands(tmp_path):
+    target = tmp_path / "materials.csv"
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("name,400,500,630,800,1000,1250\nPanel,0.2,0.3,0.4,0.5,0.6,0.7\n")
+    report = material_importer(str(target)).import_csv(str(catalog))
+    assert report.rows_imported == 1
+    database = material_database(str(target))
+    # Third-octave bands are averaged to octave bands, bands not covered by the catalog stay unknown
+    np.testing.assert_allclose(database.coefficients[0], [np.nan, np.nan, np.nan, 0.3, 0.6, np.nan, np.nan, np.nan])
+
+def test_import_csv_errors(tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("name,thickness\nPanel,40\n")
+    with pytest.raises(ValueError):
+        material_importer(str(tmp_path / "materials.csv")).import_csv(str(catalog))
+    with pytest.raises(ValueError):
+        material_importer(chunk_size=0)
+    assert not (tmp_path / "materials.csv").exists()
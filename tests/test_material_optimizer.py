@@ -0,0 +1,106 @@
+import itertools
+import pytest
+import numpy as np
+from src.reverberation_calc import room, material, surface, reverberation_time
+from src.material_optimizer import material_optimizer, optimization_result, _score
+
+@pytest.fixture
+def classroom():
+    """Provides a classroom with concrete surfaces."""
+    r = room(volume=200)
+    r.set_height(3)
+    concrete = material("Concrete", [0.01, 0.01, 0.02, 0.02, 0.02, 0.03, 0.04, 0.04])
+    areas = [66.7, 66.7, 30, 30, 20, 20, 10, 8]
+    surfaces = [surface(f"Surface {i}", area, concrete) for i, area in enumerate(areas)]
+    return r, surfaces
+
+@pytest.fixture
+def candidates():
+    """Provides a few candidate materials."""
+    return [
+        material("Concrete", [0.01, 0.01, 0.02, 0.02, 0.02, 0.03, 0.04, 0.04]),
+        material("Carpet", [0.02, 0.05, 0.1, 0.2, 0.45, 0.65, 0.7, 0.7]),
+        material("Absorber", [0.2, 0.4, 0.8, 0.95, 0.95, 0.9, 0.85, 0.8]),
+        material("Wood panel", [0.3, 0.25, 0.15, 0.1, 0.08, 0.07, 0.07, 0.07]),
+    ]
+
+def test_optimizer_result_matches_reverberation_time(classroom, candidates):
+    r, surfaces = classroom
+    optimizer = material_optimizer(r, "A3", surfaces, materials=candidates)
+    result = optimizer.search(n_restarts=64, n_workers=1, seed=0)
+    assert isinstance(result, optimization_result)
+    assert result.within_limits
+    expected = reverberation_time(r, result.get_surfaces()).reverberation_time
+    np.testing.assert_allclose(result.reverberation_time, expected)
+    # The surfaces of the optimizer are not changed
+    assert all(s.get_material().get_name() == "Concrete" for s in surfaces)
+
+def test_optimizer_streams_improving_results(classroom, candidates):
+    r, surfaces = classroom
+    optimizer = material_optimizer(r, "A3", surfaces, materials=candidates)
+    scores = [result.score for result in optimizer.iter_search(n_restarts=64, block_size=4, n_workers=1, seed=1)]
+    assert len(scores) >= 1
+    assert all(later < earlier for earlier, later in zip(scores, scores[1:]))
+
+def test_optimizer_process_pool_matches_serial(classroom, candidates):
+    r, surfaces = classroom
+    optimizer = material_optimizer(r, "A3", surfaces, materials=candidates)
+    serial = optimizer.search(n_restarts=32, block_size=8, n_workers=1, seed=2)
+    parallel = optimizer.search(n_restarts=32, block_size=8, n_workers=2, seed=2)
+    assert parallel.score == pytest.approx(serial.score)
+
+def test_optimizer_fixed_surfaces(classroom, candidates):
+    r, surfaces = classroom
+    optimizer = material_optimizer(r, "A3", surfaces, materials=candidates, fixed=surfaces[:2])
+    result = optimizer.search(n_restarts=32, n_workers=1, seed=0)
+    assert result.assignment[0] is surfaces[0].get_material()
+    assert result.assignment[1] is surfaces[1].get_material()
+    assert len(result.indices) == len(surfaces) - 2
+
+def test_optimizer_band_mask_and_validation(classroom, candidates):
+    r, surfaces = classroom
+    candidates.append(material("Partly known", [np.nan, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, np.nan]))
+    optimizer = material_optimizer(r, "A3", surfaces, materials=candidates)
+    np.testing.assert_array_equal(optimizer.band_mask, [False, True, True, True, True, True, True, False])
+    with pytest.raises(ValueError):
+        material_optimizer(r, "A3", surfaces, materials=candidates, fixed=surfaces)
+    with pytest.raises(ValueError):
+        material_optimizer(r, "A3", surfaces, materials=candidates, fixed=[surface("Other", 1, candidates[0])])
+    with pytest.raises(TypeError):
+        material_optimizer(r, "A3", surfaces, materials=["Carpet"])
+
+def test_optimizer_database_candidates(classroom):
+    r, surfaces = classroom
+    optimizer = material_optimizer(r, "A3", surfaces)
+    assert len(optimizer.materials) == 68
+    assert optimizer.contrib.shape == (len(surfaces), 68, 8)
+
+def test_solve_matches_exhaustive_search(classroom, candidates):
+    r, surfaces = classroom
+    surfaces = surfaces[3:]
+    optimizer = material_optimizer(r, "A3", surfaces, materials=candidates)
+    problem = optimizer._problem()
+    contrib = optimizer.contrib[:, :, optimizer.band_mask]
+    n = len(surfaces)
+    best = min(_score(problem["base"] + contrib[np.arange(n), list(combo)].sum(axis=0), problem)
+               for combo in itertools.product(range(len(candidates)), repeat=n))
+    result = optimizer.solve(within_limits=False, initial_restarts=0)
+    assert result.score == pytest.approx(best)
+    assert result.statistics["proven_optimal"]
+    assert result.statistics["pruned"] > 0
+    assert optimizer.statistics is result.statistics
+
+def test_solve_within_limits_and_time_budget(classroom, candidates):
+    r, surfaces = classroom
+    optimizer = material_optimizer(r, "A3", surfaces, materials=candidates)
+    result = optimizer.solve(seed=0)
+    assert result.within_limits
+    assert result.score <= result.statistics["initial_score"]
+    # No assignment of concrete and wood reaches the limits of a room for speech
+    hard = material_optimizer(r, "A4", surfaces, materials=[candidates[0], candidates[3]])
+    assert hard.solve(initial_restarts=0) is None
+    assert hard.statistics["proven_optimal"]
+    budget = material_optimizer(r, "A3", surfaces * 4, materials=candidates * 2)
+    result = budget.solve(time_budget=0.05, seed=0)
+    assert not budget.statistics["proven_optimal"]
+    assert result is not None
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+from src.material_database import material_database
+from src.material_search import normalize, trigram_index, parse_filter_query, material_search
+
+CSV = """name,63,125,250,500,1000,2000,4000,8000
+Concrete,0.01,0.01,0.02,0.02,0.02,0.03,0.04,0.04
+"Plaster, smooth",nan,0.05,0.1,0.1,0.15,0.2,0.2,nan
+Plasterboard on studs,0.3,0.2,0.15,0.05,0.05,0.05,0.05,0.05
+Carpet on concrete,0.02,0.05,0.1,0.2,0.45,0.65,0.7,0.7
+Glass wool 50 mm,0.1,0.25,0.6,0.9,0.95,0.95,0.9,0.85
+Holzwolle-Leichtbauplatte,0.1,0.15,0.3,0.55,0.65,0.7,0.7,0.7
+"""
+
+@pytest.fixture
+def search(tmp_path):
+    """Provides a material search over a small material database."""
+    path = tmp_path / "materials.csv"
+    path.write_text(CSV)
+    return material_search(material_database(str(path)))
+
+def test_normalize():
+    assert normalize("  Gipskarton, 12.5 mm (Ø) ") == "gipskarton 12 5 mm ø"
+    assert normalize("Béton") == "beton"
+
+def test_trigram_index_ranking():
+    names = ["Concrete", "Plaster, smooth", "Plasterboard on studs", "Carpet on concrete", "Glass wool"]
+    index = trigram_index(names)
+    indices, scores = index.search("plaster")
+    # Names starting with the query come first, ties keep the order of the names
+    assert indices.tolist()[:2] == [1, 2]
+    assert np.all(np.diff(scores) <= 0)
+    assert index.search("concrete")[0].tolist() == [0, 3]
+    # Typos and unfinished words are found by their shared trigrams
+    assert index.search("glas wol")[0][0] == 4
+    assert index.search("conc", limit=1)[0].tolist() == [0]
+    assert index.search("xyz")[0].size == 0
+    assert index.search("")[0].tolist() == [0, 1, 2, 3, 4]
+
+def test_parse_filter_query():
+    assert parse_filter_query("{name} icontains plaster && {500} >= 0.5") == [("name", "contains", "plaster"), ("500", "ge", 0.5)]
+    assert parse_filter_query('{name} s= "Concrete"') == [("name", "eq", "Concrete")]
+    assert parse_filter_query("") == []
+    with pytest.raises(ValueError):
+        parse_filter_query("{500} >")
+    with pytest.raises(ValueError):
+        parse_filter_query("{500} datestartswith 2020")
+
+def test_material_search_query(search):
+    records, total = search.query("plaster")
+    assert total == 2 and [r["name"] for r in records] == ["Plaster, smooth", "Plasterboard on studs"]
+    assert set(records[0]) == {"name", "63", "125", "250", "500", "1000", "2000", "4000", "8000"}
+    assert np.isnan(records[0]["63"])
+    records, total = search.query(filter_query="{500} >= 0.1", sort_by=[{"column_id": "500", "direction": "desc"}])
+    assert total == 4 and [r["500"] for r in records] == [0.9, 0.55, 0.2, 0.1]
+    records, total = search.query(sort_by=[{"column_id": "63", "direction": "asc"}])
+    # Missing values are sorted last
+    assert records[0]["name"] == "Concrete" and records[-1]["name"] == "Plaster, smooth"
+    records, total = search.query(filter_query="{name} contains wo", page_current=0, page_size=1)
+    assert total == 2 and len(records) == 1
+    records, total = search.query(page_current=2, page_size=4)
+    assert total == 6 and records == []
+    assert search.get_page_count(6, 4) == 2 and search.get_page_count(0, 4) == 1
+    with pytest.raises(ValueError):
+        search.query(filter_query="{unknown} = 1")
+
+def test_material_search_similar_spectrum(search):
+    spectrum = [np.nan, 0.05, 0.1, 0.2, 0.45, 0.65, 0.7, np.nan]
+    records, total = search.query(spectrum=spectrum, n_similar=3)
+    assert total == 3 and records[0]["name"] == "Carpet on concrete"
+    records, total = search.query("plaster", spectrum=spectrum, n_similar=6)
+    assert [r["name"] for r in records] == ["Plaster, smooth", "Plasterboard on studs"]
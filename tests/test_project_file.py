@@ -0,0 +1,87 @@
+import json
+import os
+import pytest
+import numpy as np
+from src import project_file as project_module
+from src.material_database import material_database
+from src.project_file import write_project, project_file, is_project
+from src.batch import iter_project_rooms
+
+MATERIALS = """name,63,125,250,500,1000,2000,4000,8000
+Carpet,0.02,0.05,0.1,0.2,0.45,0.65,0.7,0.7
+"""
+
+@pytest.fixture
+def database(tmp_path):
+    """Provides a small material database."""
+    path = tmp_path / "materials.csv"
+    path.write_text(MATERIALS)
+    return material_database(str(path), cache_dir=str(tmp_path / "cache"))
+
+def make_rooms(n):
+    return [
+        {"id": f"R{i}", "volume": 100.0 + i, "height": 3.0, "type": "A3", "air_damping": i % 2 == 0,
+         "surfaces": [{"name": "Wall", "area": 50.0, "material": "Plaster", "absorption_coefficient": [0.1, None, 0.2, 0.2, 0.3, 0.3, 0.4, 0.4]},
+                      {"name": "Floor", "area": 10.0 + i, "material": "Carpet", "axis": 2}]}
+        for i in range(n)
+    ]
+
+def test_write_and_read_project(tmp_path, database):
+    path = str(tmp_path / "building")
+    project = write_project(path, make_rooms(5), name="Building 1", database=database)
+    assert is_project(path) and not is_project(str(tmp_path))
+    assert (len(project), project.name) == (5, "Building 1")
+    room = project_file(path).get_room(3)
+    assert room["id"] == "R3" and room["volume"] == 103.0 and room["air_damping"] is False
+    assert room["temperature"] == 20.0 and room["pressure"] == pytest.approx(1013.25)
+    assert room["surfaces"][0] == {"name": "Wall", "area": 50.0, "material": "Plaster", "absorption_coefficient": [0.1, None, 0.2, 0.2, 0.3, 0.3, 0.4, 0.4]}
+    # Materials of the database are stored with their coefficients
+    assert room["surfaces"][1]["material"] == "Carpet" and room["surfaces"][1]["axis"] == 2
+    np.testing.assert_allclose(room["surfaces"][1]["absorption_coefficient"], database.get(0)[1])
+    assert project.get_room(-1)["id"] == "R4" and project.get_room_index("R2") == 2
+    assert [room["id"] for room in project.iter_rooms(1, 3)] == ["R1", "R2"]
+    assert list(iter_project_rooms(path)) == list(project.iter_rooms())
+    with pytest.raises(IndexError):
+        project.get_room(5)
+
+def test_rewrite_project(tmp_path, database):
+    path = str(tmp_path / "building")
+    old = write_project(path, make_rooms(3), database=database)
+    old.get_room(0)
+    write_project(path, make_rooms(2), database=database)
+    # The files of the old version are removed, an open project keeps its mapped columns
+    assert len([name for name in os.listdir(path) if name.endswith(".npy")]) == len(project_file(path).manifest["files"])
+    assert len(project_file(path)) == 2 and old.get_room(2)["id"] == "R2"
+    with pytest.raises(ValueError, match="Room 1: Volume"):
+        write_project(path, [make_rooms(1)[0], {"volume": -1}], database=database)
+    assert len(project_file(path)) == 2
+    assert len(write_project(str(tmp_path / "empty"), [])) == 0
+    # Files that are not part of the project are kept, other directories are not overwritten
+    (tmp_path / "building" / "my_measurements.npy").write_bytes(b"data")
+    write_project(path, make_rooms(1), database=database)
+    assert (tmp_path / "building" / "my_measurements.npy").read_bytes() == b"data"
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "notes.npy").write_bytes(b"data")
+    with pytest.raises(ValueError, match="holds no project"):
+        write_project(str(tmp_path / "other"), make_rooms(1), database=database)
+    assert os.listdir(tmp_path / "other") == ["notes.npy"]
+
+def test_schema_version(tmp_path, database, monkeypatch):
+    path = tmp_path / "building"
+    write_project(str(path), make_rooms(1), database=database)
+    manifest = json.loads((path / "manifest.json").read_text())
+    (path / "manifest.json").write_text(json.dumps(dict(manifest, schema_version=99)))
+    with pytest.raises(ValueError, match="schema version 99"):
+        project_file(str(path))
+    # Older projects are upgraded by the migrations
+    (path / "manifest.json").write_text(json.dumps(dict(manifest, schema_version=0, title="Old name")))
+    with pytest.raises(ValueError, match="not supported"):
+        project_file(str(path))
+    monkeypatch.setitem(project_module._migrations, 0, lambda manifest, path: dict(manifest, schema_version=1, name=manifest.pop("title")))
+    assert project_file(str(path)).name == "Old name"
+    # Projects written before surfaces had an axis
+    del manifest["files"]["axis"]
+    (path / "manifest.json").write_text(json.dumps(manifest))
+    assert "axis" not in project_file(str(path)).get_room(0)["surfaces"][1]
+    with pytest.raises(ValueError, match="not a project"):
+        project_file(str(tmp_path))
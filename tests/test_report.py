@@ -0,0 +1,69 @@
+import re
+import pytest
+from src.reverberation_calc import room, surface, material
+from src.result_cache import result_cache
+from src.report import pdf_document, room_report, render_reports, get_report_filename, fit_text, text_width
+
+def make_report(name="Room 1.01", type="A3", n_surfaces=4):
+    calc_room = room(200)
+    calc_room.set_height(3)
+    surfaces = [surface(f"Surface {i}", 20 + i, material(f"Material {i}", [0.05 + 0.1 * i] * 8)) for i in range(n_surfaces)]
+    return room_report(name, calc_room, surfaces, type)
+
+def check_pdf(data):
+    assert data.startswith(b"%PDF-1.4") and data.rstrip().endswith(b"%%EOF")
+    # Every entry of the cross-reference table points to its object
+    start = int(re.search(rb"startxref\s+(\d+)", data).group(1))
+    entries = re.findall(rb"(\d{10}) 00000 n", data[start:])
+    for number, offset in enumerate(entries, start=1):
+        assert data[int(offset):].startswith(f"{number} 0 obj".encode())
+    return len(entries)
+
+def test_pdf_document():
+    doc = pdf_document()
+    doc.add_page()
+    doc.text(40, 800, "Nachhallzeit (Ä) – 1/2", bold=True)
+    doc.line([(40, 790), (200, 790)], dash=(2, 2))
+    doc.rect(40, 700, 100, 50, fill=(1, 0.8, 0.8))
+    doc.add_page()
+    data = doc.to_bytes()
+    assert check_pdf(data) == 9
+    assert data.count(b"/Type /Page ") == 2
+    assert text_width("Hello", 10) < text_width("Hello", 10, bold=True)
+    assert text_width(fit_text("A" * 200, 100, 10), 10) <= 100
+
+def test_room_report(tmp_path):
+    report = make_report(n_surfaces=60)
+    assert report.reverberation_time.shape == report.T_upper_limit.shape == (8,)
+    assert set(report.get_band_status()) <= {"ok", "too long", "too short", ""}
+    assert make_report(type="no requirements").get_band_status() == [""] * 8
+    data = report.render(result_cache())
+    # 60 surfaces need a second page
+    assert check_pdf(data) > 6 and data.count(b"/Type /Page ") == 2
+    path = tmp_path / "report.pdf"
+    report.save(str(path), result_cache())
+    assert path.read_bytes()[:8] == b"%PDF-1.4"
+
+def test_figure_cache():
+    cache = result_cache()
+    first = make_report()
+    first.render(cache)
+    # Another room with the same results draws the figure from the cache
+    make_report(name="Room 1.02").render(cache)
+    assert (cache.misses, cache.hits) == (1, 1)
+    make_report(n_surfaces=5).render(cache)
+    assert cache.misses == 2
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_render_reports(tmp_path, n_workers):
+    reports = [make_report(name=f"Room {i}/a") for i in range(3)]
+    paths = render_reports(reports, str(tmp_path), n_workers=n_workers)
+    assert [path.rsplit("/", 1)[-1] for path in paths] == ["000_Room_0_a.pdf", "001_Room_1_a.pdf", "002_Room_2_a.pdf"]
+    for path in paths:
+        with open(path, "rb") as f:
+            check_pdf(f.read())
+
+def test_get_report_filename():
+    assert get_report_filename(3, "Room 1.01") == "003_Room_1.01.pdf"
+    assert "/" not in get_report_filename(12, "../../etc/passwd")
+    assert get_report_filename(0, "***") == "000_room.pdf"
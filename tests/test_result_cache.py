@@ -0,0 +1,40 @@
+import pytest
+import numpy as np
+from src.result_cache import canonical_key, result_cache
+
+def test_canonical_key():
+    assert canonical_key([1.0, 2.5], "A3", True) == canonical_key((1.0, 2.5), "A3", True)
+    assert canonical_key(0.0, np.nan) == canonical_key(-0.0, float("nan"))
+    assert canonical_key({"b": 1, "a": 2}) == canonical_key({"a": 2, "b": 1})
+    assert canonical_key(1.0, 2.0) != canonical_key(2.0, 1.0)
+    assert canonical_key(0.1) != canonical_key(0.1 + 1e-12)
+
+def test_result_cache_lru():
+    cache = result_cache(maxsize=2)
+    cache.put("a", {"value": 1})
+    cache.put("b", {"value": 2})
+    assert cache.get("a") == {"value": 1}
+    # "b" is the least recently used entry
+    cache.put("c", {"value": 3})
+    assert cache.get("b") is None
+    assert cache.get("c") == {"value": 3}
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 2)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    cache.clear()
+    assert cache.get_stats()["size"] == 0 and cache.get("a") is None
+    with pytest.raises(ValueError):
+        result_cache(maxsize=0)
+
+def test_result_cache_directory(tmp_path):
+    writer = result_cache(directory=str(tmp_path), disk_maxsize=2)
+    reader = result_cache(directory=str(tmp_path))
+    writer.put("a", {"data": [1.5, None]})
+    # Another process finds the result in the shared directory
+    assert reader.get("a") == {"data": [1.5, None]}
+    assert reader.get("a") == {"data": [1.5, None]}
+    assert (reader.disk_hits, reader.hits) == (1, 1)
+    writer.put("b", 2)
+    writer.put("c", 3)
+    writer.prune()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["b.json", "c.json"]
@@ -1,6 +1,7 @@
+import warnings
 import pytest
 import numpy as np
-from src.reverberation_calc import room, material, surface, reverberation_time, DIN_18041_limits
+from src.reverberation_calc import room, material, surface, reverberation_time, DIN_18041_limits, room_batch, reverberation_time_batch, air_damp, air_absorption, air_damp_cache, Aeq_accumulator, material_table, reverberation_formulas, band_set, octave_bands, third_octave_bands, DIN_18041_limits_batch, DIN_18041_limits_lookup, DIN_18041_flags, describe_DIN_18041_flags
 
 # Fixtures for reusable objects
 @pytest.fixture
@@ -93,3 +94,390 @@ def test_din_18041_music_usage(sample_room):
 def test_din_18041_speech_usage(sample_room):
     limits = DIN_18041_limits(sample_room, "A4")
     assert limits.T_upper_limit[3] < 1.0
+
+def test_din_18041_no_requirements(sample_room):
+    limits = DIN_18041_limits(sample_room, "no requirements")
+    assert np.all(np.isnan(limits.T_upper_limit))
+    assert limits.flags == DIN_18041_flags["no_requirements"]
+
+def test_din_18041_limits_batch_matches_class():
+    types = ["A1", "A2", "A3", "A4", "A5", "B1", "B2", "B3", "B4", "B5"]
+    volumes = [20, 60, 400, 800, 250, 100, 100, 100, 200, 300]
+    heights = [3, 3, 3, 3, 3, 3, 2.4, 3, 4, 5]
+    rooms = []
+    for volume, height in zip(volumes, heights):
+        r = room(volume)
+        r.set_height(height)
+        rooms.append(r)
+    c = [r.c for r in rooms]
+    for bands in (None, third_octave_bands):
+        T_upper_limit, T_lower_limit, T_soll, flags = DIN_18041_limits_batch(volumes, heights, c, types, bands=bands)
+        for i, (r, room_type) in enumerate(zip(rooms, types)):
+            with pytest.warns(UserWarning) if flags[i] else warnings.catch_warnings():
+                limits = DIN_18041_limits(r, room_type, bands=bands)
+            np.testing.assert_allclose(T_upper_limit[i], limits.T_upper_limit)
+            np.testing.assert_allclose(T_lower_limit[i], limits.T_lower_limit)
+            assert T_soll[i] == pytest.approx(limits.T_soll)
+            assert flags[i] == limits.flags
+    assert flags[0] == DIN_18041_flags["volume_below_range"]
+    assert flags[3] == DIN_18041_flags["volume_above_range"]
+    assert flags[5] == DIN_18041_flags["no_requirements"]
+    assert np.all(flags[[1, 2, 4, 6, 7, 8, 9]] == 0)
+    _, _, _, flags = DIN_18041_limits_batch(100, None, 343.6, "B3")
+    assert flags[0] == DIN_18041_flags["height_required"]
+    assert describe_DIN_18041_flags(flags[0], "B3") == ["According to DIN 18041, the room height is required for type B3."]
+    with pytest.raises(ValueError):
+        DIN_18041_limits_batch([100, 200], 3, 343.6, ["A1", "C1"])
+
+def test_din_18041_limits_lookup_is_cached():
+    DIN_18041_limits_lookup.cache_clear()
+    T_upper_limit, T_lower_limit, T_soll, flags = DIN_18041_limits_lookup("A3", 100, 3, 343.6)
+    assert DIN_18041_limits_lookup("A3", 100, 3, 343.6)[0] is T_upper_limit
+    assert DIN_18041_limits_lookup.cache_info().hits == 1
+    assert T_soll == pytest.approx(0.32 * np.log10(100) + 0.17)
+    with pytest.raises(ValueError):
+        T_upper_limit[0] = 0
+
+# Tests for the room_batch class
+def test_room_batch_matches_reverberation_time(sample_room, sample_surface):
+    other_room = room(volume=350)
+    other_room.set_temperature(25)
+    other_room.set_rel_humidity(30)
+    other_surfaces = [
+        surface("Floor", 80, material("Carpet", [0.02, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.5])),
+        surface("Ceiling", 80, material("Plaster", [np.nan, 0.02, 0.02, 0.03, 0.03, 0.04, 0.06, np.nan])),
+    ]
+    batch = room_batch.from_rooms([sample_room, other_room], [[sample_surface], other_surfaces])
+    for air_damp_calc in (True, False):
+        expected = np.array([
+            reverberation_time(sample_room, [sample_surface], air_damp_calc=air_damp_calc).reverberation_time,
+            reverberation_time(other_room, other_surfaces, air_damp_calc=air_damp_calc).reverberation_time,
+        ])
+        np.testing.assert_allclose(batch.calculate_reverberation_time(air_damp_calc=air_damp_calc), expected)
+    assert np.isnan(batch.reverberation_time[1, [0, 7]]).all()
+    assert not np.isnan(batch.reverberation_time[0]).any()
+
+def test_reverberation_time_batch_measured(sample_room, sample_surface):
+    meas = [1.2, 1.1, 1.0, 0.9, 0.9, 0.8, 0.7, 0.6]
+    expected = reverberation_time(sample_room, [sample_surface], meas_reverberation_time=meas).reverberation_time
+    result = reverberation_time_batch([100], 20, 50, 101.325, [0], [50], [sample_surface.material.absorption_coefficient],
+                                      meas_reverberation_time=[meas])
+    np.testing.assert_allclose(result[0], expected)
+
+def test_room_batch_invalid_input():
+    coeffs = np.full((2, 8), 0.1)
+    with pytest.raises(ValueError):
+        room_batch([100, 200], 20, 50, 101.325, [0, 0], [10, 10], coeffs)  # second room without surfaces
+    with pytest.raises(ValueError):
+        room_batch([100], 20, 50, 101.325, [0, 1], [10, 10], coeffs)
+    with pytest.raises(ValueError):
+        room_batch([-100], 20, 50, 101.325, [0, 0], [10, 10], coeffs)
+    with pytest.raises(ValueError):
+        room_batch([100], 20, 50, 101.325, [0, 0], [10, 10], np.full((2, 6), 0.1))
+
+# Tests for the vectorized air absorption
+def test_air_absorption_matches_air_damp():
+    frequency = [63, 125, 250, 500, 1000, 2000, 4000, 8000]
+    calc_air_damp = air_damp(frequency)
+    calc_air_damp.set_temperature(25)
+    calc_air_damp.set_pressure(98.0)
+    calc_air_damp.set_rel_humidity(30)
+    alpha, m = air_absorption(frequency, 25, 30, 98.0)
+    np.testing.assert_allclose(calc_air_damp.calculate_coefficient(), m)
+    np.testing.assert_allclose(calc_air_damp.alpha, alpha)
+
+def test_air_absorption_broadcasts_over_climate_grid():
+    frequency = np.geomspace(50, 10000, 40)
+    temperature = np.linspace(-5, 30, 24)[:, np.newaxis]
+    rel_humidity = np.array([20, 50, 80])
+    alpha, m = air_absorption(frequency, temperature, rel_humidity, 101.325)
+    assert alpha.shape == m.shape == (24, 3, 40)
+    np.testing.assert_allclose(m[5, 1], air_absorption(frequency, temperature[5, 0], 50)[1])
+    assert np.all(np.diff(m, axis=-1) > 0)
+
+# Tests for the air_damp_cache class
+def test_air_damp_cache_hits_and_quantization():
+    cache = air_damp_cache(maxsize=2, temperature_resolution=0.5)
+    frequency = [63, 125, 250, 500, 1000, 2000, 4000, 8000]
+    m = cache.get(frequency, 20.1, 50, 101.325)
+    np.testing.assert_allclose(m, air_absorption(frequency, 20.0, 50, 101.325)[1])
+    assert cache.get(frequency, 19.9, 50, 101.325) is m
+    assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 1
+    with pytest.raises(ValueError):
+        m[0] = 0
+
+def test_air_damp_cache_eviction_and_invalidation():
+    cache = air_damp_cache(maxsize=2)
+    frequency = [500, 1000]
+    cache.get(frequency, 20, 50, 101.325)
+    cache.get(frequency, 22, 50, 101.325)
+    cache.get(frequency, 20, 50, 101.325)
+    cache.get(frequency, 24, 50, 101.325)  # evicts 22 °C
+    assert cache.get_stats()["size"] == 2
+    assert not cache.invalidate(frequency, 22, 50, 101.325)
+    assert cache.invalidate(frequency, 20, 50, 101.325)
+    cache.clear()
+    assert cache.get_stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "size": 0, "maxsize": 2}
+
+# Tests for the Aeq_accumulator class
+def test_aeq_accumulator_nan_counts():
+    acc = Aeq_accumulator(n_bands=3)
+    acc.add("wall", 10, [0.1, np.nan, 0.3])
+    acc.add("floor", 20, [0.2, 0.2, np.nan])
+    np.testing.assert_allclose(acc.get_Aeq(), [5.0, np.nan, np.nan])
+    acc.update("floor", absorption_coefficient=[0.2, 0.2, 0.2])
+    np.testing.assert_allclose(acc.get_Aeq(), [5.0, np.nan, 7.0])
+    acc.pop_changed_bands()
+    acc.remove("wall")
+    np.testing.assert_array_equal(acc.pop_changed_bands(), [True, True, True])
+    np.testing.assert_allclose(acc.get_Aeq(), [4.0, 4.0, 4.0])
+    with pytest.raises(KeyError):
+        acc.remove("wall")
+
+def test_reverberation_time_incremental_update(sample_room, sample_surface):
+    wall = surface("Wall", 30, material("Plaster", [np.nan, 0.02, 0.02, 0.03, 0.03, 0.04, 0.06, np.nan]))
+    rt = reverberation_time(sample_room, [sample_surface, wall])
+    assert np.isnan(rt.reverberation_time[[0, 7]]).all()
+
+    changed = rt.update_surface(wall, calc_material=material("Plaster", [0.01, 0.02, 0.02, 0.03, 0.03, 0.04, 0.06, 0.07]))
+    np.testing.assert_array_equal(changed, [True, False, False, False, False, False, False, True])
+    expected = reverberation_time(sample_room, [sample_surface, wall]).reverberation_time
+    np.testing.assert_allclose(rt.reverberation_time, expected)
+
+    rt.update_surface(wall, area=45)
+    rt.add_surface(surface("Door", 2, sample_surface.material))
+    np.testing.assert_allclose(rt.reverberation_time, reverberation_time(sample_room, rt.surfaces).reverberation_time)
+    rt.remove_surface(wall)
+    np.testing.assert_allclose(rt.reverberation_time, reverberation_time(sample_room, rt.surfaces).reverberation_time)
+
+def test_reverberation_time_surface_list(sample_room, sample_material):
+    surfaces = [surface(f"Wall {i}", 10, sample_material) for i in range(4)]
+    rt = reverberation_time(sample_room, surfaces)
+    door = surface("Door", 2, sample_material)
+    rt.add_surface(door)
+    rt.remove_surface(surfaces[1])
+    assert rt.surfaces == [surfaces[0], door, surfaces[2], surfaces[3]]
+    rt.remove_surface(surfaces[3])
+    rt.remove_surface(door)
+    assert rt.surfaces == [surfaces[0], surfaces[2]]
+    assert len(surfaces) == 4
+    with pytest.raises(KeyError):
+        rt.remove_surface(door)
+
+def test_reverberation_time_repeated_surface(sample_room, sample_material):
+    wall = surface("Wall", 10, sample_material)
+    door = surface("Door", 2, material("Wood", [0.1] * 8))
+    rt = reverberation_time(sample_room, [wall, door, wall])
+    twice = surface("Walls", 20, sample_material)
+    np.testing.assert_allclose(rt.reverberation_time, reverberation_time(sample_room, [twice, door]).reverberation_time)
+    rt.add_surface(door)
+    rt.update_surface(wall, area=15)
+    expected = reverberation_time(sample_room, [wall, door, wall, door]).reverberation_time
+    np.testing.assert_allclose(rt.reverberation_time, expected)
+    rt.remove_surface(wall)
+    assert rt.surfaces == [wall, door, door]
+    np.testing.assert_allclose(rt.reverberation_time, reverberation_time(sample_room, [wall, door, door]).reverberation_time)
+    rt.remove_surface(wall)
+    assert rt.surfaces == [door, door] and wall not in rt.Aeq_accumulator
+    with pytest.raises(KeyError):
+        rt.remove_surface(wall)
+
+def test_reverberation_time_incremental_update_total_area():
+    r = room(volume=60)
+    s1 = surface("Ceiling", 20, material("Concrete", [0, 0.1, 0.1, 0.1, 0.2, 0.2, 0.2, 0.2]))
+    s2 = surface("Floor", 30, material("Carpet", [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.6, 0.6]))
+    for formula in ("sabine", "eyring", "millington_sette"):
+        rt = reverberation_time(r, [s1, s2], formula=formula)
+        changed = rt.update_surface(s1, area=40)
+        assert changed.all()
+        np.testing.assert_allclose(rt.reverberation_time, reverberation_time(r, [s1, s2], formula=formula).reverberation_time)
+        s1.set_area(20)
+
+# Tests for the reverberation formula engines
+@pytest.fixture
+def shoebox_surfaces():
+    """Provides the six surfaces of a 5 m x 4 m x 3 m room with a uniform absorption coefficient of 0.3."""
+    uniform = material("Uniform", [0.3] * 8)
+    return [surface(f"Surface {axis}{side}", area, uniform, axis=axis)
+            for axis, area in ((0, 12.0), (1, 15.0), (2, 20.0)) for side in "ab"]
+
+def test_formulas_agree_for_uniform_absorption(shoebox_surfaces):
+    calc_room = room(volume=60)
+    results = {formula: reverberation_time(calc_room, shoebox_surfaces, formula=formula).reverberation_time
+               for formula in reverberation_formulas}
+    for formula in ("millington_sette", "fitzroy", "arau_puchades"):
+        np.testing.assert_allclose(results[formula], results["eyring"])
+    assert np.all(results["eyring"] < results["sabine"])
+    c = calc_room.get_c()
+    m = reverberation_time(calc_room, shoebox_surfaces).m
+    expected = (55.3 / c) * 60 / (-94 * np.log(0.7) + 4 * 60 * m)
+    np.testing.assert_allclose(results["eyring"], expected)
+
+def test_formulas_reject_absorption_coefficients_of_one(shoebox_surfaces):
+    calc_room = room(volume=60)
+    for calc_surface in shoebox_surfaces:
+        calc_surface.material = material("Open", [0.3, 1, 0.3, 0.3, 0.3, 0.3, 0.3, 0.3])
+    for formula in ("eyring", "fitzroy", "arau_puchades"):
+        with pytest.raises(ValueError, match="has 1 at 125 Hz, but the .* formula requires a mean absorption coefficient below 1"):
+            reverberation_time(calc_room, shoebox_surfaces, formula=formula)
+    shoebox_surfaces[2].material = material("Object", [0.3, 0.3, 0.3, 2.5, 0.3, 0.3, 0.3, 0.3])
+    with pytest.raises(ValueError, match="Surface 0 has 1 at 125 Hz, but the Millington-Sette"):
+        reverberation_time(calc_room, shoebox_surfaces, formula="millington_sette")
+    batch = room_batch.from_rooms([calc_room, calc_room], [[surface("a", 10, material("a", [0.3] * 8))], shoebox_surfaces[2:]])
+    with pytest.raises(ValueError, match="Room 1, surface 0 has 2.5 at 500 Hz"):
+        batch.calculate_reverberation_time(formula="millington_sette")
+
+def test_formulas_batch_matches_single_room(shoebox_surfaces, sample_room, sample_surface):
+    shoebox_surfaces[0].material = material("Absorber", [0.1, 0.3, 0.6, 0.9, 0.9, 0.8, 0.7, np.nan])
+    meas = [1.0] * 8
+    batch = room_batch.from_rooms([room(volume=60), sample_room], [shoebox_surfaces, [surface("Wall", 50, sample_surface.material, axis=0)]])
+    for formula in reverberation_formulas:
+        result = batch.calculate_reverberation_time(formula=formula, meas_reverberation_time=[meas, meas])
+        expected = reverberation_time(room(volume=60), shoebox_surfaces, formula=formula, meas_reverberation_time=meas).reverberation_time
+        np.testing.assert_allclose(result[0], expected)
+        assert np.isnan(result[0, 7])
+
+def test_axis_formulas_require_axis(sample_room, sample_surface):
+    with pytest.raises(ValueError):
+        reverberation_time(sample_room, [sample_surface], formula="fitzroy")
+    with pytest.raises(ValueError):
+        reverberation_time(sample_room, [sample_surface], formula="unknown")
+
+# Tests for the band_set class
+def test_band_set_conversion():
+    assert len(octave_bands) == 8 and len(third_octave_bands) == 24
+    coeffs = np.array([[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, np.nan]])
+    third = octave_bands.convert(coeffs, third_octave_bands)
+    assert third.shape == (1, 24)
+    np.testing.assert_allclose(third[0, [1, 4, 7]], [0.1, 0.2, 0.3])
+    assert np.isnan(third[0, 0]) and np.isnan(third[0, -1])
+    back = third_octave_bands.convert(third, octave_bands)
+    np.testing.assert_allclose(back[0, 1:6], coeffs[0, 1:6])
+    custom = band_set([100, 1000])
+    np.testing.assert_allclose(custom.convert([0.2, 0.8], band_set([100, 316.2, 1000])), [0.2, 0.5, 0.8], atol=1e-4)
+
+def test_third_octave_pipeline(sample_room):
+    third_material = material("Third-octave absorber", [0.3] * 24, bands=third_octave_bands)
+    octave_material = material("Octave absorber", [0.3] * 8)
+    rt_third = reverberation_time(sample_room, [surface("Wall", 50, third_material)], air_damp_calc=False)
+    rt_mixed = reverberation_time(sample_room, [surface("Wall", 25, third_material), surface("Floor", 25, octave_material)],
+                                  air_damp_calc=False, bands=octave_bands)
+    assert len(rt_third.reverberation_time) == 24
+    assert rt_third.frequency_bands[0] == 50
+    np.testing.assert_allclose(rt_third.reverberation_time[0], rt_mixed.reverberation_time[1])
+    with pytest.raises(ValueError):
+        material("Invalid", [0.3] * 8, bands=third_octave_bands)
+    limits = DIN_18041_limits(sample_room, "A3", bands=third_octave_bands)
+    assert len(limits.T_upper_limit) == 24
+    np.testing.assert_allclose(limits.T_upper_limit[13], DIN_18041_limits(sample_room, "A3").T_upper_limit[4])
+
+@pytest.mark.parametrize("air_damp_calc, meas", [(True, None), (False, None), (True, [1.5] * 8), (False, [1.5] * 8)])
+def test_sensitivity_matches_finite_differences(air_damp_calc, meas):
+    def calculate(volume=120, temperature=22, rel_humidity=40, areas=(30, 20, 10), coeffs=None):
+        r = room(volume)
+        r.set_temperature(temperature)
+        r.set_rel_humidity(rel_humidity)
+        coeffs = coeffs if coeffs is not None else [[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8], [0.05] * 8, [0.3] * 8]
+        surfaces = [surface(f"S{i}", area, material(f"M{i}", list(coeff))) for i, (area, coeff) in enumerate(zip(areas, coeffs))]
+        return reverberation_time(r, surfaces, air_damp_calc=air_damp_calc, meas_reverberation_time=meas)
+
+    sensitivity = calculate().sensitivity()
+    central = lambda plus, minus, step: (plus.reverberation_time - minus.reverberation_time) / (2 * step)
+    np.testing.assert_allclose(sensitivity["volume"], central(calculate(volume=120.01), calculate(volume=119.99), 0.01), rtol=1e-5)
+    # Steps on the 0.01 grid of default_air_damp_cache
+    np.testing.assert_allclose(sensitivity["temperature"], central(calculate(temperature=22.1), calculate(temperature=21.9), 0.1), rtol=1e-3)
+    np.testing.assert_allclose(sensitivity["rel_humidity"], central(calculate(rel_humidity=40.1), calculate(rel_humidity=39.9), 0.1), rtol=1e-3, atol=1e-12)
+    np.testing.assert_allclose(sensitivity["area"][1], central(calculate(areas=(30, 20.01, 10)), calculate(areas=(30, 19.99, 10)), 0.01), rtol=1e-5)
+    coeffs = np.array([[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8], [0.05] * 8, [0.3] * 8])
+    plus, minus = coeffs.copy(), coeffs.copy()
+    plus[2] += 0.001
+    minus[2] -= 0.001
+    np.testing.assert_allclose(sensitivity["absorption_coefficient"][2], central(calculate(coeffs=plus), calculate(coeffs=minus), 0.001), rtol=1e-5)
+
+def test_sensitivity_requires_sabine(sample_room, sample_surface):
+    with pytest.raises(ValueError):
+        reverberation_time(sample_room, [sample_surface], formula="eyring").sensitivity()
+
+def test_model_classes_are_slotted(sample_room, sample_material, sample_surface):
+    for obj in (sample_room, sample_material, sample_surface):
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            obj.unknown = 1
+
+def test_material_from_array(sample_material):
+    coeffs = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8])
+    fast = material.from_array("Test Material", coeffs)
+    np.testing.assert_array_equal(fast.get_absorption_coefficient(), sample_material.get_absorption_coefficient())
+    assert fast.get_bands() is octave_bands and fast.get_price() is None
+    assert material.from_array("Partly known", [np.nan, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, np.nan]).absorption_coefficient.dtype == float
+    with pytest.raises(TypeError):
+        material.from_array(1, coeffs)
+    with pytest.raises(TypeError):
+        material.from_array("Test", ["a"] * 8)
+    with pytest.raises(ValueError):
+        material.from_array("Test", coeffs[:7])
+    with pytest.raises(ValueError):
+        material.from_array("Test", -coeffs)
+    # Trusted data is not validated
+    assert material.from_array("Test", coeffs[:7], trusted=True).absorption_coefficient.shape == (7,)
+
+def test_surface_from_arrays_matches_constructor(sample_room, sample_material):
+    names = [f"Surface {i}" for i in range(6)]
+    areas = np.arange(1.0, 7.0) * 5
+    coefficients = np.tile(sample_material.get_absorption_coefficient(), (6, 1)) * np.linspace(0.5, 1, 6)[:, None]
+    fast = surface.from_arrays(names, areas, coefficients, axis=[0, 1, 2, 0, 1, 2])
+    slow = [surface(name, float(area), material(name, row.tolist()), axis=i % 3) for i, (name, area, row) in enumerate(zip(names, areas, coefficients))]
+    for formula in ("sabine", "fitzroy"):
+        np.testing.assert_allclose(reverberation_time(sample_room, fast, formula=formula).reverberation_time,
+                                   reverberation_time(sample_room, slow, formula=formula).reverberation_time)
+    shared = surface.from_arrays(names, areas, [sample_material] * 6, trusted=True)
+    assert all(s.get_material() is sample_material and s.get_axis() is None for s in shared)
+    with pytest.raises(ValueError):
+        surface.from_arrays(names, -areas, coefficients)
+    with pytest.raises(TypeError):
+        surface.from_arrays(names[:-1] + [5], areas, coefficients)
+    with pytest.raises(ValueError):
+        surface.from_arrays(names, areas, coefficients[:, :7])
+    with pytest.raises(ValueError):
+        surface.from_arrays(names, areas, coefficients, axis=[0, 1, 2, 3, 0, 1])
+    with pytest.raises(TypeError):
+        surface.from_arrays(names, areas, ["Concrete"] * 6)
+
+def test_material_table_interning(sample_material):
+    table = material_table(capacity=1)
+    coeffs = sample_material.get_absorption_coefficient()
+    plaster = [np.nan, 0.05, 0.1, 0.1, 0.15, 0.2, 0.2, -0.0]
+    assert table.intern(sample_material) == 0
+    assert table.add("Test Material", coeffs.copy()) == 0
+    assert table.add("Plaster", plaster) == table.add("Plaster", [float("nan")] + plaster[1:7] + [0.0]) == 1
+    assert table.add("Other name", coeffs) == 2
+    assert len(table) == 3 and table.coefficients.shape == (3, 8)
+    assert table.get_material(0) is sample_material
+    with pytest.raises(ValueError):
+        table.coefficients[0, 0] = 1
+    third_octave_material = material("Thirds", [0.5] * len(third_octave_bands), bands=third_octave_bands)
+    np.testing.assert_array_equal(table.intern_many([third_octave_material, sample_material, third_octave_material]), [3, 0, 3])
+    np.testing.assert_allclose(table.coefficients[3], 0.5)
+    with pytest.raises(TypeError):
+        table.intern("Plaster")
+
+def test_material_table_Aeq_matches_accumulator():
+    rng = np.random.default_rng(0)
+    table = material_table()
+    for i in range(5):
+        coeffs = rng.uniform(0.01, 1, 8)
+        if i == 4:
+            coeffs[0] = np.nan
+        table.add(f"Material {i}", coeffs)
+    material_index = rng.integers(0, 4, 500)
+    areas = rng.uniform(1, 50, 500)
+    accumulator = Aeq_accumulator()
+    accumulator.add_many(range(500), areas, table.coefficients[material_index])
+    np.testing.assert_allclose(table.calculate_Aeq(material_index, areas), accumulator.get_Aeq())
+    material_index[0] = 4
+    Aeq = table.calculate_Aeq(material_index, areas)
+    assert np.isnan(Aeq[0]) and np.all(np.isfinite(Aeq[1:]))
+    with pytest.raises(ValueError):
+        table.calculate_Aeq([5], [1.0])
+    with pytest.raises(ValueError):
+        table.calculate_Aeq([0, 1], [1.0])
@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+from src.material_database import material_database
+from src.reverberation_calc import room, surface, material, reverberation_time, DIN_18041_limits
+from src.room_io import room_definition, calculate_rooms, iter_room_results
+
+CSV = """name,63,125,250,500,1000,2000,4000,8000
+Concrete,0.01,0.01,0.02,0.02,0.02,0.03,0.04,0.04
+Carpet,0.02,0.05,0.1,0.2,0.45,0.65,0.7,0.7
+"""
+
+@pytest.fixture
+def database(tmp_path):
+    """Provides a small material database."""
+    path = tmp_path / "materials.csv"
+    path.write_text(CSV)
+    return material_database(str(path), cache_dir=str(tmp_path / "cache"))
+
+def make_definition(**kwargs):
+    definition = {"id": "R1", "volume": 200, "height": 3, "type": "A3",
+                  "surfaces": [{"area": 100, "absorption_coefficient": [0.1] * 8}, {"area": 60, "material": "Carpet"}]}
+    return {**definition, **kwargs}
+
+def test_calculate_rooms_matches_reverberation_time(database):
+    definitions = [make_definition(), make_definition(id=2, volume=80, temperature=25, air_damping=False, type="B3"), make_definition(type=None)]
+    results = calculate_rooms([room_definition(definition, database) for definition in definitions], database=database)
+    for definition, result in zip(definitions, results):
+        calc_room = room(definition["volume"])
+        calc_room.set_height(3)
+        calc_room.set_temperature(definition.get("temperature", 20))
+        surfaces = [surface("a", 100, material("a", [0.1] * 8)), surface("b", 60, material("b", database.get_by_name("Carpet")[1].tolist()))]
+        expected = reverberation_time(calc_room, surfaces, air_damp_calc=definition.get("air_damping", True))
+        assert result["id"] == definition["id"]
+        np.testing.assert_allclose(result["reverberation_time"], expected.reverberation_time, atol=1e-6)
+        if definition["type"]:
+            np.testing.assert_allclose(result["DIN_18041_limits"]["T_upper_limit"], DIN_18041_limits(calc_room, definition["type"]).T_upper_limit, atol=1e-6)
+        else:
+            assert result["DIN_18041_limits"] is None
+
+@pytest.mark.parametrize("definition, message", [
+    ([], "JSON object"),
+    (make_definition(volume=None), "Volume is required"),
+    (make_definition(volume="200"), "finite number"),
+    (make_definition(rel_humidity=120), "Relative humidity"),
+    (make_definition(type="C1"), "Type must be"),
+    (make_definition(surfaces=[]), "non-empty"),
+    (make_definition(surfaces=[{"area": 10, "absorption_coefficient": [0.1] * 7}]), "Surface 0: Absorption coefficient"),
+    (make_definition(surfaces=[{"area": 10, "material": "Glass"}]), "Unknown material"),
+    (make_definition(surfaces=[{"area": 10, "material": 5}]), "Unknown material"),
+])
+def test_room_definition_errors(database, definition, message):
+    with pytest.raises(ValueError, match=message):
+        room_definition(definition, database)
+
+def test_iter_room_results(database):
+    definitions = [make_definition(id=i, volume=100 + i) for i in range(7)]
+    definitions[3] = make_definition(id=3, volume=-1)
+    results = list(iter_room_results(iter(definitions + [ValueError("Invalid JSON")]), chunk_size=2, database=database))
+    assert [result["index"] for result in results] == list(range(8))
+    assert results[3] == {"index": 3, "id": 3, "error": "Volume must be a positive value."}
+    assert results[7]["error"] == "Invalid JSON"
+    # The chunk size does not change the results
+    assert results[:7] == list(iter_room_results(definitions, chunk_size=1000, database=database))
+    with pytest.raises(ValueError):
+        next(iter_room_results(definitions, formula="unknown"))
+
+def test_iter_room_results_formula_errors(database):
+    definitions = [make_definition(id=i) for i in range(3)]
+    definitions[1]["surfaces"] = [{"area": 10, "absorption_coefficient": [1] * 8}]
+    results = list(iter_room_results(definitions, formula="eyring", database=database))
+    assert results[1] == {"index": 1, "id": 1, "error": "The room has 1 at 63 Hz, but the Eyring formula requires a mean absorption coefficient below 1."}
+    assert results[0] == next(iter_room_results(definitions[:1], formula="eyring", database=database))
+    assert "error" not in results[2]
@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+from src.spectral_index import masked_rms_distance, kd_tree, spectral_index
+from src.material_database import material_database
+
+@pytest.fixture
+def catalog():
+    """Provides a random catalog with missing outer bands."""
+    rng = np.random.default_rng(0)
+    coefficients = rng.uniform(0, 1, (6000, 8)).round(2)
+    coefficients[rng.random(6000) < 0.5, 0] = np.nan
+    coefficients[rng.random(6000) < 0.3, 7] = np.nan
+    coefficients[:10] = np.nan
+    return coefficients
+
+def test_masked_rms_distance():
+    coefficients = np.array([[0.1, 0.2, np.nan], [0.1, 0.4, 0.5], [np.nan, np.nan, 0.3]])
+    distance = masked_rms_distance(coefficients, [0.1, 0.2, 0.3], min_bands=2)
+    np.testing.assert_allclose(distance, [0.0, np.sqrt(0.08 / 3), np.inf])
+    assert masked_rms_distance(coefficients, [np.nan, np.nan, np.nan])[0] == np.inf
+
+def test_kd_tree_subspace_query():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0, 1, (1000, 4))
+    tree = kd_tree(points, leaf_size=8, block_size=4)
+    dims = np.array([0, 2])
+    query = np.array([0.3, 0.7])
+    distance, index = tree.query(query, dims, np.empty(0), np.empty(0, dtype=np.intp), 3, 2)
+    expected = np.sqrt(((points[:, dims] - query) ** 2).mean(axis=1))
+    np.testing.assert_array_equal(index, np.argsort(expected)[:3])
+    np.testing.assert_allclose(distance, np.sort(expected)[:3])
+    with pytest.raises(ValueError):
+        kd_tree(np.empty((0, 4)))
+
+@pytest.mark.parametrize("k, min_bands", [(1, 1), (7, 1), (25, 8)])
+def test_spectral_index_tree_matches_brute_force(catalog, k, min_bands):
+    tree = spectral_index(catalog, leaf_size=16, brute_force_limit=100)
+    brute = spectral_index(catalog, brute_force_limit=len(catalog))
+    rng = np.random.default_rng(2)
+    for _ in range(20):
+        spectrum = rng.uniform(0, 1, 8)
+        spectrum[rng.random(8) < 0.2] = np.nan
+        tree_index, tree_distance = tree.query(spectrum, k, min_bands)
+        brute_index, brute_distance = brute.query(spectrum, k, min_bands)
+        np.testing.assert_array_equal(tree_index, brute_index)
+        np.testing.assert_allclose(tree_distance, brute_distance)
+    assert not np.isin(np.arange(10), tree.query(np.full(8, 0.5), 50)[0]).any()
+    with pytest.raises(ValueError):
+        tree.query(np.full(7, 0.5))
+    with pytest.raises(ValueError):
+        tree.query(np.full(8, 0.5), k=0)
+
+def test_material_database_nearest(tmp_path):
+    path = tmp_path / "materials.csv"
+    path.write_text("name,63,125,250,500,1000,2000,4000,8000\n"
+                    "Concrete,0.01,0.01,0.02,0.02,0.02,0.03,0.04,0.04\n"
+                    "Plaster,nan,0.02,0.02,0.03,0.03,0.04,0.06,nan\n"
+                    "Absorber,0.2,0.4,0.8,0.95,0.95,0.9,0.85,0.8\n")
+    db = material_database(str(path))
+    indices, distances = db.nearest([np.nan, 0.3, 0.7, 0.9, 0.9, 0.9, 0.9, np.nan], k=2)
+    assert indices.tolist() == [2, 1] and distances[0] < distances[1]
@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+from src.reverberation_calc import room, material, surface, reverberation_time
+from src.uncertainty import streaming_histogram, reverberation_time_uncertainty
+
+
+@pytest.fixture
+def sample_reverberation_time():
+    """Provides a reverberation time calculation with a material that is undefined in the outer bands."""
+    r = room(volume=200)
+    absorber = material("Absorber", [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8])
+    plaster = material("Plaster", [np.nan, 0.05, 0.1, 0.1, 0.15, 0.2, 0.2, np.nan])
+    surfaces = [surface(f"Surface {i}", 10 + i, [absorber, plaster][i % 2], axis=i % 3) for i in range(6)]
+    return reverberation_time(r, surfaces)
+
+
+def test_streaming_histogram_matches_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(0, 0.3, (50000, 3))
+    values[::100, 2] = np.nan
+    histogram = streaming_histogram(np.full(3, 0.5), np.full(3, 2.0))
+    for chunk in np.array_split(values, 7):
+        histogram.update(chunk)
+    q = [0, 5, 50, 95, 100]
+    np.testing.assert_allclose(histogram.get_percentiles(q), np.nanpercentile(values, q, axis=0), rtol=1e-3)
+    np.testing.assert_allclose(histogram.get_mean(), np.nanmean(values, axis=0))
+    np.testing.assert_allclose(histogram.get_std(), np.nanstd(values, axis=0, ddof=1))
+    assert histogram.nan_count.tolist() == [0, 0, 500]
+    with pytest.raises(ValueError):
+        streaming_histogram([1.0], [0.5])
+
+
+def test_uncertainty_without_deviation_is_nominal(sample_reverberation_time):
+    uncertainty = reverberation_time_uncertainty(sample_reverberation_time, coefficient_std=0, area_std=0,
+                                                 temperature_std=0, rel_humidity_std=0)
+    uncertainty.run(n_samples=1000, chunk_size=300, seed=0)
+    nominal = sample_reverberation_time.reverberation_time
+    for percentile in uncertainty.get_percentiles((5, 50, 95)):
+        np.testing.assert_allclose(percentile, nominal, rtol=1e-12)
+
+
+def test_uncertainty_percentiles(sample_reverberation_time):
+    uncertainty = reverberation_time_uncertainty(sample_reverberation_time)
+    progress = list(uncertainty.iter_run(n_samples=10000, chunk_size=4000, seed=1))
+    assert progress == [4000, 8000, 10000]
+    summary = uncertainty.get_summary()
+    P5, P50, P95 = summary["percentiles"][5], summary["percentiles"][50], summary["percentiles"][95]
+    valid = np.isfinite(sample_reverberation_time.reverberation_time)
+    assert np.all(np.isnan(P50[~valid]))
+    assert np.all(P5[valid] < P50[valid]) and np.all(P50[valid] < P95[valid])
+    np.testing.assert_allclose(P50[valid], sample_reverberation_time.reverberation_time[valid], rtol=0.05)
+    assert np.all(summary["std"][valid] > 0)
+
+
+def test_uncertainty_absorption_coefficient_above_one():
+    r = room(volume=200)
+    seats = surface("Seats", 40, material("Seats", [2.0, 2.5, 3.0, 3.5, 4.1, 4.1, 4.1, 4.1]))
+    plaster = surface("Plaster", 300, material("Plaster", [0.02] * 8))
+    nominal = reverberation_time(r, [seats, plaster])
+    uncertainty = reverberation_time_uncertainty(nominal, coefficient_std=0.05, area_std=0,
+                                                 temperature_std=0, rel_humidity_std=0)
+    uncertainty.run(10000, seed=0)
+    np.testing.assert_allclose(uncertainty.get_percentiles(50)[0], nominal.reverberation_time, rtol=0.01)
+    assert np.all(uncertainty.get_percentiles(95)[0] > nominal.reverberation_time)
+    absorber = surface("Absorber", 40, material("Absorber", [0.99] * 8))
+    millington_sette = reverberation_time(r, [absorber, plaster], formula="millington_sette")
+    uncertainty = reverberation_time_uncertainty(millington_sette, area_std=0, temperature_std=0, rel_humidity_std=0)
+    uncertainty.run(1000, seed=0)
+    assert np.all(uncertainty.get_percentiles(0)[0] > 0)
+
+
+@pytest.mark.parametrize("formula", ["eyring", "millington_sette", "fitzroy", "arau_puchades"])
+def test_uncertainty_high_absorption(formula):
+    absorber = material("Absorber", [0.97] * 8)
+    surfaces = [surface(f"Surface {axis}{side}", area, absorber, axis=axis)
+                for axis, area in ((0, 12.0), (1, 15.0), (2, 20.0)) for side in "ab"]
+    nominal = reverberation_time(room(volume=60), surfaces, formula=formula)
+    uncertainty = reverberation_time_uncertainty(nominal, area_std=0, temperature_std=0, rel_humidity_std=0).run(2000, seed=0)
+    summary = uncertainty.get_summary()
+    assert np.all(summary["nan_count"] < 2000)
+    assert np.all(np.isfinite(summary["percentiles"][50]) & (summary["percentiles"][50] > 0))
+
+
+def test_uncertainty_other_formula_and_validation(sample_reverberation_time):
+    r, surfaces = sample_reverberation_time.calc_room, sample_reverberation_time.surfaces
+    fitzroy = reverberation_time(r, surfaces, formula="fitzroy")
+    uncertainty = reverberation_time_uncertainty(fitzroy, coefficient_std=0, area_std=0, temperature_std=0, rel_humidity_std=0)
+    uncertainty.run(100, seed=0)
+    np.testing.assert_allclose(uncertainty.get_percentiles(50)[0], fitzroy.reverberation_time, rtol=1e-12)
+    with pytest.raises(ValueError):
+        reverberation_time_uncertainty(sample_reverberation_time, coefficient_std=-0.1)
+    with pytest.raises(ValueError):
+        reverberation_time_uncertainty(sample_reverberation_time, area_std=[0.1, 0.2])
+    with pytest.raises(TypeError):
+        reverberation_time_uncertainty(r)
+    with pytest.raises(ValueError):
+        reverberation_time_uncertainty(sample_reverberation_time).get_percentiles()